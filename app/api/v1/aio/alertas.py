@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.respuestas import RespuestaFilas
+from app.database import get_async_db
+from app.services.aio.alertas import AlertaServiceAsync
+from app.schemas.alerta import AlertaResponse
+from typing import List
+
+router = APIRouter()
+
+@router.get("/paciente/{paciente_id}", response_model=List[AlertaResponse])
+async def get_alertas_paciente(
+    paciente_id: int, 
+    skip: int = 0, 
+    limit: int = 100, 
+    db: AsyncSession = Depends(get_async_db)
+):
+    service = AlertaServiceAsync(db)
+    if settings.lectura_rapida:
+        return RespuestaFilas(await service.get_by_paciente_filas(paciente_id, skip=skip, limit=limit), AlertaResponse)
+    return await service.get_by_paciente(paciente_id, skip=skip, limit=limit)
+
+@router.get("/activas", response_model=List[AlertaResponse])
+async def get_alertas_activas(db: AsyncSession = Depends(get_async_db)):
+    service = AlertaServiceAsync(db)
+    if settings.lectura_rapida:
+        return RespuestaFilas(await service.get_active_alerts_filas(), AlertaResponse)
+    return await service.get_active_alerts()
@@ -0,0 +1,87 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.respuestas import RespuestaFilas
+from app.database import get_async_db
+from app.services.aio.mediciones import MedicionServiceAsync
+from app.services.aio.alertas import AlertaServiceAsync
+from app.schemas.medicion import MedicionCreate, MedicionResponse
+from typing import List
+from datetime import datetime
+
+router = APIRouter()
+
+# /rango con más lecturas que `limit`
+TRUNCADO = {"X-Truncado": "true"}
+
+@router.post("/", response_model=MedicionResponse)
+async def create_medicion(medicion: MedicionCreate, db: AsyncSession = Depends(get_async_db)):
+    service = MedicionServiceAsync(db)
+    nueva_medicion = await service.create(medicion)
+    
+    # Evaluar y crear alerta si es necesario. Las reglas y el detector de
+    # tendencias (con su cerrojo, compartido con el threadpool) van fuera del bucle
+    alerta_service = AlertaServiceAsync(db)
+    alerta_data = await run_in_threadpool(
+        alerta_service.evaluate_medicion, MedicionResponse.model_validate(nueva_medicion))
+    await alerta_service.registrar(alerta_data)
+    
+    return nueva_medicion
+
+@router.get("/paciente/{paciente_id}", response_model=List[MedicionResponse])
+async def get_mediciones_paciente(
+    paciente_id: int, 
+    skip: int = 0, 
+    limit: int = 100, 
+    db: AsyncSession = Depends(get_async_db)
+):
+    service = MedicionServiceAsync(db)
+    if settings.lectura_rapida:
+        return RespuestaFilas(await service.get_by_paciente_filas(paciente_id, skip=skip, limit=limit), MedicionResponse)
+    return await service.get_by_paciente(paciente_id, skip=skip, limit=limit)
+
+@router.get("/paciente/{paciente_id}/ultima", response_model=MedicionResponse)
+async def get_ultima_medicion_paciente(paciente_id: int, db: AsyncSession = Depends(get_async_db)):
+    service = MedicionServiceAsync(db)
+    medicion = await service.get_ultima(paciente_id)
+    if not medicion:
+        raise HTTPException(status_code=404, detail="No hay mediciones para este paciente")
+    return medicion
+
+@router.get("/paciente/{paciente_id}/rango", response_model=List[MedicionResponse])
+async def get_mediciones_rango(
+    paciente_id: int,
+    response: Response,
+    start_date: datetime = Query(..., description="Fecha de inicio (YYYY-MM-DD HH:MM:SS)"),
+    end_date: datetime = Query(..., description="Fecha de fin (YYYY-MM-DD HH:MM:SS)"),
+    limit: int = Query(settings.rango_max_filas, ge=1, le=settings.rango_max_filas),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Lecturas crudas del rango (las más recientes primero), como mucho `limit`.
+
+    Si el rango tiene más lecturas la respuesta lleva la cabecera
+    `X-Truncado: true`: para rangos largos usar /serie (agregados) o
+    recorrer las lecturas con /pagina.
+    """
+    service = MedicionServiceAsync(db)
+    if settings.lectura_rapida:
+        filas = await service.get_by_date_range_filas(paciente_id, start_date, end_date, limit=limit + 1)
+        return RespuestaFilas(filas[:limit], MedicionResponse, headers=TRUNCADO if len(filas) > limit else None)
+    mediciones = await service.get_by_date_range(paciente_id, start_date, end_date, limit=limit + 1)
+    if len(mediciones) > limit:
+        response.headers.update(TRUNCADO)
+    return mediciones[:limit]
+
+@router.post("/paciente/{paciente_id}/simular", response_model=MedicionResponse)
+async def simular_medicion(paciente_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Genera una medición falsa para pruebas"""
+    service = MedicionServiceAsync(db)
+    medicion = await service.generate_fake_medicion(paciente_id)
+    
+    # Evaluar y crear alerta (fuera del bucle, como en create_medicion)
+    alerta_service = AlertaServiceAsync(db)
+    alerta_data = await run_in_threadpool(alerta_service.evaluate_medicion, MedicionResponse.model_validate(medicion))
+    await alerta_service.registrar(alerta_data)
+    
+    return medicion
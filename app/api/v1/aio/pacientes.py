@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.respuestas import RespuestaFilas
+from app.database import get_async_db
+from app.services.aio.pacientes import PacienteServiceAsync
+from app.schemas.paciente import PacienteCreate, PacienteUpdate, PacienteResponse
+from typing import List
+
+router = APIRouter()
+
+@router.post("/", response_model=PacienteResponse)
+async def create_paciente(paciente: PacienteCreate, db: AsyncSession = Depends(get_async_db)):
+    service = PacienteServiceAsync(db)
+    return await service.create(paciente)
+
+@router.get("/", response_model=List[PacienteResponse])
+async def get_pacientes(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+    service = PacienteServiceAsync(db)
+    if settings.lectura_rapida:
+        return RespuestaFilas(await service.get_all_filas(skip=skip, limit=limit), PacienteResponse)
+    return await service.get_all(skip=skip, limit=limit)
+
+@router.get("/activos", response_model=List[PacienteResponse])
+async def get_pacientes_activos(db: AsyncSession = Depends(get_async_db)):
+    service = PacienteServiceAsync(db)
+    if settings.lectura_rapida:
+        return RespuestaFilas(await service.get_active_filas(), PacienteResponse)
+    return await service.get_active()
+
+@router.get("/{paciente_id}", response_model=PacienteResponse)
+async def get_paciente(paciente_id: int, db: AsyncSession = Depends(get_async_db)):
+    service = PacienteServiceAsync(db)
+    paciente = await service.get_by_id(paciente_id)
+    if not paciente:
+        raise HTTPException(status_code=404, detail="Paciente no encontrado")
+    return paciente
+
+@router.put("/{paciente_id}", response_model=PacienteResponse)
+async def update_paciente(paciente_id: int, paciente_update: PacienteUpdate, db: AsyncSession = Depends(get_async_db)):
+    service = PacienteServiceAsync(db)
+    paciente = await service.update(paciente_id, paciente_update)
+    if not paciente:
+        raise HTTPException(status_code=404, detail="Paciente no encontrado")
+    return paciente
+
+@router.delete("/{paciente_id}")
+async def delete_paciente(paciente_id: int, db: AsyncSession = Depends(get_async_db)):
+    service = PacienteServiceAsync(db)
+    if not await service.delete(paciente_id):
+        raise HTTPException(status_code=404, detail="Paciente no encontrado")
+    return {"message": "Paciente eliminado exitosamente"}
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.respuestas import RespuestaFilas
+from app.database import get_async_db
+from app.services.aio.predicciones import PrediccionServiceAsync
+from app.schemas.prediccion import PrediccionResponse
+from typing import List
+
+router = APIRouter()
+
+@router.get("/paciente/{paciente_id}", response_model=List[PrediccionResponse])
+async def get_predicciones_paciente(
+    paciente_id: int, 
+    skip: int = 0, 
+    limit: int = 100, 
+    db: AsyncSession = Depends(get_async_db)
+):
+    service = PrediccionServiceAsync(db)
+    if settings.lectura_rapida:
+        return RespuestaFilas(
+            await service.get_by_paciente_filas(paciente_id, skip=skip, limit=limit), PrediccionResponse
+        )
+    return await service.get_by_paciente(paciente_id, skip=skip, limit=limit)
+
+@router.post("/paciente/{paciente_id}/simular", response_model=PrediccionResponse)
+async def simular_prediccion(paciente_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Genera una predicción falsa para demostración"""
+    service = PrediccionServiceAsync(db)
+    return await service.generate_fake_prediction(paciente_id)
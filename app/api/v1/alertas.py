@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.respuestas import RespuestaFilas
 from app.database import get_db
 from app.services.alertas import AlertaService
 from app.schemas.alerta import AlertaResponse
-from typing import List
+from app.schemas.paginacion import Pagina
+from typing import List, Optional
 
 router = APIRouter()
 
@@ -15,9 +18,29 @@ def get_alertas_paciente(
     db: Session = Depends(get_db)
 ):
     service = AlertaService(db)
+    if settings.lectura_rapida:
+        return RespuestaFilas(service.get_by_paciente_filas(paciente_id, skip=skip, limit=limit), AlertaResponse)
     return service.get_by_paciente(paciente_id, skip=skip, limit=limit)
 
+@router.get("/paciente/{paciente_id}/pagina", response_model=Pagina[AlertaResponse])
+def get_alertas_paciente_pagina(
+    paciente_id: int,
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = Query(None, description="next_cursor de la página anterior"),
+    before: Optional[str] = Query(None, description="prev_cursor de la página siguiente"),
+    db: Session = Depends(get_db)
+):
+    """Paginación por cursor (timestamp, id): las páginas profundas cuestan lo mismo que la primera"""
+    service = AlertaService(db)
+    try:
+        items, next_cursor, prev_cursor = service.get_page_by_paciente(paciente_id, limit, after=after, before=before)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor, "prev_cursor": prev_cursor}
+
 @router.get("/activas", response_model=List[AlertaResponse])
 def get_alertas_activas(db: Session = Depends(get_db)):
     service = AlertaService(db)
+    if settings.lectura_rapida:
+        return RespuestaFilas(service.get_active_alerts_filas(), AlertaResponse)
     return service.get_active_alerts()
@@ -1,14 +1,39 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.respuestas import RespuestaFilas
 from app.database import get_db
 from app.services.mediciones import MedicionService
 from app.services.alertas import AlertaService
-from app.schemas.medicion import MedicionCreate, MedicionResponse
+from app.services.ingesta import IngestaService, leer_lote
+from app.services.exportacion import FORMATOS, ExportacionService, parquet_disponible
+from app.schemas.medicion import MedicionCreate, MedicionResponse, MedicionBatchResponse, SerieMediciones
+from app.schemas.paginacion import Pagina
 from typing import List, Optional
 from datetime import datetime
 
 router = APIRouter()
 
+# /rango con más lecturas que `limit`
+TRUNCADO = {"X-Truncado": "true"}
+
+# El cuerpo del lote se lee a mano para aceptar JSON y NDJSON y validar cada elemento
+_BATCH_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {
+                "schema": {"type": "array", "items": {"$ref": "#/components/schemas/MedicionCreate"}}
+            },
+            "application/x-ndjson": {
+                "schema": {"type": "string", "description": "Una MedicionCreate en JSON por línea"}
+            },
+        },
+    }
+}
+
 @router.post("/", response_model=MedicionResponse)
 def create_medicion(medicion: MedicionCreate, db: Session = Depends(get_db)):
     service = MedicionService(db)
@@ -17,10 +42,58 @@ def create_medicion(medicion: MedicionCreate, db: Session = Depends(get_db)):
     # Evaluar y crear alerta si es necesario
     alerta_service = AlertaService(db)
     alerta_data = alerta_service.evaluate_medicion(MedicionResponse.from_orm(nueva_medicion))
-    alerta_service.create(alerta_data)
+    alerta_service.registrar(alerta_data)
     
     return nueva_medicion
 
+@router.post("/batch", response_model=MedicionBatchResponse, openapi_extra=_BATCH_BODY)
+async def create_mediciones_batch(request: Request, db: Session = Depends(get_db)):
+    """Registra un lote de mediciones (array JSON o NDJSON) en una sola transacción"""
+    # Rechazar los cuerpos demasiado grandes antes de leerlos
+    longitud = request.headers.get("content-length", "")
+    if longitud.isdigit() and int(longitud) > settings.batch_max_bytes:
+        raise HTTPException(status_code=413, detail=f"El lote supera el máximo de {settings.batch_max_bytes} bytes")
+    cuerpo = bytearray()
+    async for bloque in request.stream():
+        cuerpo += bloque
+        if len(cuerpo) > settings.batch_max_bytes:
+            raise HTTPException(status_code=413, detail=f"El lote supera el máximo de {settings.batch_max_bytes} bytes")
+    
+    # El parseo y la validación se hacen en el threadpool, fuera del event loop
+    ndjson = "ndjson" in request.headers.get("content-type", "")
+    return await run_in_threadpool(_registrar_lote, db, bytes(cuerpo), ndjson)
+
+def _registrar_lote(db: Session, cuerpo: bytes, ndjson: bool) -> MedicionBatchResponse:
+    try:
+        items, errores = leer_lote(cuerpo, ndjson)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Cuerpo inválido: {e}")
+    if len(items) > settings.batch_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"El lote supera el máximo de {settings.batch_max_items} mediciones"
+        )
+    return IngestaService(db).registrar_lote(items, errores)
+
+@router.get("/exportar")
+def exportar_mediciones(
+    formato: str = Query("ndjson", pattern="^(ndjson|csv|parquet)$"),
+    paciente_id: Optional[List[int]] = Query(None, description="Pacientes a exportar (repetible); vacío = toda la sala"),
+    start_date: Optional[datetime] = Query(None, description="Fecha de inicio (YYYY-MM-DD HH:MM:SS)"),
+    end_date: Optional[datetime] = Query(None, description="Fecha de fin (YYYY-MM-DD HH:MM:SS)"),
+):
+    """Descarga de mediciones en streaming (NDJSON, CSV o Parquet), con memoria constante"""
+    if formato == "parquet" and not parquet_disponible():
+        raise HTTPException(status_code=501, detail="La exportación Parquet requiere pyarrow")
+    exportacion = ExportacionService(paciente_id, start_date, end_date)
+    media_type, extension = FORMATOS[formato]
+    nombre = f"mediciones_{datetime.now():%Y%m%d%H%M%S}.{extension}"
+    return StreamingResponse(
+        exportacion.exportar(formato),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{nombre}"'}
+    )
+
 @router.get("/paciente/{paciente_id}", response_model=List[MedicionResponse])
 def get_mediciones_paciente(
     paciente_id: int, 
@@ -29,25 +102,72 @@ def get_mediciones_paciente(
     db: Session = Depends(get_db)
 ):
     service = MedicionService(db)
+    if settings.lectura_rapida:
+        return RespuestaFilas(service.get_by_paciente_filas(paciente_id, skip=skip, limit=limit), MedicionResponse)
     return service.get_by_paciente(paciente_id, skip=skip, limit=limit)
 
+@router.get("/paciente/{paciente_id}/pagina", response_model=Pagina[MedicionResponse])
+def get_mediciones_paciente_pagina(
+    paciente_id: int,
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = Query(None, description="next_cursor de la página anterior"),
+    before: Optional[str] = Query(None, description="prev_cursor de la página siguiente"),
+    db: Session = Depends(get_db)
+):
+    """Paginación por cursor (timestamp, id): las páginas profundas cuestan lo mismo que la primera"""
+    service = MedicionService(db)
+    try:
+        items, next_cursor, prev_cursor = service.get_page_by_paciente(paciente_id, limit, after=after, before=before)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor, "prev_cursor": prev_cursor}
+
 @router.get("/paciente/{paciente_id}/ultima", response_model=MedicionResponse)
 def get_ultima_medicion_paciente(paciente_id: int, db: Session = Depends(get_db)):
     service = MedicionService(db)
-    medicion = service.get_latest_by_paciente(paciente_id)
+    medicion = service.get_ultima(paciente_id)
     if not medicion:
         raise HTTPException(status_code=404, detail="No hay mediciones para este paciente")
     return medicion
 
 @router.get("/paciente/{paciente_id}/rango", response_model=List[MedicionResponse])
 def get_mediciones_rango(
+    paciente_id: int,
+    response: Response,
+    start_date: datetime = Query(..., description="Fecha de inicio (YYYY-MM-DD HH:MM:SS)"),
+    end_date: datetime = Query(..., description="Fecha de fin (YYYY-MM-DD HH:MM:SS)"),
+    limit: int = Query(settings.rango_max_filas, ge=1, le=settings.rango_max_filas),
+    db: Session = Depends(get_db)
+):
+    """Lecturas crudas del rango (las más recientes primero), como mucho `limit`.
+
+    Si el rango tiene más lecturas la respuesta lleva la cabecera
+    `X-Truncado: true`: para rangos largos usar /serie (agregados) o
+    recorrer las lecturas con /pagina.
+    """
+    service = MedicionService(db)
+    # Una fila de más indica si el rango se ha recortado
+    if settings.lectura_rapida:
+        filas = service.get_by_date_range_filas(paciente_id, start_date, end_date, limit=limit + 1)
+        return RespuestaFilas(filas[:limit], MedicionResponse, headers=TRUNCADO if len(filas) > limit else None)
+    mediciones = service.get_by_date_range(paciente_id, start_date, end_date, limit=limit + 1)
+    if len(mediciones) > limit:
+        response.headers.update(TRUNCADO)
+    return mediciones[:limit]
+
+@router.get("/paciente/{paciente_id}/serie", response_model=SerieMediciones)
+def get_mediciones_serie(
     paciente_id: int,
     start_date: datetime = Query(..., description="Fecha de inicio (YYYY-MM-DD HH:MM:SS)"),
     end_date: datetime = Query(..., description="Fecha de fin (YYYY-MM-DD HH:MM:SS)"),
+    puntos: int = Query(500, ge=1, le=settings.serie_puntos_max, description="Número de puntos deseado"),
     db: Session = Depends(get_db)
 ):
+    """Serie para gráficas: lecturas crudas o agregados por minuto/hora/día según el rango"""
+    if end_date <= start_date:
+        raise HTTPException(status_code=400, detail="end_date debe ser posterior a start_date")
     service = MedicionService(db)
-    return service.get_by_date_range(paciente_id, start_date, end_date)
+    return service.get_serie(paciente_id, start_date, end_date, puntos)
 
 @router.post("/paciente/{paciente_id}/simular", response_model=MedicionResponse)
 def simular_medicion(paciente_id: int, db: Session = Depends(get_db)):
@@ -58,6 +178,6 @@ def simular_medicion(paciente_id: int, db: Session = Depends(get_db)):
     # Evaluar y crear alerta
     alerta_service = AlertaService(db)
     alerta_data = alerta_service.evaluate_medicion(MedicionResponse.from_orm(medicion))
-    alerta_service.create(alerta_data)
+    alerta_service.registrar(alerta_data)
     
     return medicion
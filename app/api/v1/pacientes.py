@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.respuestas import RespuestaFilas
 from app.database import get_db
 from app.services.pacientes import PacienteService
 from app.schemas.paciente import PacienteCreate, PacienteUpdate, PacienteResponse
-from typing import List
+from app.schemas.paginacion import Pagina
+from typing import List, Optional
 
 router = APIRouter()
 
@@ -15,11 +18,30 @@ def create_paciente(paciente: PacienteCreate, db: Session = Depends(get_db)):
 @router.get("/", response_model=List[PacienteResponse])
 def get_pacientes(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     service = PacienteService(db)
+    if settings.lectura_rapida:
+        return RespuestaFilas(service.get_all_filas(skip=skip, limit=limit), PacienteResponse)
     return service.get_all(skip=skip, limit=limit)
 
+@router.get("/pagina", response_model=Pagina[PacienteResponse])
+def get_pacientes_pagina(
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = Query(None, description="next_cursor de la página anterior"),
+    before: Optional[str] = Query(None, description="prev_cursor de la página siguiente"),
+    db: Session = Depends(get_db)
+):
+    """Paginación por cursor sobre el id"""
+    service = PacienteService(db)
+    try:
+        items, next_cursor, prev_cursor = service.get_page(limit, after=after, before=before)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor, "prev_cursor": prev_cursor}
+
 @router.get("/activos", response_model=List[PacienteResponse])
 def get_pacientes_activos(db: Session = Depends(get_db)):
     service = PacienteService(db)
+    if settings.lectura_rapida:
+        return RespuestaFilas(service.get_active_filas(), PacienteResponse)
     return service.get_active()
 
 @router.get("/{paciente_id}", response_model=PacienteResponse)
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.respuestas import RespuestaFilas
 from app.database import get_db
+from app.services.inferencia import InferenciaService
 from app.services.predicciones import PrediccionService
 from app.schemas.prediccion import PrediccionResponse
-from typing import List
+from app.schemas.paginacion import Pagina
+from typing import List, Optional
 
 router = APIRouter()
 
@@ -15,10 +19,38 @@ def get_predicciones_paciente(
     db: Session = Depends(get_db)
 ):
     service = PrediccionService(db)
+    if settings.lectura_rapida:
+        return RespuestaFilas(service.get_by_paciente_filas(paciente_id, skip=skip, limit=limit), PrediccionResponse)
     return service.get_by_paciente(paciente_id, skip=skip, limit=limit)
 
+@router.get("/paciente/{paciente_id}/pagina", response_model=Pagina[PrediccionResponse])
+def get_predicciones_paciente_pagina(
+    paciente_id: int,
+    limit: int = Query(100, ge=1, le=1000),
+    after: Optional[str] = Query(None, description="next_cursor de la página anterior"),
+    before: Optional[str] = Query(None, description="prev_cursor de la página siguiente"),
+    db: Session = Depends(get_db)
+):
+    """Paginación por cursor (timestamp, id): las páginas profundas cuestan lo mismo que la primera"""
+    service = PrediccionService(db)
+    try:
+        items, next_cursor, prev_cursor = service.get_page_by_paciente(paciente_id, limit, after=after, before=before)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor, "prev_cursor": prev_cursor}
+
 @router.post("/paciente/{paciente_id}/simular", response_model=PrediccionResponse)
 def simular_prediccion(paciente_id: int, db: Session = Depends(get_db)):
     """Genera una predicción falsa para demostración"""
     service = PrediccionService(db)
     return service.generate_fake_prediction(paciente_id)
+
+@router.post("/ejecutar")
+def ejecutar_predicciones(db: Session = Depends(get_db)):
+    """Calcula y guarda las predicciones de todos los pacientes activos (tiempos por etapa)"""
+    return InferenciaService(db).ejecutar()
+
+@router.post("/paciente/{paciente_id}/predecir")
+def predecir_paciente(paciente_id: int, db: Session = Depends(get_db)):
+    """Calcula y guarda las predicciones de un paciente con su ventana de lecturas reciente"""
+    return InferenciaService(db).ejecutar(paciente_ids=[paciente_id])
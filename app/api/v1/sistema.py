@@ -0,0 +1,88 @@
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Response
+from fastapi.responses import PlainTextResponse
+from app.core.bus import bus
+from app.core.cache import cache_ultima_medicion
+from app.core.eventos import hub_eventos
+from app.core.perfilado import perfilador
+from app.database import estadisticas_pools
+from app.mqtt.ingesta import cola_ingesta
+from app.mqtt.lider import lider_ingesta
+from app.services.estado import estado_sistema
+from app.services.inferencia import tarea_predicciones
+from app.services.retencion import tarea_retencion
+from app.services.tendencias import detector_tendencias
+
+router = APIRouter()
+
+@router.get("/estado")
+def get_estado_sistema():
+    """Recursos, filas aproximadas y contadores de la página de estado (copia precalculada)"""
+    return Response(content=estado_sistema.vigente().json, media_type="application/json")
+
+@router.get("/ingesta")
+def get_estadisticas_ingesta():
+    """Profundidad de la cola MQTT y contadores de contrapresión"""
+    return cola_ingesta.estadisticas()
+
+@router.get("/cache")
+def get_estadisticas_cache():
+    """Aciertos, fallos y desalojos de la caché de última medición"""
+    return cache_ultima_medicion.estadisticas()
+
+@router.get("/eventos")
+def get_estadisticas_eventos():
+    """Clientes en tiempo real conectados y consumidores lentos descartados"""
+    return hub_eventos.estadisticas()
+
+@router.get("/workers")
+def get_estado_workers():
+    """Worker que atiende la petición: bus entre procesos y elección del líder de la ingesta"""
+    return {"bus": bus.estadisticas(), "lider": lider_ingesta.estadisticas()}
+
+@router.get("/pool")
+def get_estadisticas_pool():
+    """Espera de checkout y utilización de los pools de conexiones"""
+    return estadisticas_pools()
+
+@router.get("/retencion")
+def get_estado_retencion():
+    """Configuración y resultado de la última ejecución de la retención"""
+    return tarea_retencion.estadisticas()
+
+@router.get("/predicciones")
+def get_estado_predicciones():
+    """Configuración y resultado (con tiempos por etapa) de la última ejecución de predicciones"""
+    return tarea_predicciones.estadisticas()
+
+@router.get("/tendencias")
+def get_estadisticas_tendencias():
+    """Pacientes seguidos, memoria y alertas emitidas por el detector de tendencias"""
+    return detector_tendencias.estadisticas()
+
+@router.get("/tendencias/{paciente_id}")
+def get_tendencia_paciente(paciente_id: int):
+    """Media, desviación y pendiente actuales de cada signo de un paciente"""
+    estado = detector_tendencias.estado(paciente_id)
+    if estado is None:
+        raise HTTPException(status_code=404, detail="Sin lecturas recientes para el paciente")
+    return estado
+
+@router.get("/perfilado")
+def get_estado_perfilado():
+    """Estado del perfilado y las peticiones más lentas de la ventana (consultas, N+1)"""
+    return perfilador.estadisticas()
+
+@router.post("/perfilado")
+def set_perfilado(activo: bool, muestreo: Optional[float] = None, duracion_s: Optional[float] = None):
+    """Activa (opcionalmente durante `duracion_s` segundos) o desactiva el perfilado"""
+    if activo:
+        perfilador.activar(muestreo=muestreo, duracion_s=duracion_s)
+    else:
+        perfilador.desactivar()
+    return perfilador.estadisticas()
+
+@router.get("/perfilado/flamegraph", response_class=PlainTextResponse)
+def get_flamegraph(perfil_id: Optional[int] = None):
+    """Pilas colapsadas de las peticiones más lentas (o de una) para flamegraph.pl o speedscope"""
+    return PlainTextResponse(perfilador.pilas_colapsadas(perfil_id))
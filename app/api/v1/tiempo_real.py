@@ -0,0 +1,72 @@
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from app.core.config import settings
+from app.core.eventos import CERRADA, hub_eventos
+from typing import List, Optional
+import asyncio
+
+router = APIRouter()
+
+# Sin paciente_id se reciben los eventos de toda la sala
+_PACIENTES = Query(None, description="Pacientes a seguir (repetible); vacío = toda la sala")
+
+@router.get("/sse")
+async def stream_sse(paciente_id: Optional[List[int]] = _PACIENTES):
+    """Mediciones y alertas nuevas como Server-Sent Events"""
+    suscripcion = hub_eventos.suscribir(paciente_id)
+    if suscripcion is None:
+        raise HTTPException(status_code=503, detail="Demasiados clientes en tiempo real")
+
+    async def eventos():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                mensaje = await suscripcion.siguiente(settings.eventos_keepalive)
+                if mensaje is None:
+                    # Comentario SSE: mantiene viva la conexión a través de proxies
+                    yield ": keepalive\n\n"
+                elif mensaje is CERRADA:
+                    yield 'event: cerrada\ndata: {"motivo": "consumidor lento"}\n\n'
+                    return
+                else:
+                    yield f"data: {mensaje}\n\n"
+        finally:
+            hub_eventos.cancelar(suscripcion)
+
+    return StreamingResponse(
+        eventos(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/ws")
+async def stream_ws(websocket: WebSocket, paciente_id: Optional[List[int]] = _PACIENTES):
+    """Mediciones y alertas nuevas por WebSocket (un mensaje JSON por evento)"""
+    suscripcion = hub_eventos.suscribir(paciente_id)
+    if suscripcion is None:
+        await websocket.close(code=1013, reason="Demasiados clientes en tiempo real")
+        return
+    await websocket.accept()
+
+    async def enviar():
+        while True:
+            mensaje = await suscripcion.siguiente(settings.eventos_keepalive)
+            if mensaje is None:
+                await websocket.send_text('{"tipo": "keepalive"}')
+            elif mensaje is CERRADA:
+                await websocket.close(code=1013, reason="Consumidor lento")
+                return
+            else:
+                await websocket.send_text(mensaje)
+
+    envio = asyncio.create_task(enviar())
+    try:
+        # Solo se lee para detectar la desconexión del cliente
+        while True:
+            if (await websocket.receive())["type"] == "websocket.disconnect":
+                break
+    except WebSocketDisconnect:
+        pass
+    finally:
+        envio.cancel()
+        hub_eventos.cancelar(suscripcion)
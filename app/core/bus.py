@@ -0,0 +1,347 @@
+import logging
+import os
+import queue
+import socket
+import struct
+import threading
+import uuid
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+import orjson
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Tramas del canal local: longitud (4 bytes, big endian) + JSON
+_CABECERA = struct.Struct("!I")
+
+
+class Bus:
+    """Canal entre los procesos de la API para eventos e invalidaciones.
+
+    Con un solo proceso (BUS_URL vacío) no reparte nada: `distribuido` es
+    False y los módulos que lo usan se comportan como hasta ahora. Con
+    varios workers (scripts/servidor.py) cada proceso publica en un canal
+    con nombre y recibe lo que publican los demás (nunca lo suyo).
+    Los manejadores se ejecutan en el hilo lector del bus.
+    """
+
+    distribuido = False
+
+    def __init__(self):
+        self.origen = uuid.uuid4().hex[:12]
+        self._manejadores: Dict[str, List[Callable[[dict], None]]] = {}
+        self._al_conectar: List[Callable[[], None]] = []
+        self.enviados = 0
+        self.recibidos = 0
+        self.descartados = 0
+        self.errores = 0
+
+    def suscribir(self, canal: str, manejador: Callable[[dict], None]):
+        self._manejadores.setdefault(canal, []).append(manejador)
+
+    def al_conectar(self, funcion: Callable[[], None]):
+        """Se llama cada vez que el proceso se (re)conecta al bus"""
+        self._al_conectar.append(funcion)
+
+    def publicar(self, canal: str, datos: dict):
+        pass
+
+    def iniciar(self):
+        pass
+
+    def detener(self):
+        pass
+
+    @property
+    def conectado(self) -> bool:
+        return False
+
+    def _entregar(self, mensaje: dict):
+        if mensaje.get("o") == self.origen:
+            return
+        self.recibidos += 1
+        for manejador in self._manejadores.get(mensaje.get("c"), ()):
+            try:
+                manejador(mensaje["d"])
+            except Exception as e:
+                self.errores += 1
+                logger.error(f"Error procesando mensaje del bus ({mensaje.get('c')}): {e}")
+
+    def _conectado(self):
+        for funcion in self._al_conectar:
+            try:
+                funcion()
+            except Exception as e:
+                logger.error(f"Error al conectar al bus: {e}")
+
+    def _trama(self, canal: str, datos: dict) -> bytes:
+        cuerpo = orjson.dumps({"c": canal, "o": self.origen, "d": datos})
+        return _CABECERA.pack(len(cuerpo)) + cuerpo
+
+    def estadisticas(self) -> dict:
+        return {
+            "tipo": type(self).__name__,
+            "distribuido": self.distribuido,
+            "conectado": self.conectado,
+            "origen": self.origen,
+            "pid": os.getpid(),
+            "enviados": self.enviados,
+            "recibidos": self.recibidos,
+            "descartados": self.descartados,
+            "errores": self.errores,
+        }
+
+
+class BusUnix(Bus):
+    """Bus sobre un socket Unix local, a través del repetidor del lanzador.
+
+    `publicar` solo encola la trama: un hilo escritor junta las pendientes
+    en un único envío, así que publicar desde el camino de ingesta no hace
+    una llamada al sistema por mensaje. Si la cola se llena (repetidor caído
+    o muy lento) se descartan mensajes en lugar de frenar la API.
+    """
+
+    distribuido = True
+
+    def __init__(self, ruta: str, cola_max: int = 10000):
+        super().__init__()
+        self.ruta = ruta
+        self._cola: "queue.Queue[bytes]" = queue.Queue(maxsize=cola_max)
+        self._socket: Optional[socket.socket] = None
+        self._detener = threading.Event()
+        self._hilos: List[threading.Thread] = []
+
+    @property
+    def conectado(self) -> bool:
+        return self._socket is not None
+
+    def publicar(self, canal: str, datos: dict):
+        try:
+            self._cola.put_nowait(self._trama(canal, datos))
+        except queue.Full:
+            self.descartados += 1
+
+    def iniciar(self):
+        if self._hilos:
+            return
+        self._detener.clear()
+        for destino, nombre in ((self._leer, "bus-lector"), (self._escribir, "bus-escritor")):
+            hilo = threading.Thread(target=destino, name=nombre, daemon=True)
+            hilo.start()
+            self._hilos.append(hilo)
+
+    def detener(self):
+        self._detener.set()
+        self._cerrar()
+        for hilo in self._hilos:
+            hilo.join(2)
+        self._hilos = []
+
+    def _cerrar(self):
+        conexion, self._socket = self._socket, None
+        if conexion is not None:
+            try:
+                conexion.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            conexion.close()
+
+    def _leer(self):
+        while not self._detener.is_set():
+            try:
+                conexion = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                conexion.connect(self.ruta)
+            except OSError as e:
+                logger.warning(f"Bus no disponible en {self.ruta}: {e}")
+                self._detener.wait(1)
+                continue
+            self._socket = conexion
+            self._conectado()
+            try:
+                for cuerpo in _tramas(conexion):
+                    self._entregar(orjson.loads(cuerpo))
+            except OSError:
+                pass
+            self._cerrar()
+
+    def _escribir(self):
+        while not self._detener.is_set():
+            try:
+                pendientes = [self._cola.get(timeout=0.5)]
+            except queue.Empty:
+                continue
+            while len(pendientes) < 1000:
+                try:
+                    pendientes.append(self._cola.get_nowait())
+                except queue.Empty:
+                    break
+            conexion = self._socket
+            if conexion is None:
+                self.descartados += len(pendientes)
+                continue
+            try:
+                conexion.sendall(b"".join(pendientes))
+                self.enviados += len(pendientes)
+            except OSError:
+                self.descartados += len(pendientes)
+                self._cerrar()
+
+
+class BusMQTT(Bus):
+    """Bus sobre el broker MQTT de la ingesta (<MQTT_TOPIC_BASE>/_bus/<canal>), para workers en varias máquinas"""
+
+    distribuido = True
+
+    def __init__(self, host: str, puerto: int):
+        super().__init__()
+        import paho.mqtt.client as mqtt
+
+        self.host = host
+        self.puerto = puerto
+        self.prefijo = f"{settings.mqtt_topic_base}/_bus/"
+        self._conectado_mqtt = False
+        self.cliente = mqtt.Client()
+        self.cliente.on_connect = self._on_connect
+        self.cliente.on_disconnect = self._on_disconnect
+        self.cliente.on_message = lambda cliente, datos, mensaje: self._entregar(orjson.loads(mensaje.payload))
+
+    @property
+    def conectado(self) -> bool:
+        return self._conectado_mqtt
+
+    def _on_connect(self, cliente, datos, flags, rc):
+        if rc == 0:
+            self._conectado_mqtt = True
+            cliente.subscribe(self.prefijo + "#")
+            self._conectado()
+
+    def _on_disconnect(self, cliente, datos, rc):
+        self._conectado_mqtt = False
+
+    def publicar(self, canal: str, datos: dict):
+        if not self._conectado_mqtt:
+            self.descartados += 1
+            return
+        self.cliente.publish(self.prefijo + canal, orjson.dumps({"c": canal, "o": self.origen, "d": datos}))
+        self.enviados += 1
+
+    def iniciar(self):
+        self.cliente.connect_async(self.host, self.puerto, 60)
+        self.cliente.loop_start()
+
+    def detener(self):
+        self.cliente.loop_stop()
+        self.cliente.disconnect()
+
+
+def _bloques(conexion: socket.socket):
+    """Tramas completas recibidas, agrupadas tal como llegan: (bytes, número de tramas)"""
+    buffer = b""
+    while True:
+        bloque = conexion.recv(65536)
+        if not bloque:
+            return
+        buffer += bloque
+        fin = tramas = 0
+        while len(buffer) - fin >= _CABECERA.size:
+            siguiente = fin + _CABECERA.size + _CABECERA.unpack_from(buffer, fin)[0]
+            if siguiente > len(buffer):
+                break
+            fin = siguiente
+            tramas += 1
+        if tramas:
+            yield buffer[:fin], tramas
+            buffer = buffer[fin:]
+
+
+def _tramas(conexion: socket.socket):
+    """Cuerpo JSON de cada trama recibida hasta que se cierre la conexión"""
+    for bloque, _ in _bloques(conexion):
+        inicio = 0
+        while inicio < len(bloque):
+            fin = inicio + _CABECERA.size + _CABECERA.unpack_from(bloque, inicio)[0]
+            yield bloque[inicio + _CABECERA.size:fin]
+            inicio = fin
+
+
+class Repetidor:
+    """Servidor del bus local: reenvía cada trama a todas las demás conexiones.
+
+    Lo arranca scripts/servidor.py en el proceso principal, antes de crear
+    los workers. No interpreta el contenido: reenvía de una vez los bloques
+    de tramas completas que recibe.
+    """
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self._conexiones: Dict[socket.socket, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._servidor: Optional[socket.socket] = None
+        self.reenviadas = 0
+
+    def iniciar(self):
+        if os.path.exists(self.ruta):
+            os.unlink(self.ruta)
+        self._servidor = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._servidor.bind(self.ruta)
+        self._servidor.listen(128)
+        threading.Thread(target=self._aceptar, name="bus-repetidor", daemon=True).start()
+
+    def detener(self):
+        if self._servidor is not None:
+            self._servidor.close()
+            self._servidor = None
+        with self._lock:
+            conexiones = list(self._conexiones)
+        for conexion in conexiones:
+            conexion.close()
+        if os.path.exists(self.ruta):
+            os.unlink(self.ruta)
+
+    def _aceptar(self):
+        while self._servidor is not None:
+            try:
+                conexion, _ = self._servidor.accept()
+            except OSError:
+                return
+            with self._lock:
+                self._conexiones[conexion] = threading.Lock()
+            threading.Thread(target=self._atender, args=(conexion,), daemon=True).start()
+
+    def _atender(self, conexion: socket.socket):
+        try:
+            for bloque, tramas in _bloques(conexion):
+                with self._lock:
+                    destinos = [(c, l) for c, l in self._conexiones.items() if c is not conexion]
+                for destino, lock in destinos:
+                    try:
+                        with lock:
+                            destino.sendall(bloque)
+                    except OSError:
+                        pass
+                self.reenviadas += tramas
+        except OSError:
+            pass
+        finally:
+            with self._lock:
+                self._conexiones.pop(conexion, None)
+            conexion.close()
+
+
+def crear_bus(url: Optional[str]) -> Bus:
+    """Bus según BUS_URL: vacío (un proceso), unix:///ruta.sock o mqtt://host:puerto"""
+    if not url:
+        return Bus()
+    destino = urlparse(url)
+    if destino.scheme == "unix":
+        return BusUnix(destino.path)
+    if destino.scheme == "mqtt":
+        return BusMQTT(destino.hostname or settings.mqtt_broker_host, destino.port or settings.mqtt_broker_port)
+    raise ValueError(f"BUS_URL no soportada: {url}")
+
+
+# Bus del proceso (lo arranca y detiene app/main.py)
+bus = crear_bus(settings.bus_url)
@@ -0,0 +1,135 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.bus import bus
+from app.core.config import settings
+from app.schemas.medicion import MedicionResponse
+
+
+class CacheUltimaMedicion:
+    """Última medición de cada paciente, en memoria y con escritura directa.
+
+    Los caminos de ingesta actualizan la caché al guardar, así que las
+    pantallas que consultan la última lectura cada pocos segundos no llegan a
+    la base de datos. La memoria está acotada a `max_pacientes` entradas
+    (se descarta la usada hace más tiempo). Cada entrada caduca `ttl`
+    segundos después de guardarse aunque se siga leyendo: es la cota de lo
+    desactualizada que puede servirse una lectura escrita sin pasar por la
+    caché (otro proceso sin bus, scripts o mensajes del bus perdidos).
+
+    Con varios workers cada proceso tiene su caché: las escrituras se
+    difunden por el bus y los demás workers actualizan solo los pacientes
+    que ya tenían en caché; las invalidaciones se aplican en todos.
+    """
+
+    def __init__(
+        self,
+        max_pacientes: int = settings.cache_ultima_max_pacientes,
+        ttl: float = settings.cache_ultima_ttl,
+    ):
+        self.max_pacientes = max_pacientes
+        self.ttl = ttl
+        # paciente -> (medición, guardada, último uso); el orden es el de uso (LRU)
+        self._datos: "OrderedDict[int, Tuple[MedicionResponse, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        self.caducadas = 0
+
+    def obtener(self, paciente_id: int) -> Optional[MedicionResponse]:
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(paciente_id)
+            if entrada is None or ahora - entrada[1] > self.ttl:
+                if entrada is not None:
+                    del self._datos[paciente_id]
+                    self.caducadas += 1
+                self.fallos += 1
+                return None
+            # El uso solo cuenta para el LRU: la caducidad sigue midiéndose desde que se guardó
+            self._datos[paciente_id] = (entrada[0], entrada[1], ahora)
+            self._datos.move_to_end(paciente_id)
+            self.aciertos += 1
+            return entrada[0]
+
+    def actualizar(self, medicion: MedicionResponse):
+        """Guarda la medición salvo que la caché ya tenga una más reciente"""
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(medicion.id_paciente)
+            if entrada is not None:
+                actual = entrada[0]
+                if (actual.timestamp, actual.id) > (medicion.timestamp, medicion.id):
+                    return
+            self._datos[medicion.id_paciente] = (medicion, ahora, ahora)
+            self._datos.move_to_end(medicion.id_paciente)
+            self._purgar(ahora)
+
+    def actualizar_presentes(self, mediciones: Iterable[MedicionResponse]):
+        """Como `actualizar`, solo para los pacientes que ya están en la caché"""
+        for medicion in mediciones:
+            if medicion.id_paciente in self._datos:
+                self.actualizar(medicion)
+
+    def difundir(self, mediciones: List[MedicionResponse]):
+        """Envía a los demás workers las mediciones recién guardadas"""
+        if bus.distribuido and mediciones:
+            bus.publicar("cache", {"m": [m.model_dump(mode="json") for m in mediciones]})
+
+    def timestamps(self, paciente_ids: Iterable[int]) -> Dict[int, datetime]:
+        """Timestamp cacheado de los pacientes indicados que estén en la caché"""
+        with self._lock:
+            return {
+                paciente_id: self._datos[paciente_id][0].timestamp
+                for paciente_id in paciente_ids if paciente_id in self._datos
+            }
+
+    def invalidar(self, paciente_id: Optional[int] = None):
+        self._invalidar(paciente_id)
+        if bus.distribuido:
+            bus.publicar("cache_invalidar", {"p": paciente_id})
+
+    def _invalidar(self, paciente_id: Optional[int]):
+        with self._lock:
+            if paciente_id is None:
+                self._datos.clear()
+            else:
+                self._datos.pop(paciente_id, None)
+
+    def estadisticas(self) -> dict:
+        consultas = self.aciertos + self.fallos
+        return {
+            "entradas": len(self._datos),
+            "capacidad": self.max_pacientes,
+            "ttl_segundos": self.ttl,
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "ratio_aciertos": round(self.aciertos / consultas, 4) if consultas else None,
+            "desalojos": self.desalojos,
+            "caducadas": self.caducadas,
+        }
+
+    def _purgar(self, ahora: float):
+        # Las usadas hace más tiempo están al principio; las caducadas que queden
+        # detrás se descartan al leerlas
+        while self._datos:
+            paciente_id, (_, guardada, _) = next(iter(self._datos.items()))
+            if len(self._datos) > self.max_pacientes:
+                self.desalojos += 1
+            elif ahora - guardada > self.ttl:
+                self.caducadas += 1
+            else:
+                break
+            del self._datos[paciente_id]
+
+
+# Caché compartida por la API y los caminos de ingesta del proceso
+cache_ultima_medicion = CacheUltimaMedicion()
+bus.suscribir("cache", lambda datos: cache_ultima_medicion.actualizar_presentes(
+    MedicionResponse.model_validate(m) for m in datos["m"]))
+bus.suscribir("cache_invalidar", lambda datos: cache_ultima_medicion._invalidar(datos["p"]))
@@ -1,8 +1,22 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Literal, Optional
 
 class Settings(BaseSettings):
     database_url: str
+    # Pila asíncrona (AsyncSession + rutas async def); la URL se deriva de database_url si se omite
+    api_async: bool = False
+    async_database_url: Optional[str] = None
+    
+    # Pool de conexiones compartido por la API, la ingesta MQTT y los scripts
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800  # segundos; por debajo del wait_timeout de MySQL
+    db_pool_pre_ping: bool = True
+    # Caché de sentencias compiladas de SQLAlchemy (0 la desactiva)
+    db_statement_cache_size: int = 500
+    # p. ej. "READ COMMITTED"; None = el nivel por defecto del servidor
+    db_isolation_level: Optional[str] = None
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
@@ -10,6 +24,134 @@ class Settings(BaseSettings):
     mqtt_broker_port: int = 1883
     mqtt_topic_base: str = "pacientes/monitoreo"
     
+    # Ingesta MQTT por lotes
+    mqtt_cola_max: int = 10000
+    mqtt_cola_bloqueo: float = 0.05
+    mqtt_lote_max: int = 500
+    mqtt_lote_intervalo: float = 0.5
+    ingesta_filas_por_insert: int = 1000
+    batch_max_items: int = 10000
+    # Tamaño máximo del cuerpo de /mediciones/batch (se rechaza antes de leerlo entero)
+    batch_max_bytes: int = 8 * 1024 * 1024
+    
+    # Tabla de reglas de alerta (JSON); si no se indica se usan las reglas por defecto
+    reglas_alerta_archivo: Optional[str] = None
+    # False = modo heredado: se guarda una alerta (también verde) por cada medición
+    alertas_solo_transiciones: bool = True
+    # Detección de deterioro sostenido por paciente (EWMA, z-score y pendiente):
+    # constante de tiempo de la ventana (s), umbral de z, lecturas y segundos
+    # seguidos en deterioro para alertar y lecturas mínimas antes de evaluar; los
+    # pacientes sin lecturas durante `tendencias_inactividad` segundos se olvidan
+    tendencias_activas: bool = True
+    tendencias_ventana: float = 300
+    tendencias_z: float = 3.0
+    tendencias_lecturas: int = 5
+    tendencias_sostenida: float = 120
+    tendencias_calentamiento: int = 30
+    tendencias_inactividad: float = 86400
+    
+    # Almacenamiento de spo2/temperatura: "entero" (SMALLINT con el valor x100),
+    # "real" (FLOAT) o "decimal" (DECIMAL, el esquema original). La migración 0004
+    # convierte las columnas al modo configurado
+    signos_almacenamiento: Literal["entero", "real", "decimal"] = "entero"
+    
+    # Listados servidos como tuplas + orjson, sin instancias ORM ni revalidación Pydantic
+    lectura_rapida: bool = True
+    
+    # Agregados por minuto/hora/día actualizados en la ingesta (gráficas de rangos largos)
+    agregados_activos: bool = True
+    serie_puntos_max: int = 5000
+    # Máximo de filas crudas que devuelve /rango
+    rango_max_filas: int = 10000
+    # Filas por lote del cursor en las exportaciones (y por row group en Parquet)
+    exportacion_filas_por_lote: int = 5000
+    
+    # Retención de series temporales: días que se conservan las mediciones y las
+    # alertas (0 = siempre). Caducan periodos completos (`particion_periodo`)
+    retencion_mediciones_dias: int = 0
+    retencion_alertas_dias: int = 0
+    particion_periodo: Literal["mes", "dia"] = "mes"
+    # Particiones creadas por adelantado (MySQL particionado)
+    particiones_futuras: int = 3
+    # MySQL: la migración 0005 convierte mediciones/alertas en tablas particionadas
+    # por RANGE sobre timestamp (elimina sus claves foráneas); si no, índice por timestamp
+    particionado_mysql: bool = False
+    # Archivar las mediciones de cada periodo antes de eliminarlo (None = no archivar)
+    retencion_archivo_dir: Optional[str] = None
+    retencion_archivo_formato: Literal["parquet", "ndjson", "csv"] = "parquet"
+    # Segundos entre ejecuciones de la tarea en la API (0 = solo scripts/retencion.py)
+    retencion_intervalo: float = 3600
+    # Filas por DELETE cuando no hay particiones nativas
+    retencion_filas_por_borrado: int = 10000
+    
+    # Motor de predicciones: ventana de lecturas por paciente (horas), fuente de las
+    # características ("auto" = agregados por hora si la ingesta los mantiene), modelo
+    # exportado a .npz (None = modelo de referencia), probabilidad mínima que se guarda
+    # y segundos entre ejecuciones en la API (0 = solo scripts/predecir.py o el endpoint;
+    # None = cada hora si hay PREDICCIONES_MODELO_ARCHIVO, si no desactivada)
+    predicciones_ventana_horas: float = 6
+    predicciones_fuente: Literal["auto", "agregados", "crudas"] = "auto"
+    predicciones_modelo_archivo: Optional[str] = None
+    predicciones_umbral: float = 0.2
+    predicciones_intervalo: Optional[float] = None
+    
+    # Eventos en tiempo real (WebSocket/SSE): eventos pendientes por cliente antes
+    # de descartarlo por lento, clientes simultáneos y segundos entre keepalives
+    eventos_cola_max: int = 256
+    eventos_max_suscriptores: int = 10000
+    eventos_keepalive: float = 15
+    
+    # Página de estado (GET / y /api/v1/sistema/estado): segundos entre refrescos
+    # en segundo plano (0 = sin hilo) y antigüedad máxima de la copia servida
+    estado_intervalo: float = 15
+    estado_ttl: float = 30
+
+    # Sondas /health y /ready: segundos entre comprobaciones y presupuestos a partir
+    # de los cuales la instancia deja de estar lista (ping a la base de datos,
+    # utilización y espera del pool, ocupación de la cola de ingesta y retraso del
+    # bucle de eventos); con SALUD_MQTT_OBLIGATORIO, también sin conexión al broker.
+    # /ready solo lee el resultado del hilo: con 0 (sin hilo) responde siempre 503
+    salud_intervalo: float = 5
+    salud_ping_max_ms: float = 250
+    salud_pool_utilizacion_max: float = 0.9
+    salud_pool_espera_max_ms: float = 100
+    salud_ingesta_ocupacion_max: float = 0.8
+    salud_lag_max_ms: float = 200
+    salud_mqtt_obligatorio: bool = False
+
+    # Métricas en formato Prometheus (GET /metrics): latencia por ruta y por método
+    # de servicio, mensajes MQTT y retraso de la ingesta
+    metricas_activas: bool = True
+
+    # Perfilado bajo demanda (POST /api/v1/sistema/perfilado o SIGUSR2): activo al
+    # arrancar, fracción de peticiones perfiladas, periodo del muestreador de pilas,
+    # peticiones más lentas conservadas y su ventana en segundos, y repeticiones de
+    # una misma consulta en una petición a partir de las que se avisa de un N+1
+    perfilado_activo: bool = False
+    perfilado_muestreo: float = 0.1
+    perfilado_intervalo_ms: float = 5
+    perfilado_peores: int = 20
+    perfilado_ventana: float = 300
+    perfilado_n_mas_1: int = 10
+
+    # Varios workers (scripts/servidor.py): bus entre procesos para eventos en tiempo
+    # real y la caché (vacío = un proceso, unix:///ruta.sock o mqtt://host:puerto),
+    # reparto de la ingesta MQTT ("lider": solo el worker elegido con el cerrojo de
+    # archivo; "compartida": suscripción compartida $share/<grupo>/... del broker).
+    # La retención y las predicciones se ejecutan siempre solo en el líder
+    bus_url: Optional[str] = None
+    mqtt_modo_workers: Literal["lider", "compartida"] = "lider"
+    mqtt_grupo_compartido: str = "monitoreo-api"
+    ingesta_cerrojo: Optional[str] = None
+
+    # Aplicar las migraciones pendientes (Alembic) al iniciar la API
+    migrar_al_iniciar: bool = True
+    
+    # Caché de la última medición por paciente: entradas y segundos que dura cada
+    # una desde que se guarda (máximo retraso ante escrituras que no pasan por ella)
+    cache_ultima_max_pacientes: int = 20000
+    cache_ultima_ttl: float = 60
+    
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,200 @@
+import asyncio
+import json
+import threading
+from typing import Dict, Iterable, Optional, Set
+
+from app.core.bus import bus
+from app.core.config import settings
+
+# Marca que cierra la suscripción de un consumidor lento
+CERRADA = object()
+
+
+class Suscripcion:
+    """Cola acotada de eventos de un cliente (WebSocket o SSE).
+
+    Un cliente inactivo solo cuesta esta cola vacía y la corrutina que la
+    espera. Si el cliente no consume al ritmo de la ingesta y la cola se
+    llena, se descarta la suscripción en lugar de acumular memoria.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, pacientes: Optional[Set[int]], cola_max: int):
+        self.loop = loop
+        # None = toda la sala
+        self.pacientes = pacientes
+        self.cola: asyncio.Queue = asyncio.Queue(maxsize=cola_max)
+        self.descartada = False
+
+    async def siguiente(self, timeout: Optional[float] = None):
+        """Siguiente evento serializado, None si caducó el timeout o CERRADA si se descartó"""
+        try:
+            return await asyncio.wait_for(self.cola.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def _entregar(self, mensaje: str) -> bool:
+        if self.descartada:
+            return False
+        try:
+            self.cola.put_nowait(mensaje)
+            return True
+        except asyncio.QueueFull:
+            # Vaciar la cola y dejar solo el aviso de cierre
+            self.descartada = True
+            while not self.cola.empty():
+                self.cola.get_nowait()
+            self.cola.put_nowait(CERRADA)
+            return False
+
+
+class HubEventos:
+    """Pub/sub en proceso de mediciones y alertas nuevas.
+
+    `publicar` puede llamarse desde cualquier hilo (threadpool de la API,
+    escritor de la ingesta MQTT o el propio event loop): el evento se
+    serializa una sola vez y el reparto a las colas se hace en el loop de
+    cada suscriptor con `call_soon_threadsafe`.
+
+    Con varios workers, cada hub anuncia por el bus cuántos suscriptores
+    tiene y reenvía los eventos solo si algún otro proceso tiene clientes;
+    los eventos recibidos del bus se reparten a los suscriptores locales.
+    """
+
+    def __init__(self, cola_max: int = settings.eventos_cola_max,
+                 max_suscriptores: int = settings.eventos_max_suscriptores):
+        self.cola_max = cola_max
+        self.max_suscriptores = max_suscriptores
+        # paciente (None = sala) -> suscripciones
+        self._suscripciones: Dict[Optional[int], Set[Suscripcion]] = {}
+        self._loops: Dict[asyncio.AbstractEventLoop, int] = {}
+        self._total = 0
+        self._lock = threading.Lock()
+        # origen en el bus -> suscriptores de ese worker
+        self._remotos: Dict[str, int] = {}
+        self._total_remoto = 0
+
+        self.publicados = 0
+        self.entregados = 0
+        self.descartados = 0
+        self.rechazados = 0
+
+    def suscribir(self, pacientes: Optional[Iterable[int]] = None) -> Optional[Suscripcion]:
+        """Nueva suscripción en el loop actual; None si se alcanzó el máximo de clientes"""
+        pacientes = set(pacientes) if pacientes else None
+        suscripcion = Suscripcion(asyncio.get_running_loop(), pacientes, self.cola_max)
+        with self._lock:
+            if self._total >= self.max_suscriptores:
+                self.rechazados += 1
+                return None
+            for clave in pacientes or (None,):
+                self._suscripciones.setdefault(clave, set()).add(suscripcion)
+            self._loops[suscripcion.loop] = self._loops.get(suscripcion.loop, 0) + 1
+            self._total += 1
+        self._anunciar()
+        return suscripcion
+
+    def cancelar(self, suscripcion: Suscripcion):
+        with self._lock:
+            eliminada = False
+            for clave in suscripcion.pacientes or (None,):
+                grupo = self._suscripciones.get(clave)
+                if grupo and suscripcion in grupo:
+                    grupo.discard(suscripcion)
+                    eliminada = True
+                    if not grupo:
+                        del self._suscripciones[clave]
+            if not eliminada:
+                return
+            self._total -= 1
+            self._loops[suscripcion.loop] -= 1
+            if not self._loops[suscripcion.loop]:
+                del self._loops[suscripcion.loop]
+        self._anunciar()
+
+    @property
+    def activo(self) -> bool:
+        """Hay algún suscriptor, aquí o en otro worker (para no serializar eventos que nadie recibe)"""
+        return self._total > 0 or self._total_remoto > 0
+
+    def publicar(self, tipo: str, paciente_id: int, datos: dict):
+        if not self._total and not self._total_remoto:
+            return
+        mensaje = json.dumps({"tipo": tipo, "datos": datos}, default=str)
+        with self._lock:
+            self.publicados += 1
+        if self._total_remoto:
+            bus.publicar("eventos", {"p": paciente_id, "m": mensaje})
+        if self._total:
+            self._a_loops(paciente_id, mensaje)
+
+    def _a_loops(self, paciente_id: int, mensaje: str):
+        with self._lock:
+            loops = list(self._loops)
+        for loop in loops:
+            try:
+                loop.call_soon_threadsafe(self._repartir, loop, paciente_id, mensaje)
+            except RuntimeError:
+                # Loop ya cerrado (p. ej. al apagar la API)
+                pass
+
+    def publicar_medicion(self, medicion):
+        if self.activo:
+            self.publicar("medicion", medicion.id_paciente, medicion.model_dump(mode="json"))
+
+    def publicar_alerta(self, alerta):
+        if self.activo:
+            self.publicar("alerta", alerta.id_paciente, alerta.model_dump(mode="json"))
+
+    def _repartir(self, loop: asyncio.AbstractEventLoop, paciente_id: int, mensaje: str):
+        with self._lock:
+            destinos = [
+                s for clave in (paciente_id, None)
+                for s in self._suscripciones.get(clave, ())
+                if s.loop is loop
+            ]
+        entregados = descartados = 0
+        for suscripcion in destinos:
+            if suscripcion._entregar(mensaje):
+                entregados += 1
+            elif suscripcion.descartada:
+                descartados += 1
+                self.cancelar(suscripcion)
+        with self._lock:
+            self.entregados += entregados
+            self.descartados += descartados
+
+    def _anunciar(self, pedir: bool = False):
+        if bus.distribuido:
+            bus.publicar("presencia", {"o": bus.origen, "n": self._total, "pedir": pedir})
+
+    def _presencia(self, datos: dict):
+        """Suscriptores de otro worker; `pedir` = acaba de conectarse y quiere los de todos"""
+        self._remotos[datos["o"]] = datos["n"]
+        self._total_remoto = sum(self._remotos.values())
+        if datos.get("pedir"):
+            self._anunciar()
+
+    def _remoto(self, datos: dict):
+        """Evento publicado en otro worker"""
+        if self._total:
+            self._a_loops(datos["p"], datos["m"])
+
+    def estadisticas(self) -> dict:
+        with self._lock:
+            return {
+                "suscriptores": self._total,
+                "suscriptores_otros_workers": self._total_remoto,
+                "max_suscriptores": self.max_suscriptores,
+                "cola_max": self.cola_max,
+                "publicados": self.publicados,
+                "entregados": self.entregados,
+                "descartados_lentos": self.descartados,
+                "rechazados": self.rechazados,
+            }
+
+
+# Hub compartido por la API y la ingesta MQTT del proceso
+hub_eventos = HubEventos()
+bus.suscribir("eventos", hub_eventos._remoto)
+bus.suscribir("presencia", hub_eventos._presencia)
+bus.al_conectar(lambda: hub_eventos._anunciar(pedir=True))
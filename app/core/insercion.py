@@ -0,0 +1,32 @@
+from typing import List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+
+def insertar_filas(db: Session, modelo, filas: List[dict], tamano: int, ids: bool = False) -> Optional[List[int]]:
+    """INSERT multi-fila de `filas` en sentencias de `tamano` filas, sin refresh por fila.
+
+    Con `ids` devuelve el id de cada fila, en orden, sin consultas extra:
+    en MySQL `lastrowid` es el id de la primera fila de la sentencia y los
+    siguientes son consecutivos (un INSERT con VALUES reserva todos sus ids
+    de una vez; se asume auto_increment_increment=1), en SQLite es el de la
+    última, y en PostgreSQL se usa RETURNING. Con otros motores devuelve None.
+    """
+    dialecto = db.bind.dialect.name
+    if ids and dialecto not in ("mysql", "sqlite", "postgresql"):
+        ids = False
+    resultado: Optional[List[int]] = [] if ids else None
+    for i in range(0, len(filas), tamano):
+        bloque = filas[i:i + tamano]
+        sentencia = insert(modelo).values(bloque)
+        if not ids:
+            db.execute(sentencia)
+        elif dialecto == "postgresql":
+            # La secuencia se evalúa en el orden de VALUES
+            resultado.extend(sorted(db.execute(sentencia.returning(modelo.id)).scalars()))
+        else:
+            cursor = db.execute(sentencia)
+            primero = cursor.lastrowid if dialecto == "mysql" else cursor.lastrowid - len(bloque) + 1
+            resultado.extend(range(primero, primero + len(bloque)))
+    return resultado
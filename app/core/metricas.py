@@ -0,0 +1,330 @@
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from app.core.perfilado import perfilador
+
+# Límites por defecto de los histogramas de latencia (segundos)
+LIMITES_LATENCIA = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Serie:
+    """Valores de una serie repartidos en un fragmento por hilo.
+
+    Cada hilo escribe solo en su propia lista, así que incrementar no
+    necesita locks ni puede perder actualizaciones; el lock solo se toma
+    la primera vez que un hilo escribe en la serie. Leer suma los
+    fragmentos (lo hace /metrics, no el camino caliente).
+    """
+
+    __slots__ = ("_local", "_fragmentos", "_lock", "_tamano")
+
+    def __init__(self, tamano: int):
+        self._local = threading.local()
+        self._fragmentos: List[list] = []
+        self._lock = threading.Lock()
+        self._tamano = tamano
+
+    def _fragmento(self) -> list:
+        try:
+            return self._local.f
+        except AttributeError:
+            fragmento = [0] * self._tamano
+            with self._lock:
+                self._fragmentos.append(fragmento)
+            self._local.f = fragmento
+            return fragmento
+
+    def total(self) -> list:
+        with self._lock:
+            fragmentos = list(self._fragmentos)
+        return [sum(valores) for valores in zip(*fragmentos)] if fragmentos else [0] * self._tamano
+
+
+class _ContadorSerie(_Serie):
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__(1)
+
+    def incrementar(self, cantidad: float = 1):
+        self._fragmento()[0] += cantidad
+
+
+class _HistogramaSerie(_Serie):
+    # Fragmento: un contador por cubeta (la última es +Inf) y la suma observada
+    __slots__ = ("limites",)
+
+    def __init__(self, limites: Tuple[float, ...]):
+        super().__init__(len(limites) + 2)
+        self.limites = limites
+
+    def observar(self, valor: float):
+        fragmento = self._fragmento()
+        fragmento[bisect_left(self.limites, valor)] += 1
+        fragmento[-1] += valor
+
+    def observar_varios(self, valores: Iterable[float]):
+        fragmento = self._fragmento()
+        limites = self.limites
+        for valor in valores:
+            fragmento[bisect_left(limites, valor)] += 1
+            fragmento[-1] += valor
+
+
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = etiquetas
+        self._series: Dict[tuple, _Serie] = {}
+        self._lock = threading.Lock()
+        if not etiquetas:
+            self._sin_etiquetas = self.con()
+
+    def _nueva_serie(self) -> _Serie:
+        raise NotImplementedError
+
+    def con(self, *valores) -> _Serie:
+        """Serie de unos valores de etiqueta (se crea la primera vez)"""
+        serie = self._series.get(valores)
+        if serie is None:
+            with self._lock:
+                serie = self._series.setdefault(valores, self._nueva_serie())
+        return serie
+
+    def _etiquetas(self, valores: tuple, extra: str = "") -> str:
+        pares = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(self.etiquetas, valores)]
+        if extra:
+            pares.append(extra)
+        return "{" + ",".join(pares) + "}" if pares else ""
+
+    def muestras(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Contador(_Metrica):
+    tipo = "counter"
+
+    def _nueva_serie(self):
+        return _ContadorSerie()
+
+    def incrementar(self, cantidad: float = 1):
+        self._sin_etiquetas.incrementar(cantidad)
+
+    def muestras(self) -> List[str]:
+        with self._lock:
+            series = list(self._series.items())
+        return [f"{self.nombre}{self._etiquetas(valores)} {_numero(serie.total()[0])}" for valores, serie in series]
+
+
+class Histograma(_Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...] = (), limites=LIMITES_LATENCIA):
+        self.limites = tuple(sorted(limites))
+        super().__init__(nombre, ayuda, etiquetas)
+
+    def _nueva_serie(self):
+        return _HistogramaSerie(self.limites)
+
+    def observar(self, valor: float):
+        self._sin_etiquetas.observar(valor)
+
+    def observar_varios(self, valores: Iterable[float]):
+        self._sin_etiquetas.observar_varios(valores)
+
+    def muestras(self) -> List[str]:
+        with self._lock:
+            series = list(self._series.items())
+        lineas = []
+        for valores, serie in series:
+            total = serie.total()
+            acumulado = 0
+            for limite, cuenta in zip(self.limites + (float("inf"),), total[:-1]):
+                acumulado += cuenta
+                le = "+Inf" if limite == float("inf") else _numero(limite)
+                etiquetas = self._etiquetas(valores, 'le="' + le + '"')
+                lineas.append(f"{self.nombre}_bucket{etiquetas} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{self._etiquetas(valores)} {_numero(total[-1])}")
+            lineas.append(f"{self.nombre}_count{self._etiquetas(valores)} {acumulado}")
+        return lineas
+
+
+class RegistroMetricas:
+    """Métricas del proceso en formato de exposición de texto de Prometheus.
+
+    Además de las métricas propias, las colecciones registradas se llaman
+    al exponer y devuelven (nombre, tipo, ayuda, [(etiquetas, valor)]) a
+    partir de contadores que ya existen (caché, cola de ingesta, pool).
+    """
+
+    def __init__(self):
+        self._metricas: List[_Metrica] = []
+        self._colecciones: List[Callable[[], Iterable[tuple]]] = []
+
+    def contador(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...] = ()) -> Contador:
+        metrica = Contador(nombre, ayuda, etiquetas)
+        self._metricas.append(metrica)
+        return metrica
+
+    def histograma(self, nombre: str, ayuda: str, etiquetas: Tuple[str, ...] = (), limites=LIMITES_LATENCIA) -> Histograma:
+        metrica = Histograma(nombre, ayuda, etiquetas, limites)
+        self._metricas.append(metrica)
+        return metrica
+
+    def registrar_coleccion(self, coleccion: Callable[[], Iterable[tuple]]):
+        self._colecciones.append(coleccion)
+
+    def exponer(self) -> str:
+        lineas = []
+        for metrica in self._metricas:
+            lineas += [f"# HELP {metrica.nombre} {metrica.ayuda}", f"# TYPE {metrica.nombre} {metrica.tipo}"]
+            lineas += metrica.muestras()
+        for coleccion in self._colecciones:
+            for nombre, tipo, ayuda, muestras in coleccion():
+                lineas += [f"# HELP {nombre} {ayuda}", f"# TYPE {nombre} {tipo}"]
+                for etiquetas, valor in muestras:
+                    if valor is None:
+                        continue
+                    pares = ",".join(f'{clave}="{_escapar(v)}"' for clave, v in etiquetas.items())
+                    lineas.append(f"{nombre}{{{pares}}} {_numero(valor)}" if pares else f"{nombre} {_numero(valor)}")
+        return "\n".join(lineas) + "\n"
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _numero(valor) -> str:
+    if isinstance(valor, float) and valor.is_integer() and abs(valor) < 1e15:
+        return str(int(valor))
+    return repr(valor) if isinstance(valor, float) else str(valor)
+
+
+metricas = RegistroMetricas()
+
+http_duracion = metricas.histograma(
+    "monitoreo_http_duracion_segundos", "Latencia de las peticiones HTTP por ruta", ("metodo", "ruta"))
+http_peticiones = metricas.contador(
+    "monitoreo_http_peticiones_total", "Peticiones HTTP por ruta y código de estado", ("metodo", "ruta", "codigo"))
+servicio_duracion = metricas.histograma(
+    "monitoreo_servicio_duracion_segundos", "Duración de los métodos de servicio (consultas incluidas)", ("metodo",))
+servicio_errores = metricas.contador(
+    "monitoreo_servicio_errores_total", "Excepciones lanzadas por los métodos de servicio", ("metodo",))
+mqtt_mensajes = metricas.contador(
+    "monitoreo_mqtt_mensajes_total", "Mensajes MQTT por resultado (recibido, parseado, fallido, persistido)",
+    ("resultado",))
+ingesta_retraso = metricas.histograma(
+    "monitoreo_ingesta_retraso_segundos", "Tiempo desde la recepción MQTT hasta el commit del lote",
+    limites=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+
+
+def instrumentado(cls):
+    """Decorador de clase: mide la duración y los errores de cada método público.
+
+    Cada método queda registrado como "<Clase>.<método>" en
+    monitoreo_servicio_duracion_segundos; funciona con métodos síncronos y
+    corrutinas. La serie se resuelve al decorar, así que medir cuesta dos
+    lecturas del reloj y un incremento.
+    """
+    for nombre, funcion in list(vars(cls).items()):
+        if nombre.startswith("_") or not inspect.isfunction(funcion):
+            continue
+        setattr(cls, nombre, _medir(funcion, f"{cls.__name__}.{nombre}"))
+    return cls
+
+
+def _medir(funcion, nombre: str):
+    duracion = servicio_duracion.con(nombre)
+    errores = servicio_errores.con(nombre)
+    reloj = time.perf_counter
+
+    if inspect.iscoroutinefunction(funcion):
+        @functools.wraps(funcion)
+        async def medida_async(*args, **kwargs):
+            inicio = reloj()
+            try:
+                return await funcion(*args, **kwargs)
+            except Exception:
+                errores.incrementar()
+                raise
+            finally:
+                duracion.observar(reloj() - inicio)
+        return medida_async
+
+    @functools.wraps(funcion)
+    def medida(*args, **kwargs):
+        inicio = reloj()
+        try:
+            if perfilador.activo:
+                # En el threadpool el hilo solo se puede atribuir a la petición desde dentro
+                with perfilador.en_hilo():
+                    return funcion(*args, **kwargs)
+            return funcion(*args, **kwargs)
+        except Exception:
+            errores.incrementar()
+            raise
+        finally:
+            duracion.observar(reloj() - inicio)
+    return medida
+
+
+class MiddlewareMetricas:
+    """Middleware ASGI: latencia y código de estado por método y plantilla de ruta.
+
+    Se usa la plantilla (/api/v1/pacientes/{paciente_id}) y no la URL para
+    que el número de series no crezca con los ids.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        inicio = time.perf_counter()
+        codigo = 500
+
+        async def enviar(mensaje):
+            nonlocal codigo
+            if mensaje["type"] == "http.response.start":
+                codigo = mensaje["status"]
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            ruta = scope.get("route")
+            plantilla = ruta.path if ruta is not None else "sin_ruta"
+            metodo = scope["method"]
+            http_duracion.con(metodo, plantilla).observar(time.perf_counter() - inicio)
+            http_peticiones.con(metodo, plantilla, codigo).incrementar()
+
+
+def _coleccion_sistema() -> Iterable[tuple]:
+    # Contadores que ya mantienen la caché, la cola de ingesta y el pool
+    from app.core.cache import cache_ultima_medicion
+    from app.database import estadisticas_pools
+    from app.mqtt.ingesta import cola_ingesta
+
+    cache = cache_ultima_medicion.estadisticas()
+    yield ("monitoreo_cache_consultas_total", "counter", "Consultas a la caché de última medición por resultado",
+           [({"resultado": "acierto"}, cache["aciertos"]), ({"resultado": "fallo"}, cache["fallos"])])
+    yield ("monitoreo_cache_ratio_aciertos", "gauge", "Aciertos / consultas de la caché de última medición",
+           [({}, cache["ratio_aciertos"])])
+    yield ("monitoreo_ingesta_cola_profundidad", "gauge", "Mediciones MQTT pendientes de escribir",
+           [({}, cola_ingesta.cola.qsize())])
+    yield ("monitoreo_ingesta_descartadas_total", "counter", "Mediciones MQTT descartadas por cola llena",
+           [({}, cola_ingesta.descartadas)])
+    pools = estadisticas_pools()
+    muestras = [({"motor": motor}, pool["utilizacion"]) for motor, pool in pools.items() if pool]
+    yield ("monitoreo_pool_utilizacion", "gauge", "Conexiones en uso / capacidad del pool", muestras)
+
+
+metricas.registrar_coleccion(_coleccion_sistema)
@@ -0,0 +1,56 @@
+from pathlib import Path
+from typing import Optional
+
+import sqlalchemy as sa
+from alembic import command
+from alembic.config import Config
+
+from app.core.config import settings
+
+DIRECTORIO_MIGRACIONES = Path(__file__).resolve().parent.parent / "migrations"
+
+
+def alembic_config(url: Optional[str] = None) -> Config:
+    """Configuración de Alembic sin depender de alembic.ini ni del directorio actual"""
+    config = Config()
+    config.set_main_option("script_location", str(DIRECTORIO_MIGRACIONES))
+    if url:
+        config.set_main_option("sqlalchemy.url", url)
+    return config
+
+
+def migrar(revision: str = "head", url: Optional[str] = None):
+    """Lleva el esquema a `revision` (por defecto la última)"""
+    command.upgrade(alembic_config(url), revision)
+
+
+def revertir(revision: str, url: Optional[str] = None):
+    command.downgrade(alembic_config(url), revision)
+
+
+def modo_signos(bind) -> Optional[str]:
+    """Modo de almacenamiento de los signos según el esquema (None si no hay tabla)"""
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("mediciones"):
+        return None
+    tipo = next(c["type"] for c in inspector.get_columns("mediciones") if c["name"] == "spo2")
+    if isinstance(tipo, sa.Integer):
+        return "entero"
+    if isinstance(tipo, sa.Float):
+        return "real"
+    return "decimal"
+
+
+def verificar_signos(bind):
+    """Falla si SIGNOS_ALMACENAMIENTO no coincide con el esquema migrado.
+
+    La aplicación escala los valores según la variable: con otro modo en la
+    base de datos todas las lecturas saldrían multiplicadas o divididas por 100.
+    """
+    modo = modo_signos(bind)
+    if modo is not None and modo != settings.signos_almacenamiento:
+        raise RuntimeError(
+            f"SIGNOS_ALMACENAMIENTO={settings.signos_almacenamiento} pero la base de datos guarda los "
+            f"signos en modo '{modo}': usa ese modo o convierte las columnas con "
+            "`alembic downgrade 0003` y `alembic upgrade head`"
+        )
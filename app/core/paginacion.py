@@ -0,0 +1,104 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query
+
+
+def codificar_cursor(valores: Sequence[Any]) -> str:
+    """Cursor opaco (base64 URL-safe) con los valores de la clave de orden"""
+    datos = [v.isoformat() if isinstance(v, datetime) else v for v in valores]
+    return base64.urlsafe_b64encode(json.dumps(datos, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str, columnas: Sequence) -> Tuple:
+    """Inverso de `codificar_cursor`. Lanza ValueError si el cursor no es válido"""
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        datos = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except Exception:
+        raise ValueError("Cursor inválido")
+    if not isinstance(datos, list) or len(datos) != len(columnas):
+        raise ValueError("Cursor inválido")
+
+    valores = []
+    for columna, valor in zip(columnas, datos):
+        if columna.type.python_type is datetime:
+            try:
+                valor = datetime.fromisoformat(valor)
+            except (TypeError, ValueError):
+                raise ValueError("Cursor inválido")
+        valores.append(valor)
+    return tuple(valores)
+
+
+def condicion_cursor(columnas: Sequence, valores: Sequence[Any], descendente: bool):
+    """Filas estrictamente posteriores a `valores` en el orden de `columnas`.
+
+    Equivale a `(c1, c2) < (v1, v2)`, pero expandido como
+    `c1 <= v1 AND (c1 < v1 OR (c1 = v1 AND c2 < v2))`: MySQL no usa el índice
+    como rango con comparaciones de filas, y sí con esta forma (la primera
+    condición acota el rango por la columna inicial del índice).
+    """
+    def mayor_o_menor(columna, valor):
+        return columna < valor if descendente else columna > valor
+
+    alternativas = [
+        and_(*[c == v for c, v in zip(columnas[:i], valores[:i])], mayor_o_menor(columnas[i], valores[i]))
+        for i in range(len(columnas))
+    ]
+    primera, valor = columnas[0], valores[0]
+    acotada = primera <= valor if descendente else primera >= valor
+    return and_(acotada, or_(*alternativas))
+
+
+def paginar(
+    query: Query,
+    columnas: Sequence,
+    limit: int,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    descendente: bool = True,
+) -> Tuple[List[Any], Optional[str], Optional[str]]:
+    """Paginación por clave (keyset) sobre `columnas`, p. ej. (timestamp, id).
+
+    Los cursores son posiciones en el orden del listado: `after` avanza a la
+    página siguiente y `before` vuelve a la anterior. Cada página cuesta lo
+    mismo que la primera porque filtra por la clave en lugar de usar OFFSET.
+    Devuelve (elementos, next_cursor, prev_cursor).
+    """
+    if after and before:
+        raise ValueError("Use solo uno de 'after' o 'before'")
+
+    cursor = after or before
+    # Retroceder equivale a recorrer en sentido inverso y dar la vuelta al resultado
+    hacia_atras = before is not None
+    orden_desc = descendente != hacia_atras
+
+    if cursor:
+        valores = decodificar_cursor(cursor, columnas)
+        query = query.filter(condicion_cursor(columnas, valores, orden_desc))
+
+    orden = [c.desc() if orden_desc else c.asc() for c in columnas]
+    filas = query.order_by(*orden).limit(limit + 1).all()
+
+    hay_mas = len(filas) > limit
+    filas = filas[:limit]
+    if hacia_atras:
+        filas.reverse()
+
+    def cursor_de(item) -> str:
+        return codificar_cursor([getattr(item, c.key) for c in columnas])
+
+    if not filas:
+        return filas, None, None
+
+    if hacia_atras:
+        next_cursor = cursor_de(filas[-1])
+        prev_cursor = cursor_de(filas[0]) if hay_mas else None
+    else:
+        next_cursor = cursor_de(filas[-1]) if hay_mas else None
+        prev_cursor = cursor_de(filas[0]) if cursor else None
+    return filas, next_cursor, prev_cursor
@@ -0,0 +1,356 @@
+import contextvars
+import functools
+import heapq
+import itertools
+import logging
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Perfil de la petición o lote en curso (se copia a los hilos del threadpool)
+_actual: contextvars.ContextVar[Optional["Perfil"]] = contextvars.ContextVar("perfil_actual", default=None)
+
+# Listas de parámetros: IN (?, ?, ?) y VALUES (...), (...) cuentan como la misma consulta
+_LISTA_PARAMETROS = re.compile(r"\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*,?)+\)")
+_REPETICIONES = re.compile(r"(\(\?\))(?:\s*,\s*\(\?\))+")
+
+
+@functools.lru_cache(maxsize=2048)
+def normalizar_sql(sentencia: str) -> str:
+    sql = _LISTA_PARAMETROS.sub("(?)", " ".join(sentencia.split()))
+    return _REPETICIONES.sub(r"\1", sql)
+
+
+class Perfil:
+    """Muestras de pila y consultas SQL de una petición (o lote de ingesta)"""
+
+    __slots__ = ("id", "nombre", "inicio", "fin", "duracion", "muestras", "consultas", "n_mas_1")
+
+    def __init__(self, id: int, nombre: str):
+        self.id = id
+        self.nombre = nombre
+        self.inicio = time.perf_counter()
+        self.fin = 0.0
+        self.duracion = 0.0
+        self.muestras: Counter = Counter()
+        self.consultas: Dict[str, list] = {}  # sql normalizada -> [veces, segundos]
+        self.n_mas_1: List[dict] = []
+
+    def registrar_consulta(self, sentencia: str, segundos: float):
+        clave = normalizar_sql(sentencia)
+        consulta = self.consultas.get(clave)
+        if consulta is None:
+            self.consultas[clave] = [1, segundos]
+        else:
+            consulta[0] += 1
+            consulta[1] += segundos
+
+    def resumen(self) -> dict:
+        return {
+            "id": self.id,
+            "nombre": self.nombre,
+            "duracion_ms": round(self.duracion * 1000, 3),
+            "consultas": sum(veces for veces, _ in self.consultas.values()),
+            "sql_ms": round(sum(segundos for _, segundos in self.consultas.values()) * 1000, 3),
+            "muestras": sum(self.muestras.values()),
+            "n_mas_1": self.n_mas_1,
+            "top_consultas": [
+                {"sql": sql[:300], "veces": veces, "ms": round(segundos * 1000, 3)}
+                for sql, (veces, segundos) in sorted(self.consultas.items(), key=lambda c: -c[1][1])[:5]
+            ],
+        }
+
+
+class Perfilador:
+    """Perfilado por muestreo de peticiones HTTP y del camino de ingesta.
+
+    Desactivado, el coste es comprobar `activo` en el middleware y en los
+    métodos de servicio: no hay hilo muestreador ni eventos de SQLAlchemy.
+    Activado (POST /api/v1/sistema/perfilado o SIGUSR2), una fracción
+    `muestreo` de las peticiones se perfila:
+
+    - un hilo toma cada `intervalo_ms` la pila de los hilos que ejecutan
+      una petición perfilada. En el bucle de eventos se reconoce la
+      petición por el marco de su middleware; en el threadpool y en los
+      hilos MQTT, por el registro del hilo mientras corre un método de
+      servicio o un bloque `perfilar()`;
+    - before/after_cursor_execute cuentan y cronometran las consultas de
+      la petición (contextvar) y marcan como N+1 la misma consulta repetida
+      `n_mas_1` veces o más;
+    - se conservan las `peores` peticiones más lentas de los últimos
+      `ventana` segundos, exportables como pilas colapsadas (flamegraph.pl,
+      speedscope).
+    """
+
+    def __init__(self):
+        self.activo = False
+        self.muestreo = settings.perfilado_muestreo
+        self.intervalo = settings.perfilado_intervalo_ms / 1000
+        self.peores_max = settings.perfilado_peores
+        self.ventana = settings.perfilado_ventana
+        self.umbral_n_mas_1 = settings.perfilado_n_mas_1
+        self._hasta: Optional[float] = None
+        self._ids = itertools.count(1)
+        self._hilos: Dict[int, Perfil] = {}
+        self._marcos: Dict[object, Perfil] = {}
+        self._peores: List[tuple] = []  # montículo (duración, id, perfil)
+        self._lock = threading.Lock()
+        self._hilo: Optional[threading.Thread] = None
+        self._detener = threading.Event()
+        self._motores = []
+        self._etiquetas: Dict[object, str] = {}
+        self.perfiladas = 0
+        self.muestras = 0
+        self.n_mas_1_detectados = 0
+
+    # --- Activación ---
+
+    def activar(self, muestreo: Optional[float] = None, duracion_s: Optional[float] = None):
+        if muestreo is not None:
+            self.muestreo = min(max(muestreo, 0.0), 1.0)
+        self._hasta = time.monotonic() + duracion_s if duracion_s else None
+        if self.activo:
+            return
+        self._escuchar_sql()
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._muestrear, name="perfilado", daemon=True)
+        self._hilo.start()
+        self.activo = True
+        logger.info(f"Perfilado activado (muestreo {self.muestreo:.0%})")
+
+    def desactivar(self):
+        if not self.activo:
+            return
+        self.activo = False
+        self._detener.set()
+        if self._hilo and self._hilo is not threading.current_thread():
+            self._hilo.join(2)
+        self._hilo = None
+        self._dejar_sql()
+        logger.info("Perfilado desactivado")
+
+    def alternar(self, *_):
+        """Manejador de SIGUSR2"""
+        self.desactivar() if self.activo else self.activar()
+
+    # --- Perfiles ---
+
+    def iniciar(self, nombre: str) -> Optional[Perfil]:
+        """Perfil nuevo si la petición sale en el muestreo"""
+        if not self.activo or random.random() >= self.muestreo:
+            return None
+        return Perfil(next(self._ids), nombre)
+
+    def terminar(self, perfil: Perfil):
+        perfil.fin = time.perf_counter()
+        perfil.duracion = perfil.fin - perfil.inicio
+        perfil.n_mas_1 = [
+            {"sql": sql[:300], "veces": veces, "ms": round(segundos * 1000, 3)}
+            for sql, (veces, segundos) in perfil.consultas.items() if veces >= self.umbral_n_mas_1
+        ]
+        if perfil.n_mas_1:
+            self.n_mas_1_detectados += 1
+            logger.warning(
+                f"Posible N+1 en {perfil.nombre}: "
+                + "; ".join(f"{c['veces']}× {c['sql'][:120]}" for c in perfil.n_mas_1)
+            )
+        with self._lock:
+            self.perfiladas += 1
+            self._purgar(perfil.fin)
+            entrada = (perfil.duracion, perfil.id, perfil)
+            if len(self._peores) < self.peores_max:
+                heapq.heappush(self._peores, entrada)
+            elif perfil.duracion > self._peores[0][0]:
+                heapq.heapreplace(self._peores, entrada)
+
+    @contextmanager
+    def perfilar(self, nombre: str):
+        """Perfila un bloque que ocupa su hilo de principio a fin (callback MQTT, lote de ingesta)"""
+        perfil = self.iniciar(nombre) if self.activo else None
+        if perfil is None:
+            yield None
+            return
+        token = _actual.set(perfil)
+        hilo = threading.get_ident()
+        previo = self._hilos.get(hilo)
+        self._hilos[hilo] = perfil
+        try:
+            yield perfil
+        finally:
+            self._restaurar(hilo, previo)
+            _actual.reset(token)
+            self.terminar(perfil)
+
+    @contextmanager
+    def en_hilo(self):
+        """Atribuye al perfil de la petición las muestras de este hilo mientras dura el bloque"""
+        perfil = _actual.get()
+        if perfil is None:
+            yield
+            return
+        hilo = threading.get_ident()
+        previo = self._hilos.get(hilo)
+        self._hilos[hilo] = perfil
+        try:
+            yield
+        finally:
+            self._restaurar(hilo, previo)
+
+    def _restaurar(self, hilo: int, previo: Optional[Perfil]):
+        if previo is None:
+            self._hilos.pop(hilo, None)
+        else:
+            self._hilos[hilo] = previo
+
+    # --- Consultas ---
+
+    def _escuchar_sql(self):
+        from app.database import engine, get_async_engine
+
+        self._motores = [engine]
+        if get_async_engine.cache_info().currsize:
+            self._motores.append(get_async_engine().sync_engine)
+        for motor in self._motores:
+            event.listen(motor, "before_cursor_execute", _antes_de_ejecutar)
+            event.listen(motor, "after_cursor_execute", _despues_de_ejecutar)
+
+    def _dejar_sql(self):
+        for motor in self._motores:
+            event.remove(motor, "before_cursor_execute", _antes_de_ejecutar)
+            event.remove(motor, "after_cursor_execute", _despues_de_ejecutar)
+        self._motores = []
+
+    # --- Muestreo ---
+
+    def _muestrear(self):
+        propio = threading.get_ident()
+        while not self._detener.wait(self.intervalo):
+            if self._hasta and time.monotonic() > self._hasta:
+                threading.Thread(target=self.desactivar, daemon=True).start()
+                return
+            if not self._hilos and not self._marcos:
+                continue
+            for hilo, marco in sys._current_frames().items():
+                if hilo == propio:
+                    continue
+                perfil, raiz = self._hilos.get(hilo), None
+                if perfil is None:
+                    # Bucle de eventos: la pila de la tarea en curso pasa por su middleware
+                    raiz = marco
+                    while raiz is not None and raiz not in self._marcos:
+                        raiz = raiz.f_back
+                    if raiz is None:
+                        continue
+                    perfil = self._marcos.get(raiz)
+                    if perfil is None:
+                        continue
+                perfil.muestras[self._colapsar(marco, raiz)] += 1
+                self.muestras += 1
+
+    def _colapsar(self, marco, raiz) -> str:
+        pila = []
+        while marco is not None:
+            codigo = marco.f_code
+            etiqueta = self._etiquetas.get(codigo)
+            if etiqueta is None:
+                etiqueta = f"{codigo.co_qualname} ({_ruta_corta(codigo.co_filename)}:{codigo.co_firstlineno})"
+                self._etiquetas[codigo] = etiqueta
+            pila.append(etiqueta)
+            if marco is raiz:
+                break
+            marco = marco.f_back
+        return ";".join(reversed(pila))
+
+    # --- Resultados ---
+
+    def _purgar(self, ahora: float):
+        vigentes = [entrada for entrada in self._peores if entrada[2].fin >= ahora - self.ventana]
+        if len(vigentes) != len(self._peores):
+            heapq.heapify(vigentes)
+            self._peores = vigentes
+
+    def peores(self) -> List[Perfil]:
+        with self._lock:
+            self._purgar(time.perf_counter())
+            return [perfil for _, _, perfil in sorted(self._peores, reverse=True)]
+
+    def pilas_colapsadas(self, perfil_id: Optional[int] = None) -> str:
+        """Pilas en formato colapsado ("a;b;c muestras"), una por línea"""
+        total: Counter = Counter()
+        for perfil in self.peores():
+            if perfil_id is None or perfil.id == perfil_id:
+                total.update(perfil.muestras)
+        return "".join(f"{pila} {muestras}\n" for pila, muestras in total.most_common())
+
+    def estadisticas(self) -> dict:
+        return {
+            "activo": self.activo,
+            "muestreo": self.muestreo,
+            "intervalo_ms": self.intervalo * 1000,
+            "ventana_segundos": self.ventana,
+            "restante_segundos": round(self._hasta - time.monotonic(), 1) if self.activo and self._hasta else None,
+            "perfiladas": self.perfiladas,
+            "muestras": self.muestras,
+            "n_mas_1_detectados": self.n_mas_1_detectados,
+            "peores": [perfil.resumen() for perfil in self.peores()],
+        }
+
+
+def _ruta_corta(archivo: str) -> str:
+    for marca in ("/site-packages/", "/app/"):
+        posicion = archivo.rfind(marca)
+        if posicion >= 0:
+            return archivo[posicion + 1:] if marca == "/app/" else archivo[posicion + len(marca):]
+    return archivo.rsplit("/", 1)[-1]
+
+
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    if _actual.get() is not None:
+        conn.info.setdefault("perfilado_inicio", []).append(time.perf_counter())
+
+
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    perfil = _actual.get()
+    inicios = conn.info.get("perfilado_inicio")
+    if perfil is not None and inicios:
+        perfil.registrar_consulta(statement, time.perf_counter() - inicios.pop())
+
+
+class MiddlewarePerfilado:
+    """Middleware ASGI: perfila una fracción de las peticiones mientras el perfilado está activo"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not perfilador.activo or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        perfil = perfilador.iniciar(f"{scope['method']} {scope['path']}")
+        if perfil is None:
+            return await self.app(scope, receive, send)
+        marco = sys._getframe()
+        token = _actual.set(perfil)
+        perfilador._marcos[marco] = perfil
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            perfilador._marcos.pop(marco, None)
+            _actual.reset(token)
+            ruta = scope.get("route")
+            if ruta is not None:
+                perfil.nombre = f"{scope['method']} {ruta.path}"
+            perfilador.terminar(perfil)
+
+
+perfilador = Perfilador()
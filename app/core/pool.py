@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class _PoolMedido:
+    """Mide la espera al pedir conexiones al pool.
+
+    `_do_get` es el punto donde el pool bloquea cuando no quedan conexiones
+    libres, así que el tiempo que pasa ahí es exactamente la espera de
+    checkout. Si la espera media sube y la utilización está cerca del 100 %,
+    el cuello de botella es el pool y no la base de datos.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock_metricas = threading.Lock()
+        self._esperas = deque(maxlen=1000)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+        self.en_uso_max = 0
+
+    def _do_get(self):
+        inicio = time.perf_counter()
+        try:
+            conexion = super()._do_get()
+        except PoolTimeoutError:
+            with self._lock_metricas:
+                self.timeouts += 1
+            raise
+        espera = time.perf_counter() - inicio
+        with self._lock_metricas:
+            self.checkouts += 1
+            self.espera_total += espera
+            self.espera_max = max(self.espera_max, espera)
+            self._esperas.append(espera)
+            self.en_uso_max = max(self.en_uso_max, self.checkedout())
+        return conexion
+
+    def estadisticas(self) -> dict:
+        with self._lock_metricas:
+            esperas = sorted(self._esperas)
+            checkouts = self.checkouts
+            espera_total = self.espera_total
+            espera_max = self.espera_max
+            timeouts = self.timeouts
+            en_uso_max = self.en_uso_max
+        capacidad = self.size() + max(self._max_overflow, 0)
+        en_uso = self.checkedout()
+        return {
+            "tamano": self.size(),
+            "max_overflow": self._max_overflow,
+            "timeout_segundos": self._timeout,
+            "en_uso": en_uso,
+            "en_uso_max": en_uso_max,
+            "libres": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "utilizacion": round(en_uso / capacidad, 4) if capacidad else None,
+            "checkouts": checkouts,
+            "timeouts": timeouts,
+            "espera_media_ms": round(espera_total * 1000 / checkouts, 3) if checkouts else None,
+            "espera_p99_ms": round(esperas[min(len(esperas) - 1, int(len(esperas) * 0.99))] * 1000, 3)
+            if esperas else None,
+            "espera_max_ms": round(espera_max * 1000, 3),
+        }
+
+
+class QueuePoolMedido(_PoolMedido, QueuePool):
+    """QueuePool con métricas de espera y utilización"""
+
+
+class AsyncQueuePoolMedido(_PoolMedido, AsyncAdaptedQueuePool):
+    """Equivalente para el motor asíncrono"""
+
+
+def estadisticas_pool(pool) -> Optional[dict]:
+    """Métricas del pool si es medido (SQLite en memoria usa otro tipo de pool)"""
+    if isinstance(pool, _PoolMedido):
+        return pool.estadisticas()
+    return None
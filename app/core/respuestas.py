@@ -0,0 +1,71 @@
+from decimal import Decimal
+from typing import Iterable, List, Sequence, Type
+
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel, PlainSerializer
+
+
+def columnas(modelo, esquema: Type[BaseModel]) -> list:
+    """Columnas del modelo ORM que corresponden a los campos del esquema de respuesta"""
+    return [getattr(modelo, campo) for campo in esquema.model_fields]
+
+
+def filas(query, esquema: Type[BaseModel]) -> List[tuple]:
+    """Ejecuta una consulta ORM seleccionando solo las columnas del esquema, como tuplas"""
+    modelo = query.column_descriptions[0]["entity"]
+    return query.with_entities(*columnas(modelo, esquema)).all()
+
+
+def seleccionar(stmt, esquema: Type[BaseModel]):
+    """Reduce un select(Modelo) a las columnas del esquema (para AsyncSession.execute)"""
+    modelo = stmt.column_descriptions[0]["entity"]
+    return stmt.with_only_columns(*columnas(modelo, esquema))
+
+
+def _por_defecto(valor):
+    # Igual que Pydantic: los Decimal se serializan como cadena ("98.50")
+    if isinstance(valor, Decimal):
+        return str(valor)
+    raise TypeError
+
+
+def _convertir(fila: Sequence, convertir: list) -> list:
+    fila = list(fila)
+    for i, funcion in convertir:
+        if fila[i] is not None:
+            fila[i] = funcion(fila[i])
+    return fila
+
+
+def _serializadores(esquema: Type[BaseModel]) -> list:
+    """Por campo, la función de serialización JSON declarada en el esquema (o None)"""
+    resultado = []
+    for campo in esquema.model_fields.values():
+        funcion = None
+        for meta in campo.metadata:
+            if isinstance(meta, PlainSerializer) and meta.when_used in ("json", "always"):
+                funcion = meta.func
+        resultado.append(funcion)
+    return resultado
+
+
+class RespuestaFilas(Response):
+    """Lista JSON generada directamente desde tuplas de columnas.
+
+    Evita crear instancias ORM y validarlas otra vez con `response_model`:
+    el cuerpo es el mismo que produciría FastAPI con el esquema, pero se
+    serializa con orjson en una sola pasada. La ruta conserva su
+    `response_model`, así que el esquema OpenAPI no cambia.
+    """
+    media_type = "application/json"
+
+    def __init__(self, filas: Iterable[Sequence], esquema: Type[BaseModel], **kwargs):
+        campos = tuple(esquema.model_fields)
+        serializadores = _serializadores(esquema)
+        convertir = [(i, f) for i, f in enumerate(serializadores) if f is not None]
+        if convertir:
+            # p. ej. los signos vitales (float) salen como "98.50", igual que con el esquema
+            filas = (_convertir(fila, convertir) for fila in filas)
+        contenido = orjson.dumps([dict(zip(campos, fila)) for fila in filas], default=_por_defecto)
+        super().__init__(contenido, **kwargs)
@@ -0,0 +1,86 @@
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TareaPeriodica:
+    """Trabajo que se repite cada `intervalo` segundos en un hilo propio.
+
+    Las subclases implementan `_pasada`; `ejecutar_ahora` la ejecuta una vez
+    (desde el hilo o desde un endpoint) y anota ejecuciones, errores y
+    duración. Con `inmediata` la primera pasada es al arrancar; si no, tras
+    el primer intervalo. Un intervalo <= 0 deja la tarea desactivada.
+    """
+
+    nombre = "tarea"
+    inmediata = True
+
+    def __init__(self, intervalo: float):
+        self.intervalo = intervalo
+        self._hilo: Optional[threading.Thread] = None
+        self._detener = threading.Event()
+        self.ejecuciones = 0
+        self.errores = 0
+        self.ultima_ejecucion: Optional[datetime] = None
+        self.ultima_duracion_s = 0.0
+        self.ultimo_error: Optional[str] = None
+
+    @property
+    def activa(self) -> bool:
+        return bool(self._hilo and self._hilo.is_alive())
+
+    def iniciar(self):
+        if self.intervalo <= 0 or self.activa:
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ejecutar, name=self.nombre, daemon=True)
+        self._hilo.start()
+
+    def detener(self, timeout: float = 10.0):
+        self._detener.set()
+        if self._hilo:
+            self._hilo.join(timeout)
+            self._hilo = None
+
+    def ejecutar_ahora(self):
+        inicio = time.perf_counter()
+        try:
+            resultado = self._pasada()
+            self.ultimo_error = None
+            return resultado
+        except Exception as e:
+            self.errores += 1
+            self.ultimo_error = str(e)
+            raise
+        finally:
+            self.ejecuciones += 1
+            self.ultima_ejecucion = datetime.now()
+            self.ultima_duracion_s = time.perf_counter() - inicio
+
+    def _pasada(self):
+        raise NotImplementedError
+
+    def estadisticas(self) -> dict:
+        return {
+            "activa": self.activa,
+            "intervalo_segundos": self.intervalo,
+            "ejecuciones": self.ejecuciones,
+            "errores": self.errores,
+            "ultima_ejecucion": self.ultima_ejecucion,
+            "ultima_duracion_s": round(self.ultima_duracion_s, 3),
+            "ultimo_error": self.ultimo_error,
+        }
+
+    def _ejecutar(self):
+        if not self.inmediata and self._detener.wait(self.intervalo):
+            return
+        while not self._detener.is_set():
+            try:
+                self.ejecutar_ahora()
+            except Exception as e:
+                logger.error(f"Error en la tarea {self.nombre}: {e}")
+            self._detener.wait(self.intervalo)
@@ -1,25 +1,27 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.v1 import pacientes, mediciones, alertas, predicciones
-from app.database import engine, Base
+from app.api.v1 import pacientes, mediciones, alertas, predicciones, sistema, tiempo_real
+from app.core.bus import bus
+from app.core.config import settings
+from app.core.metricas import MiddlewareMetricas, metricas
+from app.core.perfilado import MiddlewarePerfilado, perfilador
+from app.core.migraciones import migrar, verificar_signos
 from app.mqtt.client import MQTTClient
+from app.mqtt.lider import lider_ingesta
+from app.services.inferencia import tarea_predicciones
+from app.services.retencion import tarea_retencion
+from app.services.estado import estado_sistema
+from app.services.salud import monitor_salud
 from datetime import datetime
 import logging
-import psutil
-import os
-from fastapi.responses import HTMLResponse
-from sqlalchemy.orm import Session
-from app.database import SessionLocal, engine
-from app import models
-from fastapi import Depends
+import signal
+from fastapi.responses import HTMLResponse, PlainTextResponse, Response
+from app.database import cerrar_async_engine, engine
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Crear tablas
-Base.metadata.create_all(bind=engine)
-
 # Crear instancia de FastAPI
 app = FastAPI(
     title="Sistema de Monitoreo de Pacientes",
@@ -44,6 +46,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Perfilado bajo demanda: sin activar solo comprueba un booleano por petición
+app.add_middleware(MiddlewarePerfilado)
+
+# Latencia por ruta para /metrics (middleware ASGI puro, más externo que CORS)
+if settings.metricas_activas:
+    app.add_middleware(MiddlewareMetricas)
+
 # Cliente MQTT global
 mqtt_client = None
 
@@ -52,13 +61,62 @@ app.include_router(pacientes.router, prefix="/api/v1/pacientes", tags=["paciente
 app.include_router(mediciones.router, prefix="/api/v1/mediciones", tags=["mediciones"])
 app.include_router(alertas.router, prefix="/api/v1/alertas", tags=["alertas"])
 app.include_router(predicciones.router, prefix="/api/v1/predicciones", tags=["predicciones"])
+app.include_router(sistema.router, prefix="/api/v1/sistema", tags=["sistema"])
+app.include_router(tiempo_real.router, prefix="/api/v1/tiempo-real", tags=["tiempo real"])
+
+if settings.api_async:
+    from app.api.v1.aio import pacientes as pacientes_aio, mediciones as mediciones_aio
+    from app.api.v1.aio import alertas as alertas_aio, predicciones as predicciones_aio
+    _rutas_sync = list(app.router.routes)
+    app.router.routes.clear()
+    app.include_router(pacientes_aio.router, prefix="/api/v1/pacientes", tags=["pacientes"])
+    app.include_router(mediciones_aio.router, prefix="/api/v1/mediciones", tags=["mediciones"])
+    app.include_router(alertas_aio.router, prefix="/api/v1/alertas", tags=["alertas"])
+    app.include_router(predicciones_aio.router, prefix="/api/v1/predicciones", tags=["predicciones"])
+    # Cada ruta asíncrona ocupa el lugar de su equivalente síncrona (mismo path y métodos),
+    # conservando el orden de resolución; las que no tienen versión asíncrona (batch,
+    # páginas) siguen atendiéndose en el threadpool
+    _rutas_async = {
+        (ruta.path, frozenset(ruta.methods)): ruta for ruta in app.router.routes
+    }
+    app.router.routes[:] = [
+        _rutas_async.get((ruta.path, frozenset(getattr(ruta, "methods", None) or ())), ruta)
+        for ruta in _rutas_sync
+    ]
 
 @app.on_event("startup")
 async def startup_event():
     """Inicializar servicios al arranque"""
+    if settings.migrar_al_iniciar:
+        migrar()
+    verificar_signos(engine)
+    bus.iniciar()
+    estado_sistema.iniciar()
+    monitor_salud.iniciar()
+    if settings.perfilado_activo:
+        perfilador.activar()
+    try:
+        # kill -USR2 <pid> activa o desactiva el perfilado
+        signal.signal(signal.SIGUSR2, perfilador.alternar)
+    except (AttributeError, ValueError):
+        pass  # Windows o fuera del hilo principal
+    
+    if settings.mqtt_modo_workers == "compartida":
+        _arrancar_mqtt()
+    # Con varios workers solo el elegido ejecuta esto (ahora o cuando herede el cerrojo)
+    lider_ingesta.iniciar(_arrancar_lider)
+
+def _arrancar_lider():
+    tarea_retencion.iniciar()
+    tarea_predicciones.iniciar()
+    if settings.mqtt_modo_workers == "lider":
+        _arrancar_mqtt()
+
+def _arrancar_mqtt():
     global mqtt_client
     try:
         mqtt_client = MQTTClient()
+        monitor_salud.mqtt = mqtt_client
         mqtt_client.start()
         logger.info("Servicios iniciados correctamente")
     except Exception as e:
@@ -71,132 +129,41 @@ async def shutdown_event():
     if mqtt_client:
         mqtt_client.stop()
         logger.info("Servicios detenidos correctamente")
+    tarea_retencion.detener()
+    tarea_predicciones.detener()
+    lider_ingesta.detener()
+    estado_sistema.detener()
+    monitor_salud.detener()
+    perfilador.desactivar()
+    bus.detener()
+    await cerrar_async_engine()
 
 
-def get_db_stats(db: Session = Depends(SessionLocal)):
-    """Función auxiliar para obtener estadísticas de la base de datos"""
-    return {
-        "pacientes": db.query(models.Paciente).count(),
-        "mediciones": db.query(models.Medicion).count(),
-        "alertas": db.query(models.Alerta).count(),
-        "predicciones": db.query(models.Prediccion).count()
-    }
+@app.get("/", response_class=HTMLResponse)
+def root():
+    """Endpoint raíz que muestra información relevante del sistema (precalculada, ver app/services/estado.py).
 
-@app.get("/")
-#async def root(db: Session = Depends(SessionLocal)):
-async def root():
-    """Endpoint raíz que muestra información relevante del sistema"""
-    
-    # Obtener información del sistema
-    process = psutil.Process(os.getpid())
-    memory_usage = process.memory_info().rss / 1024 / 1024  # en MB
-    cpu_usage = psutil.cpu_percent()
-    uptime = datetime.now() - start_time
-    
-    # Obtener estadísticas de la base de datos (ejemplo)
-    db_stats = {
-        "pacientes": 0,
-        "mediciones": 0,
-        "alertas": 0,
-        "predicciones": 0
-    }
-    
-    try:
-        db_stats = get_db_stats(db)
-    except Exception as e:
-        print(f"Error obteniendo estadísticas de DB: {e}")
-        db_stats = {
-            "pacientes": "Error",
-            "mediciones": "Error",
-            "alertas": "Error",
-            "predicciones": "Error"
-        }    
-    # Generar HTML con la información
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>Sistema de Monitoreo de Pacientes</title>
-        <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; max-width: 800px; margin: 0 auto; padding: 20px; }}
-            h1 {{ color: #2c3e50; border-bottom: 2px solid #3498db; }}
-            .card {{ background: #f9f9f9; border-left: 4px solid #3498db; padding: 15px; margin: 15px 0; }}
-            .stats {{ display: grid; grid-template-columns: repeat(2, 1fr); gap: 10px; }}
-            .stat {{ background: #e8f4fc; padding: 10px; border-radius: 5px; }}
-            .endpoints {{ margin-top: 20px; }}
-            .endpoint {{ margin: 10px 0; padding: 10px; background: #f0f0f0; border-radius: 5px; }}
-            .critical {{ color: #e74c3c; }}
-            .warning {{ color: #f39c12; }}
-            .ok {{ color: #27ae60; }}
-        </style>
-    </head>
-    <body>
-        <h1>🏥 Sistema de Monitoreo de Pacientes</h1>
-        
-        <div class="card">
-            <h2>📊 Estadísticas del Sistema</h2>
-            <div class="stats">
-                <div class="stat">
-                    <h3>Uso de Recursos</h3>
-                    <p>Memoria: <strong>{memory_usage:.2f} MB</strong></p>
-                    <p>CPU: <strong>{cpu_usage}%</strong></p>
-                    <p>Tiempo activo: <strong>{str(uptime).split('.')[0]}</strong></p>
-                </div>
-                
-                <div class="stat">
-                    <h3>📦 Datos Almacenados</h3>
-                    <p>Pacientes: <strong>{db_stats['pacientes']}</strong></p>
-                    <p>Mediciones: <strong>{db_stats['mediciones']}</strong></p>
-                    <p>Alertas: <strong>{db_stats['alertas']}</strong></p>
-                    <p>Predicciones: <strong>{db_stats['predicciones']}</strong></p>
-                </div>
-            </div>
-        </div>
-        
-        <div class="card">
-            <h2>🚀 Endpoints Disponibles</h2>
-            <div class="endpoints">
-                <div class="endpoint">
-                    <strong>GET /api/v1/pacientes/</strong> - Listar todos los pacientes
-                </div>
-                <div class="endpoint">
-                    <strong>POST /api/v1/pacientes/</strong> - Crear nuevo paciente
-                </div>
-                <div class="endpoint">
-                    <strong>GET /api/v1/mediciones/paciente/{id}</strong> - Obtener mediciones
-                </div>
-                <div class="endpoint">
-                    <strong>POST /api/v1/mediciones/</strong> - Registrar medición
-                </div>
-                <div class="endpoint">
-                    <strong>GET /api/v1/alertas/activas</strong> - Alertas recientes
-                </div>
-                <div class="endpoint">
-                    <strong>GET /api/v1/predicciones/paciente/{id}</strong> - Predicciones
-                </div>
-            </div>
-        </div>
-        
-        <div class="card">
-            <h2>🔗 Enlaces Rápidos</h2>
-            <ul>
-                <li><a href="/docs" target="_blank">📚 Documentación interactiva (Swagger)</a></li>
-                <li><a href="/redoc" target="_blank">📖 Documentación alternativa (ReDoc)</a></li>
-                <li><a href="/health" target="_blank">🩺 Estado del sistema</a></li>
-            </ul>
-        </div>
-        
-        <footer>
-            <p>🔄 Última actualización: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</p>
-        </footer>
-    </body>
-    </html>
+    Síncrono: si la copia ha caducado `vigente` la refresca con una consulta,
+    y eso debe ocurrir en el threadpool, no en el bucle de eventos.
     """
-    return HTMLResponse(content=html_content)
+    return HTMLResponse(content=estado_sistema.vigente().html)
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "timestamp": "2024-01-01T00:00:00"}
+    """Liveness: responde mientras el proceso y su bucle de eventos atienden peticiones"""
+    return {
+        "status": "healthy",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "tiempo_activo_s": int((datetime.now() - monitor_salud.inicio).total_seconds()),
+    }
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 503 si alguna comprobación supera su presupuesto (resultado en memoria, ver app/services/salud.py)"""
+    codigo, cuerpo = monitor_salud.respuesta()
+    return Response(content=cuerpo, status_code=codigo, media_type="application/json")
 
-# Variable para registrar el tiempo de inicio
-start_time = datetime.now()
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Métricas del proceso en formato de texto de Prometheus (ver app/core/metricas.py)"""
+    return PlainTextResponse(metricas.exponer(), media_type="text/plain; version=0.0.4; charset=utf-8")
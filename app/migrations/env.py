@@ -0,0 +1,54 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine
+
+from app.database import Base, engine
+from app import models  # noqa: F401  (registra las tablas en Base.metadata)
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def _url():
+    # Una URL explícita (p. ej. desde los benchmarks) tiene prioridad sobre la de la app
+    return config.get_main_option("sqlalchemy.url") or engine.url.render_as_string(hide_password=False)
+
+
+def run_migrations_offline():
+    context.configure(
+        url=_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    conexion = config.attributes.get("connection")
+    if conexion is not None:
+        _ejecutar(conexion)
+        return
+
+    motor = create_engine(_url()) if config.get_main_option("sqlalchemy.url") else engine
+    with motor.connect() as conexion:
+        _ejecutar(conexion)
+
+
+def _ejecutar(conexion):
+    # render_as_batch permite ALTER TABLE en SQLite
+    context.configure(connection=conexion, target_metadata=target_metadata, render_as_batch=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,72 @@
+"""Esquema inicial (pacientes, mediciones, alertas, predicciones)
+
+Equivalente a scripts/init.sql. Las tablas que ya existan (bases creadas
+con init.sql o con create_all) se respetan, de modo que una base existente
+puede pasar a estar versionada con un simple `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+BIGINT_PK = sa.BigInteger().with_variant(sa.Integer(), "sqlite")
+
+
+def upgrade():
+    # En modo offline (--sql) no hay conexión que inspeccionar
+    existentes = set() if op.get_context().as_sql else set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "pacientes" not in existentes:
+        op.create_table(
+            "pacientes",
+            sa.Column("id", sa.Integer(), primary_key=True, index=True),
+            sa.Column("nombre", sa.String(100), nullable=False),
+            sa.Column("edad", sa.Integer(), nullable=False),
+            sa.Column("genero", sa.Enum("M", "F"), nullable=False),
+            sa.Column("activo", sa.Boolean(), default=True),
+        )
+
+    if "mediciones" not in existentes:
+        op.create_table(
+            "mediciones",
+            sa.Column("id", BIGINT_PK, primary_key=True, index=True),
+            sa.Column("id_paciente", sa.Integer(), sa.ForeignKey("pacientes.id"), nullable=False),
+            sa.Column("timestamp", sa.TIMESTAMP(), server_default=sa.func.current_timestamp()),
+            sa.Column("spo2", sa.DECIMAL(5, 2), nullable=False),
+            sa.Column("bpm", sa.Integer(), nullable=False),
+            sa.Column("temperatura", sa.DECIMAL(4, 2), nullable=False),
+        )
+
+    if "alertas" not in existentes:
+        op.create_table(
+            "alertas",
+            sa.Column("id", BIGINT_PK, primary_key=True, index=True),
+            sa.Column("id_paciente", sa.Integer(), sa.ForeignKey("pacientes.id"), nullable=False),
+            sa.Column("tipo", sa.Enum("verde", "amarilla", "roja"), nullable=False),
+            sa.Column("mensaje", sa.String(255), nullable=False),
+            sa.Column("timestamp", sa.TIMESTAMP(), server_default=sa.func.current_timestamp()),
+        )
+
+    if "predicciones" not in existentes:
+        op.create_table(
+            "predicciones",
+            sa.Column("id", BIGINT_PK, primary_key=True, index=True),
+            sa.Column("id_paciente", sa.Integer(), sa.ForeignKey("pacientes.id"), nullable=False),
+            sa.Column("enfermedad", sa.String(100), nullable=False),
+            sa.Column("probabilidad", sa.DECIMAL(5, 4), nullable=False),
+            sa.Column("timestamp", sa.TIMESTAMP(), server_default=sa.func.current_timestamp()),
+        )
+
+
+def downgrade():
+    op.drop_table("predicciones")
+    op.drop_table("alertas")
+    op.drop_table("mediciones")
+    op.drop_table("pacientes")
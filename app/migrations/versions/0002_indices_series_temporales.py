@@ -0,0 +1,32 @@
+"""Índices compuestos para las tablas de series temporales
+
+Todas las lecturas por paciente filtran por id_paciente y ordenan por
+timestamp DESC; las alertas activas filtran por tipo y ordenan por timestamp.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDICES = [
+    ("ix_mediciones_paciente_timestamp", "mediciones", ["id_paciente", "timestamp"]),
+    ("ix_alertas_paciente_timestamp", "alertas", ["id_paciente", "timestamp"]),
+    ("ix_alertas_tipo_timestamp", "alertas", ["tipo", "timestamp"]),
+    ("ix_predicciones_paciente_timestamp", "predicciones", ["id_paciente", "timestamp"]),
+]
+
+
+def upgrade():
+    for nombre, tabla, columnas in INDICES:
+        op.create_index(nombre, tabla, columnas)
+
+
+def downgrade():
+    for nombre, tabla, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name=tabla)
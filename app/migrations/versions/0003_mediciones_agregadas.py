@@ -0,0 +1,40 @@
+"""Tabla de agregados de mediciones (minuto, hora y día)
+
+La clave primaria (resolucion, id_paciente, inicio) sirve tanto para el
+upsert incremental de la ingesta como para leer una serie por rango.
+Los datos ya existentes se agregan con scripts/reconstruir_agregados.py.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "mediciones_agregadas",
+        sa.Column("resolucion", sa.String(8), primary_key=True),
+        sa.Column("id_paciente", sa.Integer(), sa.ForeignKey("pacientes.id"), primary_key=True),
+        sa.Column("inicio", sa.DateTime(), primary_key=True),
+        sa.Column("n", sa.Integer(), nullable=False),
+        sa.Column("spo2_min", sa.DECIMAL(5, 2), nullable=False),
+        sa.Column("spo2_max", sa.DECIMAL(5, 2), nullable=False),
+        sa.Column("spo2_suma", sa.Float(), nullable=False),
+        sa.Column("bpm_min", sa.Integer(), nullable=False),
+        sa.Column("bpm_max", sa.Integer(), nullable=False),
+        sa.Column("bpm_suma", sa.Float(), nullable=False),
+        sa.Column("temperatura_min", sa.DECIMAL(4, 2), nullable=False),
+        sa.Column("temperatura_max", sa.DECIMAL(4, 2), nullable=False),
+        sa.Column("temperatura_suma", sa.Float(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("mediciones_agregadas")
@@ -0,0 +1,89 @@
+"""Signos vitales en formato compacto (SIGNOS_ALMACENAMIENTO)
+
+Convierte spo2/temperatura de mediciones y los mínimos/máximos de
+mediciones_agregadas al modo configurado: SMALLINT con el valor x100
+("entero"), FLOAT ("real") o el DECIMAL original ("decimal"). El modo de
+partida se lee del esquema, así que para cambiar de modo basta con
+`alembic downgrade 0003` (vuelve a DECIMAL) y `alembic upgrade head`.
+
+En MySQL cada cambio de tipo reescribe la tabla.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# tabla -> [(columna, precision, escala)]
+COLUMNAS = {
+    "mediciones": [("spo2", 5, 2), ("temperatura", 4, 2)],
+    "mediciones_agregadas": [
+        ("spo2_min", 5, 2), ("spo2_max", 5, 2), ("temperatura_min", 4, 2), ("temperatura_max", 4, 2),
+    ],
+}
+
+
+def _tipo(modo, precision, escala):
+    if modo == "entero":
+        return sa.SmallInteger()
+    if modo == "real":
+        return sa.Float()
+    return sa.DECIMAL(precision, escala)
+
+
+def _modo_actual(tabla, columna):
+    tipo = next(c["type"] for c in sa.inspect(op.get_bind()).get_columns(tabla) if c["name"] == columna)
+    if isinstance(tipo, sa.Integer):
+        return "entero"
+    if isinstance(tipo, sa.Float):
+        return "real"
+    return "decimal"
+
+
+def _convertir(tabla, destino):
+    columnas = [c for c in COLUMNAS[tabla] if _modo_actual(tabla, c[0]) != destino]
+    if not columnas:
+        return
+    origen = {nombre: _modo_actual(tabla, nombre) for nombre, _, _ in columnas}
+
+    # Paso intermedio por un DECIMAL con dos dígitos más, que admite tanto el
+    # valor real como el escalado: SQLite copia la tabla con CAST y un cambio
+    # directo a SMALLINT truncaría 98.50 a 98
+    with op.batch_alter_table(tabla) as batch:
+        for nombre, precision, escala in columnas:
+            batch.alter_column(nombre, type_=sa.DECIMAL(precision + 2, escala), existing_nullable=False)
+
+    t = sa.table(tabla, *(sa.column(nombre) for nombre, _, _ in columnas))
+    valores = {}
+    for nombre, _, escala in columnas:
+        valor = t.c[nombre]
+        if origen[nombre] == "entero":
+            valor = valor / (10.0 ** escala)
+        if destino == "entero":
+            valor = sa.func.round(valor * (10 ** escala))
+        if valor is not t.c[nombre]:
+            valores[nombre] = valor
+    if valores:
+        op.execute(t.update().values(**valores))
+
+    with op.batch_alter_table(tabla) as batch:
+        for nombre, precision, escala in columnas:
+            batch.alter_column(nombre, type_=_tipo(destino, precision, escala), existing_nullable=False)
+
+
+def upgrade():
+    for tabla in COLUMNAS:
+        _convertir(tabla, settings.signos_almacenamiento)
+
+
+def downgrade():
+    for tabla in COLUMNAS:
+        _convertir(tabla, "decimal")
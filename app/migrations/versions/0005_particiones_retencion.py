@@ -0,0 +1,101 @@
+"""Particiones por periodo (MySQL) o índice por timestamp para la retención
+
+Con PARTICIONADO_MYSQL=true en MySQL, mediciones y alertas pasan a estar
+particionadas por RANGE (UNIX_TIMESTAMP(timestamp)), una partición por
+PARTICION_PERIODO más `pmax`. MySQL exige que la columna de partición forme
+parte de la clave primaria y no admite claves foráneas en tablas
+particionadas: la clave pasa a ser (id, timestamp) y se eliminan las FK a
+pacientes. La conversión reescribe las tablas.
+
+En el resto de casos se añade un índice por timestamp para que la retención
+borre los periodos caducados por rangos sin recorrer la tabla.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+TABLAS = ("mediciones", "alertas")
+
+
+# Copias fijas de los cálculos de periodos de app/services/retencion.py: la
+# revisión no debe cambiar si el servicio cambia más adelante
+def _inicio_periodo(ts, periodo):
+    ts = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    return ts.replace(day=1) if periodo == "mes" else ts
+
+
+def _siguiente_periodo(inicio, periodo):
+    if periodo == "dia":
+        return inicio + timedelta(days=1)
+    return (inicio.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _definiciones(desde, hasta, periodo):
+    """Cláusulas PARTITION de cada periodo entre `desde` y `hasta`, más pmax"""
+    definiciones = []
+    inicio = _inicio_periodo(desde, periodo)
+    while inicio < hasta:
+        fin = _siguiente_periodo(inicio, periodo)
+        nombre = inicio.strftime("p%Y%m" if periodo == "mes" else "p%Y%m%d")
+        definiciones.append(f"PARTITION {nombre} VALUES LESS THAN (UNIX_TIMESTAMP('{fin:%Y-%m-%d %H:%M:%S}'))")
+        inicio = fin
+    definiciones.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    return definiciones
+
+
+def _particionar():
+    return op.get_bind().dialect.name == "mysql" and settings.particionado_mysql
+
+
+def _particionada(tabla):
+    return bool(op.get_bind().execute(sa.text(
+        "SELECT COUNT(*) FROM information_schema.PARTITIONS WHERE TABLE_SCHEMA = DATABASE()"
+        " AND TABLE_NAME = :tabla AND PARTITION_NAME IS NOT NULL"
+    ), {"tabla": tabla}).scalar())
+
+
+def upgrade():
+    if not _particionar():
+        for tabla in TABLAS:
+            op.create_index(f"ix_{tabla}_timestamp", tabla, ["timestamp"])
+        return
+
+    periodo = settings.particion_periodo
+    limite = _inicio_periodo(datetime.now(), periodo)
+    for _ in range(settings.particiones_futuras + 1):
+        limite = _siguiente_periodo(limite, periodo)
+
+    inspector = sa.inspect(op.get_bind())
+    for tabla in TABLAS:
+        for fk in inspector.get_foreign_keys(tabla):
+            op.drop_constraint(fk["name"], tabla, type_="foreignkey")
+        op.execute(f"ALTER TABLE {tabla} MODIFY `timestamp` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP")
+        op.execute(f"ALTER TABLE {tabla} DROP PRIMARY KEY, ADD PRIMARY KEY (id, `timestamp`)")
+
+        minimo = op.get_bind().execute(sa.text(f"SELECT MIN(`timestamp`) FROM {tabla}")).scalar()
+        definiciones = _definiciones(minimo or datetime.now(), limite, periodo)
+        op.execute(
+            f"ALTER TABLE {tabla} PARTITION BY RANGE (UNIX_TIMESTAMP(`timestamp`)) ({', '.join(definiciones)})"
+        )
+
+
+def downgrade():
+    for tabla in TABLAS:
+        if op.get_bind().dialect.name == "mysql" and _particionada(tabla):
+            op.execute(f"ALTER TABLE {tabla} REMOVE PARTITIONING")
+            op.execute(f"ALTER TABLE {tabla} DROP PRIMARY KEY, ADD PRIMARY KEY (id)")
+            op.create_foreign_key(f"{tabla}_ibfk_1", tabla, "pacientes", ["id_paciente"], ["id"])
+        else:
+            op.drop_index(f"ix_{tabla}_timestamp", table_name=tabla)
@@ -0,0 +1,24 @@
+"""Índice (resolucion, inicio) en los agregados
+
+El motor de predicciones lee la ventana reciente de todos los pacientes a la
+vez; sin este índice la consulta recorre todos los agregados de la
+resolución.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_mediciones_agregadas_resolucion_inicio", "mediciones_agregadas", ["resolucion", "inicio"])
+
+
+def downgrade():
+    op.drop_index("ix_mediciones_agregadas_resolucion_inicio", table_name="mediciones_agregadas")
@@ -2,3 +2,4 @@ from .paciente import Paciente
 from .medicion import Medicion
 from .alerta import Alerta
 from .prediccion import Prediccion
+from .agregado import MedicionAgregada
@@ -0,0 +1,30 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
+from app.database import Base, SignoVital
+
+class MedicionAgregada(Base):
+    """Mínimo, máximo, suma y número de lecturas por paciente e intervalo.
+    
+    Se guarda la suma (no la media) para poder acumular lotes nuevos sobre
+    una fila existente; la media es suma / n.
+    """
+    __tablename__ = "mediciones_agregadas"
+    
+    # 'minuto', 'hora' o 'dia'
+    resolucion = Column(String(8), primary_key=True)
+    id_paciente = Column(Integer, ForeignKey("pacientes.id"), primary_key=True)
+    inicio = Column(DateTime, primary_key=True)
+    n = Column(Integer, nullable=False)
+    spo2_min = Column(SignoVital(5, 2), nullable=False)
+    spo2_max = Column(SignoVital(5, 2), nullable=False)
+    spo2_suma = Column(Float, nullable=False)
+    bpm_min = Column(Integer, nullable=False)
+    bpm_max = Column(Integer, nullable=False)
+    bpm_suma = Column(Float, nullable=False)
+    temperatura_min = Column(SignoVital(4, 2), nullable=False)
+    temperatura_max = Column(SignoVital(4, 2), nullable=False)
+    temperatura_suma = Column(Float, nullable=False)
+    
+    __table_args__ = (
+        # Ventana reciente de todos los pacientes (motor de predicciones)
+        Index("ix_mediciones_agregadas_resolucion_inicio", "resolucion", "inicio"),
+    )
@@ -1,12 +1,18 @@
-from sqlalchemy import Column, Integer, BigInteger, String, Enum, TIMESTAMP, ForeignKey
+from sqlalchemy import Column, Integer, String, Enum, TIMESTAMP, ForeignKey, Index
 from sqlalchemy.sql import func
-from app.database import Base
+from app.database import Base, BigIntegerPK
 
 class Alerta(Base):
     __tablename__ = "alertas"
     
-    id = Column(BigInteger, primary_key=True, index=True)
+    id = Column(BigIntegerPK, primary_key=True, index=True)
     id_paciente = Column(Integer, ForeignKey("pacientes.id"), nullable=False)
     tipo = Column(Enum('verde', 'amarilla', 'roja'), nullable=False)
     mensaje = Column(String(255), nullable=False)
     timestamp = Column(TIMESTAMP, default=func.current_timestamp())
+    
+    __table_args__ = (
+        Index("ix_alertas_paciente_timestamp", "id_paciente", "timestamp"),
+        # Alertas activas: filtro por tipo y orden por timestamp DESC
+        Index("ix_alertas_tipo_timestamp", "tipo", "timestamp"),
+    )
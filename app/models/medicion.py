@@ -1,13 +1,18 @@
-from sqlalchemy import Column, Integer, BigInteger, DECIMAL, TIMESTAMP, ForeignKey
+from sqlalchemy import Column, Integer, TIMESTAMP, ForeignKey, Index
 from sqlalchemy.sql import func
-from app.database import Base
+from app.database import Base, BigIntegerPK, SignoVital
 
 class Medicion(Base):
     __tablename__ = "mediciones"
     
-    id = Column(BigInteger, primary_key=True, index=True)
+    id = Column(BigIntegerPK, primary_key=True, index=True)
     id_paciente = Column(Integer, ForeignKey("pacientes.id"), nullable=False)
     timestamp = Column(TIMESTAMP, default=func.current_timestamp())
-    spo2 = Column(DECIMAL(5, 2), nullable=False)
+    spo2 = Column(SignoVital(5, 2), nullable=False)
     bpm = Column(Integer, nullable=False)
-    temperatura = Column(DECIMAL(4, 2), nullable=False)
+    temperatura = Column(SignoVital(4, 2), nullable=False)
+    
+    # Todas las lecturas filtran por paciente y ordenan por timestamp DESC
+    __table_args__ = (
+        Index("ix_mediciones_paciente_timestamp", "id_paciente", "timestamp"),
+    )
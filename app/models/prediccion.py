@@ -1,12 +1,16 @@
-from sqlalchemy import Column, Integer, BigInteger, String, DECIMAL, TIMESTAMP, ForeignKey
+from sqlalchemy import Column, Integer, String, DECIMAL, TIMESTAMP, ForeignKey, Index
 from sqlalchemy.sql import func
-from app.database import Base
+from app.database import Base, BigIntegerPK
 
 class Prediccion(Base):
     __tablename__ = "predicciones"
     
-    id = Column(BigInteger, primary_key=True, index=True)
+    id = Column(BigIntegerPK, primary_key=True, index=True)
     id_paciente = Column(Integer, ForeignKey("pacientes.id"), nullable=False)
     enfermedad = Column(String(100), nullable=False)
     probabilidad = Column(DECIMAL(5, 4), nullable=False)
     timestamp = Column(TIMESTAMP, default=func.current_timestamp())
+    
+    __table_args__ = (
+        Index("ix_predicciones_paciente_timestamp", "id_paciente", "timestamp"),
+    )
@@ -1,67 +1,93 @@
 import paho.mqtt.client as mqtt
 from app.core.config import settings
-from app.database import SessionLocal
-from app.services.mediciones import MedicionService
+from app.core.metricas import mqtt_mensajes
+from app.core.perfilado import perfilador
+from app.mqtt.ingesta import ColaIngesta, cola_ingesta
 from app.schemas.medicion import MedicionCreate
+from datetime import datetime
+from typing import Optional
 import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Series resueltas una vez: on_message corre por cada mensaje
+_recibidos = mqtt_mensajes.con("recibido")
+_parseados = mqtt_mensajes.con("parseado")
+_fallidos = mqtt_mensajes.con("fallido")
+
 class MQTTClient:
-    def __init__(self):
+    def __init__(self, cola: Optional[ColaIngesta] = None):
+        # Las mediciones se encolan y se guardan por lotes fuera del hilo de red
+        self.cola = cola or cola_ingesta
         self.client = mqtt.Client()
         self.client.on_connect = self.on_connect
         self.client.on_message = self.on_message
         self.client.on_disconnect = self.on_disconnect
+        # Estado de la conexión para /ready (lo escribe el hilo de red de paho)
+        self.conectado = False
     
     def on_connect(self, client, userdata, flags, rc):
         if rc == 0:
+            self.conectado = True
             logger.info("Conectado al broker MQTT")
-            # Suscribirse a todos los tópicos de mediciones
-            client.subscribe(f"{settings.mqtt_topic_base}/+/mediciones")
+            # Suscribirse a todos los tópicos de mediciones; en modo "compartida"
+            # el broker reparte cada mensaje a un solo worker del grupo
+            topico = f"{settings.mqtt_topic_base}/+/mediciones"
+            if settings.mqtt_modo_workers == "compartida":
+                topico = f"$share/{settings.mqtt_grupo_compartido}/{topico}"
+            client.subscribe(topico)
         else:
             logger.error(f"Error conectando al broker MQTT: {rc}")
     
     def on_message(self, client, userdata, msg):
+        _recibidos.incrementar()
+        if perfilador.activo:
+            with perfilador.perfilar("mqtt:on_message"):
+                return self._procesar(msg)
+        self._procesar(msg)
+
+    def _procesar(self, msg):
         try:
-            # Parsear el tópico para obtener el ID del paciente
-            topic_parts = msg.topic.split('/')
-            if len(topic_parts) >= 3 and topic_parts[2] == 'mediciones':
-                paciente_id = int(topic_parts[1])
+            # Parsear el tópico (<base>/<id_paciente>/mediciones) para obtener el ID del paciente
+            topic_parts = msg.topic[len(settings.mqtt_topic_base) + 1:].split('/')
+            if len(topic_parts) >= 2 and topic_parts[1] == 'mediciones':
+                paciente_id = int(topic_parts[0])
                 
                 # Parsear los datos del mensaje
                 data = json.loads(msg.payload.decode())
                 
-                # Crear la medición en la base de datos
+                # Conservar la hora de recepción: la escritura ocurre más tarde
                 medicion_data = MedicionCreate(
                     id_paciente=paciente_id,
                     spo2=data['spo2'],
                     bpm=data['bpm'],
-                    temperatura=data['temperatura']
+                    temperatura=data['temperatura'],
+                    timestamp=datetime.now()
                 )
+                _parseados.incrementar()
                 
-                db = SessionLocal()
-                try:
-                    service = MedicionService(db)
-                    service.create(medicion_data)
-                    logger.info(f"Medición guardada para paciente {paciente_id}")
-                finally:
-                    db.close()
+                if not self.cola.encolar(medicion_data):
+                    logger.warning(f"Cola de ingesta llena, medición descartada para paciente {paciente_id}")
                     
         except Exception as e:
+            _fallidos.incrementar()
             logger.error(f"Error procesando mensaje MQTT: {e}")
     
     def on_disconnect(self, client, userdata, rc):
+        self.conectado = False
         logger.info("Desconectado del broker MQTT")
     
     def start(self):
+        self.cola.iniciar()
         self.client.connect(settings.mqtt_broker_host, settings.mqtt_broker_port, 60)
         self.client.loop_start()
     
     def stop(self):
         self.client.loop_stop()
         self.client.disconnect()
+        # Vaciar la cola después de dejar de recibir mensajes
+        self.cola.detener()
     
     def publish_alert(self, paciente_id: int, alert_data: dict):
         """Publica una alerta via MQTT"""
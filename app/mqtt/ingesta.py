@@ -0,0 +1,162 @@
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional
+
+from app.core.config import settings
+from app.core.metricas import ingesta_retraso, mqtt_mensajes
+from app.core.perfilado import perfilador
+from app.database import SessionLocal
+from app.schemas.medicion import MedicionCreate
+from app.services.ingesta import IngestaService
+
+logger = logging.getLogger(__name__)
+
+_persistidos = mqtt_mensajes.con("persistido")
+
+
+class ColaIngesta:
+    """Cola acotada de mediciones con un escritor en segundo plano.
+
+    `encolar` se llama desde el hilo de red de paho y nunca toca la base de
+    datos. El hilo escritor vacía la cola en micro-lotes, cerrando cada lote
+    al llegar a `lote_max` elementos o al vencer `lote_intervalo` segundos,
+    y guarda cada lote (mediciones y alertas) con INSERT multi-fila y un
+    solo commit.
+    """
+
+    def __init__(
+        self,
+        cola_max: int = settings.mqtt_cola_max,
+        lote_max: int = settings.mqtt_lote_max,
+        lote_intervalo: float = settings.mqtt_lote_intervalo,
+        bloqueo: float = settings.mqtt_cola_bloqueo,
+    ):
+        self.cola: "queue.Queue[MedicionCreate]" = queue.Queue(maxsize=cola_max)
+        self.cola_max = cola_max
+        self.lote_max = lote_max
+        self.lote_intervalo = lote_intervalo
+        self.bloqueo = bloqueo
+
+        self._hilo: Optional[threading.Thread] = None
+        self._detener = threading.Event()
+
+        # Contadores: cada uno lo escribe un único hilo (paho o el escritor)
+        self.recibidas = 0
+        self.descartadas = 0
+        self.bloqueos = 0
+        self.profundidad_max = 0
+        self.lotes_escritos = 0
+        self.filas_escritas = 0
+        self.filas_fallidas = 0
+        self.ultimo_lote_ms = 0.0
+
+    def encolar(self, medicion: MedicionCreate) -> bool:
+        """Añade una medición a la cola. Devuelve False si se descartó por cola llena"""
+        self.recibidas += 1
+        try:
+            self.cola.put_nowait(medicion)
+        except queue.Full:
+            # Contrapresión: frenar brevemente el hilo de red antes de descartar
+            self.bloqueos += 1
+            try:
+                self.cola.put(medicion, timeout=self.bloqueo)
+            except queue.Full:
+                self.descartadas += 1
+                return False
+
+        profundidad = self.cola.qsize()
+        if profundidad > self.profundidad_max:
+            self.profundidad_max = profundidad
+        return True
+
+    def iniciar(self):
+        if self._hilo and self._hilo.is_alive():
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ejecutar, name="ingesta-mqtt", daemon=True)
+        self._hilo.start()
+
+    def detener(self, timeout: float = 10.0):
+        """Detiene el escritor después de vaciar lo que quede en la cola"""
+        self._detener.set()
+        if self._hilo:
+            self._hilo.join(timeout)
+            self._hilo = None
+
+    def estadisticas(self) -> dict:
+        return {
+            "profundidad": self.cola.qsize(),
+            "capacidad": self.cola_max,
+            "profundidad_max": self.profundidad_max,
+            "recibidas": self.recibidas,
+            "descartadas": self.descartadas,
+            "bloqueos": self.bloqueos,
+            "lotes_escritos": self.lotes_escritos,
+            "filas_escritas": self.filas_escritas,
+            "filas_fallidas": self.filas_fallidas,
+            "ultimo_lote_ms": round(self.ultimo_lote_ms, 3),
+            "activo": bool(self._hilo and self._hilo.is_alive()),
+        }
+
+    def _tomar_lote(self) -> List[MedicionCreate]:
+        """Espera el primer elemento y acumula hasta llenar el lote o vencer la ventana"""
+        try:
+            primero = self.cola.get(timeout=self.lote_intervalo)
+        except queue.Empty:
+            return []
+
+        lote = [primero]
+        limite = time.monotonic() + self.lote_intervalo
+        while len(lote) < self.lote_max:
+            restante = limite - time.monotonic()
+            try:
+                if restante <= 0:
+                    lote.append(self.cola.get_nowait())
+                else:
+                    lote.append(self.cola.get(timeout=restante))
+            except queue.Empty:
+                break
+        return lote
+
+    def _ejecutar(self):
+        while not self._detener.is_set() or not self.cola.empty():
+            lote = self._tomar_lote()
+            if lote:
+                self._escribir(lote)
+
+    def _escribir(self, lote: List[MedicionCreate]):
+        with perfilador.perfilar("ingesta:lote"):
+            self._escribir_lote(lote)
+
+    def _escribir_lote(self, lote: List[MedicionCreate]):
+        inicio = time.perf_counter()
+        db = SessionLocal()
+        try:
+            # Mismo camino que POST /mediciones/batch: descarta pacientes
+            # inexistentes, clasifica alertas en bloque y guarda en una transacción
+            resultado = IngestaService(db).registrar_lote(lote)
+        except Exception as e:
+            self.filas_fallidas += len(lote)
+            logger.error(f"Error escribiendo lote MQTT: {e}")
+            return
+        finally:
+            db.close()
+            self.ultimo_lote_ms = (time.perf_counter() - inicio) * 1000
+
+        # El lote ya está guardado: las métricas no deben marcarlo como fallido
+        self.filas_escritas += resultado.guardadas
+        self.filas_fallidas += resultado.rechazadas
+        self.lotes_escritos += 1
+        if resultado.rechazadas:
+            logger.warning(f"{resultado.rechazadas} mediciones MQTT rechazadas en el lote")
+        # Retraso recepción → commit de cada medición del lote
+        ahora = datetime.now()
+        ingesta_retraso.observar_varios((ahora - m.timestamp).total_seconds() for m in lote)
+        _persistidos.incrementar(resultado.guardadas)
+
+
+# Instancia compartida por el cliente MQTT y la API
+cola_ingesta = ColaIngesta()
@@ -0,0 +1,101 @@
+import logging
+import os
+import tempfile
+import threading
+from typing import Callable, Optional
+
+from app.core.bus import bus
+from app.core.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin elección, cada proceso ingiere
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class LiderIngesta:
+    """Elige el único worker que ingiere de MQTT y ejecuta las tareas periódicas.
+
+    Con varios workers, todos suscritos al mismo tópico insertarían cada
+    lectura N veces, y la retención y las predicciones se ejecutarían N
+    veces. El líder es el proceso que tiene el cerrojo exclusivo (flock) de
+    `ruta`: el sistema lo libera si el proceso muere, y los demás lo
+    reintentan cada `reintento` segundos, así que otro toma el relevo.
+    Solo hay elección con varios workers (BUS_URL o INGESTA_CERROJO); con un
+    proceso `iniciar` llama directamente a `al_ganar`.
+    """
+
+    def __init__(self, ruta: Optional[str] = None, reintento: float = 5.0, eleccion: Optional[bool] = None):
+        self.ruta = ruta or settings.ingesta_cerrojo or os.path.join(tempfile.gettempdir(), "monitoreo-ingesta.lock")
+        self.reintento = reintento
+        if eleccion is None:
+            eleccion = bool(bus.distribuido or settings.ingesta_cerrojo)
+        self.eleccion = eleccion and fcntl is not None
+        self.es_lider = False
+        self._archivo = None
+        self._hilo: Optional[threading.Thread] = None
+        self._detener = threading.Event()
+
+    @property
+    def delegada(self) -> bool:
+        """La ingesta MQTT la hace otro worker (en modo "compartida" la hacen todos)"""
+        return self.eleccion and not self.es_lider and settings.mqtt_modo_workers == "lider"
+
+    def iniciar(self, al_ganar: Callable[[], None]):
+        if not self.eleccion:
+            al_ganar()
+            return
+        self._detener.clear()
+        if self._intentar():
+            al_ganar()
+            return
+        logger.info(f"Otro worker es el líder; proceso {os.getpid()} en espera")
+        self._hilo = threading.Thread(target=self._esperar, args=(al_ganar,), name="lider-ingesta", daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+        if self._hilo:
+            self._hilo.join(2)
+            self._hilo = None
+        if self._archivo is not None:
+            # Cerrar el descriptor libera el cerrojo para otro worker
+            self._archivo.close()
+            self._archivo = None
+        self.es_lider = False
+
+    def _intentar(self) -> bool:
+        archivo = open(self.ruta, "a+")
+        try:
+            fcntl.flock(archivo.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            archivo.close()
+            return False
+        archivo.seek(0)
+        archivo.truncate()
+        archivo.write(str(os.getpid()))
+        archivo.flush()
+        self._archivo = archivo
+        self.es_lider = True
+        logger.info(f"Proceso {os.getpid()} elegido líder (ingesta MQTT y tareas periódicas)")
+        return True
+
+    def _esperar(self, al_ganar: Callable[[], None]):
+        while not self._detener.wait(self.reintento):
+            if self._intentar():
+                al_ganar()
+                return
+
+    def estadisticas(self) -> dict:
+        return {
+            "eleccion": self.eleccion,
+            "modo": settings.mqtt_modo_workers,
+            "lider": self.es_lider if self.eleccion else None,
+            "cerrojo": self.ruta if self.eleccion else None,
+            "pid": os.getpid(),
+        }
+
+
+lider_ingesta = LiderIngesta()
@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from datetime import datetime
 from enum import Enum
+from typing import Optional
 
 class TipoAlertaEnum(str, Enum):
     verde = "verde"
@@ -13,6 +14,7 @@ class AlertaBase(BaseModel):
 
 class AlertaCreate(AlertaBase):
     id_paciente: int
+    timestamp: Optional[datetime] = None
 
 class AlertaResponse(AlertaBase):
     id: int
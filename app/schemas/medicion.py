@@ -1,14 +1,36 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, PlainSerializer
 from datetime import datetime
-from decimal import Decimal
+from typing import Annotated, List, Optional
+
+
+def formatear_signo(valor: float) -> str:
+    """Mismo texto que producía el campo Decimal: dos decimales ("98.50")"""
+    return f"{valor:.2f}"
+
+
+# float en Python (sin coste de Decimal); acepta número, cadena o Decimal como
+# antes y en JSON se mantiene la cadena "98.50". Se redondea a dos decimales al guardar
+Signo = Annotated[
+    float,
+    Field(allow_inf_nan=False),
+    PlainSerializer(formatear_signo, return_type=str, when_used="json"),
+]
+
 
 class MedicionBase(BaseModel):
-    spo2: Decimal
+    spo2: Signo
     bpm: int
-    temperatura: Decimal
+    temperatura: Signo
 
 class MedicionCreate(MedicionBase):
+    # Límites de entrada: caben en cualquier SIGNOS_ALMACENAMIENTO (SMALLINT x100
+    # llega a 327.67), así que una lectura fuera de rango se rechaza sola en
+    # lugar de romper el lote. Las respuestas no se acotan: sirven filas antiguas
+    spo2: Annotated[Signo, Field(ge=0, le=100)]
+    temperatura: Annotated[Signo, Field(ge=0, le=50)]
     id_paciente: int
+    # Momento de la lectura; si se omite se usa la hora del servidor al insertar
+    timestamp: Optional[datetime] = None
 
 class MedicionResponse(MedicionBase):
     id: int
@@ -17,3 +39,37 @@ class MedicionResponse(MedicionBase):
     
     class Config:
         from_attributes = True
+
+class MedicionBatchItem(BaseModel):
+    indice: int
+    estado: str
+    error: Optional[str] = None
+
+class MedicionBatchResponse(BaseModel):
+    total: int
+    guardadas: int
+    rechazadas: int
+    alertas: int
+    resultados: List[MedicionBatchItem]
+
+class PuntoSerie(BaseModel):
+    """Un intervalo de la serie (o una lectura cruda, con n = 1)"""
+    inicio: datetime
+    n: int
+    spo2_min: float
+    spo2_max: float
+    spo2_avg: float
+    bpm_min: float
+    bpm_max: float
+    bpm_avg: float
+    temperatura_min: float
+    temperatura_max: float
+    temperatura_avg: float
+
+class SerieMediciones(BaseModel):
+    id_paciente: int
+    # 'cruda', 'minuto', 'hora' o 'dia'
+    resolucion: str
+    desde: datetime
+    hasta: datetime
+    puntos: List[PuntoSerie]
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+from typing import Generic, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+class Pagina(BaseModel, Generic[T]):
+    items: List[T]
+    # Pasar como `after` para la página siguiente y como `before` para la anterior
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
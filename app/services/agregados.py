@@ -0,0 +1,215 @@
+from sqlalchemy import delete, func
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.agregado import MedicionAgregada
+from app.models.medicion import Medicion
+from app.schemas.medicion import PuntoSerie, SerieMediciones
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
+
+# Resoluciones de menor a mayor, con la duración de cada intervalo en segundos
+RESOLUCIONES = {"minuto": 60, "hora": 3600, "dia": 86400}
+CRUDA = "cruda"
+
+_SIGNOS = ("spo2", "bpm", "temperatura")
+_CLAVE = ("resolucion", "id_paciente", "inicio")
+
+
+def inicio_intervalo(ts: datetime, resolucion: str) -> datetime:
+    if resolucion == "minuto":
+        return ts.replace(second=0, microsecond=0)
+    if resolucion == "hora":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def fila_creacion(medicion) -> dict:
+    """Columnas de una MedicionCreate para el INSERT y los agregados.
+
+    Sin timestamp se toma la hora actual en segundos, como el CURRENT_TIMESTAMP
+    del servidor, para conocerlo sin releer la fila tras insertarla.
+    """
+    fila = medicion.model_dump(exclude_none=True)
+    fila.setdefault("timestamp", datetime.now().replace(microsecond=0))
+    return fila
+
+
+def agregar(filas: Iterable[dict]) -> List[dict]:
+    """Agrupa mediciones (id_paciente, timestamp y signos) en filas de agregados"""
+    grupos: Dict[Tuple[str, int, datetime], dict] = {}
+    for fila in filas:
+        ts = fila["timestamp"]
+        for resolucion in RESOLUCIONES:
+            clave = (resolucion, fila["id_paciente"], inicio_intervalo(ts, resolucion))
+            grupo = grupos.get(clave)
+            if grupo is None:
+                grupo = grupos[clave] = dict(zip(_CLAVE, clave), n=0)
+                for signo in _SIGNOS:
+                    grupo[f"{signo}_min"] = grupo[f"{signo}_max"] = fila[signo]
+                    grupo[f"{signo}_suma"] = 0.0
+            grupo["n"] += 1
+            for signo in _SIGNOS:
+                valor = fila[signo]
+                if valor < grupo[f"{signo}_min"]:
+                    grupo[f"{signo}_min"] = valor
+                elif valor > grupo[f"{signo}_max"]:
+                    grupo[f"{signo}_max"] = valor
+                grupo[f"{signo}_suma"] += float(valor)
+    return list(grupos.values())
+
+
+# Sentencia de upsert compilable una vez por dialecto
+_upserts: Dict[str, object] = {}
+
+
+def sentencia_upsert(dialecto: str):
+    """INSERT ... ON CONFLICT/ON DUPLICATE KEY que suma los agregados a los existentes.
+
+    La sentencia no lleva valores: se ejecuta con la lista de agregados como
+    parámetros (executemany), así se compila una sola vez y queda en caché.
+    """
+    stmt = _upserts.get(dialecto)
+    if stmt is not None:
+        return stmt
+
+    tabla = MedicionAgregada.__table__
+    if dialecto == "mysql":
+        stmt = mysql.insert(tabla)
+        nuevo, menor, mayor = stmt.inserted, func.least, func.greatest
+    elif dialecto in ("sqlite", "postgresql"):
+        modulo = sqlite if dialecto == "sqlite" else postgresql
+        stmt = modulo.insert(tabla)
+        nuevo = stmt.excluded
+        # En SQLite min()/max() con dos argumentos son escalares
+        menor, mayor = (func.min, func.max) if dialecto == "sqlite" else (func.least, func.greatest)
+    else:
+        raise ValueError(f"Dialecto sin soporte para agregados: {dialecto}")
+
+    cambios = {"n": tabla.c.n + nuevo.n}
+    for signo in _SIGNOS:
+        cambios[f"{signo}_min"] = menor(tabla.c[f"{signo}_min"], nuevo[f"{signo}_min"])
+        cambios[f"{signo}_max"] = mayor(tabla.c[f"{signo}_max"], nuevo[f"{signo}_max"])
+        cambios[f"{signo}_suma"] = tabla.c[f"{signo}_suma"] + nuevo[f"{signo}_suma"]
+
+    if dialecto == "mysql":
+        stmt = stmt.on_duplicate_key_update(**cambios)
+    else:
+        stmt = stmt.on_conflict_do_update(index_elements=list(_CLAVE), set_=cambios)
+    _upserts[dialecto] = stmt
+    return stmt
+
+
+def elegir_resolucion(desde: datetime, hasta: datetime, puntos: int) -> str:
+    """La resolución más fina que no supera `puntos` intervalos en el rango"""
+    segundos = (hasta - desde).total_seconds() / max(puntos, 1)
+    for resolucion, duracion in RESOLUCIONES.items():
+        if duracion >= segundos:
+            return resolucion
+    return "dia"
+
+
+class AgregadoService:
+    """Agregados por minuto, hora y día para gráficas de rangos largos"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def acumular(self, filas: List[dict]):
+        """Suma un lote de mediciones a los agregados (dentro de la transacción del llamador)"""
+        if settings.agregados_activos and filas:
+            self._upsert(filas)
+
+    def reconstruir(self, paciente_id: Optional[int] = None, desde: Optional[datetime] = None,
+                    lote: int = 10000, hasta: Optional[datetime] = None) -> int:
+        """Recalcula los agregados a partir de las mediciones crudas.
+
+        `desde` y `hasta` (exclusivo) se redondean al inicio del día para no
+        dejar intervalos a medias. Devuelve el número de mediciones procesadas.
+        """
+        borrar = delete(MedicionAgregada)
+        query = self.db.query(Medicion.id_paciente, Medicion.timestamp, Medicion.spo2,
+                              Medicion.bpm, Medicion.temperatura)
+        if paciente_id is not None:
+            borrar = borrar.where(MedicionAgregada.id_paciente == paciente_id)
+            query = query.filter(Medicion.id_paciente == paciente_id)
+        if desde is not None:
+            desde = inicio_intervalo(desde, "dia")
+            borrar = borrar.where(MedicionAgregada.inicio >= desde)
+            query = query.filter(Medicion.timestamp >= desde)
+        if hasta is not None:
+            hasta = inicio_intervalo(hasta, "dia")
+            borrar = borrar.where(MedicionAgregada.inicio < hasta)
+            query = query.filter(Medicion.timestamp < hasta)
+        self.db.execute(borrar)
+
+        procesadas = 0
+        filas = []
+        for fila in query.yield_per(lote):
+            filas.append(fila._asdict())
+            if len(filas) >= lote:
+                self._upsert(filas)
+                procesadas += len(filas)
+                filas = []
+        if filas:
+            self._upsert(filas)
+            procesadas += len(filas)
+        self.db.commit()
+        return procesadas
+
+    def _upsert(self, filas: List[dict]):
+        agregados = agregar(filas)
+        if agregados:
+            self.db.execute(sentencia_upsert(self.db.bind.dialect.name), agregados)
+
+    def get_serie(self, paciente_id: int, desde: datetime, hasta: datetime, puntos: int) -> SerieMediciones:
+        """Serie de un rango con a lo sumo ~`puntos` puntos.
+
+        Si el rango tiene pocas lecturas se devuelven las crudas; si no, los
+        agregados de la resolución más fina que cabe en `puntos`.
+        """
+        if (hasta - desde).total_seconds() <= puntos:
+            crudas = self._crudas(paciente_id, desde, hasta, puntos + 1)
+            if len(crudas) <= puntos:
+                return SerieMediciones(id_paciente=paciente_id, resolucion=CRUDA,
+                                       desde=desde, hasta=hasta, puntos=crudas)
+
+        resolucion = elegir_resolucion(desde, hasta, puntos)
+        filas = (self.db.query(MedicionAgregada)
+                 .filter(MedicionAgregada.resolucion == resolucion)
+                 .filter(MedicionAgregada.id_paciente == paciente_id)
+                 .filter(MedicionAgregada.inicio >= inicio_intervalo(desde, resolucion))
+                 .filter(MedicionAgregada.inicio <= hasta)
+                 .order_by(MedicionAgregada.inicio)
+                 .all())
+        return SerieMediciones(
+            id_paciente=paciente_id, resolucion=resolucion, desde=desde, hasta=hasta,
+            puntos=[_punto_agregado(f) for f in filas]
+        )
+
+    def _crudas(self, paciente_id: int, desde: datetime, hasta: datetime, limite: int) -> List[PuntoSerie]:
+        filas = (self.db.query(Medicion)
+                 .filter(Medicion.id_paciente == paciente_id)
+                 .filter(Medicion.timestamp >= desde)
+                 .filter(Medicion.timestamp <= hasta)
+                 .order_by(Medicion.timestamp)
+                 .limit(limite)
+                 .all())
+        return [_punto_crudo(m) for m in filas]
+
+
+def _punto_agregado(fila: MedicionAgregada) -> PuntoSerie:
+    punto = {"inicio": fila.inicio, "n": fila.n}
+    for signo in _SIGNOS:
+        punto[f"{signo}_min"] = float(getattr(fila, f"{signo}_min"))
+        punto[f"{signo}_max"] = float(getattr(fila, f"{signo}_max"))
+        punto[f"{signo}_avg"] = getattr(fila, f"{signo}_suma") / fila.n
+    return PuntoSerie(**punto)
+
+
+def _punto_crudo(medicion: Medicion) -> PuntoSerie:
+    punto = {"inicio": medicion.timestamp, "n": 1}
+    for signo in _SIGNOS:
+        valor = float(getattr(medicion, signo))
+        punto[f"{signo}_min"] = punto[f"{signo}_max"] = punto[f"{signo}_avg"] = valor
+    return PuntoSerie(**punto)
@@ -0,0 +1,95 @@
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.eventos import hub_eventos
+from app.core.metricas import instrumentado
+from app.core.respuestas import seleccionar
+from app.models.alerta import Alerta
+from app.schemas.alerta import AlertaCreate, AlertaResponse
+from app.schemas.medicion import MedicionResponse
+from app.services.estado_alertas import estado_alertas
+from app.services.reglas import TIPOS_ALERTA, motor_reglas
+from app.services.tendencias import detector_tendencias
+from typing import Dict, Iterable, List, Optional
+
+@instrumentado
+class AlertaServiceAsync:
+    """Versión asíncrona de AlertaService"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def create(self, alerta: AlertaCreate) -> Alerta:
+        db_alerta = Alerta(**alerta.model_dump(exclude_none=True))
+        self.db.add(db_alerta)
+        await self.db.commit()
+        await self.db.refresh(db_alerta)
+        estado_alertas.confirmar([alerta])
+        hub_eventos.publicar_alerta(AlertaResponse.model_validate(db_alerta))
+        return db_alerta
+    
+    async def registrar(self, alerta: AlertaCreate) -> Optional[Alerta]:
+        """Guarda la alerta solo si es anormal o cambia el estado del paciente"""
+        if estado_alertas.solo_transiciones and not estado_alertas.conocido(alerta.id_paciente):
+            previos = await self.get_ultimos_tipos([alerta.id_paciente])
+            estado_alertas.sembrar(alerta.id_paciente, previos.get(alerta.id_paciente))
+        # El estado previo ya está en memoria: no hace falta consultar la base de datos
+        reserva = {}
+        if not estado_alertas.filtrar([alerta], lambda ids: {}, reserva):
+            return None
+        try:
+            return await self.create(alerta)
+        except Exception:
+            estado_alertas.liberar(reserva)
+            raise
+    
+    async def get_ultimos_tipos(self, paciente_ids: Iterable[int]) -> Dict[int, str]:
+        """Tipo de la última alerta (por timestamp, id) de cada paciente, en una sola consulta"""
+        ultimos = (select(Alerta.id_paciente, func.max(Alerta.timestamp).label("ts"))
+                   .where(Alerta.id_paciente.in_(list(paciente_ids)))
+                   .group_by(Alerta.id_paciente)
+                   .subquery())
+        filas = await self.db.execute(
+            select(Alerta.id_paciente, Alerta.tipo)
+            .join(ultimos, (Alerta.id_paciente == ultimos.c.id_paciente) & (Alerta.timestamp == ultimos.c.ts))
+            .order_by(Alerta.id))
+        return {id_paciente: tipo for id_paciente, tipo in filas}
+    
+    def _select_by_paciente(self, paciente_id: int, skip: int, limit: int):
+        return (select(Alerta)
+                .where(Alerta.id_paciente == paciente_id)
+                .order_by(Alerta.timestamp.desc())
+                .offset(skip)
+                .limit(limit))
+    
+    async def get_by_paciente(self, paciente_id: int, skip: int = 0, limit: int = 100) -> List[Alerta]:
+        return list(await self.db.scalars(self._select_by_paciente(paciente_id, skip, limit)))
+    
+    async def get_by_paciente_filas(self, paciente_id: int, skip: int = 0, limit: int = 100) -> List[tuple]:
+        return list(await self.db.execute(seleccionar(self._select_by_paciente(paciente_id, skip, limit), AlertaResponse)))
+    
+    def _select_active_alerts(self):
+        return (select(Alerta)
+                .where(Alerta.tipo.in_(['amarilla', 'roja']))
+                .order_by(Alerta.timestamp.desc())
+                .limit(50))
+    
+    async def get_active_alerts(self) -> List[Alerta]:
+        """Obtiene las alertas más recientes de cada paciente"""
+        return list(await self.db.scalars(self._select_active_alerts()))
+    
+    async def get_active_alerts_filas(self) -> List[tuple]:
+        return list(await self.db.execute(seleccionar(self._select_active_alerts(), AlertaResponse)))
+    
+    def evaluate_medicion(self, medicion: MedicionResponse) -> AlertaCreate:
+        """Evalúa una medición con la tabla de reglas compartida (no toca la base de datos).
+
+        Es CPU y toma el cerrojo del detector de tendencias: desde el bucle de
+        eventos se llama con `run_in_threadpool`.
+        """
+        severidad, mensaje = motor_reglas.evaluar_una(medicion.spo2, medicion.bpm, medicion.temperatura)
+        alerta = AlertaCreate(
+            id_paciente=medicion.id_paciente,
+            tipo=TIPOS_ALERTA[severidad],
+            mensaje=mensaje
+        )
+        return detector_tendencias.aplicar([medicion], [alerta])[0]
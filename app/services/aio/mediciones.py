@@ -0,0 +1,96 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import cache_ultima_medicion
+from app.core.config import settings
+from app.core.eventos import hub_eventos
+from app.core.metricas import instrumentado
+from app.core.respuestas import seleccionar
+from app.models.medicion import Medicion
+from app.schemas.medicion import MedicionCreate, MedicionResponse
+from app.services.agregados import agregar, fila_creacion, sentencia_upsert
+from typing import List, Optional
+from datetime import datetime
+import random
+
+@instrumentado
+class MedicionServiceAsync:
+    """Versión asíncrona de MedicionService"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def create(self, medicion: MedicionCreate) -> Medicion:
+        fila = fila_creacion(medicion)
+        db_medicion = Medicion(**fila)
+        self.db.add(db_medicion)
+        if settings.agregados_activos:
+            await self.db.execute(sentencia_upsert(self.db.bind.dialect.name), agregar([fila]))
+        await self.db.commit()
+        await self.db.refresh(db_medicion)
+        respuesta = MedicionResponse.model_validate(db_medicion)
+        cache_ultima_medicion.actualizar(respuesta)
+        cache_ultima_medicion.difundir([respuesta])
+        hub_eventos.publicar_medicion(respuesta)
+        return db_medicion
+    
+    def _select_by_paciente(self, paciente_id: int, skip: int, limit: int):
+        return (select(Medicion)
+                .where(Medicion.id_paciente == paciente_id)
+                .order_by(Medicion.timestamp.desc())
+                .offset(skip)
+                .limit(limit))
+    
+    async def get_by_paciente(self, paciente_id: int, skip: int = 0, limit: int = 100) -> List[Medicion]:
+        return list(await self.db.scalars(self._select_by_paciente(paciente_id, skip, limit)))
+    
+    async def get_by_paciente_filas(self, paciente_id: int, skip: int = 0, limit: int = 100) -> List[tuple]:
+        stmt = seleccionar(self._select_by_paciente(paciente_id, skip, limit), MedicionResponse)
+        return list(await self.db.execute(stmt))
+    
+    async def get_latest_by_paciente(self, paciente_id: int) -> Optional[Medicion]:
+        return await self.db.scalar(
+            select(Medicion)
+            .where(Medicion.id_paciente == paciente_id)
+            .order_by(Medicion.timestamp.desc())
+            .limit(1)
+        )
+    
+    async def get_ultima(self, paciente_id: int) -> Optional[MedicionResponse]:
+        """Última medición servida desde la caché; ante un fallo se lee y se cachea"""
+        medicion = cache_ultima_medicion.obtener(paciente_id)
+        if medicion is None:
+            db_medicion = await self.get_latest_by_paciente(paciente_id)
+            if db_medicion is None:
+                return None
+            medicion = MedicionResponse.model_validate(db_medicion)
+            cache_ultima_medicion.actualizar(medicion)
+        return medicion
+    
+    async def get_by_date_range(
+        self, paciente_id: int, start_date: datetime, end_date: datetime, limit: Optional[int] = None
+    ) -> List[Medicion]:
+        return list(await self.db.scalars(self._select_by_date_range(paciente_id, start_date, end_date, limit)))
+    
+    async def get_by_date_range_filas(
+        self, paciente_id: int, start_date: datetime, end_date: datetime, limit: Optional[int] = None
+    ) -> List[tuple]:
+        stmt = seleccionar(self._select_by_date_range(paciente_id, start_date, end_date, limit), MedicionResponse)
+        return list(await self.db.execute(stmt))
+    
+    def _select_by_date_range(self, paciente_id: int, start_date: datetime, end_date: datetime, limit: Optional[int]):
+        return (select(Medicion)
+                .where(Medicion.id_paciente == paciente_id)
+                .where(Medicion.timestamp >= start_date)
+                .where(Medicion.timestamp <= end_date)
+                .order_by(Medicion.timestamp.desc())
+                .limit(limit))
+    
+    async def generate_fake_medicion(self, paciente_id: int) -> Medicion:
+        """Genera una medición falsa con datos realistas"""
+        fake_data = MedicionCreate(
+            id_paciente=paciente_id,
+            spo2=round(random.uniform(95.0, 100.0), 2),
+            bpm=random.randint(60, 100),
+            temperatura=round(random.uniform(36.0, 38.0), 2)
+        )
+        return await self.create(fake_data)
@@ -0,0 +1,67 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache import cache_ultima_medicion
+from app.core.metricas import instrumentado
+from app.core.respuestas import seleccionar
+from app.models.paciente import Paciente
+from app.schemas.paciente import PacienteCreate, PacienteUpdate, PacienteResponse
+from app.services.estado_alertas import estado_alertas
+from app.services.tendencias import detector_tendencias
+from typing import List, Optional
+
+@instrumentado
+class PacienteServiceAsync:
+    """Versión asíncrona de PacienteService"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def create(self, paciente: PacienteCreate) -> Paciente:
+        db_paciente = Paciente(**paciente.model_dump())
+        self.db.add(db_paciente)
+        await self.db.commit()
+        await self.db.refresh(db_paciente)
+        return db_paciente
+    
+    async def get_by_id(self, paciente_id: int) -> Optional[Paciente]:
+        return await self.db.get(Paciente, paciente_id)
+    
+    async def get_all(self, skip: int = 0, limit: int = 100) -> List[Paciente]:
+        resultado = await self.db.scalars(select(Paciente).offset(skip).limit(limit))
+        return list(resultado)
+    
+    async def get_all_filas(self, skip: int = 0, limit: int = 100) -> List[tuple]:
+        stmt = seleccionar(select(Paciente).offset(skip).limit(limit), PacienteResponse)
+        return list(await self.db.execute(stmt))
+    
+    async def get_active(self) -> List[Paciente]:
+        resultado = await self.db.scalars(select(Paciente).where(Paciente.activo == True))
+        return list(resultado)
+    
+    async def get_active_filas(self) -> List[tuple]:
+        return list(await self.db.execute(seleccionar(select(Paciente).where(Paciente.activo == True), PacienteResponse)))
+    
+    async def update(self, paciente_id: int, paciente_update: PacienteUpdate) -> Optional[Paciente]:
+        db_paciente = await self.get_by_id(paciente_id)
+        if not db_paciente:
+            return None
+        
+        update_data = paciente_update.model_dump(exclude_unset=True)
+        for field, value in update_data.items():
+            setattr(db_paciente, field, value)
+        
+        await self.db.commit()
+        await self.db.refresh(db_paciente)
+        return db_paciente
+    
+    async def delete(self, paciente_id: int) -> bool:
+        db_paciente = await self.get_by_id(paciente_id)
+        if not db_paciente:
+            return False
+        
+        await self.db.delete(db_paciente)
+        await self.db.commit()
+        cache_ultima_medicion.invalidar(paciente_id)
+        estado_alertas.invalidar(paciente_id)
+        detector_tendencias.invalidar(paciente_id)
+        return True
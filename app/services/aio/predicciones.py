@@ -0,0 +1,56 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.metricas import instrumentado
+from app.core.respuestas import seleccionar
+from app.models.prediccion import Prediccion
+from app.schemas.prediccion import PrediccionCreate, PrediccionResponse
+from typing import List
+import random
+from decimal import Decimal
+
+@instrumentado
+class PrediccionServiceAsync:
+    """Versión asíncrona de PrediccionService"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def create(self, prediccion: PrediccionCreate) -> Prediccion:
+        db_prediccion = Prediccion(**prediccion.model_dump())
+        self.db.add(db_prediccion)
+        await self.db.commit()
+        await self.db.refresh(db_prediccion)
+        return db_prediccion
+    
+    def _select_by_paciente(self, paciente_id: int, skip: int, limit: int):
+        return (select(Prediccion)
+                .where(Prediccion.id_paciente == paciente_id)
+                .order_by(Prediccion.timestamp.desc())
+                .offset(skip)
+                .limit(limit))
+    
+    async def get_by_paciente(self, paciente_id: int, skip: int = 0, limit: int = 100) -> List[Prediccion]:
+        return list(await self.db.scalars(self._select_by_paciente(paciente_id, skip, limit)))
+    
+    async def get_by_paciente_filas(self, paciente_id: int, skip: int = 0, limit: int = 100) -> List[tuple]:
+        stmt = seleccionar(self._select_by_paciente(paciente_id, skip, limit), PrediccionResponse)
+        return list(await self.db.execute(stmt))
+    
+    async def generate_fake_prediction(self, paciente_id: int) -> Prediccion:
+        """Genera una predicción falsa para demostración"""
+        enfermedades = [
+            "Hipertensión",
+            "Diabetes",
+            "Arritmia",
+            "Hipoxia",
+            "Fiebre",
+            "Bradicardia",
+            "Taquicardia"
+        ]
+        
+        fake_data = PrediccionCreate(
+            id_paciente=paciente_id,
+            enfermedad=random.choice(enfermedades),
+            probabilidad=Decimal(str(round(random.uniform(0.1, 0.9), 4)))
+        )
+        return await self.create(fake_data)
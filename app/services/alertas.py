@@ -1,74 +1,178 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.insercion import insertar_filas
+from app.core.eventos import hub_eventos
 from app.models.alerta import Alerta
-from app.schemas.alerta import AlertaCreate, TipoAlertaEnum
-from app.schemas.medicion import MedicionResponse
-from typing import List
-from decimal import Decimal
+from app.core.metricas import instrumentado
+from app.core.paginacion import paginar
+from app.core.respuestas import filas
+from app.schemas.alerta import AlertaCreate, AlertaResponse
+from app.schemas.medicion import MedicionBase, MedicionResponse
+from app.services.estado_alertas import Reserva, estado_alertas
+from app.services.reglas import TIPOS_ALERTA, motor_reglas
+from app.services.tendencias import detector_tendencias
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
 
+@instrumentado
 class AlertaService:
     def __init__(self, db: Session):
         self.db = db
+        # Lecturas de evaluate_batch pendientes de entrar en el detector de tendencias
+        self._tendencias = []
+        # Transiciones reservadas por `transiciones`, pendientes del commit
+        self._reserva: Reserva = {}
     
     def create(self, alerta: AlertaCreate) -> Alerta:
-        db_alerta = Alerta(**alerta.dict())
+        db_alerta = Alerta(**alerta.dict(exclude_none=True))
         self.db.add(db_alerta)
         self.db.commit()
         self.db.refresh(db_alerta)
+        estado_alertas.confirmar([alerta])
+        hub_eventos.publicar_alerta(AlertaResponse.model_validate(db_alerta))
         return db_alerta
     
-    def get_by_paciente(self, paciente_id: int, skip: int = 0, limit: int = 100) -> List[Alerta]:
+    def bulk_create(self, alertas: List[AlertaCreate], commit: bool = True) -> int:
+        """Inserta varias alertas con INSERT multi-fila, sin refresh por fila"""
+        ids = self.insertar_lote(alertas)
+        if commit and alertas:
+            self.db.commit()
+            self.notificar_lote(alertas, ids)
+        return len(alertas)
+    
+    def insertar_lote(self, alertas: List[AlertaCreate]) -> Optional[List[int]]:
+        """INSERT multi-fila sin commit; devuelve el id de cada alerta (ver insertar_filas)"""
+        if not alertas:
+            return []
+        ahora = datetime.now()
+        for a in alertas:
+            if a.timestamp is None:
+                a.timestamp = ahora
+        filas = [a.model_dump(exclude_none=True) for a in alertas]
+        return insertar_filas(self.db, Alerta, filas, settings.ingesta_filas_por_insert, ids=True)
+    
+    def notificar_lote(self, alertas: List[AlertaCreate], ids: Optional[List[int]] = None):
+        """Acciones posteriores al commit de un lote (tras insertar_lote o bulk_create con commit=False):
+        avanza el estado de alertas y el detector de tendencias y publica las alertas con su id"""
+        estado_alertas.confirmar(alertas)
+        self._reserva.clear()
+        for observacion in self._tendencias:
+            detector_tendencias.confirmar(observacion)
+        self._tendencias.clear()
+        if not hub_eventos.activo:
+            return
+        ahora = datetime.now()
+        for i, a in enumerate(alertas):
+            datos = {"id": ids[i] if ids else None, **a.model_dump(mode="json"),
+                     "timestamp": (a.timestamp or ahora).isoformat()}
+            hub_eventos.publicar("alerta", a.id_paciente, datos)
+    
+    def registrar(self, alerta: AlertaCreate) -> Optional[Alerta]:
+        """Guarda la alerta solo si es anormal o cambia el estado del paciente"""
+        if not self.transiciones([alerta]):
+            return None
+        try:
+            db_alerta = self.create(alerta)
+        except Exception:
+            self.descartar()
+            raise
+        self._reserva.clear()
+        return db_alerta
+    
+    def registrar_lote(self, alertas: List[AlertaCreate]) -> List[AlertaCreate]:
+        """Versión por lotes de `registrar`; devuelve las alertas que se guardaron"""
+        guardar = self.transiciones(alertas)
+        try:
+            self.bulk_create(guardar)
+        except Exception:
+            self.descartar()
+            raise
+        return guardar
+    
+    def transiciones(self, alertas: List[AlertaCreate]) -> List[AlertaCreate]:
+        """Alertas que deben guardarse: anormales o que cambian el estado del paciente.
+
+        Las transiciones quedan reservadas hasta `notificar_lote` (tras el
+        commit) o `descartar` (si el lote no se guarda).
+        """
+        return estado_alertas.filtrar(alertas, self.get_ultimos_tipos, self._reserva)
+    
+    def descartar(self):
+        """Deshace lo pendiente de un lote que no se guardó (rollback)"""
+        estado_alertas.liberar(self._reserva)
+        self._tendencias.clear()
+    
+    def get_ultimos_tipos(self, paciente_ids: Iterable[int]) -> Dict[int, str]:
+        """Tipo de la última alerta (por timestamp, id) de cada paciente, en una sola consulta.
+        
+        Se ordena por timestamp y no por id: las alertas de un relleno
+        histórico tienen ids mayores que otras más recientes.
+        """
+        ultimos = (self.db.query(Alerta.id_paciente, func.max(Alerta.timestamp).label("ts"))
+                   .filter(Alerta.id_paciente.in_(list(paciente_ids)))
+                   .group_by(Alerta.id_paciente)
+                   .subquery())
+        filas = (self.db.query(Alerta.id_paciente, Alerta.tipo)
+                 .join(ultimos, (Alerta.id_paciente == ultimos.c.id_paciente) & (Alerta.timestamp == ultimos.c.ts))
+                 .order_by(Alerta.id)
+                 .all())
+        # Con timestamps repetidos gana el id mayor (el último de la lista)
+        return {id_paciente: tipo for id_paciente, tipo in filas}
+    
+    def _query_by_paciente(self, paciente_id: int, skip: int, limit: int):
         return (self.db.query(Alerta)
                 .filter(Alerta.id_paciente == paciente_id)
                 .order_by(Alerta.timestamp.desc())
                 .offset(skip)
-                .limit(limit)
-                .all())
+                .limit(limit))
     
-    def get_active_alerts(self) -> List[Alerta]:
-        """Obtiene las alertas más recientes de cada paciente"""
+    def get_by_paciente(self, paciente_id: int, skip: int = 0, limit: int = 100) -> List[Alerta]:
+        return self._query_by_paciente(paciente_id, skip, limit).all()
+    
+    def get_by_paciente_filas(self, paciente_id: int, skip: int = 0, limit: int = 100) -> List[tuple]:
+        """Como get_by_paciente, pero como tuplas con las columnas de AlertaResponse"""
+        return filas(self._query_by_paciente(paciente_id, skip, limit), AlertaResponse)
+    
+    def get_page_by_paciente(
+        self, paciente_id: int, limit: int = 100, after: Optional[str] = None, before: Optional[str] = None
+    ) -> Tuple[List[Alerta], Optional[str], Optional[str]]:
+        """Página por cursor (timestamp, id) en orden descendente"""
+        query = self.db.query(Alerta).filter(Alerta.id_paciente == paciente_id)
+        return paginar(query, (Alerta.timestamp, Alerta.id), limit, after=after, before=before)
+    
+    def _query_active_alerts(self):
         return (self.db.query(Alerta)
                 .filter(Alerta.tipo.in_(['amarilla', 'roja']))
                 .order_by(Alerta.timestamp.desc())
-                .limit(50)
-                .all())
+                .limit(50))
+    
+    def get_active_alerts(self) -> List[Alerta]:
+        """Obtiene las alertas más recientes de cada paciente"""
+        return self._query_active_alerts().all()
+    
+    def get_active_alerts_filas(self) -> List[tuple]:
+        return filas(self._query_active_alerts(), AlertaResponse)
     
     def evaluate_medicion(self, medicion: MedicionResponse) -> AlertaCreate:
         """Evalúa una medición y genera una alerta según los valores"""
-        alertas = []
-        
-        # Evaluar SpO2
-        if medicion.spo2 < 90:
-            alertas.append(("SpO2 críticamente bajo", "roja"))
-        elif medicion.spo2 < 95:
-            alertas.append(("SpO2 bajo", "amarilla"))
-        
-        # Evaluar BPM
-        if medicion.bpm < 50 or medicion.bpm > 120:
-            alertas.append(("Ritmo cardíaco anormal", "roja"))
-        elif medicion.bpm < 60 or medicion.bpm > 100:
-            alertas.append(("Ritmo cardíaco irregular", "amarilla"))
-        
-        # Evaluar Temperatura
-        if medicion.temperatura > 39 or medicion.temperatura < 35:
-            alertas.append(("Temperatura crítica", "roja"))
-        elif medicion.temperatura > 38 or medicion.temperatura < 36:
-            alertas.append(("Temperatura anormal", "amarilla"))
-        
-        # Determinar la alerta más crítica
-        if alertas:
-            alertas_rojas = [a for a in alertas if a[1] == "roja"]
-            if alertas_rojas:
-                mensaje = "; ".join([a[0] for a in alertas_rojas])
-                tipo = TipoAlertaEnum.roja
-            else:
-                mensaje = "; ".join([a[0] for a in alertas])
-                tipo = TipoAlertaEnum.amarilla
-        else:
-            mensaje = "Signos vitales normales"
-            tipo = TipoAlertaEnum.verde
-        
-        return AlertaCreate(
+        severidad, mensaje = motor_reglas.evaluar_una(medicion.spo2, medicion.bpm, medicion.temperatura)
+        alerta = AlertaCreate(
             id_paciente=medicion.id_paciente,
-            tipo=tipo,
+            tipo=TIPOS_ALERTA[severidad],
             mensaje=mensaje
         )
+        return detector_tendencias.aplicar([medicion], [alerta])[0]
+    
+    def evaluate_batch(self, mediciones: List[MedicionBase], edades: Optional[List[int]] = None) -> List[AlertaCreate]:
+        """Evalúa un lote de mediciones en una sola pasada vectorizada.
+        
+        Cada alerta conserva el timestamp de su lectura. Las lecturas que
+        completan un deterioro sostenido se elevan a amarilla como mínimo.
+        Las lecturas aún no están guardadas: el detector de tendencias solo
+        las incorpora en `notificar_lote`, tras el commit.
+        """
+        alertas, observacion = detector_tendencias.evaluar(mediciones, motor_reglas.clasificar(mediciones, edades))
+        if observacion is not None:
+            self._tendencias.append(observacion)
+        return alertas
@@ -0,0 +1,226 @@
+import html
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict
+
+import orjson
+import psutil
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache_ultima_medicion
+from app.core.config import settings
+from app.core.eventos import hub_eventos
+from app.core.tareas import TareaPeriodica
+from app.database import SessionLocal
+from app.models.alerta import Alerta
+from app.models.medicion import Medicion
+from app.models.paciente import Paciente
+from app.models.prediccion import Prediccion
+from app.mqtt.ingesta import cola_ingesta
+
+logger = logging.getLogger(__name__)
+
+TABLAS = {"pacientes": Paciente, "mediciones": Medicion, "alertas": Alerta, "predicciones": Prediccion}
+
+
+class EstadoService:
+    """Recuento aproximado de filas sin recorrer las tablas.
+
+    MySQL y PostgreSQL: estadísticas del motor (information_schema.TABLES /
+    pg_class.reltuples), actualizadas por ANALYZE y por el propio motor. En el
+    resto (SQLite) el mayor id, que lee solo el final del índice de la clave
+    primaria; cuenta también las filas ya borradas por la retención.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.dialecto = db.bind.dialect.name
+
+    def conteos(self) -> Dict[str, int]:
+        if self.dialecto == "mysql":
+            filas = self.db.execute(text(
+                "SELECT TABLE_NAME, TABLE_ROWS FROM information_schema.TABLES"
+                " WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN :tablas"
+            ).bindparams(tablas=tuple(TABLAS)))
+            # TABLE_NAME puede venir en mayúsculas según la configuración del servidor
+            estadisticas = {nombre.lower(): filas for nombre, filas in filas}
+        elif self.dialecto == "postgresql":
+            filas = self.db.execute(text(
+                "SELECT relname, reltuples FROM pg_class WHERE relname = ANY(:tablas) AND relkind IN ('r', 'p')"
+            ), {"tablas": list(TABLAS)})
+            # reltuples = -1 mientras la tabla no se ha analizado
+            estadisticas = {nombre: max(filas, 0) for nombre, filas in filas}
+        else:
+            estadisticas = {
+                tabla: self.db.query(func.max(modelo.id)).scalar() for tabla, modelo in TABLAS.items()
+            }
+        return {tabla: int(estadisticas.get(tabla) or 0) for tabla in TABLAS}
+
+
+class EstadoSistema(TareaPeriodica):
+    """Página de estado (GET /) y su versión JSON, precalculadas.
+
+    Un hilo refresca cada `intervalo` segundos los recuentos aproximados, el
+    uso de recursos y los contadores de los subsistemas, y deja renderizados
+    el HTML y el JSON: servir la página es devolver bytes ya hechos. Sin el
+    hilo (scripts, pruebas) la primera petición tras `ttl` segundos refresca.
+    """
+
+    nombre = "estado"
+
+    def __init__(self, intervalo: float = settings.estado_intervalo, ttl: float = settings.estado_ttl):
+        super().__init__(intervalo)
+        self.ttl = ttl
+        self.inicio = datetime.now()
+        self._proceso = psutil.Process(os.getpid())
+        # La primera lectura de cpu_percent(None) es 0: inicia la medición
+        self._proceso.cpu_percent(None)
+        self._lock = threading.Lock()
+        self._generado = 0.0
+        self.datos: dict = {}
+        self.html = b""
+        self.json = b""
+        self.refrescos = 0
+        self.ultima_duracion_ms = 0.0
+
+    def vigente(self):
+        """Refresca si la copia ha caducado (solo la primera petición que lo detecta)"""
+        if time.monotonic() - self._generado > self.ttl and self._lock.acquire(blocking=not self.html):
+            try:
+                if time.monotonic() - self._generado > self.ttl:
+                    self.refrescar()
+            finally:
+                self._lock.release()
+        return self
+
+    def refrescar(self):
+        inicio = time.perf_counter()
+        ahora = datetime.now()
+        try:
+            with SessionLocal() as db:
+                conteos = EstadoService(db).conteos()
+        except Exception as e:
+            logger.error(f"Error obteniendo estadísticas de la base de datos: {e}")
+            conteos = {tabla: None for tabla in TABLAS}
+
+        ingesta = cola_ingesta.estadisticas()
+        datos = {
+            "generado": ahora.isoformat(timespec="seconds"),
+            "activo_desde": self.inicio.isoformat(timespec="seconds"),
+            "tiempo_activo_s": int((ahora - self.inicio).total_seconds()),
+            "memoria_mb": round(self._proceso.memory_info().rss / 1024 / 1024, 2),
+            "cpu_porcentaje": self._proceso.cpu_percent(None),
+            "filas_aproximadas": conteos,
+            "ingesta": {clave: ingesta.get(clave) for clave in ("profundidad", "filas_escritas", "descartadas")},
+            "eventos": {"suscriptores": hub_eventos.estadisticas().get("suscriptores")},
+            "cache": {"aciertos": cache_ultima_medicion.aciertos, "fallos": cache_ultima_medicion.fallos},
+        }
+        self.datos = datos
+        self.json = orjson.dumps(datos)
+        self.html = _renderizar(datos).encode()
+        self._generado = time.monotonic()
+        self.refrescos += 1
+        self.ultima_duracion_ms = (time.perf_counter() - inicio) * 1000
+
+    def _pasada(self):
+        with self._lock:
+            self.refrescar()
+
+
+def _cifra(valor) -> str:
+    return "—" if valor is None else f"~{valor:,}".replace(",", ".")
+
+
+def _renderizar(datos: dict) -> str:
+    filas = datos["filas_aproximadas"]
+    tiempo_activo = datos["tiempo_activo_s"]
+    horas, resto = divmod(tiempo_activo, 3600)
+    return _PLANTILLA.format(
+        memoria=f"{datos['memoria_mb']:.2f}",
+        cpu=datos["cpu_porcentaje"],
+        tiempo_activo=f"{horas}:{resto // 60:02d}:{resto % 60:02d}",
+        pacientes=_cifra(filas["pacientes"]),
+        mediciones=_cifra(filas["mediciones"]),
+        alertas=_cifra(filas["alertas"]),
+        predicciones=_cifra(filas["predicciones"]),
+        pendientes=datos["ingesta"]["profundidad"],
+        suscriptores=datos["eventos"]["suscriptores"],
+        generado=html.escape(datos["generado"].replace("T", " ")),
+        ttl=settings.estado_ttl,
+    )
+
+
+_PLANTILLA = """<!DOCTYPE html>
+<html>
+<head>
+    <title>Sistema de Monitoreo de Pacientes</title>
+    <style>
+        body {{ font-family: Arial, sans-serif; line-height: 1.6; max-width: 800px; margin: 0 auto; padding: 20px; }}
+        h1 {{ color: #2c3e50; border-bottom: 2px solid #3498db; }}
+        .card {{ background: #f9f9f9; border-left: 4px solid #3498db; padding: 15px; margin: 15px 0; }}
+        .stats {{ display: grid; grid-template-columns: repeat(2, 1fr); gap: 10px; }}
+        .stat {{ background: #e8f4fc; padding: 10px; border-radius: 5px; }}
+        .endpoints {{ margin-top: 20px; }}
+        .endpoint {{ margin: 10px 0; padding: 10px; background: #f0f0f0; border-radius: 5px; }}
+    </style>
+</head>
+<body>
+    <h1>🏥 Sistema de Monitoreo de Pacientes</h1>
+
+    <div class="card">
+        <h2>📊 Estadísticas del Sistema</h2>
+        <div class="stats">
+            <div class="stat">
+                <h3>Uso de Recursos</h3>
+                <p>Memoria: <strong>{memoria} MB</strong></p>
+                <p>CPU: <strong>{cpu}%</strong></p>
+                <p>Tiempo activo: <strong>{tiempo_activo}</strong></p>
+                <p>Ingesta pendiente: <strong>{pendientes}</strong> · Clientes en tiempo real: <strong>{suscriptores}</strong></p>
+            </div>
+
+            <div class="stat">
+                <h3>📦 Datos Almacenados (aprox.)</h3>
+                <p>Pacientes: <strong>{pacientes}</strong></p>
+                <p>Mediciones: <strong>{mediciones}</strong></p>
+                <p>Alertas: <strong>{alertas}</strong></p>
+                <p>Predicciones: <strong>{predicciones}</strong></p>
+            </div>
+        </div>
+    </div>
+
+    <div class="card">
+        <h2>🚀 Endpoints Disponibles</h2>
+        <div class="endpoints">
+            <div class="endpoint"><strong>GET /api/v1/pacientes/</strong> - Listar todos los pacientes</div>
+            <div class="endpoint"><strong>POST /api/v1/pacientes/</strong> - Crear nuevo paciente</div>
+            <div class="endpoint"><strong>GET /api/v1/mediciones/paciente/{{id}}</strong> - Obtener mediciones</div>
+            <div class="endpoint"><strong>POST /api/v1/mediciones/</strong> - Registrar medición</div>
+            <div class="endpoint"><strong>GET /api/v1/alertas/activas</strong> - Alertas recientes</div>
+            <div class="endpoint"><strong>GET /api/v1/predicciones/paciente/{{id}}</strong> - Predicciones</div>
+        </div>
+    </div>
+
+    <div class="card">
+        <h2>🔗 Enlaces Rápidos</h2>
+        <ul>
+            <li><a href="/docs" target="_blank">📚 Documentación interactiva (Swagger)</a></li>
+            <li><a href="/redoc" target="_blank">📖 Documentación alternativa (ReDoc)</a></li>
+            <li><a href="/health" target="_blank">🩺 Estado del sistema</a></li>
+            <li><a href="/api/v1/sistema/estado" target="_blank">🧾 Estado en JSON</a></li>
+        </ul>
+    </div>
+
+    <footer>
+        <p>🔄 Última actualización: {generado} (se regenera cada {ttl:g} s)</p>
+    </footer>
+</body>
+</html>
+"""
+
+
+# Página de estado compartida por la API
+estado_sistema = EstadoSistema()
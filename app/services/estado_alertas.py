@@ -0,0 +1,135 @@
+import threading
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from app.core.bus import bus
+from app.core.config import settings
+from app.schemas.alerta import AlertaCreate, TipoAlertaEnum
+
+# paciente -> (estado antes del lote, estado reservado por el lote)
+Reserva = Dict[int, Tuple[Optional[str], str]]
+
+
+class EstadoAlertas:
+    """Severidad vigente de cada paciente, para guardar solo alertas útiles.
+
+    Con `solo_transiciones` activo una alerta se persiste si es anormal
+    (amarilla o roja) o si cambia la severidad del paciente (p. ej. la vuelta
+    a verde). Las lecturas normales consecutivas no generan filas. Si no hay
+    estado en memoria para un paciente se toma el de su última alerta guardada.
+
+    Con varios workers cada proceso tiene su copia: las confirmaciones y las
+    invalidaciones se difunden por el bus y los demás workers actualizan los
+    pacientes que ya conocían (el resto se siembra de la base de datos).
+    """
+
+    def __init__(self, solo_transiciones: bool = settings.alertas_solo_transiciones):
+        self.solo_transiciones = solo_transiciones
+        self._estado: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def conocido(self, paciente_id: int) -> bool:
+        return paciente_id in self._estado
+
+    def sembrar(self, paciente_id: int, tipo: Optional[str]):
+        """Registra el estado previo leído de la base de datos si aún no hay uno en memoria"""
+        if tipo is not None:
+            with self._lock:
+                self._estado.setdefault(paciente_id, tipo)
+
+    def invalidar(self, paciente_id: Optional[int] = None):
+        self._invalidar(paciente_id)
+        if bus.distribuido:
+            bus.publicar("alertas_estado_invalidar", {"p": paciente_id})
+
+    def _invalidar(self, paciente_id: Optional[int]):
+        with self._lock:
+            if paciente_id is None:
+                self._estado.clear()
+            else:
+                self._estado.pop(paciente_id, None)
+
+    def filtrar(
+        self,
+        alertas: List[AlertaCreate],
+        cargar_previos: Callable[[Set[int]], Dict[int, str]],
+        reserva: Optional[Reserva] = None,
+    ) -> List[AlertaCreate]:
+        """Devuelve, en orden, las alertas que deben persistirse.
+
+        `cargar_previos` recibe los pacientes sin estado en memoria y devuelve
+        el tipo de su última alerta guardada (una sola consulta por lote).
+        La decisión y la reserva de las transiciones se hacen bajo el mismo
+        cerrojo: el estado de cada paciente pasa ya al de su última alerta,
+        así que otra petición (o el hilo de MQTT) que llegue antes del commit
+        no repite la misma transición. Lo reservado se anota en `reserva`;
+        si el lote no se guarda, `liberar(reserva)` lo deshace. `confirmar`
+        se llama tras el commit.
+        """
+        if not self.solo_transiciones:
+            return alertas
+
+        desconocidos = {a.id_paciente for a in alertas if a.id_paciente not in self._estado}
+        if desconocidos:
+            for paciente_id, tipo in cargar_previos(desconocidos).items():
+                self.sembrar(paciente_id, tipo)
+
+        persistir = []
+        with self._lock:
+            for alerta in alertas:
+                tipo = _valor(alerta.tipo)
+                previo = self._estado.get(alerta.id_paciente)
+                if tipo != TipoAlertaEnum.verde.value or tipo != previo:
+                    persistir.append(alerta)
+                if tipo != previo:
+                    self._estado[alerta.id_paciente] = tipo
+                    if reserva is not None:
+                        # Se conserva el estado anterior al lote y lo último reservado
+                        reserva[alerta.id_paciente] = (reserva.get(alerta.id_paciente, (previo,))[0], tipo)
+        return persistir
+
+    def liberar(self, reserva: Reserva):
+        """Deshace lo reservado por `filtrar` para un lote que no llegó a guardarse"""
+        with self._lock:
+            for paciente_id, (previo, reservado) in reserva.items():
+                # Si otro lote ya cambió el estado se respeta el suyo
+                if self._estado.get(paciente_id) == reservado:
+                    if previo is None:
+                        self._estado.pop(paciente_id, None)
+                    else:
+                        self._estado[paciente_id] = previo
+        reserva.clear()
+
+    def confirmar(self, guardadas: List[AlertaCreate]):
+        """Fija el estado con las alertas ya guardadas (en orden) y lo difunde.
+
+        Basta con las guardadas: una alerta que `filtrar` descarta siempre
+        repite el estado previo del paciente.
+        """
+        if not self.solo_transiciones or not guardadas:
+            return
+        nuevos = {alerta.id_paciente: _valor(alerta.tipo) for alerta in guardadas}
+        with self._lock:
+            self._estado.update(nuevos)
+        if bus.distribuido:
+            bus.publicar("alertas_estado", {"e": nuevos})
+
+    def actualizar_presentes(self, nuevos: Dict[int, str]):
+        """Aplica lo confirmado en otro worker a los pacientes ya conocidos"""
+        with self._lock:
+            for paciente_id, tipo in nuevos.items():
+                if paciente_id in self._estado:
+                    self._estado[paciente_id] = tipo
+
+    def estadisticas(self) -> dict:
+        return {"solo_transiciones": self.solo_transiciones, "pacientes": len(self._estado)}
+
+
+def _valor(tipo) -> str:
+    return tipo.value if isinstance(tipo, TipoAlertaEnum) else tipo
+
+
+# Estado compartido por todos los caminos de ingesta del proceso
+estado_alertas = EstadoAlertas()
+bus.suscribir("alertas_estado", lambda datos: estado_alertas.actualizar_presentes(
+    {int(paciente_id): tipo for paciente_id, tipo in datos["e"].items()}))
+bus.suscribir("alertas_estado_invalidar", lambda datos: estado_alertas._invalidar(datos["p"]))
@@ -0,0 +1,152 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.paginacion import condicion_cursor
+from app.database import SessionLocal
+from app.models.medicion import Medicion
+from app.schemas.medicion import formatear_signo
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - dependencia opcional
+    pa = pq = None
+
+COLUMNAS = ("id", "id_paciente", "timestamp", "spo2", "bpm", "temperatura")
+# Orden del recorrido: sigue el índice (id_paciente, timestamp) y el id desempata
+ORDEN = (Medicion.id_paciente, Medicion.timestamp, Medicion.id)
+
+FORMATOS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def parquet_disponible() -> bool:
+    return pq is not None
+
+
+class _Salida(io.RawIOBase):
+    """Archivo de solo escritura que acumula bytes hasta que se recogen"""
+
+    def __init__(self):
+        self._partes: List[bytes] = []
+        self._posicion = 0
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        datos = bytes(datos)
+        self._partes.append(datos)
+        self._posicion += len(datos)
+        return len(datos)
+
+    def tell(self):
+        return self._posicion
+
+    def recoger(self) -> bytes:
+        datos = b"".join(self._partes)
+        self._partes = []
+        return datos
+
+
+class ExportacionService:
+    """Exportación de mediciones en streaming.
+
+    Cada exportación abre su propia sesión (vive mientras dura la respuesta,
+    no la petición) y recorre el rango por clave (id_paciente, timestamp, id)
+    en consultas de `lote` filas: en memoria solo hay un lote a la vez, sea
+    cual sea el rango y el driver (mysqlconnector no tiene cursores del
+    servidor, así que `stream_results` traería el rango entero al cliente).
+
+    NDJSON y CSV escriben spo2 y temperatura como la API, con dos decimales
+    ("98.50"); Parquet los guarda como float64.
+    """
+
+    def __init__(self, paciente_ids: Optional[List[int]] = None, desde: Optional[datetime] = None,
+                 hasta: Optional[datetime] = None, lote: int = settings.exportacion_filas_por_lote):
+        self.paciente_ids = paciente_ids
+        self.desde = desde
+        self.hasta = hasta
+        self.lote = lote
+
+    def _consulta(self):
+        consulta = select(*(getattr(Medicion, c) for c in COLUMNAS))
+        if self.paciente_ids:
+            consulta = consulta.where(Medicion.id_paciente.in_(self.paciente_ids))
+        if self.desde is not None:
+            consulta = consulta.where(Medicion.timestamp >= self.desde)
+        if self.hasta is not None:
+            consulta = consulta.where(Medicion.timestamp <= self.hasta)
+        return consulta.order_by(*ORDEN)
+
+    def lotes(self) -> Iterator[list]:
+        """Filas (tuplas en el orden de COLUMNAS) en lotes de `lote`"""
+        db = SessionLocal()
+        try:
+            consulta = self._consulta().limit(self.lote)
+            siguiente = consulta
+            while True:
+                filas = db.execute(siguiente).all()
+                # Cada consulta es corta: no se retiene una transacción abierta entre lotes
+                db.rollback()
+                if filas:
+                    yield filas
+                if len(filas) < self.lote:
+                    return
+                id, id_paciente, ts = filas[-1][:3]
+                siguiente = consulta.where(condicion_cursor(ORDEN, (id_paciente, ts, id), descendente=False))
+        finally:
+            db.close()
+
+    def exportar(self, formato: str) -> Iterator[bytes]:
+        return getattr(self, f"_{formato}")()
+
+    def _ndjson(self) -> Iterator[bytes]:
+        for filas in self.lotes():
+            yield "".join(
+                json.dumps({
+                    "id": id, "id_paciente": id_paciente, "timestamp": ts.isoformat(),
+                    "spo2": formatear_signo(spo2), "bpm": bpm, "temperatura": formatear_signo(temperatura),
+                }) + "\n"
+                for id, id_paciente, ts, spo2, bpm, temperatura in filas
+            ).encode()
+
+    def _csv(self) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        escritor.writerow(COLUMNAS)
+        for filas in self.lotes():
+            escritor.writerows(
+                (id, id_paciente, ts.isoformat(), formatear_signo(spo2), bpm, formatear_signo(temperatura))
+                for id, id_paciente, ts, spo2, bpm, temperatura in filas
+            )
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+
+    def _parquet(self) -> Iterator[bytes]:
+        # Un row group por lote; el pie del archivo se escribe al cerrar
+        esquema = pa.schema([
+            ("id", pa.int64()), ("id_paciente", pa.int32()), ("timestamp", pa.timestamp("us")),
+            ("spo2", pa.float64()), ("bpm", pa.int32()), ("temperatura", pa.float64()),
+        ])
+        salida = _Salida()
+        with pq.ParquetWriter(salida, esquema, compression="snappy") as escritor:
+            for filas in self.lotes():
+                columnas = list(zip(*filas))
+                escritor.write_table(pa.Table.from_arrays(
+                    [pa.array(col, type=campo.type) for col, campo in zip(columnas, esquema)], schema=esquema
+                ))
+                yield salida.recoger()
+        yield salida.recoger()
@@ -0,0 +1,319 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.tareas import TareaPeriodica
+from app.database import SessionLocal
+from app.models.agregado import MedicionAgregada
+from app.models.medicion import Medicion
+from app.models.paciente import Paciente
+from app.models.prediccion import Prediccion
+from app.services.reglas import SIGNOS
+
+logger = logging.getLogger(__name__)
+
+ESTADISTICOS = ("media", "desviacion", "minimo", "maximo", "pendiente", "ultima")
+# Orden de las columnas de la matriz de características
+CARACTERISTICAS = tuple(f"{signo}_{estadistico}" for signo in SIGNOS for estadistico in ESTADISTICOS) + ("edad",)
+
+
+class ModeloLogistico:
+    """Regresión logística multietiqueta evaluada con NumPy.
+
+    Probabilidad de cada clase = sigmoide(((X - media) / escala) @ coef + intercepto).
+    Se carga desde un .npz con los arrays `clases`, `caracteristicas`, `coef`
+    (características x clases), `intercepto`, `media` y `escala`; p. ej.
+    exportados de un StandardScaler + LogisticRegression de scikit-learn
+    (un clasificador binario por clase). Cualquier objeto con `clases`,
+    `caracteristicas` y `predecir(X)` sirve como modelo.
+    """
+
+    def __init__(self, clases: Sequence[str], caracteristicas: Sequence[str], coef, intercepto,
+                 media=None, escala=None):
+        self.clases = list(clases)
+        self.caracteristicas = list(caracteristicas)
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercepto = np.asarray(intercepto, dtype=np.float64)
+        self.media = np.zeros(len(self.caracteristicas)) if media is None else np.asarray(media, dtype=np.float64)
+        self.escala = np.ones(len(self.caracteristicas)) if escala is None else np.asarray(escala, dtype=np.float64)
+        if self.coef.shape != (len(self.caracteristicas), len(self.clases)):
+            raise ValueError(f"coef debe ser {len(self.caracteristicas)}x{len(self.clases)}, no {self.coef.shape}")
+
+    @classmethod
+    def desde_archivo(cls, ruta: str) -> "ModeloLogistico":
+        with np.load(ruta, allow_pickle=False) as datos:
+            return cls(datos["clases"].tolist(), datos["caracteristicas"].tolist(), datos["coef"],
+                       datos["intercepto"], datos["media"], datos["escala"])
+
+    def guardar(self, ruta: str):
+        np.savez(ruta, clases=np.array(self.clases), caracteristicas=np.array(self.caracteristicas),
+                 coef=self.coef, intercepto=self.intercepto, media=self.media, escala=self.escala)
+
+    def predecir(self, X: np.ndarray) -> np.ndarray:
+        """Probabilidades (pacientes x clases) para la matriz de características X"""
+        z = ((X - self.media) / self.escala) @ self.coef + self.intercepto
+        return 1.0 / (1.0 + np.exp(-z))
+
+
+def modelo_referencia() -> ModeloLogistico:
+    """Modelo de ejemplo con pesos fijados a mano (no entrenado).
+
+    Cada característica se estandariza frente a valores de un adulto sano y
+    cada clase depende de pocos signos: sirve para tener predicciones
+    coherentes con las lecturas hasta disponer de un modelo entrenado.
+    """
+    referencia = {
+        "spo2_media": (97, 2), "spo2_minimo": (95, 3), "spo2_pendiente": (0, 2),
+        "bpm_media": (75, 12), "bpm_desviacion": (5, 5), "bpm_minimo": (60, 10), "bpm_maximo": (95, 15),
+        "temperatura_media": (36.8, 0.5), "temperatura_minimo": (36.3, 0.6), "temperatura_maximo": (37.2, 0.6),
+        "edad": (50, 20),
+    }
+    pesos = {
+        "Hipoxia": {"spo2_media": -1.5, "spo2_minimo": -1.0, "spo2_pendiente": -0.5},
+        "Taquicardia": {"bpm_media": 1.5, "bpm_maximo": 0.8},
+        "Bradicardia": {"bpm_media": -1.5, "bpm_minimo": -0.8},
+        "Arritmia": {"bpm_desviacion": 1.5, "edad": 0.3},
+        "Fiebre": {"temperatura_media": 1.5, "temperatura_maximo": 1.0},
+        "Hipotermia": {"temperatura_media": -1.5, "temperatura_minimo": -1.0},
+    }
+    clases = list(pesos)
+    coef = np.zeros((len(CARACTERISTICAS), len(clases)))
+    for j, clase in enumerate(clases):
+        for caracteristica, peso in pesos[clase].items():
+            coef[CARACTERISTICAS.index(caracteristica), j] = peso
+    media = np.array([referencia.get(c, (0, 1))[0] for c in CARACTERISTICAS], dtype=np.float64)
+    escala = np.array([referencia.get(c, (0, 1))[1] for c in CARACTERISTICAS], dtype=np.float64)
+    return ModeloLogistico(clases, CARACTERISTICAS, coef, np.full(len(clases), -4.0), media, escala)
+
+
+def cargar_modelo() -> ModeloLogistico:
+    if settings.predicciones_modelo_archivo:
+        return ModeloLogistico.desde_archivo(settings.predicciones_modelo_archivo)
+    return modelo_referencia()
+
+
+def _reducir(ids: np.ndarray, t: np.ndarray, x: np.ndarray, peso: np.ndarray,
+             minimo: np.ndarray, maximo: np.ndarray, desviacion: Optional[np.ndarray] = None):
+    """Estadísticos por paciente de filas ordenadas por (paciente, tiempo).
+
+    Cada fila es una lectura (peso 1) o un intervalo agregado (peso = lecturas,
+    `x` su media). Devuelve (pacientes, matriz pacientes x estadísticos x signos).
+    """
+    inicios = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    finales = np.r_[inicios[1:], len(ids)] - 1
+    w = peso[:, None]
+    n = np.add.reduceat(peso, inicios)[:, None]
+    media = np.add.reduceat(w * x, inicios) / n
+    # Varianza entre lecturas (o entre medias de intervalo) más la interna de cada intervalo
+    cuadrados = np.add.reduceat(w * x * x, inicios)
+    if desviacion is not None:
+        cuadrados += np.add.reduceat(w * desviacion * desviacion, inicios)
+    varianza = np.maximum(cuadrados / n - media * media, 0.0)
+
+    # Recta de mínimos cuadrados ponderada de cada signo sobre el tiempo (horas)
+    mt = np.add.reduceat(peso * t, inicios)[:, None] / n
+    varianza_t = np.add.reduceat(peso * t * t, inicios)[:, None] / n - mt * mt
+    covarianza = np.add.reduceat(w * t[:, None] * x, inicios) / n - mt * media
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pendiente = np.where(varianza_t > 1e-9, covarianza / varianza_t, 0.0)
+
+    estadisticos = np.stack([
+        media, np.sqrt(varianza), np.minimum.reduceat(minimo, inicios), np.maximum.reduceat(maximo, inicios),
+        pendiente, x[finales],
+    ], axis=1)
+    return ids[inicios], estadisticos
+
+
+class InferenciaService:
+    """Predicciones para todos los pacientes activos en una sola pasada.
+
+    1. consulta: lecturas de la ventana (`predicciones_ventana_horas`) de todos
+       los pacientes con una sola consulta, de los agregados por hora o de las
+       mediciones crudas según `predicciones_fuente`;
+    2. características: media, desviación, mínimo, máximo, pendiente por hora
+       y último valor de cada signo, más la edad, con reducciones de NumPy;
+    3. inferencia: el modelo puntúa la matriz completa;
+    4. escritura: INSERT por lotes de las predicciones con probabilidad
+       mayor o igual que `predicciones_umbral`.
+    """
+
+    def __init__(self, db: Session, modelo=None):
+        self.db = db
+        self.modelo = modelo or cargar_modelo()
+
+    def fuente(self) -> str:
+        if settings.predicciones_fuente == "auto":
+            return "agregados" if settings.agregados_activos else "crudas"
+        return settings.predicciones_fuente
+
+    def caracteristicas(self, ahora: Optional[datetime] = None, paciente_ids: Optional[List[int]] = None,
+                        tiempos: Optional[Dict[str, float]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(IDs de paciente, matriz pacientes x CARACTERISTICAS) de los pacientes con lecturas"""
+        tiempos = {} if tiempos is None else tiempos
+        ahora = ahora or datetime.now()
+        desde = ahora - timedelta(hours=settings.predicciones_ventana_horas)
+
+        inicio = time.perf_counter()
+        pacientes = self.db.query(Paciente.id, Paciente.edad).filter(Paciente.activo == True)  # noqa: E712
+        if paciente_ids is not None:
+            pacientes = pacientes.filter(Paciente.id.in_(paciente_ids))
+        edades = dict(pacientes.all())
+        if self.fuente() == "agregados":
+            filas = self._filas_agregadas(desde, ahora, paciente_ids)
+        else:
+            filas = self._filas_crudas(desde, ahora, paciente_ids)
+        tiempos["consulta_ms"] = (time.perf_counter() - inicio) * 1000
+
+        inicio = time.perf_counter()
+        vacio = (np.zeros(0, dtype=np.int64), np.zeros((0, len(CARACTERISTICAS))))
+        if not filas or not edades:
+            tiempos["caracteristicas_ms"] = (time.perf_counter() - inicio) * 1000
+            return vacio
+        ids, t, x, peso, minimo, maximo, desviacion = filas
+        # Solo pacientes activos; orden por (paciente, tiempo) para las reducciones
+        activos = np.isin(ids, np.fromiter(edades, dtype=np.int64, count=len(edades)))
+        orden = np.lexsort((t[activos], ids[activos]))
+        seleccion = np.flatnonzero(activos)[orden]
+        if not len(seleccion):
+            tiempos["caracteristicas_ms"] = (time.perf_counter() - inicio) * 1000
+            return vacio
+        ids_unicos, estadisticos = _reducir(
+            ids[seleccion], t[seleccion], x[seleccion], peso[seleccion], minimo[seleccion], maximo[seleccion],
+            None if desviacion is None else desviacion[seleccion],
+        )
+        # (pacientes, estadísticos, signos) -> columnas signo_estadístico + edad
+        matriz = np.empty((len(ids_unicos), len(CARACTERISTICAS)))
+        matriz[:, :-1] = estadisticos.transpose(0, 2, 1).reshape(len(ids_unicos), -1)
+        matriz[:, -1] = [edades[i] or 0 for i in ids_unicos.tolist()]
+        tiempos["caracteristicas_ms"] = (time.perf_counter() - inicio) * 1000
+        return ids_unicos, matriz
+
+    def _filas_crudas(self, desde: datetime, hasta: datetime, paciente_ids: Optional[List[int]]):
+        consulta = select(Medicion.id_paciente, Medicion.timestamp, Medicion.spo2, Medicion.bpm,
+                          Medicion.temperatura).where(Medicion.timestamp >= desde, Medicion.timestamp < hasta)
+        if paciente_ids is not None:
+            consulta = consulta.where(Medicion.id_paciente.in_(paciente_ids))
+        filas = self.db.execute(consulta).all()
+        if not filas:
+            return None
+        ids, timestamps, spo2, bpm, temperatura = zip(*filas)
+        x = np.column_stack([np.asarray(spo2, dtype=np.float64), np.asarray(bpm, dtype=np.float64),
+                             np.asarray(temperatura, dtype=np.float64)])
+        return (np.asarray(ids, dtype=np.int64), _horas(timestamps, hasta), x, np.ones(len(ids)), x, x, None)
+
+    def _filas_agregadas(self, desde: datetime, hasta: datetime, paciente_ids: Optional[List[int]]):
+        a = MedicionAgregada
+        consulta = select(
+            a.id_paciente, a.inicio, a.n, a.spo2_suma, a.bpm_suma, a.temperatura_suma,
+            a.spo2_min, a.bpm_min, a.temperatura_min, a.spo2_max, a.bpm_max, a.temperatura_max,
+        ).where(a.resolucion == "hora", a.inicio >= desde.replace(minute=0, second=0, microsecond=0),
+                a.inicio < hasta)
+        if paciente_ids is not None:
+            consulta = consulta.where(a.id_paciente.in_(paciente_ids))
+        filas = self.db.execute(consulta).all()
+        if not filas:
+            return None
+        columnas = list(zip(*filas))
+        n = np.asarray(columnas[2], dtype=np.float64)
+        sumas = np.column_stack([np.asarray(c, dtype=np.float64) for c in columnas[3:6]])
+        minimo = np.column_stack([np.asarray(c, dtype=np.float64) for c in columnas[6:9]])
+        maximo = np.column_stack([np.asarray(c, dtype=np.float64) for c in columnas[9:12]])
+        # Cada hora se representa por su media en el centro del intervalo; sin suma de
+        # cuadrados, la dispersión interna se aproxima por el rango / 4
+        t = _horas(columnas[1], hasta) + 0.5
+        return (np.asarray(columnas[0], dtype=np.int64), t, sumas / n[:, None], n, minimo, maximo,
+                (maximo - minimo) / 4)
+
+    def predecir(self, ahora: Optional[datetime] = None, paciente_ids: Optional[List[int]] = None,
+                 tiempos: Optional[Dict[str, float]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(IDs de paciente, probabilidades pacientes x clases del modelo)"""
+        tiempos = {} if tiempos is None else tiempos
+        ids, X = self.caracteristicas(ahora, paciente_ids, tiempos)
+        inicio = time.perf_counter()
+        if len(ids):
+            columnas = [CARACTERISTICAS.index(c) for c in self.modelo.caracteristicas]
+            probabilidades = self.modelo.predecir(X[:, columnas])
+        else:
+            probabilidades = np.zeros((0, len(self.modelo.clases)))
+        tiempos["inferencia_ms"] = (time.perf_counter() - inicio) * 1000
+        return ids, probabilidades
+
+    def ejecutar(self, ahora: Optional[datetime] = None, paciente_ids: Optional[List[int]] = None,
+                 guardar: bool = True) -> dict:
+        """Calcula y guarda las predicciones; devuelve recuentos y tiempos por etapa"""
+        ahora = ahora or datetime.now()
+        tiempos: Dict[str, float] = {}
+        ids, probabilidades = self.predecir(ahora, paciente_ids, tiempos)
+
+        inicio = time.perf_counter()
+        pacientes, clases = np.nonzero(probabilidades >= settings.predicciones_umbral)
+        filas = [
+            {"id_paciente": int(ids[i]), "enfermedad": self.modelo.clases[j],
+             "probabilidad": round(float(probabilidades[i, j]), 4), "timestamp": ahora}
+            for i, j in zip(pacientes.tolist(), clases.tolist())
+        ]
+        if guardar and filas:
+            tamano = settings.ingesta_filas_por_insert
+            try:
+                for k in range(0, len(filas), tamano):
+                    self.db.execute(insert(Prediccion), filas[k:k + tamano])
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                raise
+        tiempos["escritura_ms"] = (time.perf_counter() - inicio) * 1000
+
+        return {
+            "fuente": self.fuente(),
+            "pacientes": len(ids),
+            "predicciones": len(filas),
+            "guardadas": len(filas) if guardar else 0,
+            "tiempos_ms": {etapa[:-3]: round(ms, 2) for etapa, ms in tiempos.items()},
+            "resultados": filas if not guardar else None,
+        }
+
+
+def _horas(timestamps: Sequence[datetime], referencia: datetime) -> np.ndarray:
+    """Horas (negativas) de cada timestamp respecto a `referencia`"""
+    return (np.asarray(timestamps, dtype="datetime64[us]") - np.datetime64(referencia, "us")) \
+        / np.timedelta64(3600, "s")
+
+
+class TareaPredicciones(TareaPeriodica):
+    """Ejecuta InferenciaService cada `intervalo` segundos en un hilo propio.
+
+    La primera ejecución espera un intervalo: al arrancar aún no hay lecturas
+    nuevas. Sin intervalo configurado solo se activa con un modelo exportado
+    (PREDICCIONES_MODELO_ARCHIVO); el de referencia no se ejecuta solo.
+    """
+
+    nombre = "predicciones"
+    inmediata = False
+
+    def __init__(self, intervalo: Optional[float] = settings.predicciones_intervalo):
+        if intervalo is None:
+            intervalo = 3600 if settings.predicciones_modelo_archivo else 0
+        super().__init__(intervalo)
+        self.ultimo_resultado: Optional[dict] = None
+
+    def _pasada(self) -> dict:
+        with SessionLocal() as db:
+            self.ultimo_resultado = InferenciaService(db).ejecutar()
+            return self.ultimo_resultado
+
+    def estadisticas(self) -> dict:
+        return {
+            **super().estadisticas(),
+            "ventana_horas": settings.predicciones_ventana_horas,
+            "modelo": settings.predicciones_modelo_archivo or "referencia",
+            "ultimo_resultado": self.ultimo_resultado,
+        }
+
+
+tarea_predicciones = TareaPredicciones()
@@ -0,0 +1,105 @@
+from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from app.schemas.medicion import MedicionCreate, MedicionBatchItem, MedicionBatchResponse
+from app.services.mediciones import MedicionService
+from app.services.alertas import AlertaService
+from app.services.pacientes import PacienteService
+from app.core.metricas import instrumentado
+from typing import Any, Dict, List, Optional, Tuple
+import json
+
+
+def leer_lote(cuerpo: bytes, ndjson: bool) -> Tuple[List[Any], Dict[int, str]]:
+    """Elementos de un cuerpo JSON (array) o NDJSON y errores de las líneas ilegibles.
+
+    En NDJSON una línea con JSON inválido solo invalida su elemento (queda
+    como None y su error en el diccionario, por índice). Un array JSON
+    ilegible invalida el cuerpo entero: lanza ValueError.
+    """
+    if not ndjson:
+        items = json.loads(cuerpo)
+        if not isinstance(items, list):
+            raise ValueError("Se esperaba una lista de mediciones")
+        return items, {}
+    items: List[Any] = []
+    errores: Dict[int, str] = {}
+    for linea in cuerpo.splitlines():
+        if not linea.strip():
+            continue
+        try:
+            items.append(json.loads(linea))
+        except ValueError as e:
+            errores[len(items)] = f"JSON inválido: {e}"
+            items.append(None)
+    return items, errores
+
+
+@instrumentado
+class IngestaService:
+    """Ingesta de lotes de mediciones en una sola transacción"""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def registrar_lote(self, items: List[Any], errores: Optional[Dict[int, str]] = None) -> MedicionBatchResponse:
+        """Valida, evalúa y guarda un lote de mediciones.
+
+        Los elementos inválidos o de pacientes inexistentes se rechazan de
+        forma individual; el resto se guarda junto con sus alertas en una
+        única transacción. `errores` marca como rechazados los elementos
+        que ya se sabe que no son legibles (ver `leer_lote`).
+        """
+        resultados = [MedicionBatchItem(indice=i, estado="guardada") for i in range(len(items))]
+        validas: List[MedicionCreate] = []
+        indices: List[int] = []
+
+        for i, item in enumerate(items):
+            if errores and i in errores:
+                resultados[i].estado = "rechazada"
+                resultados[i].error = errores[i]
+                continue
+            try:
+                validas.append(MedicionCreate.model_validate(item))
+                indices.append(i)
+            except ValidationError as e:
+                resultados[i].estado = "rechazada"
+                resultados[i].error = "; ".join(
+                    f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+                )
+
+        # Descartar las mediciones de pacientes que no existen (una sola consulta)
+        existentes = PacienteService(self.db).get_ids_existentes(m.id_paciente for m in validas)
+        mediciones: List[MedicionCreate] = []
+        for i, medicion in zip(indices, validas):
+            if medicion.id_paciente in existentes:
+                mediciones.append(medicion)
+            else:
+                resultados[i].estado = "rechazada"
+                resultados[i].error = f"Paciente {medicion.id_paciente} no encontrado"
+
+        alerta_service = AlertaService(self.db)
+        alertas = alerta_service.evaluate_batch(mediciones)
+
+        medicion_service = MedicionService(self.db)
+        try:
+            ids_mediciones = medicion_service.insertar_lote(mediciones)
+            alertas_guardadas = alerta_service.transiciones(alertas)
+            ids_alertas = alerta_service.insertar_lote(alertas_guardadas)
+            self.db.commit()
+        except Exception:
+            # Deshace las transiciones reservadas; el detector de tendencias no llegó a avanzar
+            self.db.rollback()
+            alerta_service.descartar()
+            raise
+        
+        medicion_service.notificar_lote(mediciones, ids_mediciones)
+        alerta_service.notificar_lote(alertas_guardadas, ids_alertas)
+
+        guardadas = len(mediciones)
+        return MedicionBatchResponse(
+            total=len(items),
+            guardadas=guardadas,
+            rechazadas=len(items) - guardadas,
+            alertas=len(alertas_guardadas),
+            resultados=resultados
+        )
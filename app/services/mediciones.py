@@ -1,29 +1,114 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+from app.core.bus import bus
+from app.core.cache import cache_ultima_medicion
+from app.core.config import settings
+from app.core.insercion import insertar_filas
+from app.core.eventos import hub_eventos
 from app.models.medicion import Medicion
-from app.schemas.medicion import MedicionCreate
-from typing import List, Optional
+from app.core.metricas import instrumentado
+from app.core.paginacion import paginar
+from app.core.respuestas import filas
+from app.schemas.medicion import MedicionCreate, MedicionResponse, SerieMediciones
+from app.services.agregados import AgregadoService, fila_creacion
+from typing import List, Optional, Tuple
 from datetime import datetime, timedelta
 import random
-from decimal import Decimal
 
+@instrumentado
 class MedicionService:
     def __init__(self, db: Session):
         self.db = db
     
     def create(self, medicion: MedicionCreate) -> Medicion:
-        db_medicion = Medicion(**medicion.dict())
+        fila = fila_creacion(medicion)
+        db_medicion = Medicion(**fila)
         self.db.add(db_medicion)
+        # El agregado sale de los valores en memoria: sin flush ni refresh previos
+        AgregadoService(self.db).acumular([fila])
         self.db.commit()
         self.db.refresh(db_medicion)
+        respuesta = MedicionResponse.model_validate(db_medicion)
+        cache_ultima_medicion.actualizar(respuesta)
+        cache_ultima_medicion.difundir([respuesta])
+        hub_eventos.publicar_medicion(respuesta)
         return db_medicion
     
-    def get_by_paciente(self, paciente_id: int, skip: int = 0, limit: int = 100) -> List[Medicion]:
+    def bulk_create(self, mediciones: List[MedicionCreate], commit: bool = True) -> int:
+        """Inserta varias mediciones con INSERT multi-fila, sin refresh por fila"""
+        ids = self.insertar_lote(mediciones)
+        if commit and mediciones:
+            self.db.commit()
+            self.notificar_lote(mediciones, ids)
+        return len(mediciones)
+    
+    def insertar_lote(self, mediciones: List[MedicionCreate]) -> Optional[List[int]]:
+        """INSERT multi-fila y agregados, sin commit; devuelve el id de cada medición (ver insertar_filas)"""
+        if not mediciones:
+            return []
+        # Las mediciones sin timestamp toman la hora actual para que todas las
+        # filas de un mismo INSERT tengan las mismas columnas (y los eventos la misma hora)
+        ahora = datetime.now()
+        for m in mediciones:
+            if m.timestamp is None:
+                m.timestamp = ahora
+        filas = [m.model_dump(exclude_none=True) for m in mediciones]
+        ids = insertar_filas(self.db, Medicion, filas, settings.ingesta_filas_por_insert, ids=True)
+        AgregadoService(self.db).acumular(filas)
+        return ids
+    
+    def notificar_lote(self, mediciones: List[MedicionCreate], ids: Optional[List[int]] = None):
+        """Acciones posteriores al commit de un lote (tras insertar_lote o bulk_create con commit=False).
+        
+        Los eventos en tiempo real llevan el mismo formato que los de una
+        medición individual, con el id de `insertar_lote` (null solo en
+        motores sin forma de obtenerlo). La caché de la última medición se
+        refresca con una consulta agrupada, solo para los pacientes cacheados
+        a los que el lote trae una lectura más reciente. Con varios workers se
+        refrescan todos los pacientes del lote, porque cualquiera puede
+        estar en la caché de otro proceso.
+        """
+        recientes = {}
+        ahora = datetime.now()
+        for i, m in enumerate(mediciones):
+            ts = m.timestamp or ahora
+            if ts > recientes.get(m.id_paciente, datetime.min):
+                recientes[m.id_paciente] = ts
+            if hub_eventos.activo:
+                datos = {"id": ids[i] if ids else None, **m.model_dump(mode="json"), "timestamp": ts.isoformat()}
+                hub_eventos.publicar("medicion", m.id_paciente, datos)
+        
+        if bus.distribuido:
+            ultimas = [MedicionResponse.model_validate(m) for m in self.get_latest_by_pacientes(list(recientes))]
+            cache_ultima_medicion.actualizar_presentes(ultimas)
+            cache_ultima_medicion.difundir(ultimas)
+            return
+        
+        cacheados = cache_ultima_medicion.timestamps(recientes)
+        refrescar = [pid for pid, ts in cacheados.items() if recientes[pid] >= ts]
+        for medicion in self.get_latest_by_pacientes(refrescar):
+            cache_ultima_medicion.actualizar(MedicionResponse.model_validate(medicion))
+    
+    def _query_by_paciente(self, paciente_id: int, skip: int, limit: int):
         return (self.db.query(Medicion)
                 .filter(Medicion.id_paciente == paciente_id)
                 .order_by(Medicion.timestamp.desc())
                 .offset(skip)
-                .limit(limit)
-                .all())
+                .limit(limit))
+    
+    def get_by_paciente(self, paciente_id: int, skip: int = 0, limit: int = 100) -> List[Medicion]:
+        return self._query_by_paciente(paciente_id, skip, limit).all()
+    
+    def get_by_paciente_filas(self, paciente_id: int, skip: int = 0, limit: int = 100) -> List[tuple]:
+        """Como get_by_paciente, pero como tuplas con las columnas de MedicionResponse"""
+        return filas(self._query_by_paciente(paciente_id, skip, limit), MedicionResponse)
+    
+    def get_page_by_paciente(
+        self, paciente_id: int, limit: int = 100, after: Optional[str] = None, before: Optional[str] = None
+    ) -> Tuple[List[Medicion], Optional[str], Optional[str]]:
+        """Página por cursor (timestamp, id) en orden descendente"""
+        query = self.db.query(Medicion).filter(Medicion.id_paciente == paciente_id)
+        return paginar(query, (Medicion.timestamp, Medicion.id), limit, after=after, before=before)
     
     def get_latest_by_paciente(self, paciente_id: int) -> Optional[Medicion]:
         return (self.db.query(Medicion)
@@ -31,20 +116,60 @@ class MedicionService:
                 .order_by(Medicion.timestamp.desc())
                 .first())
     
-    def get_by_date_range(self, paciente_id: int, start_date: datetime, end_date: datetime) -> List[Medicion]:
+    def get_latest_by_pacientes(self, paciente_ids: List[int]) -> List[Medicion]:
+        """Última medición de cada paciente indicado, en una sola consulta"""
+        if not paciente_ids:
+            return []
+        ultimos = (self.db.query(Medicion.id_paciente, func.max(Medicion.timestamp).label("ts"))
+                   .filter(Medicion.id_paciente.in_(paciente_ids))
+                   .group_by(Medicion.id_paciente)
+                   .subquery())
+        filas = (self.db.query(Medicion)
+                 .join(ultimos, (Medicion.id_paciente == ultimos.c.id_paciente) & (Medicion.timestamp == ultimos.c.ts))
+                 .order_by(Medicion.id)
+                 .all())
+        # Con timestamps repetidos gana el id mayor (el último de la lista)
+        return list({m.id_paciente: m for m in filas}.values())
+    
+    def get_ultima(self, paciente_id: int) -> Optional[MedicionResponse]:
+        """Última medición servida desde la caché; ante un fallo se lee y se cachea"""
+        medicion = cache_ultima_medicion.obtener(paciente_id)
+        if medicion is None:
+            db_medicion = self.get_latest_by_paciente(paciente_id)
+            if db_medicion is None:
+                return None
+            medicion = MedicionResponse.model_validate(db_medicion)
+            cache_ultima_medicion.actualizar(medicion)
+        return medicion
+    
+    def get_by_date_range(
+        self, paciente_id: int, start_date: datetime, end_date: datetime, limit: Optional[int] = None
+    ) -> List[Medicion]:
+        return self._query_by_date_range(paciente_id, start_date, end_date, limit).all()
+    
+    def get_by_date_range_filas(
+        self, paciente_id: int, start_date: datetime, end_date: datetime, limit: Optional[int] = None
+    ) -> List[tuple]:
+        return filas(self._query_by_date_range(paciente_id, start_date, end_date, limit), MedicionResponse)
+    
+    def _query_by_date_range(self, paciente_id: int, start_date: datetime, end_date: datetime, limit: Optional[int]):
         return (self.db.query(Medicion)
                 .filter(Medicion.id_paciente == paciente_id)
                 .filter(Medicion.timestamp >= start_date)
                 .filter(Medicion.timestamp <= end_date)
                 .order_by(Medicion.timestamp.desc())
-                .all())
+                .limit(limit))
+    
+    def get_serie(self, paciente_id: int, start_date: datetime, end_date: datetime, puntos: int) -> SerieMediciones:
+        """Serie acotada a ~`puntos` puntos con la resolución adecuada al rango"""
+        return AgregadoService(self.db).get_serie(paciente_id, start_date, end_date, puntos)
     
     def generate_fake_medicion(self, paciente_id: int) -> Medicion:
         """Genera una medición falsa con datos realistas"""
         fake_data = MedicionCreate(
             id_paciente=paciente_id,
-            spo2=Decimal(str(round(random.uniform(95.0, 100.0), 2))),
+            spo2=round(random.uniform(95.0, 100.0), 2),
             bpm=random.randint(60, 100),
-            temperatura=Decimal(str(round(random.uniform(36.0, 38.0), 2)))
+            temperatura=round(random.uniform(36.0, 38.0), 2)
         )
         return self.create(fake_data)
@@ -1,8 +1,15 @@
 from sqlalchemy.orm import Session
 from app.models.paciente import Paciente
-from app.schemas.paciente import PacienteCreate, PacienteUpdate
-from typing import List, Optional
+from app.schemas.paciente import PacienteCreate, PacienteUpdate, PacienteResponse
+from app.core.cache import cache_ultima_medicion
+from app.core.metricas import instrumentado
+from app.core.paginacion import paginar
+from app.core.respuestas import filas
+from app.services.estado_alertas import estado_alertas
+from app.services.tendencias import detector_tendencias
+from typing import Iterable, List, Optional, Set, Tuple
 
+@instrumentado
 class PacienteService:
     def __init__(self, db: Session):
         self.db = db
@@ -20,9 +27,30 @@ class PacienteService:
     def get_all(self, skip: int = 0, limit: int = 100) -> List[Paciente]:
         return self.db.query(Paciente).offset(skip).limit(limit).all()
     
+    def get_all_filas(self, skip: int = 0, limit: int = 100) -> List[tuple]:
+        """Como get_all, pero como tuplas con las columnas de PacienteResponse"""
+        return filas(self.db.query(Paciente).offset(skip).limit(limit), PacienteResponse)
+    
+    def get_page(
+        self, limit: int = 100, after: Optional[str] = None, before: Optional[str] = None
+    ) -> Tuple[List[Paciente], Optional[str], Optional[str]]:
+        """Página por cursor sobre el id, en orden ascendente"""
+        return paginar(self.db.query(Paciente), (Paciente.id,), limit, after=after, before=before, descendente=False)
+    
+    def get_ids_existentes(self, ids: Iterable[int]) -> Set[int]:
+        """Devuelve cuáles de los IDs indicados existen, en una sola consulta"""
+        ids = set(ids)
+        if not ids:
+            return set()
+        filas = self.db.query(Paciente.id).filter(Paciente.id.in_(ids)).all()
+        return {fila[0] for fila in filas}
+    
     def get_active(self) -> List[Paciente]:
         return self.db.query(Paciente).filter(Paciente.activo == True).all()
     
+    def get_active_filas(self) -> List[tuple]:
+        return filas(self.db.query(Paciente).filter(Paciente.activo == True), PacienteResponse)
+    
     def update(self, paciente_id: int, paciente_update: PacienteUpdate) -> Optional[Paciente]:
         db_paciente = self.get_by_id(paciente_id)
         if not db_paciente:
@@ -43,4 +71,7 @@ class PacienteService:
         
         self.db.delete(db_paciente)
         self.db.commit()
+        cache_ultima_medicion.invalidar(paciente_id)
+        estado_alertas.invalidar(paciente_id)
+        detector_tendencias.invalidar(paciente_id)
         return True
@@ -1,10 +1,14 @@
 from sqlalchemy.orm import Session
 from app.models.prediccion import Prediccion
-from app.schemas.prediccion import PrediccionCreate
-from typing import List
+from app.core.metricas import instrumentado
+from app.core.paginacion import paginar
+from app.core.respuestas import filas
+from app.schemas.prediccion import PrediccionCreate, PrediccionResponse
+from typing import List, Optional, Tuple
 import random
 from decimal import Decimal
 
+@instrumentado
 class PrediccionService:
     def __init__(self, db: Session):
         self.db = db
@@ -16,13 +20,26 @@ class PrediccionService:
         self.db.refresh(db_prediccion)
         return db_prediccion
     
-    def get_by_paciente(self, paciente_id: int, skip: int = 0, limit: int = 100) -> List[Prediccion]:
+    def _query_by_paciente(self, paciente_id: int, skip: int, limit: int):
         return (self.db.query(Prediccion)
                 .filter(Prediccion.id_paciente == paciente_id)
                 .order_by(Prediccion.timestamp.desc())
                 .offset(skip)
-                .limit(limit)
-                .all())
+                .limit(limit))
+    
+    def get_by_paciente(self, paciente_id: int, skip: int = 0, limit: int = 100) -> List[Prediccion]:
+        return self._query_by_paciente(paciente_id, skip, limit).all()
+    
+    def get_by_paciente_filas(self, paciente_id: int, skip: int = 0, limit: int = 100) -> List[tuple]:
+        """Como get_by_paciente, pero como tuplas con las columnas de PrediccionResponse"""
+        return filas(self._query_by_paciente(paciente_id, skip, limit), PrediccionResponse)
+    
+    def get_page_by_paciente(
+        self, paciente_id: int, limit: int = 100, after: Optional[str] = None, before: Optional[str] = None
+    ) -> Tuple[List[Prediccion], Optional[str], Optional[str]]:
+        """Página por cursor (timestamp, id) en orden descendente"""
+        query = self.db.query(Prediccion).filter(Prediccion.id_paciente == paciente_id)
+        return paginar(query, (Prediccion.timestamp, Prediccion.id), limit, after=after, before=before)
     
     def generate_fake_prediction(self, paciente_id: int) -> Prediccion:
         """Genera una predicción falsa para demostración"""
@@ -0,0 +1,185 @@
+import json
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.schemas.alerta import AlertaCreate, TipoAlertaEnum
+
+# Severidades en orden creciente; el índice es el valor numérico de la severidad
+TIPOS_ALERTA = (TipoAlertaEnum.verde, TipoAlertaEnum.amarilla, TipoAlertaEnum.roja)
+VERDE, AMARILLA, ROJA = 0, 1, 2
+
+SIGNOS = ("spo2", "bpm", "temperatura")
+MENSAJE_NORMAL = "Signos vitales normales"
+
+
+class ReglaAlerta(NamedTuple):
+    """Umbral de un signo vital: se dispara si el valor es < minimo o > maximo.
+
+    El mensaje puede usar `{valor}`. Si se indica una banda de edad la regla
+    solo aplica a pacientes dentro de ella (y solo cuando se conoce la edad).
+    """
+    signo: str
+    severidad: int
+    minimo: Optional[float]
+    maximo: Optional[float]
+    mensaje: str
+    edad_min: Optional[int] = None
+    edad_max: Optional[int] = None
+
+
+# Tabla única de umbrales. Ordenada por signo: el orden define el de los mensajes
+REGLAS_POR_DEFECTO = [
+    ReglaAlerta("spo2", ROJA, 90, None, "SpO2 críticamente bajo"),
+    ReglaAlerta("spo2", AMARILLA, 95, None, "SpO2 bajo"),
+    ReglaAlerta("bpm", ROJA, 50, 120, "Ritmo cardíaco anormal"),
+    ReglaAlerta("bpm", AMARILLA, 60, 100, "Ritmo cardíaco irregular"),
+    ReglaAlerta("temperatura", ROJA, 35, 39, "Temperatura crítica"),
+    ReglaAlerta("temperatura", AMARILLA, 36, 38, "Temperatura anormal"),
+]
+
+
+class MotorReglas:
+    """Evaluador de alertas compilado a arrays de NumPy.
+
+    Por lectura, la severidad es la máxima de las reglas disparadas y el
+    mensaje une (con "; ") los mensajes de las reglas de esa severidad.
+    """
+
+    def __init__(self, reglas: Sequence[ReglaAlerta] = REGLAS_POR_DEFECTO):
+        if len(reglas) > 63:
+            raise ValueError("El motor admite como máximo 63 reglas")
+        self.reglas = list(reglas)
+
+        self._signo = np.array([SIGNOS.index(r.signo) for r in self.reglas], dtype=np.intp)
+        self._severidad = np.array([r.severidad for r in self.reglas], dtype=np.int8)
+        self._minimo = np.array([-np.inf if r.minimo is None else r.minimo for r in self.reglas])
+        self._maximo = np.array([np.inf if r.maximo is None else r.maximo for r in self.reglas])
+        self._edad_min = np.array([-np.inf if r.edad_min is None else r.edad_min for r in self.reglas])
+        self._edad_max = np.array([np.inf if r.edad_max is None else r.edad_max for r in self.reglas])
+        self._sin_edad = np.array([r.edad_min is None and r.edad_max is None for r in self.reglas])
+        self._pesos = np.left_shift(np.int64(1), np.arange(len(self.reglas), dtype=np.int64))
+
+        # Copia en tipos de Python para el camino escalar de `evaluar_una`
+        self._escalar = [
+            (int(signo), int(sev), float(mn), float(mx), float(emn), float(emx), bool(sin_edad))
+            for signo, sev, mn, mx, emn, emx, sin_edad in zip(
+                self._signo, self._severidad, self._minimo, self._maximo,
+                self._edad_min, self._edad_max, self._sin_edad
+            )
+        ]
+
+        # Reglas cuyo mensaje depende del valor y deben formatearse fila a fila
+        self._mascara_formato = 0
+        for i, regla in enumerate(self.reglas):
+            if "{valor" in regla.mensaje:
+                self._mascara_formato |= 1 << i
+        self._textos = {0: MENSAJE_NORMAL}
+
+    @classmethod
+    def desde_archivo(cls, ruta: str) -> "MotorReglas":
+        """Carga la tabla de reglas desde un JSON con una lista de objetos ReglaAlerta"""
+        with open(ruta, encoding="utf-8") as f:
+            return cls([ReglaAlerta(**regla) for regla in json.load(f)])
+
+    def evaluar(
+        self,
+        spo2: Iterable[float],
+        bpm: Iterable[float],
+        temperatura: Iterable[float],
+        edades: Optional[Iterable[float]] = None,
+    ) -> Tuple[np.ndarray, List[str]]:
+        """Clasifica arrays de lecturas. Devuelve (severidades, mensajes)"""
+        valores = np.vstack([
+            np.asarray(spo2, dtype=np.float64),
+            np.asarray(bpm, dtype=np.float64),
+            np.asarray(temperatura, dtype=np.float64),
+        ])
+        n = valores.shape[1]
+        if n == 0 or not self.reglas:
+            return np.zeros(n, dtype=np.int8), [MENSAJE_NORMAL] * n
+
+        # (reglas, lecturas): qué regla se dispara en cada lectura
+        por_regla = valores[self._signo]
+        disparadas = (por_regla < self._minimo[:, None]) | (por_regla > self._maximo[:, None])
+        if edades is None:
+            disparadas &= self._sin_edad[:, None]
+        else:
+            edad = np.asarray(edades, dtype=np.float64)
+            disparadas &= (edad >= self._edad_min[:, None]) & (edad <= self._edad_max[:, None])
+
+        severidades = (disparadas * self._severidad[:, None]).max(axis=0)
+
+        # Código de bits con las reglas de severidad máxima; los textos se
+        # construyen una vez por código distinto y no por lectura
+        ganadoras = disparadas & (self._severidad[:, None] == severidades[None, :])
+        codigos = self._pesos @ ganadoras
+
+        unicos, inversos = np.unique(codigos, return_inverse=True)
+        textos = np.array([self._texto(int(codigo)) for codigo in unicos], dtype=object)
+        mensajes = textos[inversos].tolist()
+
+        if self._mascara_formato:
+            for k in np.flatnonzero(codigos & self._mascara_formato):
+                mensajes[k] = self._texto(int(codigos[k]), valores[:, k])
+        return severidades, mensajes
+
+    def evaluar_una(
+        self, spo2: float, bpm: float, temperatura: float, edad: Optional[float] = None
+    ) -> Tuple[int, str]:
+        """Misma semántica que `evaluar` para una sola lectura, sin pasar por NumPy"""
+        valores = (float(spo2), float(bpm), float(temperatura))
+        severidad, codigo = VERDE, 0
+        for i, (signo, sev, minimo, maximo, edad_min, edad_max, sin_edad) in enumerate(self._escalar):
+            if edad is None:
+                if not sin_edad:
+                    continue
+            elif not edad_min <= edad <= edad_max:
+                continue
+            valor = valores[signo]
+            if valor < minimo or valor > maximo:
+                if sev > severidad:
+                    severidad, codigo = sev, 0
+                if sev == severidad:
+                    codigo |= 1 << i
+        return severidad, self._texto(codigo, valores)
+
+    def clasificar(self, mediciones: Sequence, edades: Optional[Iterable[float]] = None) -> List[AlertaCreate]:
+        """Genera la AlertaCreate de cada medición (objetos con id_paciente, spo2, bpm y temperatura)"""
+        n = len(mediciones)
+        severidades, mensajes = self.evaluar(
+            np.fromiter((m.spo2 for m in mediciones), dtype=np.float64, count=n),
+            np.fromiter((m.bpm for m in mediciones), dtype=np.float64, count=n),
+            np.fromiter((m.temperatura for m in mediciones), dtype=np.float64, count=n),
+            edades,
+        )
+        return [
+            AlertaCreate(
+                id_paciente=m.id_paciente,
+                tipo=TIPOS_ALERTA[severidad],
+                mensaje=mensaje,
+                timestamp=getattr(m, "timestamp", None)
+            )
+            for m, severidad, mensaje in zip(mediciones, severidades.tolist(), mensajes)
+        ]
+
+    def _texto(self, codigo: int, valores=None) -> str:
+        if codigo & self._mascara_formato and valores is not None:
+            return "; ".join(
+                regla.mensaje.format(valor=valores[self._signo[i]])
+                for i, regla in enumerate(self.reglas) if codigo >> i & 1
+            )
+        texto = self._textos.get(codigo)
+        if texto is None:
+            texto = "; ".join(r.mensaje for i, r in enumerate(self.reglas) if codigo >> i & 1)
+            self._textos[codigo] = texto
+        return texto
+
+
+# Motor compartido por la API, la ingesta MQTT y los generadores de datos
+motor_reglas = (
+    MotorReglas.desde_archivo(settings.reglas_alerta_archivo)
+    if settings.reglas_alerta_archivo
+    else MotorReglas()
+)
@@ -0,0 +1,252 @@
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache_ultima_medicion
+from app.core.config import settings
+from app.core.tareas import TareaPeriodica
+from app.database import SessionLocal
+from app.models.alerta import Alerta
+from app.models.medicion import Medicion
+from app.services.agregados import AgregadoService
+from app.services.exportacion import FORMATOS, ExportacionService, parquet_disponible
+
+logger = logging.getLogger(__name__)
+
+TABLAS = {"mediciones": Medicion, "alertas": Alerta}
+
+
+class Particion(NamedTuple):
+    """Periodo [desde, hasta) de una tabla; `desde`/`hasta` None = sin límite"""
+    nombre: str
+    desde: Optional[datetime]
+    hasta: Optional[datetime]
+
+
+def inicio_periodo(ts: datetime, periodo: str) -> datetime:
+    ts = ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    return ts.replace(day=1) if periodo == "mes" else ts
+
+
+def siguiente_periodo(inicio: datetime, periodo: str) -> datetime:
+    if periodo == "dia":
+        return inicio + timedelta(days=1)
+    return (inicio.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def nombre_particion(inicio: datetime, periodo: str) -> str:
+    return inicio.strftime("p%Y%m" if periodo == "mes" else "p%Y%m%d")
+
+
+def definicion_particion(nombre: str, hasta: Optional[datetime]) -> str:
+    """Cláusula PARTITION de MySQL (RANGE sobre UNIX_TIMESTAMP(timestamp))"""
+    if hasta is None:
+        return f"PARTITION {nombre} VALUES LESS THAN MAXVALUE"
+    return f"PARTITION {nombre} VALUES LESS THAN (UNIX_TIMESTAMP('{hasta:%Y-%m-%d %H:%M:%S}'))"
+
+
+def periodos(desde: datetime, hasta: datetime, periodo: str) -> List[Particion]:
+    """Periodos completos desde el que contiene `desde` hasta el que empieza en o tras `hasta`"""
+    resultado = []
+    inicio = inicio_periodo(desde, periodo)
+    while inicio < hasta:
+        fin = siguiente_periodo(inicio, periodo)
+        resultado.append(Particion(nombre_particion(inicio, periodo), inicio, fin))
+        inicio = fin
+    return resultado
+
+
+class RetencionService:
+    """Retención por periodos de mediciones y alertas.
+
+    En MySQL con `PARTICIONADO_MYSQL` cada periodo es una partición RANGE y
+    caducarlo es un DROP PARTITION. En el resto de motores el periodo se
+    borra por rangos de timestamp en lotes cortos (índice ix_*_timestamp),
+    para no bloquear la ingesta con una transacción enorme.
+
+    Antes de eliminar un periodo de mediciones se consolidan sus agregados
+    (si la ingesta no los mantiene ya) y, si hay directorio de archivo, se
+    exportan sus filas a un archivo por periodo.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.dialecto = db.bind.dialect.name
+
+    def particionada(self, tabla: str) -> bool:
+        return bool(self._particiones_mysql(tabla))
+
+    def particiones(self, tabla: str) -> List[Particion]:
+        """Particiones nativas o, sin ellas, los periodos que tienen datos"""
+        nativas = self._particiones_mysql(tabla)
+        if nativas:
+            return nativas
+        modelo = TABLAS[tabla]
+        minimo, maximo = self.db.query(func.min(modelo.timestamp), func.max(modelo.timestamp)).one()
+        if minimo is None:
+            return []
+        return periodos(minimo, maximo + timedelta(microseconds=1), settings.particion_periodo)
+
+    def _particiones_mysql(self, tabla: str) -> List[Particion]:
+        if self.dialecto != "mysql":
+            return []
+        filas = self.db.execute(text(
+            "SELECT PARTITION_NAME, IF(PARTITION_DESCRIPTION = 'MAXVALUE', NULL,"
+            " FROM_UNIXTIME(PARTITION_DESCRIPTION)) FROM information_schema.PARTITIONS"
+            " WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :tabla AND PARTITION_NAME IS NOT NULL"
+            " ORDER BY PARTITION_ORDINAL_POSITION"
+        ), {"tabla": tabla}).all()
+        resultado, desde = [], None
+        for nombre, hasta in filas:
+            resultado.append(Particion(nombre, desde, hasta))
+            desde = hasta
+        return resultado
+
+    def asegurar_particiones(self, ahora: Optional[datetime] = None) -> Dict[str, List[str]]:
+        """Crea las particiones que falten hasta `particiones_futuras` periodos por delante"""
+        ahora = ahora or datetime.now()
+        periodo = settings.particion_periodo
+        limite = inicio_periodo(ahora, periodo)
+        for _ in range(settings.particiones_futuras + 1):
+            limite = siguiente_periodo(limite, periodo)
+
+        creadas = {}
+        for tabla in TABLAS:
+            particiones = self._particiones_mysql(tabla)
+            if not particiones or particiones[-1].hasta is not None:
+                continue
+            # La última partición (MAXVALUE) se divide en los periodos nuevos más ella misma
+            ultima = particiones[-1]
+            nuevas = [p for p in periodos(ultima.desde or ahora, limite, periodo)
+                      if ultima.desde is None or p.desde >= ultima.desde]
+            if not nuevas:
+                continue
+            definiciones = [definicion_particion(p.nombre, p.hasta) for p in nuevas]
+            definiciones.append(definicion_particion(ultima.nombre, None))
+            self.db.execute(text(
+                f"ALTER TABLE {tabla} REORGANIZE PARTITION {ultima.nombre} INTO ({', '.join(definiciones)})"
+            ))
+            creadas[tabla] = [p.nombre for p in nuevas]
+        return creadas
+
+    def corte(self, dias: int, ahora: Optional[datetime] = None) -> datetime:
+        """Inicio del periodo que contiene el límite de retención: lo anterior caduca"""
+        return inicio_periodo((ahora or datetime.now()) - timedelta(days=dias), settings.particion_periodo)
+
+    def aplicar(self, ahora: Optional[datetime] = None) -> Dict[str, dict]:
+        """Elimina (tras consolidar y archivar) los periodos caducados de cada tabla"""
+        dias = {"mediciones": settings.retencion_mediciones_dias, "alertas": settings.retencion_alertas_dias}
+        resumen = {}
+        for tabla, retencion in dias.items():
+            if retencion <= 0:
+                continue
+            corte = self.corte(retencion, ahora)
+            caducadas = [p for p in self.particiones(tabla) if p.hasta is not None and p.hasta <= corte]
+            resultado = resumen[tabla] = {"corte": corte, "particiones": [], "filas": 0, "archivos": []}
+            for particion in caducadas:
+                if tabla == "mediciones":
+                    self._consolidar(particion)
+                    archivo = self._archivar(particion)
+                    if archivo:
+                        resultado["archivos"].append(archivo)
+                resultado["filas"] += self._eliminar(tabla, particion)
+                resultado["particiones"].append(particion.nombre)
+            if tabla == "mediciones" and caducadas:
+                cache_ultima_medicion.invalidar()
+        return resumen
+
+    def ejecutar(self, ahora: Optional[datetime] = None) -> dict:
+        return {"creadas": self.asegurar_particiones(ahora), "eliminadas": self.aplicar(ahora)}
+
+    def _consolidar(self, particion: Particion):
+        # Con la ingesta manteniendo los agregados ya están al día
+        if settings.agregados_activos:
+            return
+        desde = particion.desde
+        if desde is None:
+            desde = self.db.query(func.min(Medicion.timestamp)).filter(
+                Medicion.timestamp < particion.hasta).scalar()
+            if desde is None:
+                return
+        AgregadoService(self.db).reconstruir(desde=desde, hasta=particion.hasta)
+
+    def _archivar(self, particion: Particion) -> Optional[str]:
+        directorio = settings.retencion_archivo_dir
+        if not directorio:
+            return None
+        formato = settings.retencion_archivo_formato
+        if formato == "parquet" and not parquet_disponible():
+            raise RuntimeError("El archivo en Parquet requiere pyarrow")
+        os.makedirs(directorio, exist_ok=True)
+        ruta = os.path.join(directorio, f"mediciones_{particion.nombre}.{FORMATOS[formato][1]}")
+        # Se escribe aparte y se renombra: un archivo con el nombre final siempre está completo
+        temporal = ruta + ".tmp"
+        exportacion = ExportacionService(
+            desde=particion.desde, hasta=particion.hasta - timedelta(microseconds=1)
+        )
+        with open(temporal, "wb") as archivo:
+            for bloque in exportacion.exportar(formato):
+                archivo.write(bloque)
+        os.replace(temporal, ruta)
+        return ruta
+
+    def _eliminar(self, tabla: str, particion: Particion) -> int:
+        if self.particionada(tabla):
+            filas = self.db.execute(text(f"SELECT COUNT(*) FROM {tabla} PARTITION ({particion.nombre})")).scalar()
+            self.db.execute(text(f"ALTER TABLE {tabla} DROP PARTITION {particion.nombre}"))
+            return filas
+
+        modelo = TABLAS[tabla]
+        condicion = modelo.timestamp < particion.hasta
+        if particion.desde is not None:
+            condicion = condicion & (modelo.timestamp >= particion.desde)
+        borradas = 0
+        while True:
+            ids = self.db.scalars(
+                select(modelo.id).where(condicion).limit(settings.retencion_filas_por_borrado)
+            ).all()
+            if not ids:
+                return borradas
+            self.db.execute(delete(modelo).where(modelo.id.in_(ids)))
+            self.db.commit()
+            borradas += len(ids)
+
+
+class TareaRetencion(TareaPeriodica):
+    """Ejecuta RetencionService cada `intervalo` segundos en un hilo propio.
+
+    La primera pasada es al arrancar: crea las particiones que falten.
+    """
+
+    nombre = "retencion"
+
+    def __init__(self, intervalo: float = settings.retencion_intervalo):
+        super().__init__(intervalo)
+        self.ultimo_resultado: Optional[dict] = None
+
+    def _pasada(self) -> dict:
+        db = SessionLocal()
+        try:
+            self.ultimo_resultado = RetencionService(db).ejecutar()
+            return self.ultimo_resultado
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def estadisticas(self) -> dict:
+        return {
+            **super().estadisticas(),
+            "periodo": settings.particion_periodo,
+            "retencion_mediciones_dias": settings.retencion_mediciones_dias,
+            "retencion_alertas_dias": settings.retencion_alertas_dias,
+            "ultimo_resultado": self.ultimo_resultado,
+        }
+
+
+tarea_retencion = TareaRetencion()
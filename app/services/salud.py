@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+import orjson
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.tareas import TareaPeriodica
+from app.database import engine, estadisticas_pools
+from app.mqtt.ingesta import cola_ingesta
+from app.mqtt.lider import lider_ingesta
+
+logger = logging.getLogger(__name__)
+
+
+class MonitorSalud(TareaPeriodica):
+    """Comprobaciones de disponibilidad para /health y /ready.
+
+    Un hilo comprueba cada `intervalo` segundos el ping a la base de datos
+    (a través del pool, como una petición), la saturación del pool, la
+    conexión MQTT, la profundidad de la cola de ingesta y el retraso del
+    bucle de eventos, y compara cada medida con su presupuesto
+    (SALUD_*). Las sondas solo leen el resultado ya serializado: nunca
+    tocan la base de datos.
+
+    El retraso del bucle lo mide una corrutina que duerme `periodo_bucle`
+    segundos y anota cuánto se pasa. Si el bucle está bloqueado la
+    corrutina no llega a anotarlo, pero el hilo ve que el último latido
+    es demasiado antiguo. Si las propias comprobaciones se atascan (p. ej.
+    el ping esperando un pool agotado), el resultado caduca y /ready
+    responde "no listo".
+    """
+
+    nombre = "salud"
+
+    def __init__(self, intervalo: float = settings.salud_intervalo, periodo_bucle: float = 0.5):
+        super().__init__(intervalo)
+        self.periodo_bucle = periodo_bucle
+        self.inicio = datetime.now()
+        self.mqtt = None  # MQTTClient de la API, si se arrancó
+        self._lock = threading.Lock()
+        self._tarea_bucle: Optional[asyncio.Task] = None
+        self._latido: Optional[float] = None
+        self._lag_max = 0.0
+        self._pool_previo = (0, 0.0)
+        self._comprobado = 0.0
+        self.listo = False
+        self.comprobaciones: dict = {}
+        self.cuerpo = b""
+
+    def iniciar(self):
+        """Arranca el hilo y, si se llama desde el bucle de la API, el vigilante del bucle"""
+        try:
+            self._tarea_bucle = asyncio.get_running_loop().create_task(self.vigilar_bucle())
+        except RuntimeError:
+            pass
+        super().iniciar()
+
+    def detener(self, timeout: float = 5.0):
+        if self._tarea_bucle:
+            self._tarea_bucle.cancel()
+            self._tarea_bucle = None
+            self._latido = None
+        super().detener(timeout)
+
+    async def vigilar_bucle(self):
+        while True:
+            self._latido = time.monotonic()
+            await asyncio.sleep(self.periodo_bucle)
+            retraso = time.monotonic() - self._latido - self.periodo_bucle
+            self._lag_max = max(self._lag_max, retraso)
+
+    def caducado(self) -> bool:
+        return time.monotonic() - self._comprobado > max(3 * self.intervalo, 1.0)
+
+    def respuesta(self):
+        """(código HTTP, cuerpo JSON) de /ready, sin comprobar nada en línea"""
+        if self.caducado():
+            edad = round(time.monotonic() - self._comprobado, 1) if self._comprobado else None
+            return 503, orjson.dumps({
+                "listo": False,
+                "motivo": "comprobaciones sin actualizar" if self._comprobado else "sin comprobar",
+                "antiguedad_s": edad,
+                "comprobaciones": self.comprobaciones,
+            })
+        return (200 if self.listo else 503), self.cuerpo
+
+    def comprobar(self):
+        comprobaciones = {
+            "base_datos": self._base_datos(),
+            "pool": self._pool(),
+            "mqtt": self._mqtt(),
+            "ingesta": self._ingesta(),
+            "bucle_eventos": self._bucle(),
+        }
+        listo = all(c["ok"] for c in comprobaciones.values())
+        if listo != self.listo and self._comprobado:
+            nivel = logging.INFO if listo else logging.WARNING
+            fallidas = [nombre for nombre, c in comprobaciones.items() if not c["ok"]]
+            logger.log(nivel, f"Instancia {'lista' if listo else 'no lista'} {fallidas or ''}".rstrip())
+        self.comprobaciones = comprobaciones
+        self.listo = listo
+        self.cuerpo = orjson.dumps({
+            "listo": listo,
+            "comprobado": datetime.now().isoformat(timespec="seconds"),
+            "comprobaciones": comprobaciones,
+        })
+        self._comprobado = time.monotonic()
+
+    def _base_datos(self) -> dict:
+        inicio = time.perf_counter()
+        try:
+            with engine.connect() as conexion:
+                conexion.execute(text("SELECT 1"))
+        except Exception as e:
+            return {"ok": False, "ping_ms": None, "presupuesto_ms": settings.salud_ping_max_ms, "error": str(e)}
+        ping_ms = round((time.perf_counter() - inicio) * 1000, 3)
+        return {"ok": ping_ms <= settings.salud_ping_max_ms, "ping_ms": ping_ms,
+                "presupuesto_ms": settings.salud_ping_max_ms}
+
+    def _pool(self) -> dict:
+        pool = estadisticas_pools()["sync"]
+        if pool is None:
+            return {"ok": True, "medido": False}
+        # Espera media desde la comprobación anterior: el p99 del pool arrastra picos antiguos
+        checkouts, espera_total = engine.pool.checkouts, engine.pool.espera_total
+        previos, espera_previa = self._pool_previo
+        self._pool_previo = (checkouts, espera_total)
+        nuevos = checkouts - previos
+        espera_ms = round((espera_total - espera_previa) * 1000 / nuevos, 3) if nuevos > 0 else 0.0
+        utilizacion = pool["utilizacion"] or 0.0
+        return {
+            "ok": utilizacion <= settings.salud_pool_utilizacion_max and espera_ms <= settings.salud_pool_espera_max_ms,
+            "utilizacion": utilizacion,
+            "en_uso": pool["en_uso"],
+            "espera_media_ms": espera_ms,
+            "timeouts": pool["timeouts"],
+            "presupuesto_utilizacion": settings.salud_pool_utilizacion_max,
+            "presupuesto_espera_ms": settings.salud_pool_espera_max_ms,
+        }
+
+    def _mqtt(self) -> dict:
+        if lider_ingesta.delegada:
+            return {"ok": True, "conectado": None, "ingesta": "otro worker"}
+        conectado = bool(self.mqtt and self.mqtt.conectado)
+        return {
+            "ok": conectado or not settings.salud_mqtt_obligatorio,
+            "conectado": conectado,
+            "obligatorio": settings.salud_mqtt_obligatorio,
+        }
+
+    def _ingesta(self) -> dict:
+        profundidad = cola_ingesta.cola.qsize()
+        ocupacion = round(profundidad / cola_ingesta.cola_max, 4) if cola_ingesta.cola_max else 0.0
+        return {
+            "ok": ocupacion <= settings.salud_ingesta_ocupacion_max,
+            "profundidad": profundidad,
+            "capacidad": cola_ingesta.cola_max,
+            "ocupacion": ocupacion,
+            "presupuesto_ocupacion": settings.salud_ingesta_ocupacion_max,
+        }
+
+    def _bucle(self) -> dict:
+        if self._latido is None:
+            return {"ok": True, "vigilado": False}
+        # Un bucle bloqueado no anota su retraso: se deduce de la antigüedad del latido
+        bloqueado = time.monotonic() - self._latido - self.periodo_bucle
+        lag_ms = round(max(self._lag_max, bloqueado, 0.0) * 1000, 3)
+        self._lag_max = 0.0
+        return {"ok": lag_ms <= settings.salud_lag_max_ms, "vigilado": True, "lag_ms": lag_ms,
+                "presupuesto_ms": settings.salud_lag_max_ms}
+
+    def _pasada(self):
+        with self._lock:
+            self.comprobar()
+
+
+# Monitor compartido por la API
+monitor_salud = MonitorSalud()
@@ -0,0 +1,376 @@
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.schemas.alerta import AlertaCreate, TipoAlertaEnum
+from app.services.reglas import SIGNOS, TIPOS_ALERTA, AMARILLA
+
+NOMBRES = ("SpO2", "Ritmo cardíaco", "Temperatura")
+UNIDADES = ("%", "lpm", "°C")
+# Desviación típica mínima por signo: evita z enormes en series casi constantes
+PISOS = np.array([0.5, 2.0, 0.1])
+# Pendiente (unidades por hora) a partir de la cual un signo se considera en deterioro
+PENDIENTES = np.array([3.0, 20.0, 1.0])
+# Solo el descenso de SpO2 es deterioro; en pulso y temperatura cuentan ambos sentidos
+SOLO_DESCENSO = np.array([True, False, False])
+# Arrays de estado (una fila por paciente); `_visto` es la hora real de la última lectura
+_ESTADO = ("_n", "_t0", "_ultimo", "_visto", "_racha", "_desde", "_avisada",
+           "_w", "_w2", "_st", "_stt", "_sx", "_sxx", "_stx")
+
+
+class Observacion(NamedTuple):
+    """Lecturas evaluadas sobre una copia del estado, pendientes de `confirmar`"""
+    copia: "DetectorTendencias"
+    # Lecturas de cada paciente en el detector al hacer la copia
+    base: Dict[int, int]
+    paciente_ids: List[int]
+    valores: np.ndarray
+    tiempos: np.ndarray
+    mensajes: List[Optional[str]]
+
+
+class DetectorTendencias:
+    """Detección en línea de deterioro sostenido por paciente.
+
+    Para cada paciente y signo mantiene, con memoria constante, sumas con
+    decaimiento exponencial de las que salen una media y una varianza (z-score
+    de cada lectura frente a su historia reciente) y una regresión lineal
+    sobre el tiempo (pendiente por hora y su error típico). El peso de cada
+    lectura depende del tiempo transcurrido (constante de tiempo `ventana` en
+    segundos), no del ritmo de muestreo.
+
+    Una lectura está en deterioro si su z-score supera el umbral o si la
+    pendiente es relevante y significativa. Cuando el deterioro dura al menos
+    `sostenida` segundos y `lecturas` lecturas seguidas se emite una única
+    alerta por episodio. El estado vive en arrays de NumPy indexados
+    por la posición de cada paciente, que crecen al llegar pacientes nuevos;
+    antes de crecer se liberan las filas de los pacientes sin lecturas
+    durante `inactividad` segundos, y `invalidar` libera la de un paciente.
+
+    Las lecturas que aún no se han guardado se evalúan con `evaluar`, sobre
+    una copia, y solo entran en el estado con `confirmar` tras el commit: un
+    lote que falla (y se reintenta) no cuenta dos veces ni gasta el aviso
+    del episodio.
+    """
+
+    def __init__(
+        self,
+        ventana: float = settings.tendencias_ventana,
+        z: float = settings.tendencias_z,
+        lecturas: int = settings.tendencias_lecturas,
+        sostenida: float = settings.tendencias_sostenida,
+        calentamiento: int = settings.tendencias_calentamiento,
+        inactividad: float = settings.tendencias_inactividad,
+        capacidad: int = 1024,
+    ):
+        self.ventana = ventana
+        self.z = z
+        self.lecturas = lecturas
+        self.sostenida = sostenida
+        self.calentamiento = calentamiento
+        self.inactividad = inactividad
+        self._lock = threading.Lock()
+        self._posiciones: Dict[int, int] = {}
+        # Filas libres por debajo de `_ocupadas` (pacientes olvidados)
+        self._libres: List[int] = []
+        self._ocupadas = 0
+        self._reservar(capacidad)
+        self.observadas = 0
+        self.alertas = 0
+
+    def _reservar(self, capacidad: int):
+        self._n = np.zeros(capacidad, dtype=np.int32)
+        self._t0 = np.zeros(capacidad)
+        self._ultimo = np.zeros(capacidad)
+        self._visto = np.zeros(capacidad)
+        # Episodio de deterioro en curso por signo: lecturas, inicio y si ya se avisó
+        self._racha = np.zeros((capacidad, 3), dtype=np.int32)
+        self._desde = np.zeros((capacidad, 3))
+        self._avisada = np.zeros((capacidad, 3), dtype=bool)
+        # Sumas con decaimiento exponencial: pesos (y sus cuadrados), t, t², x, x² y t·x.
+        # Cada lectura entra con peso 1 y pierde peso con el tiempo transcurrido
+        self._w = np.zeros(capacidad)
+        self._w2 = np.zeros(capacidad)
+        self._st = np.zeros(capacidad)
+        self._stt = np.zeros(capacidad)
+        self._sx = np.zeros((capacidad, 3))
+        self._sxx = np.zeros((capacidad, 3))
+        self._stx = np.zeros((capacidad, 3))
+
+    def _crecer(self, minimo: int):
+        capacidad = len(self._n)
+        while capacidad < minimo:
+            capacidad *= 2
+        for nombre in _ESTADO:
+            actual = getattr(self, nombre)
+            nuevo = np.zeros((capacidad,) + actual.shape[1:], dtype=actual.dtype)
+            nuevo[:len(actual)] = actual
+            setattr(self, nombre, nuevo)
+
+    def _slots(self, paciente_ids: Sequence[int]) -> np.ndarray:
+        posiciones = self._posiciones
+        nuevos = {p for p in paciente_ids if p not in posiciones}
+        if self._ocupadas + len(nuevos) - len(self._libres) > len(self._n):
+            self._purgar(excepto=set(paciente_ids))
+        for paciente_id in nuevos:
+            if self._libres:
+                posiciones[paciente_id] = self._libres.pop()
+            else:
+                posiciones[paciente_id] = self._ocupadas
+                self._ocupadas += 1
+        if self._ocupadas > len(self._n):
+            self._crecer(self._ocupadas)
+        return np.fromiter((posiciones[p] for p in paciente_ids), dtype=np.intp, count=len(paciente_ids))
+
+    def _liberar(self, paciente_id: int):
+        s = self._posiciones.pop(paciente_id)
+        self._n[s] = 0
+        self._libres.append(s)
+
+    def _purgar(self, excepto=()):
+        """Libera las filas de los pacientes sin lecturas durante `inactividad` segundos"""
+        limite = time.time() - self.inactividad
+        for paciente_id in [p for p, s in self._posiciones.items() if self._visto[s] < limite and p not in excepto]:
+            self._liberar(paciente_id)
+
+    def observar(self, paciente_ids: Sequence[int], valores, tiempos) -> List[Optional[str]]:
+        """Incorpora lecturas (spo2, bpm, temperatura) con su hora en segundos.
+
+        Las lecturas de un mismo paciente se procesan en el orden recibido.
+        Devuelve, por lectura, el mensaje de la alerta de tendencia o None.
+        """
+        valores = np.asarray(valores, dtype=np.float64).reshape(-1, 3)
+        tiempos = np.asarray(tiempos, dtype=np.float64)
+        if not len(valores):
+            return []
+        with self._lock:
+            return self._observar(paciente_ids, valores, tiempos)
+
+    def _observar(self, paciente_ids: Sequence[int], valores: np.ndarray, tiempos: np.ndarray) -> List[Optional[str]]:
+        mensajes: List[Optional[str]] = [None] * len(valores)
+        slots = self._slots(paciente_ids)
+        if len(slots) == 1:
+            disparadas, z, pendientes = self._actualizar(slots, valores, tiempos)
+            if disparadas.any():
+                mensajes[0] = self._mensaje(disparadas[0], z[0], pendientes[0])
+                self.alertas += 1
+            self.observadas += 1
+            return mensajes
+        # Ronda k = k-ésima lectura de cada paciente en el lote: dentro de una
+        # ronda no hay pacientes repetidos y se actualiza en bloque
+        orden = np.argsort(slots, kind="stable")
+        ordenados = slots[orden]
+        inicios = np.flatnonzero(np.r_[True, ordenados[1:] != ordenados[:-1]])
+        rango = np.empty(len(slots), dtype=np.intp)
+        rango[orden] = np.arange(len(slots)) - np.repeat(inicios, np.diff(np.r_[inicios, len(slots)]))
+
+        for ronda in range(int(rango.max()) + 1):
+            indices = np.flatnonzero(rango == ronda)
+            disparadas, z, pendientes = self._actualizar(slots[indices], valores[indices], tiempos[indices])
+            for k in np.flatnonzero(disparadas.any(axis=1)):
+                mensajes[indices[k]] = self._mensaje(disparadas[k], z[k], pendientes[k])
+        self.observadas += len(valores)
+        self.alertas += sum(m is not None for m in mensajes)
+        return mensajes
+
+    def _momentos(self, s):
+        """Media y varianza de cada signo, pendiente por hora y su error típico"""
+        w = np.maximum(self._w[s], 1e-300)[:, None]
+        media = self._sx[s] / w
+        varianza = np.maximum(self._sxx[s] / w - media * media, 0.0)
+        mt = self._st[s][:, None] / w
+        varianza_t = self._stt[s][:, None] / w - mt * mt
+        with np.errstate(divide="ignore", invalid="ignore"):
+            valida = varianza_t > 1e-12
+            pendiente = np.where(valida, (self._stx[s] / w - mt * media) / varianza_t, 0.0)
+            # Tamaño efectivo de la muestra con pesos desiguales: W² / Σw²
+            efectivas = w * w / self._w2[s][:, None]
+            residuo = np.maximum(varianza - pendiente * pendiente * varianza_t, 0.0)
+            error = np.where(valida, np.sqrt(residuo / (efectivas * varianza_t)), np.inf)
+        return media, varianza, pendiente, error
+
+    def _actualizar(self, s: np.ndarray, x: np.ndarray, t: np.ndarray):
+        nuevos = self._n[s] == 0
+        if nuevos.any():
+            p = s[nuevos]
+            self._t0[p] = self._ultimo[p] = t[nuevos]
+            for nombre in _ESTADO[3:]:
+                getattr(self, nombre)[p] = 0
+
+        # z-score frente a la historia previa a la lectura
+        media, varianza, _, _ = self._momentos(s)
+        z = np.where(nuevos[:, None], 0.0, (x - media) / np.maximum(np.sqrt(varianza), PISOS))
+
+        # Una lectura posterior envejece lo acumulado; una atrasada entra ya con menos peso
+        avance = t - self._ultimo[s]
+        decaimiento = np.exp(-np.maximum(avance, 0.0) / self.ventana)
+        peso = np.exp(-np.maximum(-avance, 0.0) / self.ventana)
+        self._ultimo[s] = np.maximum(self._ultimo[s], t)
+        self._visto[s] = time.time()
+
+        horas = (t - self._t0[s]) / 3600.0
+        self._w[s] = decaimiento * self._w[s] + peso
+        self._w2[s] = decaimiento ** 2 * self._w2[s] + peso ** 2
+        self._st[s] = decaimiento * self._st[s] + peso * horas
+        self._stt[s] = decaimiento * self._stt[s] + peso * horas * horas
+        decaimiento, peso, horas = decaimiento[:, None], peso[:, None], horas[:, None]
+        self._sx[s] = decaimiento * self._sx[s] + peso * x
+        self._sxx[s] = decaimiento * self._sxx[s] + peso * x * x
+        self._stx[s] = decaimiento * self._stx[s] + peso * horas * x
+
+        # Una pendiente cuenta si es clínicamente relevante y estadísticamente
+        # significativa (|pendiente / error típico| por encima del umbral de z)
+        _, _, pendientes, error = self._momentos(s)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            significativa = np.abs(pendientes) > self.z * error
+        subida = (pendientes > PENDIENTES) & significativa
+        bajada = (pendientes < -PENDIENTES) & significativa
+
+        n = self._n[s] = self._n[s] + 1
+        deterioro = np.where(SOLO_DESCENSO, (z < -self.z) | bajada, (np.abs(z) > self.z) | subida | bajada)
+        # Sin una ventana completa de historia la pendiente aún no es fiable
+        deterioro &= ((n >= self.calentamiento) & (self._ultimo[s] - self._t0[s] >= self.ventana))[:, None]
+        racha = self._racha[s] = np.where(deterioro, self._racha[s] + 1, 0)
+        desde = self._desde[s] = np.where(racha == 1, t[:, None], self._desde[s])
+        disparadas = (racha >= self.lecturas) & (t[:, None] - desde >= self.sostenida) & ~self._avisada[s]
+        self._avisada[s] = deterioro & (self._avisada[s] | disparadas)
+        return disparadas, z, pendientes
+
+    def _mensaje(self, disparadas, z, pendientes) -> str:
+        partes = []
+        for i in np.flatnonzero(disparadas):
+            # El sentido lo da la pendiente si supera su umbral; si no, el z-score
+            cambio = pendientes[i] if abs(pendientes[i]) > PENDIENTES[i] else z[i]
+            sentido = "en descenso" if cambio < 0 else "en ascenso"
+            partes.append(f"{NOMBRES[i]} {sentido} sostenido ({pendientes[i]:+.1f} {UNIDADES[i]}/h, z {z[i]:+.1f})")
+        return "Tendencia: " + "; ".join(partes)
+
+    def aplicar(self, mediciones: Sequence, alertas: List[AlertaCreate]) -> List[AlertaCreate]:
+        """Observa mediciones ya guardadas y eleva a amarilla (como mínimo) las alertas de las que disparan"""
+        if not settings.tendencias_activas or not mediciones:
+            return alertas
+        return _elevar(alertas, self.observar(*_lecturas(mediciones)))
+
+    def evaluar(self, mediciones: Sequence, alertas: List[AlertaCreate]) -> Tuple[List[AlertaCreate], Optional[Observacion]]:
+        """Como `aplicar` para lecturas aún sin guardar: no cambia el estado.
+
+        Las lecturas se evalúan sobre una copia del estado de sus pacientes;
+        la observación devuelta se pasa a `confirmar` después del commit.
+        """
+        if not settings.tendencias_activas or not mediciones:
+            return alertas, None
+        paciente_ids, valores, tiempos = _lecturas(mediciones)
+        valores = np.asarray(valores, dtype=np.float64).reshape(-1, 3)
+        tiempos = np.asarray(tiempos, dtype=np.float64)
+        copia = DetectorTendencias(self.ventana, self.z, self.lecturas, self.sostenida, self.calentamiento,
+                                   self.inactividad, capacidad=len(set(paciente_ids)))
+        with self._lock:
+            base = {}
+            for paciente_id in dict.fromkeys(paciente_ids):
+                s = self._posiciones.get(paciente_id)
+                base[paciente_id] = int(self._n[s]) if s is not None else 0
+                destino = copia._slots([paciente_id])
+                if s is not None:
+                    for nombre in _ESTADO:
+                        getattr(copia, nombre)[destino] = getattr(self, nombre)[s]
+        mensajes = copia._observar(paciente_ids, valores, tiempos)
+        return _elevar(alertas, mensajes), Observacion(copia, base, paciente_ids, valores, tiempos, mensajes)
+
+    def confirmar(self, observacion: Optional[Observacion]):
+        """Incorpora al estado las lecturas de `evaluar` una vez guardadas.
+
+        Si otro lote ha confirmado lecturas del mismo paciente desde la copia,
+        las de este se vuelven a observar sobre el estado actual.
+        """
+        if observacion is None:
+            return
+        copia = observacion.copia
+        with self._lock:
+            repetir = set()
+            for paciente_id, n in observacion.base.items():
+                s = self._posiciones.get(paciente_id)
+                if (int(self._n[s]) if s is not None else 0) != n:
+                    repetir.add(paciente_id)
+                    continue
+                s = self._slots([paciente_id])
+                origen = copia._posiciones[paciente_id]
+                for nombre in _ESTADO:
+                    getattr(self, nombre)[s] = getattr(copia, nombre)[origen]
+            copiadas = [i for i, p in enumerate(observacion.paciente_ids) if p not in repetir]
+            self.observadas += len(copiadas)
+            self.alertas += sum(observacion.mensajes[i] is not None for i in copiadas)
+            if repetir:
+                indices = [i for i, p in enumerate(observacion.paciente_ids) if p in repetir]
+                self._observar([observacion.paciente_ids[i] for i in indices],
+                               observacion.valores[indices], observacion.tiempos[indices])
+
+    def estado(self, paciente_id: int) -> Optional[dict]:
+        """Estadísticas actuales de un paciente (None si no tiene lecturas)"""
+        with self._lock:
+            s = self._posiciones.get(paciente_id)
+            if s is None or not self._n[s]:
+                return None
+            media, varianza, pendiente, _ = (v[0] for v in self._momentos(np.array([s])))
+            return {
+                "lecturas": int(self._n[s]),
+                "ultima": datetime.fromtimestamp(self._ultimo[s]),
+                **{
+                    signo: {
+                        "media": round(float(media[i]), 3),
+                        "desviacion": round(float(np.sqrt(varianza[i])), 3),
+                        "pendiente_hora": round(float(pendiente[i]), 3),
+                        "racha": int(self._racha[s, i]),
+                    }
+                    for i, signo in enumerate(SIGNOS)
+                },
+            }
+
+    def invalidar(self, paciente_id: Optional[int] = None):
+        """Olvida el estado de un paciente (o de todos) y libera su fila"""
+        with self._lock:
+            if paciente_id is None:
+                self._posiciones.clear()
+                self._libres.clear()
+                self._ocupadas = 0
+                self._reservar(1024)
+            elif paciente_id in self._posiciones:
+                self._liberar(paciente_id)
+
+    def estadisticas(self) -> dict:
+        return {
+            "activas": settings.tendencias_activas,
+            "ventana_segundos": self.ventana,
+            "pacientes": len(self._posiciones),
+            "memoria_bytes": sum(getattr(self, nombre).nbytes for nombre in _ESTADO),
+            "lecturas_observadas": self.observadas,
+            "alertas_emitidas": self.alertas,
+        }
+
+
+def _lecturas(mediciones: Sequence):
+    """(pacientes, valores, horas en segundos) de las mediciones; sin timestamp, ahora"""
+    ahora = datetime.now().timestamp()
+    return (
+        [m.id_paciente for m in mediciones],
+        [(m.spo2, m.bpm, m.temperatura) for m in mediciones],
+        [m.timestamp.timestamp() if getattr(m, "timestamp", None) else ahora for m in mediciones],
+    )
+
+
+def _elevar(alertas: List[AlertaCreate], mensajes: Sequence[Optional[str]]) -> List[AlertaCreate]:
+    for alerta, mensaje in zip(alertas, mensajes):
+        if mensaje is None:
+            continue
+        if TIPOS_ALERTA.index(TipoAlertaEnum(alerta.tipo)) < AMARILLA:
+            alerta.tipo, alerta.mensaje = TipoAlertaEnum.amarilla, mensaje
+        else:
+            alerta.mensaje = f"{alerta.mensaje}; {mensaje}"[:255]
+    return alertas
+
+
+# Detector compartido por todos los caminos de ingesta del proceso
+detector_tendencias = DetectorTendencias()
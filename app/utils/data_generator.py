@@ -1,24 +1,35 @@
 import random
-from decimal import Decimal
+import time
 from datetime import datetime, timedelta
+from typing import List, Optional
+import numpy as np
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
+from app.core.cache import cache_ultima_medicion
+from app.core.config import settings
+from app.models.alerta import Alerta
+from app.models.medicion import Medicion
+from app.services.agregados import RESOLUCIONES, inicio_intervalo, sentencia_upsert
 from app.services.pacientes import PacienteService
 from app.services.mediciones import MedicionService
 from app.services.alertas import AlertaService
 from app.services.predicciones import PrediccionService
 from app.schemas.paciente import PacienteCreate
-from app.schemas.medicion import MedicionCreate
+from app.schemas.medicion import MedicionCreate, MedicionResponse
 from app.schemas.alerta import AlertaCreate, TipoAlertaEnum
 from app.schemas.prediccion import PrediccionCreate
+from app.services.estado_alertas import estado_alertas
+from app.services.reglas import TIPOS_ALERTA, VERDE, motor_reglas
 
 class DataGenerator:
     def __init__(self, db: Session):
         self.db = db
     
-    def generate_sample_patients(self, count: int = 5):
-        """Genera pacientes de muestra"""
+    def generate_sample_patients(self, count: int = 5) -> List[int]:
+        """Genera pacientes de muestra y devuelve sus IDs"""
         nombres = ["Juan Pérez", "María García", "Carlos López", "Ana Rodríguez", "Pedro Martínez"]
         service = PacienteService(self.db)
+        ids = []
         
         for i in range(count):
             paciente = PacienteCreate(
@@ -27,7 +38,8 @@ class DataGenerator:
                 genero=random.choice(['M', 'F']),
                 activo=True
             )
-            service.create(paciente)
+            ids.append(service.create(paciente).id)
+        return ids
     
     def generate_historical_data(self, paciente_id: int, days: int = 7):
         """Genera datos históricos para un paciente"""
@@ -41,14 +53,14 @@ class DataGenerator:
             timestamp = start_date + timedelta(hours=hour)
             
             # Generar datos con ligera variabilidad
-            spo2 = Decimal(str(round(random.uniform(95.0, 100.0), 2)))
+            spo2 = round(random.uniform(95.0, 100.0), 2)
             bpm = random.randint(60, 100)
-            temperatura = Decimal(str(round(random.uniform(36.0, 38.0), 2)))
+            temperatura = round(random.uniform(36.0, 38.0), 2)
             
             # Ocasionalmente generar valores anormales
             if random.random() < 0.1:  # 10% de probabilidad
                 if random.choice([True, False]):
-                    spo2 = Decimal(str(round(random.uniform(88.0, 94.0), 2)))
+                    spo2 = round(random.uniform(88.0, 94.0), 2)
                 else:
                     bpm = random.randint(45, 55) if random.choice([True, False]) else random.randint(105, 125)
             
@@ -56,15 +68,101 @@ class DataGenerator:
                 id_paciente=paciente_id,
                 spo2=spo2,
                 bpm=bpm,
-                temperatura=temperatura
+                temperatura=temperatura,
+                timestamp=timestamp
             )
             
             nueva_medicion = service.create(medicion)
             
-            # Evaluar y crear alerta
-            from app.schemas.medicion import MedicionResponse
-            alerta_data = alerta_service.evaluate_medicion(MedicionResponse.from_orm(nueva_medicion))
-            alerta_service.create(alerta_data)
+            # Evaluar y crear alerta con la hora de la lectura
+            alerta_data = alerta_service.evaluate_medicion(MedicionResponse.model_validate(nueva_medicion))
+            alerta_data.timestamp = timestamp
+            alerta_service.registrar(alerta_data)
+    
+    def generate_historical_bulk(
+        self,
+        paciente_ids: List[int],
+        days: int = 7,
+        intervalo_minutos: float = 60,
+        semilla: Optional[int] = None,
+    ) -> dict:
+        """Genera el histórico de varios pacientes en bloque.
+        
+        Mismas distribuciones que `generate_historical_data`, pero las
+        lecturas se generan como arrays de NumPy, las alertas se clasifican
+        con una sola llamada al motor de reglas y todo se escribe con INSERT
+        por lotes en una única transacción. Con `alertas_solo_transiciones`
+        solo se guardan las alertas anormales y los cambios de severidad de
+        cada paciente dentro del histórico generado. Devuelve un resumen con
+        las filas escritas y su ritmo.
+        """
+        inicio = time.perf_counter()
+        rng = np.random.default_rng(semilla)
+        pasos = int(days * 24 * 60 / intervalo_minutos)
+        forma = (pasos, len(paciente_ids))
+        
+        spo2 = rng.uniform(95.0, 100.0, forma)
+        bpm = rng.integers(60, 101, forma)
+        temperatura = rng.uniform(36.0, 38.0, forma)
+        
+        # 10 % de lecturas anormales: la mitad con SpO2 bajo, el resto con bradi/taquicardia
+        anormal = rng.random(forma) < 0.1
+        hipoxia = anormal & (rng.random(forma) < 0.5)
+        arritmia = anormal & ~hipoxia
+        spo2[hipoxia] = rng.uniform(88.0, 94.0, int(hipoxia.sum()))
+        bajo = rng.random(forma) < 0.5
+        bpm[arritmia & bajo] = rng.integers(45, 56, int((arritmia & bajo).sum()))
+        bpm[arritmia & ~bajo] = rng.integers(105, 126, int((arritmia & ~bajo).sum()))
+        spo2, temperatura = spo2.round(2), temperatura.round(2)
+        
+        severidades, mensajes = motor_reglas.evaluar(spo2.ravel(), bpm.ravel(), temperatura.ravel())
+        severidades = severidades.reshape(forma)
+        guardar = np.ones(forma, dtype=bool)
+        if estado_alertas.solo_transiciones:
+            guardar[1:] = (severidades[1:] != VERDE) | (severidades[1:] != severidades[:-1])
+        
+        # Orden temporal (todas las lecturas de un instante seguidas), como en la ingesta real
+        desde = datetime.now().replace(microsecond=0) - timedelta(days=days)
+        timestamps = [desde + timedelta(minutes=intervalo_minutos * k) for k in range(pasos)]
+        ids = np.tile(np.asarray(paciente_ids), pasos).tolist()
+        ts = np.repeat(np.asarray(timestamps, dtype=object), len(paciente_ids)).tolist()
+        columnas = (ids, ts, spo2.ravel().tolist(), bpm.ravel().tolist(), temperatura.ravel().tolist())
+        claves = ("id_paciente", "timestamp", "spo2", "bpm", "temperatura")
+        tipos = [TIPOS_ALERTA[s].value for s in severidades.ravel().tolist()]
+        indices_alertas = np.flatnonzero(guardar.ravel()).tolist()
+        
+        tamano = settings.ingesta_filas_por_insert
+        try:
+            for i in range(0, len(ids), tamano):
+                filas = [dict(zip(claves, fila)) for fila in zip(*(c[i:i + tamano] for c in columnas))]
+                self.db.execute(insert(Medicion), filas)
+            if settings.agregados_activos:
+                agregados = _agregados_por_bloque(paciente_ids, timestamps, spo2, bpm, temperatura)
+                for i in range(0, len(agregados), tamano):
+                    self.db.execute(sentencia_upsert(self.db.bind.dialect.name), agregados[i:i + tamano])
+            for i in range(0, len(indices_alertas), tamano):
+                self.db.execute(insert(Alerta), [
+                    {"id_paciente": ids[k], "tipo": tipos[k], "mensaje": mensajes[k], "timestamp": ts[k]}
+                    for k in indices_alertas[i:i + tamano]
+                ])
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        
+        # El histórico puede ser posterior a lo que hay en caché o en el estado de alertas
+        cache_ultima_medicion.invalidar()
+        for paciente_id in paciente_ids:
+            estado_alertas.invalidar(paciente_id)
+        
+        segundos = time.perf_counter() - inicio
+        filas_totales = len(ids) + len(indices_alertas)
+        return {
+            "mediciones": len(ids),
+            "alertas": len(indices_alertas),
+            "segundos": round(segundos, 2),
+            "filas_s": round(filas_totales / segundos, 1) if segundos else 0.0,
+        }
     
     def generate_predictions(self, paciente_id: int, count: int = 5):
         """Genera predicciones de muestra para un paciente"""
@@ -72,3 +170,28 @@ class DataGenerator:
         
         for _ in range(count):
             service.generate_fake_prediction(paciente_id)
+
+
+def _agregados_por_bloque(paciente_ids, timestamps, spo2, bpm, temperatura) -> List[dict]:
+    """Filas de agregados de arrays (instantes, pacientes) con los instantes en orden.
+
+    Equivale a `agregar` sobre todas las lecturas, pero reduce cada intervalo
+    con NumPy en lugar de recorrer las lecturas una a una.
+    """
+    filas = []
+    for resolucion in RESOLUCIONES:
+        inicios = [inicio_intervalo(ts, resolucion) for ts in timestamps]
+        cortes = [0] + [k for k in range(1, len(inicios)) if inicios[k] != inicios[k - 1]]
+        n = np.diff(cortes + [len(inicios)])
+        por_signo = {}
+        for signo, valores in (("spo2", spo2), ("bpm", bpm), ("temperatura", temperatura)):
+            por_signo[f"{signo}_min"] = np.minimum.reduceat(valores, cortes, axis=0).tolist()
+            por_signo[f"{signo}_max"] = np.maximum.reduceat(valores, cortes, axis=0).tolist()
+            por_signo[f"{signo}_suma"] = np.add.reduceat(valores.astype(np.float64), cortes, axis=0).tolist()
+        for b, corte in enumerate(cortes):
+            for p, paciente_id in enumerate(paciente_ids):
+                fila = {"resolucion": resolucion, "id_paciente": paciente_id, "inicio": inicios[corte], "n": int(n[b])}
+                for clave, valores in por_signo.items():
+                    fila[clave] = valores[b][p]
+                filas.append(fila)
+    return filas
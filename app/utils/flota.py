@@ -0,0 +1,412 @@
+"""Simulador de una flota de dispositivos ESP32 para generar carga.
+
+Los signos de todos los dispositivos se calculan a la vez con NumPy y un
+único bucle asyncio decide qué dispositivos envían en cada tick, así que
+decenas de miles de dispositivos caben en un proceso (y varios procesos
+reparten la flota con scripts/simular_flota.py).
+
+Destinos:
+- MQTT: una conexión TCP por dispositivo (o `conexiones` compartidas) con un
+  cliente MQTT 3.1.1 mínimo (QoS 0) sobre asyncio; paho necesita un hilo
+  por cliente y no escala a 10k conexiones.
+- REST: los dispositivos pasan por una pasarela que agrupa sus lecturas y
+  las envía a POST /api/v1/mediciones/batch.
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+import random
+import struct
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bandas por edad (bpm, spo2, temperatura), las mismas que DataSimulationService
+BANDAS_EDAD = (
+    (30, (70, 90), (97, 100), (36.2, 37.2)),
+    (60, (65, 85), (96, 99), (36.1, 37.1)),
+    (200, (60, 80), (95, 98), (36.0, 37.0)),
+)
+
+# Episodios: desplazamiento del valor objetivo (spo2, bpm, temperatura)
+EPISODIOS = {
+    "desaturacion": (-8.0, 12.0, 0.0),
+    "fiebre": (-1.0, 15.0, 1.8),
+    "taquicardia": (0.0, 45.0, 0.1),
+}
+_DESPLAZAMIENTOS = np.array([(0.0, 0.0, 0.0)] + list(EPISODIOS.values()))
+
+# Límites fisiológicos y parámetros del proceso de Ornstein-Uhlenbeck por signo
+_MINIMOS = np.array([70.0, 30.0, 34.0])
+_MAXIMOS = np.array([100.0, 220.0, 42.0])
+_REVERSION = np.array([0.05, 0.1, 0.01])  # por segundo
+_RUIDO = np.array([0.3, 2.0, 0.03])  # desviación por raíz de segundo
+
+
+class SenalesFlota:
+    """Signos vitales fisiológicamente plausibles para N dispositivos.
+
+    Cada dispositivo parte de una línea base dentro de la banda de su edad y
+    deriva con un proceso de Ornstein-Uhlenbeck hacia ella. Con probabilidad
+    `tasa_episodios` por hora entra en un episodio (desaturación, fiebre o
+    taquicardia) que desplaza el objetivo durante 1-10 minutos.
+    """
+
+    def __init__(self, edades: Sequence[int], tasa_episodios: float = 0.5, semilla: Optional[int] = None):
+        self.rng = np.random.default_rng(semilla)
+        edades = np.asarray(edades)
+        n = len(edades)
+        self.base = np.empty((n, 3))
+        for limite, bpm, spo2, temp in reversed(BANDAS_EDAD):
+            en_banda = edades < limite
+            for columna, (bajo, alto) in enumerate((spo2, bpm, temp)):
+                self.base[en_banda, columna] = self.rng.uniform(bajo, alto, en_banda.sum())
+        self.valor = self.base.copy()
+        self.episodio = np.zeros(n, dtype=np.int8)
+        self.fin_episodio = np.zeros(n)
+        self.tasa_episodios = tasa_episodios / 3600
+
+    def avanzar(self, indices: np.ndarray, dt: np.ndarray, ahora: float) -> np.ndarray:
+        """Avanza `dt` segundos los dispositivos `indices`; devuelve (spo2, bpm, temperatura) por fila"""
+        terminados = indices[(self.episodio[indices] > 0) & (self.fin_episodio[indices] <= ahora)]
+        self.episodio[terminados] = 0
+        inician = indices[(self.episodio[indices] == 0)
+                          & (self.rng.random(len(indices)) < self.tasa_episodios * dt)]
+        self.episodio[inician] = self.rng.integers(1, len(_DESPLAZAMIENTOS), len(inician))
+        self.fin_episodio[inician] = ahora + self.rng.uniform(60, 600, len(inician))
+
+        objetivo = self.base[indices] + _DESPLAZAMIENTOS[self.episodio[indices]]
+        dt = dt[:, None]
+        valor = self.valor[indices]
+        valor += _REVERSION * (objetivo - valor) * dt + _RUIDO * np.sqrt(dt) * self.rng.standard_normal(valor.shape)
+        np.clip(valor, _MINIMOS, _MAXIMOS, out=valor)
+        self.valor[indices] = valor
+        return valor
+
+
+# --- MQTT 3.1.1 mínimo (solo publicar con QoS 0) ---
+
+def _longitud_restante(n: int) -> bytes:
+    salida = bytearray()
+    while True:
+        byte, n = n % 128, n // 128
+        salida.append(byte | 0x80 if n else byte)
+        if not n:
+            return bytes(salida)
+
+
+def _cadena(texto: str) -> bytes:
+    datos = texto.encode()
+    return struct.pack("!H", len(datos)) + datos
+
+
+def paquete_connect(client_id: str, keepalive: int = 0) -> bytes:
+    # Sesión limpia; keepalive 0 = el broker no espera PINGREQ
+    variable = _cadena("MQTT") + bytes([4, 0x02]) + struct.pack("!H", keepalive)
+    cuerpo = variable + _cadena(client_id)
+    return b"\x10" + _longitud_restante(len(cuerpo)) + cuerpo
+
+
+def paquete_publish(topic: str, payload: bytes) -> bytes:
+    cuerpo = _cadena(topic) + payload
+    return b"\x30" + _longitud_restante(len(cuerpo)) + cuerpo
+
+
+PAQUETE_DISCONNECT = b"\xe0\x00"
+
+
+class ConexionMQTT:
+    """Conexión de un dispositivo al broker que solo publica"""
+
+    def __init__(self, host: str, port: int, client_id: str):
+        self.host = host
+        self.port = port
+        self.client_id = client_id
+        self.escritor: Optional[asyncio.StreamWriter] = None
+
+    @property
+    def conectada(self) -> bool:
+        return self.escritor is not None and not self.escritor.is_closing()
+
+    async def conectar(self, timeout: float = 10):
+        lector, escritor = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), timeout)
+        escritor.write(paquete_connect(self.client_id))
+        connack = await asyncio.wait_for(lector.readexactly(4), timeout)
+        if connack[0] != 0x20 or connack[3] != 0:
+            escritor.close()
+            raise ConnectionError(f"CONNACK rechazado ({connack[3]})")
+        self.escritor = escritor
+
+    def publicar(self, topic: str, payload: bytes):
+        self.escritor.write(paquete_publish(topic, payload))
+
+    async def cerrar(self, limpio: bool = True):
+        if self.escritor is None:
+            return
+        if limpio and not self.escritor.is_closing():
+            self.escritor.write(PAQUETE_DISCONNECT)
+        self.escritor.close()
+        try:
+            await self.escritor.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+        self.escritor = None
+
+
+@dataclass
+class Estadisticas:
+    generadas: int = 0
+    enviadas: int = 0
+    duplicadas: int = 0
+    desordenadas: int = 0
+    errores: int = 0
+    reconexiones: int = 0
+    tormentas: int = 0
+    peticiones: int = 0
+    latencias_ms: List[float] = field(default_factory=list)
+
+    def como_dict(self) -> dict:
+        resultado = {k: v for k, v in self.__dict__.items() if k != "latencias_ms"}
+        if self.latencias_ms:
+            ordenadas = sorted(self.latencias_ms)
+            for p in (50, 95, 99):
+                resultado[f"p{p}_ms"] = round(ordenadas[min(len(ordenadas) - 1, len(ordenadas) * p // 100)], 2)
+        return resultado
+
+
+class DestinoMQTT:
+    """Publica cada lectura en <base>/<id_paciente>/mediciones, como el firmware"""
+
+    def __init__(self, pacientes: Sequence[int], host: str = settings.mqtt_broker_host,
+                 port: int = settings.mqtt_broker_port, conexiones: Optional[int] = None,
+                 conexiones_por_segundo: float = 1000, prefijo: str = "flota"):
+        self.pacientes = pacientes
+        n = conexiones or len(pacientes)
+        self.conexiones = [ConexionMQTT(host, port, f"{prefijo}-{i}") for i in range(n)]
+        self.conexiones_por_segundo = conexiones_por_segundo
+        self.stats: Optional[Estadisticas] = None
+
+    async def abrir(self, stats: Estadisticas):
+        # Arranque escalonado: una flota que enciende no reconecta toda a la vez
+        self.stats = stats
+        for inicio in range(0, len(self.conexiones), max(1, int(self.conexiones_por_segundo))):
+            grupo = self.conexiones[inicio:inicio + max(1, int(self.conexiones_por_segundo))]
+            await asyncio.gather(*(self._conectar(c) for c in grupo))
+            if inicio + len(grupo) < len(self.conexiones):
+                await asyncio.sleep(1)
+
+    async def _conectar(self, conexion: ConexionMQTT):
+        try:
+            await conexion.conectar()
+        except (OSError, asyncio.TimeoutError, ConnectionError, asyncio.IncompleteReadError) as e:
+            self.stats.errores += 1
+            logger.debug(f"{conexion.client_id}: {e}")
+
+    async def enviar(self, lecturas: List[dict]):
+        topic_base = settings.mqtt_topic_base
+        for lectura in lecturas:
+            conexion = self.conexiones[lectura.pop("_indice") % len(self.conexiones)]
+            if not conexion.conectada:
+                # Reconexión perezosa, como el firmware tras perder la red
+                await self._conectar(conexion)
+                self.stats.reconexiones += 1
+                if not conexion.conectada:
+                    continue
+            paciente_id = lectura.pop("id_paciente")
+            conexion.publicar(f"{topic_base}/{paciente_id}/mediciones", json.dumps(lectura).encode())
+            self.stats.enviadas += 1
+
+    async def tormenta(self):
+        """Corta todas las conexiones y las reabre a la vez"""
+        self.stats.tormentas += 1
+        await asyncio.gather(*(c.cerrar(limpio=False) for c in self.conexiones))
+        await asyncio.gather(*(self._conectar(c) for c in self.conexiones))
+        self.stats.reconexiones += len(self.conexiones)
+
+    async def cerrar(self):
+        await asyncio.gather(*(c.cerrar() for c in self.conexiones))
+
+
+class DestinoREST:
+    """Pasarela que agrupa las lecturas y las envía a POST /mediciones/batch"""
+
+    def __init__(self, url: str = "http://localhost:8000", lote: int = 500, concurrencia: int = 8,
+                 cliente=None):
+        self.url = url.rstrip("/")
+        self.lote = lote
+        self.semaforo = asyncio.Semaphore(concurrencia)
+        self.cliente = cliente
+        self._propio = cliente is None
+        self.pendientes: List[dict] = []
+        self.tareas: set = set()
+        self.stats: Optional[Estadisticas] = None
+
+    async def abrir(self, stats: Estadisticas):
+        import httpx
+        self.stats = stats
+        if self.cliente is None:
+            self.cliente = httpx.AsyncClient(base_url=self.url, timeout=30)
+
+    async def enviar(self, lecturas: List[dict]):
+        for lectura in lecturas:
+            lectura.pop("_indice")
+        self.pendientes.extend(lecturas)
+        while len(self.pendientes) >= self.lote:
+            self._lanzar(self.pendientes[:self.lote])
+            self.pendientes = self.pendientes[self.lote:]
+
+    async def vaciar(self):
+        if self.pendientes:
+            self._lanzar(self.pendientes)
+            self.pendientes = []
+
+    def _lanzar(self, lote: List[dict]):
+        tarea = asyncio.ensure_future(self._post(lote))
+        self.tareas.add(tarea)
+        tarea.add_done_callback(self.tareas.discard)
+
+    async def _post(self, lote: List[dict]):
+        async with self.semaforo:
+            inicio = time.perf_counter()
+            try:
+                respuesta = await self.cliente.post(f"{self.url}/api/v1/mediciones/batch", json=lote)
+                self.stats.peticiones += 1
+                self.stats.latencias_ms.append((time.perf_counter() - inicio) * 1000)
+                if respuesta.status_code >= 400:
+                    self.stats.errores += len(lote)
+                else:
+                    self.stats.enviadas += len(lote)
+            except Exception as e:
+                self.stats.errores += len(lote)
+                logger.debug(f"Error enviando lote: {e}")
+
+    async def tormenta(self):
+        # Equivalente HTTP: se descartan las conexiones keep-alive de la pasarela
+        import httpx
+        self.stats.tormentas += 1
+        if self._propio:
+            anterior, self.cliente = self.cliente, httpx.AsyncClient(base_url=self.url, timeout=30)
+            await anterior.aclose()
+
+    async def cerrar(self):
+        await self.vaciar()
+        if self.tareas:
+            await asyncio.gather(*self.tareas)
+        if self._propio:
+            await self.cliente.aclose()
+
+
+@dataclass
+class ConfigFlota:
+    frecuencia: float = 1.0  # lecturas por segundo y dispositivo
+    fluctuacion: float = 0.1  # variación aleatoria del periodo (fracción)
+    duracion: float = 60.0
+    tick: float = 0.05
+    rafaga_cada: float = 0.0  # segundos entre ráfagas (0 = sin ráfagas)
+    rafaga_duracion: float = 5.0
+    rafaga_factor: float = 5.0
+    tormenta_cada: float = 0.0  # segundos entre tormentas de reconexión (0 = ninguna)
+    desorden: float = 0.0  # probabilidad de retrasar una lectura (llega fuera de orden)
+    desorden_max: float = 5.0  # retraso máximo en segundos
+    duplicados: float = 0.0  # probabilidad de enviar una lectura dos veces
+    tasa_episodios: float = 0.5  # episodios por dispositivo y hora
+    semilla: Optional[int] = None
+
+
+class Flota:
+    """Planifica los envíos de todos los dispositivos en un bucle asyncio"""
+
+    def __init__(self, pacientes: Sequence[Tuple[int, int]], destino, config: ConfigFlota = None):
+        self.config = config or ConfigFlota()
+        self.ids = np.array([p for p, _ in pacientes])
+        self.senales = SenalesFlota([e for _, e in pacientes], self.config.tasa_episodios, self.config.semilla)
+        self.destino = destino
+        self.rng = random.Random(self.config.semilla)
+        self.np_rng = np.random.default_rng(self.config.semilla)
+        self.stats = Estadisticas()
+        self._retenidas: List[Tuple[float, int, dict]] = []
+
+    def _en_rafaga(self, transcurrido: float) -> bool:
+        c = self.config
+        return c.rafaga_cada > 0 and transcurrido % c.rafaga_cada < c.rafaga_duracion
+
+    async def ejecutar(self) -> Estadisticas:
+        c = self.config
+        n = len(self.ids)
+        periodo = 1.0 / c.frecuencia
+        await self.destino.abrir(self.stats)
+        inicio = time.monotonic()
+        reloj = datetime.now()
+        # Primer envío repartido en un periodo para no sincronizar la flota
+        proximo = inicio + self.np_rng.uniform(0, periodo, n)
+        ultimo = proximo - periodo
+        siguiente_tormenta = inicio + c.tormenta_cada if c.tormenta_cada > 0 else float("inf")
+        secuencia = 0
+
+        while (ahora := time.monotonic()) - inicio < c.duracion:
+            transcurrido = ahora - inicio
+            if ahora >= siguiente_tormenta:
+                await self.destino.tormenta()
+                siguiente_tormenta += c.tormenta_cada
+
+            indices = np.flatnonzero(proximo <= ahora)
+            lecturas = []
+            if len(indices):
+                valores = self.senales.avanzar(indices, ahora - ultimo[indices], ahora)
+                ultimo[indices] = ahora
+                factor = c.rafaga_factor if self._en_rafaga(transcurrido) else 1.0
+                proximo[indices] += periodo / factor * (1 + c.fluctuacion * (2 * self.np_rng.random(len(indices)) - 1))
+                marca = (reloj + timedelta(seconds=transcurrido)).isoformat()
+                for i, (spo2, bpm, temp) in zip(indices.tolist(), valores.tolist()):
+                    lectura = {"_indice": i, "id_paciente": int(self.ids[i]), "spo2": round(spo2, 2),
+                               "bpm": int(round(bpm)), "temperatura": round(temp, 2), "timestamp": marca}
+                    self.stats.generadas += 1
+                    if c.desorden and self.rng.random() < c.desorden:
+                        secuencia += 1
+                        self.stats.desordenadas += 1
+                        heapq.heappush(self._retenidas, (ahora + self.rng.uniform(0, c.desorden_max), secuencia, lectura))
+                        continue
+                    lecturas.append(lectura)
+                    if c.duplicados and self.rng.random() < c.duplicados:
+                        self.stats.duplicadas += 1
+                        lecturas.append(dict(lectura))
+            while self._retenidas and self._retenidas[0][0] <= ahora:
+                lecturas.append(heapq.heappop(self._retenidas)[2])
+            if lecturas:
+                await self.destino.enviar(lecturas)
+            await asyncio.sleep(c.tick)
+
+        # Lo retenido se entrega al final (muy fuera de orden)
+        if self._retenidas:
+            await self.destino.enviar([lectura for _, _, lectura in sorted(self._retenidas)])
+            self._retenidas = []
+        await self.destino.cerrar()
+        return self.stats
+
+
+def pacientes_sinteticos(n: int, primer_id: int = 1, semilla: Optional[int] = None) -> List[Tuple[int, int]]:
+    """(id_paciente, edad) para ids consecutivos con edades aleatorias"""
+    rng = random.Random(semilla)
+    return [(primer_id + i, rng.randint(18, 90)) for i in range(n)]
+
+
+def sumar_estadisticas(partes: List[dict]) -> Dict[str, float]:
+    """Suma los contadores de varios procesos (los percentiles se promedian)"""
+    total: Dict[str, float] = {}
+    for parte in partes:
+        for clave, valor in parte.items():
+            total[clave] = total.get(clave, 0) + valor
+    for clave in ("p50_ms", "p95_ms", "p99_ms"):
+        con_valor = [p[clave] for p in partes if clave in p]
+        if con_valor:
+            total[clave] = round(sum(con_valor) / len(con_valor), 2)
+    return total
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark del hub de eventos en tiempo real.
+
+Abre `--clientes` suscripciones inactivas (como WebSockets/SSE sin tráfico),
+mide la memoria que ocupan y el coste de publicar eventos cuando solo una
+fracción de los clientes sigue al paciente afectado.
+
+    python benchmarks/bench_eventos.py --clientes 5000 --eventos 20000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.eventos import HubEventos
+
+
+async def ejecutar(clientes: int, eventos: int, pacientes: int, sala: int):
+    hub = HubEventos(cola_max=256, max_suscriptores=clientes + sala)
+
+    tracemalloc.start()
+    antes = tracemalloc.get_traced_memory()[0]
+    suscripciones = [hub.suscribir([i % pacientes]) for i in range(clientes)]
+    suscripciones += [hub.suscribir() for _ in range(sala)]
+    # Una corrutina esperando por cliente, como en los endpoints
+    esperas = [asyncio.create_task(s.siguiente()) for s in suscripciones]
+    await asyncio.sleep(0)
+    memoria = tracemalloc.get_traced_memory()[0] - antes
+    tracemalloc.stop()
+    print(f"{clientes + sala} clientes inactivos: {memoria / (clientes + sala):.0f} bytes por cliente")
+    for tarea in esperas:
+        tarea.cancel()
+
+    datos = {"id_paciente": 0, "spo2": "97.50", "bpm": 72, "temperatura": "36.80"}
+    inicio = time.perf_counter()
+    for i in range(eventos):
+        hub.publicar("medicion", i % pacientes, {**datos, "id_paciente": i % pacientes})
+        if i % 100 == 0:
+            # Dejar que el loop reparta y vaciar las colas (consumidores al día)
+            await asyncio.sleep(0)
+            for s in suscripciones:
+                while not s.cola.empty():
+                    s.cola.get_nowait()
+    await asyncio.sleep(0)
+    segundos = time.perf_counter() - inicio
+    stats = hub.estadisticas()
+    print(f"{eventos} eventos en {segundos:.2f} s ({eventos / segundos:.0f} eventos/s), "
+          f"{stats['entregados']} entregas, {stats['descartados_lentos']} descartados")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clientes", type=int, default=5000, help="Clientes que siguen a un paciente")
+    parser.add_argument("--sala", type=int, default=20, help="Clientes que siguen a toda la sala")
+    parser.add_argument("--pacientes", type=int, default=500)
+    parser.add_argument("--eventos", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(ejecutar(args.clientes, args.eventos, args.pacientes, args.sala))
+
+
+if __name__ == "__main__":
+    main()
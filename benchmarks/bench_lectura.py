@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la lectura rápida de listados (LECTURA_RAPIDA).
+
+Compara, para páginas de 100, 1.000 y 10.000 mediciones, el camino
+original (instancias ORM + revalidación con response_model) con el camino
+rápido (tuplas de columnas + orjson), a través de la API completa en el
+propio proceso. También separa el coste de la consulta y de la
+serialización sin HTTP.
+
+    python benchmarks/bench_lectura.py
+    python benchmarks/bench_lectura.py --filas 100 1000 10000 --repeticiones 50
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# La base de pruebas debe fijarse antes de importar la aplicación
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_lectura.db")
+
+from typing import List
+
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.core.migraciones import migrar
+from app.core.respuestas import RespuestaFilas
+from app.database import SessionLocal
+from app.main import app
+from app.models import Medicion, Paciente
+from app.schemas.medicion import MedicionResponse
+from app.services.mediciones import MedicionService
+
+
+def poblar(filas: int) -> int:
+    inicio = datetime(2024, 1, 1)
+    with SessionLocal() as db:
+        paciente = Paciente(nombre="Bench lectura", edad=50, genero="F", activo=True)
+        db.add(paciente)
+        db.flush()
+        db.execute(insert(Medicion), [
+            {"id_paciente": paciente.id, "timestamp": inicio + timedelta(seconds=i),
+             "spo2": 97.25, "bpm": 60 + i % 40, "temperatura": 36.75}
+            for i in range(filas)
+        ])
+        db.commit()
+        return paciente.id
+
+
+def cronometrar(funcion, repeticiones: int) -> float:
+    funcion()  # calentamiento
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return (time.perf_counter() - inicio) * 1000 / repeticiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    migrar()
+    paciente_id = poblar(max(args.filas))
+    cliente = TestClient(app)
+    adaptador = TypeAdapter(List[MedicionResponse])
+    resultados = {}
+
+    for filas in args.filas:
+        url = f"/api/v1/mediciones/paciente/{paciente_id}?limit={filas}"
+        resultado = {}
+        for modo, rapida in (("original", False), ("rapida", True)):
+            settings.lectura_rapida = rapida
+            assert len(cliente.get(url).json()) == filas
+            resultado[f"{modo}_http_ms"] = round(cronometrar(lambda: cliente.get(url), args.repeticiones), 3)
+
+        # Sin HTTP: consulta y serialización por separado
+        with SessionLocal() as db:
+            servicio = MedicionService(db)
+            orm = servicio.get_by_paciente(paciente_id, limit=filas)
+            tuplas = servicio.get_by_paciente_filas(paciente_id, limit=filas)
+            resultado["original_consulta_ms"] = round(cronometrar(
+                lambda: servicio.get_by_paciente(paciente_id, limit=filas), args.repeticiones), 3)
+            resultado["rapida_consulta_ms"] = round(cronometrar(
+                lambda: servicio.get_by_paciente_filas(paciente_id, limit=filas), args.repeticiones), 3)
+            resultado["original_serializacion_ms"] = round(cronometrar(
+                lambda: adaptador.dump_json(adaptador.validate_python(orm, from_attributes=True)), args.repeticiones), 3)
+            resultado["rapida_serializacion_ms"] = round(cronometrar(
+                lambda: RespuestaFilas(tuplas, MedicionResponse), args.repeticiones), 3)
+        resultado["aceleracion_http"] = round(resultado["original_http_ms"] / resultado["rapida_http_ms"], 2)
+        resultados[filas] = resultado
+
+        print(f"\n{filas} filas")
+        for etapa in ("http", "consulta", "serializacion"):
+            print(f"  {etapa:14} original {resultado[f'original_{etapa}_ms']:>9} ms"
+                  f"   rápida {resultado[f'rapida_{etapa}_ms']:>9} ms")
+        print(f"  aceleración HTTP x{resultado['aceleracion_http']}")
+
+    settings.lectura_rapida = True
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
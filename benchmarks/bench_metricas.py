@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark del coste de las métricas (app/core/metricas.py).
+
+Mide por operación:
+
+- incrementar un contador y observar un valor en un histograma
+- un método de servicio con @instrumentado frente al mismo método sin medir
+- una petición ASGI mínima con MiddlewareMetricas frente a la misma sin él
+  (la diferencia es lo que añade el middleware a cada petición de la API)
+- generar /metrics con las series que haya
+
+    python benchmarks/bench_metricas.py
+    python benchmarks/bench_metricas.py --iteraciones 500000 --json metricas.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.metricas import MiddlewareMetricas, RegistroMetricas, instrumentado, metricas
+
+
+def _por_operacion(funcion, iteraciones: int) -> float:
+    inicio = time.perf_counter()
+    funcion(iteraciones)
+    return (time.perf_counter() - inicio) / iteraciones * 1e6
+
+
+def medir(iteraciones: int) -> dict:
+    registro = RegistroMetricas()
+    contador = registro.contador("bench_total", "Benchmark").con()
+    histograma = registro.histograma("bench_segundos", "Benchmark", ("ruta",)).con("/bench")
+    resultado = {}
+
+    def contar(n):
+        for _ in range(n):
+            contador.incrementar()
+
+    def observar(n):
+        for i in range(n):
+            histograma.observar(i * 1e-6)
+
+    def vacio(n):
+        for _ in range(n):
+            pass
+
+    base = _por_operacion(vacio, iteraciones)
+    resultado["contador_us"] = round(_por_operacion(contar, iteraciones) - base, 3)
+    resultado["histograma_us"] = round(_por_operacion(observar, iteraciones) - base, 3)
+
+    class Servicio:
+        def consultar(self, x):
+            return x
+
+    @instrumentado
+    class ServicioMedido:
+        def consultar(self, x):
+            return x
+
+    normal, medido = Servicio(), ServicioMedido()
+
+    def llamar(objeto):
+        def bucle(n):
+            for i in range(n):
+                objeto.consultar(i)
+        return bucle
+
+    resultado["servicio_us"] = round(
+        _por_operacion(llamar(medido), iteraciones) - _por_operacion(llamar(normal), iteraciones), 3)
+
+    async def aplicacion(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    async def enviar(mensaje):
+        pass
+
+    async def recibir():
+        return {"type": "http.request", "body": b""}
+
+    scope = {"type": "http", "method": "GET", "path": "/bench"}
+    con_middleware = MiddlewareMetricas(aplicacion)
+
+    async def peticiones(app, n):
+        for _ in range(n):
+            await app(dict(scope), recibir, enviar)
+
+    peticiones_n = max(iteraciones // 5, 1)
+    sin = _por_operacion(lambda n: asyncio.run(peticiones(aplicacion, n)), peticiones_n)
+    con = _por_operacion(lambda n: asyncio.run(peticiones(con_middleware, n)), peticiones_n)
+    resultado["middleware_us"] = round(con - sin, 3)
+
+    metricas.exponer()  # la primera vez importa la caché, la cola y el pool
+    inicio = time.perf_counter()
+    texto = metricas.exponer()
+    resultado["exponer_ms"] = round((time.perf_counter() - inicio) * 1000, 3)
+    resultado["exponer_lineas"] = texto.count("\n")
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iteraciones", type=int, default=200000)
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    resultado = medir(args.iteraciones)
+    print(f"  contador            {resultado['contador_us']:>8} µs")
+    print(f"  histograma          {resultado['histograma_us']:>8} µs")
+    print(f"  @instrumentado      {resultado['servicio_us']:>8} µs/llamada")
+    print(f"  middleware          {resultado['middleware_us']:>8} µs/petición")
+    print(f"  /metrics            {resultado['exponer_ms']:>8} ms ({resultado['exponer_lineas']} líneas)")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"parametros": vars(args), "resultados": resultado}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark del coste del perfilado (app/core/perfilado.py).
+
+Mide lo que añade a una petición ASGI mínima MiddlewarePerfilado con el
+perfilado desactivado (el caso normal en producción) y activado con todas
+las peticiones muestreadas, y el coste por consulta de los eventos de
+SQLAlchemy en una SQLite en memoria.
+
+    python benchmarks/bench_perfilado.py
+    python benchmarks/bench_perfilado.py --peticiones 100000 --json perfilado.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, text
+
+from app.core import perfilado
+from app.core.perfilado import MiddlewarePerfilado, perfilador
+
+
+async def _aplicacion(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def _enviar(mensaje):
+    pass
+
+
+async def _recibir():
+    return {"type": "http.request", "body": b""}
+
+
+def _por_peticion(app, n: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/bench"}
+
+    async def bucle():
+        for _ in range(n):
+            await app(dict(scope), _recibir, _enviar)
+
+    inicio = time.perf_counter()
+    asyncio.run(bucle())
+    return (time.perf_counter() - inicio) / n * 1e6
+
+
+def _por_consulta(motor, n: int, perfil) -> float:
+    token = perfilado._actual.set(perfil)
+    try:
+        with motor.connect() as conexion:
+            inicio = time.perf_counter()
+            for _ in range(n):
+                conexion.execute(text("SELECT 1"))
+            return (time.perf_counter() - inicio) / n * 1e6
+    finally:
+        perfilado._actual.reset(token)
+
+
+def medir(peticiones: int, consultas: int) -> dict:
+    resultado = {}
+    con_middleware = MiddlewarePerfilado(_aplicacion)
+    base = _por_peticion(_aplicacion, peticiones)
+    resultado["desactivado_us"] = round(_por_peticion(con_middleware, peticiones) - base, 3)
+
+    perfilador.muestreo = 1.0
+    perfilador.activo = True  # sin hilo ni eventos: solo el coste del middleware
+    try:
+        resultado["activo_us"] = round(_por_peticion(con_middleware, peticiones) - base, 3)
+    finally:
+        perfilador.activo = False
+
+    motor = create_engine("sqlite://")
+    sin_eventos = _por_consulta(motor, consultas, None)
+    event.listen(motor, "before_cursor_execute", perfilado._antes_de_ejecutar)
+    event.listen(motor, "after_cursor_execute", perfilado._despues_de_ejecutar)
+    perfil = perfilado.Perfil(0, "bench")
+    resultado["consulta_us"] = round(_por_consulta(motor, consultas, perfil) - sin_eventos, 3)
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--peticiones", type=int, default=50000)
+    parser.add_argument("--consultas", type=int, default=20000)
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    resultado = medir(args.peticiones, args.consultas)
+    print(f"  middleware desactivado  {resultado['desactivado_us']:>8} µs/petición")
+    print(f"  middleware activo       {resultado['activo_us']:>8} µs/petición (muestreo 100 %)")
+    print(f"  eventos SQL             {resultado['consulta_us']:>8} µs/consulta")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"parametros": vars(args), "resultados": resultado}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark del almacenamiento de signos vitales (SIGNOS_ALMACENAMIENTO).
+
+Para cada modo ("decimal", "entero", "real") crea una base SQLite nueva en
+un subproceso, inserta `--filas` mediciones y mide filas/s de inserción y
+lectura y bytes por fila de la tabla (dbstat). En el proceso principal
+compara además la validación de MedicionCreate y la evaluación de reglas
+con el esquema anterior basado en Decimal.
+
+    python benchmarks/bench_signos.py
+    python benchmarks/bench_signos.py --filas 200000 --json signos.json
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(RAIZ)
+
+MODOS = ("decimal", "entero", "real")
+# Bytes por columna en InnoDB (referencia; SQLite guarda enteros de tamaño variable)
+BYTES_MYSQL = {"decimal": 3 + 2, "entero": 2 + 2, "real": 4 + 4}
+
+
+def _filas(n: int, paciente_id: int = 1) -> list:
+    from datetime import datetime, timedelta
+    inicio = datetime(2024, 1, 1)
+    return [
+        {"id_paciente": paciente_id, "timestamp": inicio + timedelta(seconds=i),
+         "spo2": round(random.uniform(88.0, 100.0), 2), "bpm": random.randint(50, 130),
+         "temperatura": round(random.uniform(35.5, 39.5), 2)}
+        for i in range(n)
+    ]
+
+
+def medir_modo(filas: int) -> dict:
+    """Se ejecuta en el subproceso, con SIGNOS_ALMACENAMIENTO y DATABASE_URL ya fijados"""
+    from sqlalchemy import insert, select, text
+
+    from app.core.migraciones import migrar
+    from app.database import engine
+    from app.models import Medicion, Paciente
+
+    migrar()
+    datos = _filas(filas)
+    with engine.begin() as conexion:
+        conexion.execute(insert(Paciente), [{"nombre": "Bench signos", "edad": 50, "genero": "F", "activo": True}])
+        inicio = time.perf_counter()
+        for i in range(0, filas, 1000):
+            conexion.execute(insert(Medicion), datos[i:i + 1000])
+        insercion = time.perf_counter() - inicio
+
+    with engine.connect() as conexion:
+        inicio = time.perf_counter()
+        leidas = conexion.execute(select(Medicion.spo2, Medicion.bpm, Medicion.temperatura)).all()
+        lectura = time.perf_counter() - inicio
+        assert len(leidas) == filas
+        conexion.execute(text("VACUUM"))
+        bytes_tabla = conexion.execute(
+            text("SELECT SUM(pgsize) FROM dbstat WHERE name = 'mediciones'")).scalar()
+        bytes_indices = conexion.execute(
+            text("SELECT SUM(pgsize) FROM dbstat WHERE name LIKE 'ix_mediciones%'")).scalar()
+    return {
+        "insercion_filas_s": round(filas / insercion),
+        "lectura_filas_s": round(filas / lectura),
+        "bytes_por_fila": round(bytes_tabla / filas, 2),
+        "bytes_indices_por_fila": round(bytes_indices / filas, 2),
+        "bytes_signos_mysql": BYTES_MYSQL[os.environ["SIGNOS_ALMACENAMIENTO"]],
+    }
+
+
+def medir_esquema(filas: int) -> dict:
+    """Validación y reglas: esquema float actual frente al anterior con Decimal"""
+    from pydantic import BaseModel, TypeAdapter
+    from typing import List
+
+    from app.schemas.medicion import MedicionCreate
+    from app.services.reglas import motor_reglas
+
+    class MedicionDecimal(BaseModel):
+        id_paciente: int
+        spo2: Decimal
+        bpm: int
+        temperatura: Decimal
+
+    # Como llegan por la API/MQTT: números JSON
+    datos = [{k: v for k, v in f.items() if k != "timestamp"} for f in _filas(filas)]
+    resultado = {}
+    for nombre, modelo in (("decimal", MedicionDecimal), ("float", MedicionCreate)):
+        adaptador = TypeAdapter(List[modelo])
+        inicio = time.perf_counter()
+        mediciones = adaptador.validate_python(datos)
+        resultado[f"validacion_{nombre}_filas_s"] = round(filas / (time.perf_counter() - inicio))
+
+        inicio = time.perf_counter()
+        for m in mediciones:
+            motor_reglas.evaluar_una(m.spo2, m.bpm, m.temperatura)
+        resultado[f"reglas_una_{nombre}_filas_s"] = round(filas / (time.perf_counter() - inicio))
+
+        inicio = time.perf_counter()
+        motor_reglas.clasificar(mediciones)
+        resultado[f"reglas_lote_{nombre}_filas_s"] = round(filas / (time.perf_counter() - inicio))
+
+        inicio = time.perf_counter()
+        adaptador.dump_json(mediciones)
+        resultado[f"serializacion_{nombre}_filas_s"] = round(filas / (time.perf_counter() - inicio))
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, default=100000)
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    parser.add_argument("--modo", choices=MODOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.modo:
+        print(json.dumps(medir_modo(args.filas)))
+        return
+
+    resultados = {"almacenamiento": {}}
+    for modo in MODOS:
+        entorno = dict(os.environ, SIGNOS_ALMACENAMIENTO=modo, AGREGADOS_ACTIVOS="false",
+                       DATABASE_URL=f"sqlite:///{tempfile.mkdtemp()}/bench_signos.db")
+        salida = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--modo", modo, "--filas", str(args.filas)],
+            env=entorno, capture_output=True, text=True, check=True, cwd=RAIZ,
+        )
+        r = resultados["almacenamiento"][modo] = json.loads(salida.stdout.strip().splitlines()[-1])
+        print(f"{modo:8} inserción {r['insercion_filas_s']:>8} filas/s   lectura {r['lectura_filas_s']:>9} filas/s"
+              f"   {r['bytes_por_fila']:>6} B/fila (+{r['bytes_indices_por_fila']} índices)"
+              f"   signos en MySQL: {r['bytes_signos_mysql']} B")
+
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_signos.db")
+    r = resultados["esquema"] = medir_esquema(args.filas)
+    print()
+    for etapa in ("validacion", "reglas_una", "reglas_lote", "serializacion"):
+        print(f"{etapa:14} Decimal {r[f'{etapa}_decimal_filas_s']:>9} filas/s   float {r[f'{etapa}_float_filas_s']:>9} filas/s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(resultados, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark del detector de tendencias (app/services/tendencias.py).
+
+Con `--pacientes` pacientes (10.000 por defecto) mide el coste por lectura
+de DetectorTendencias.observar en tres formas de llegada:
+
+- lote completo: una lectura de cada paciente por llamada
+- lotes de la ingesta: lotes de `--lote` lecturas de pacientes al azar
+  (como los de la cola MQTT o POST /mediciones/batch)
+- lectura suelta: una llamada por lectura (POST /mediciones/)
+
+y la memoria del estado. Los signos siguen un paseo aleatorio a 1 Hz.
+
+    python benchmarks/bench_tendencias.py
+    python benchmarks/bench_tendencias.py --pacientes 50000 --json tendencias.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.tendencias import DetectorTendencias
+
+
+def _signos(rng, n: int) -> np.ndarray:
+    return np.column_stack([rng.normal(97, 1, n), rng.normal(75, 5, n), rng.normal(36.8, 0.2, n)])
+
+
+def medir(pacientes: int, segundos: int, lote: int, sueltas: int) -> dict:
+    rng = np.random.default_rng(0)
+    ids = np.arange(1, pacientes + 1)
+    detector = DetectorTendencias()
+    resultado = {}
+
+    # Calentamiento: todos los pacientes con historia antes de medir
+    for segundo in range(60):
+        detector.observar(ids.tolist(), _signos(rng, pacientes), np.full(pacientes, float(segundo)))
+
+    lista = ids.tolist()
+    inicio = time.perf_counter()
+    for segundo in range(60, 60 + segundos):
+        detector.observar(lista, _signos(rng, pacientes), np.full(pacientes, float(segundo)))
+    total = time.perf_counter() - inicio
+    resultado["lote_completo_us"] = round(total / (segundos * pacientes) * 1e6, 3)
+
+    t = 60.0 + segundos
+    lecturas = segundos * pacientes
+    inicio = time.perf_counter()
+    for _ in range(lecturas // lote):
+        elegidos = rng.choice(ids, lote).tolist()
+        t += lote / pacientes
+        detector.observar(elegidos, _signos(rng, lote), np.full(lote, t))
+    total = time.perf_counter() - inicio
+    resultado["lote_ingesta_us"] = round(total / (lecturas // lote * lote) * 1e6, 3)
+
+    valores = _signos(rng, sueltas)
+    elegidos = rng.choice(ids, sueltas).tolist()
+    inicio = time.perf_counter()
+    for i in range(sueltas):
+        t += 1 / pacientes
+        detector.observar(elegidos[i:i + 1], valores[i:i + 1], (t,))
+    resultado["suelta_us"] = round((time.perf_counter() - inicio) / sueltas * 1e6, 3)
+
+    estadisticas = detector.estadisticas()
+    resultado["memoria_bytes"] = estadisticas["memoria_bytes"]
+    resultado["bytes_por_paciente"] = round(estadisticas["memoria_bytes"] / pacientes, 1)
+    resultado["alertas"] = estadisticas["alertas_emitidas"]
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pacientes", type=int, default=10000)
+    parser.add_argument("--segundos", type=int, default=30, help="Lecturas por paciente en el lote completo")
+    parser.add_argument("--lote", type=int, default=500)
+    parser.add_argument("--sueltas", type=int, default=20000)
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    resultado = medir(args.pacientes, args.segundos, args.lote, args.sueltas)
+    print(f"{args.pacientes} pacientes")
+    print(f"  lote completo    {resultado['lote_completo_us']:>8} µs/lectura")
+    print(f"  lotes de {args.lote:<6}  {resultado['lote_ingesta_us']:>8} µs/lectura")
+    print(f"  lectura suelta   {resultado['suelta_us']:>8} µs/lectura")
+    print(f"  memoria          {resultado['memoria_bytes'] / 1e6:>8.2f} MB ({resultado['bytes_por_paciente']} B/paciente)")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"parametros": vars(args), "resultados": resultado}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Benchmark de escalado con varios workers (scripts/servidor.py).
+
+Arranca la API con 1, 2, 4... workers sobre la misma base de datos de
+prueba y la carga con varios procesos cliente a la vez contra un listado
+de mediciones (trabajo de Python por petición: consulta, validación y
+serialización). Informa req/s, latencias y la aceleración respecto a un
+worker. Los clientes comparten las CPU con el servidor: en una máquina de
+pocos núcleos la aceleración medida es una cota inferior.
+
+    python benchmarks/bench_workers.py
+    python benchmarks/bench_workers.py --workers 1 2 4 8 --clientes 4 --peticiones 4000
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(RAIZ)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# La base de pruebas debe fijarse antes de importar la aplicación
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/bench_workers.db")
+os.environ.setdefault("SECRET_KEY", "bench")
+
+import httpx
+from sqlalchemy import insert
+
+from comun import resumen
+from app.core.migraciones import migrar
+from app.database import SessionLocal
+from app.models import Medicion, Paciente
+
+
+def poblar(pacientes: int, filas: int):
+    inicio = datetime(2024, 1, 1)
+    with SessionLocal() as db:
+        for i in range(pacientes):
+            paciente = Paciente(nombre=f"Bench workers {i}", edad=50, genero="F", activo=True)
+            db.add(paciente)
+            db.flush()
+            db.execute(insert(Medicion), [
+                {"id_paciente": paciente.id, "timestamp": inicio + timedelta(seconds=j),
+                 "spo2": 97.25, "bpm": 60 + j % 40, "temperatura": 36.75}
+                for j in range(filas)
+            ])
+        db.commit()
+
+
+def _cliente(argumentos) -> list:
+    """Proceso de carga: `peticiones` GET con `concurrencia` en vuelo; devuelve las latencias"""
+    url, peticiones, concurrencia, pacientes, limite = argumentos
+
+    async def cargar():
+        latencias = []
+        siguiente = iter(range(peticiones))
+        async with httpx.AsyncClient(base_url=url, timeout=60) as cliente:
+            async def trabajador():
+                for i in siguiente:
+                    inicio = time.perf_counter()
+                    respuesta = await cliente.get(f"/api/v1/mediciones/paciente/{i % pacientes + 1}?limit={limite}")
+                    respuesta.raise_for_status()
+                    latencias.append((time.perf_counter() - inicio) * 1000)
+            await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+        return latencias
+
+    return asyncio.run(cargar())
+
+
+def _esperar_servidor(url: str, proceso: subprocess.Popen, timeout: float = 60):
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError("El servidor terminó al arrancar")
+        try:
+            if httpx.get(url + "/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("El servidor no respondió a tiempo")
+
+
+def medir(workers: int, args) -> dict:
+    url = f"http://127.0.0.1:{args.puerto}"
+    proceso = subprocess.Popen(
+        [sys.executable, os.path.join(RAIZ, "scripts", "servidor.py"), "--workers", str(workers),
+         "--host", "127.0.0.1", "--port", str(args.puerto), "--sin-migrar", "--log-level", "warning"],
+        cwd=RAIZ, stdout=subprocess.DEVNULL,
+    )
+    try:
+        _esperar_servidor(url, proceso)
+        trabajo = (url, args.peticiones // args.clientes, args.concurrencia, args.pacientes, args.limite)
+        with multiprocessing.Pool(args.clientes) as pool:
+            # Calentamiento: conexiones del pool y cachés de cada worker
+            pool.map(_cliente, [(url, 50, args.concurrencia, args.pacientes, args.limite)] * args.clientes)
+            inicio = time.perf_counter()
+            latencias = [ms for parte in pool.map(_cliente, [trabajo] * args.clientes) for ms in parte]
+            segundos = time.perf_counter() - inicio
+        return resumen(latencias, segundos)
+    finally:
+        proceso.terminate()
+        proceso.wait(30)
+
+
+def main():
+    nucleos = os.cpu_count() or 1
+    por_defecto = [1] + [n for n in (2, 4, 8, 16, 32) if n <= max(nucleos, 2)]
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=por_defecto)
+    parser.add_argument("--clientes", type=int, default=max(2, nucleos // 2), help="Procesos que generan carga")
+    parser.add_argument("--concurrencia", type=int, default=8, help="Peticiones en vuelo por cliente")
+    parser.add_argument("--peticiones", type=int, default=2000)
+    parser.add_argument("--pacientes", type=int, default=20)
+    parser.add_argument("--limite", type=int, default=100, help="Mediciones por respuesta")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    args = parser.parse_args()
+
+    migrar()
+    poblar(args.pacientes, args.limite)
+    print(f"  {nucleos} núcleos, {args.clientes} procesos cliente")
+    resultados = {}
+    for workers in args.workers:
+        resultado = medir(workers, args)
+        base = resultados.get(1, resultado)["req_s"]
+        resultado["aceleracion"] = round(resultado["req_s"] / base, 2)
+        resultados[workers] = resultado
+        print(f"  {workers:>3} workers  {resultado['req_s']:>8} req/s  p50 {resultado['p50_ms']:>7} ms  "
+              f"p95 {resultado['p95_ms']:>7} ms  x{resultado['aceleracion']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"parametros": vars(args), "nucleos": nucleos, "resultados": resultados}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
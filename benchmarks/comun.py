@@ -0,0 +1,46 @@
+"""Utilidades compartidas por los benchmarks: percentiles y carga concurrente"""
+
+import asyncio
+import statistics
+import time
+from typing import List
+
+
+def percentil(valores, p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p))]
+
+
+def resumen(latencias_ms: List[float], segundos: float, errores: int = 0, elementos: int = 1) -> dict:
+    """Rendimiento y latencias de una serie de operaciones (`elementos` filas por operación)"""
+    operaciones = len(latencias_ms)
+    resultado = {
+        "req_s": round(operaciones / segundos, 1),
+        "p50_ms": round(statistics.median(latencias_ms), 3),
+        "p95_ms": round(percentil(latencias_ms, 0.95), 3),
+        "p99_ms": round(percentil(latencias_ms, 0.99), 3),
+        "errores": errores,
+    }
+    if elementos != 1:
+        resultado["filas_s"] = round(operaciones * elementos / segundos, 1)
+    return resultado
+
+
+async def cargar(cliente, peticiones: int, concurrencia: int, hacer, elementos: int = 1) -> dict:
+    """Lanza `peticiones` llamadas a `hacer(cliente, i)` con `concurrencia` en vuelo"""
+    latencias = []
+    errores = 0
+    siguiente = iter(range(peticiones))
+
+    async def trabajador():
+        nonlocal errores
+        for i in siguiente:
+            inicio = time.perf_counter()
+            respuesta = await hacer(cliente, i)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            if respuesta.status_code >= 400:
+                errores += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabajador() for _ in range(concurrencia)))
+    return resumen(latencias, time.perf_counter() - inicio, errores, elementos)
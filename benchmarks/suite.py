@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks de la API y de la ingesta.
+
+Para cada número de pacientes de `--pacientes` lanza un proceso con una base
+SQLite nueva (o `--url`), la llena con `--historial` mediciones por paciente
+y mide rendimiento y latencias p50/p95/p99 de:
+
+- ingesta: POST /mediciones/ (una lectura), POST /mediciones/batch y MQTT
+  (MQTTClient.on_message sin broker, con la cola y el escritor reales)
+- lecturas: última medición, páginas de historial, alertas activas y la
+  página de estado (GET /)
+
+La API se atiende en el propio proceso (httpx + ASGITransport, sin red). Los
+resultados se guardan en JSON con el commit para comparar entre versiones:
+
+    python benchmarks/suite.py --pacientes 10 100 1000 --json base.json
+    python benchmarks/suite.py --json nuevo.json --comparar base.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(RAIZ)
+
+from benchmarks.comun import cargar, resumen
+
+# Métricas en las que subir es mejor; en el resto (latencias) subir es peor
+MAYOR_ES_MEJOR = ("req_s", "filas_s")
+# Diferencias de latencia menores que esto (ms) son ruido aunque en % sean grandes
+RUIDO_MS = 0.1
+
+
+def poblar(pacientes: int, historial: int) -> list:
+    """Pacientes con `historial` mediciones (una por segundo) y algunas alertas cada uno"""
+    from sqlalchemy import insert
+    from app.database import SessionLocal
+    from app.models import Alerta, Medicion, Paciente
+
+    ahora = datetime.now().replace(microsecond=0)
+    with SessionLocal() as db:
+        db.execute(insert(Paciente), [
+            {"nombre": f"Bench {i}", "edad": 20 + i % 70, "genero": "MF"[i % 2], "activo": True}
+            for i in range(pacientes)
+        ])
+        ids = [p.id for p in db.query(Paciente.id).order_by(Paciente.id).all()]
+        filas = [
+            {"id_paciente": paciente_id, "timestamp": ahora - timedelta(seconds=historial - s),
+             "spo2": 90 + (s + paciente_id) % 10, "bpm": 55 + (s * 7) % 70, "temperatura": 36.0 + (s % 20) / 10}
+            for paciente_id in ids for s in range(historial)
+        ]
+        for i in range(0, len(filas), 10000):
+            db.execute(insert(Medicion), filas[i:i + 10000])
+        db.execute(insert(Alerta), [
+            {"id_paciente": paciente_id, "tipo": ("verde", "amarilla", "roja")[(paciente_id + k) % 3],
+             "mensaje": "Alerta de prueba", "timestamp": ahora - timedelta(minutes=k)}
+            for paciente_id in ids for k in range(3)
+        ])
+        db.commit()
+    return ids
+
+
+def medir_mqtt(ids: list, mensajes: int) -> dict:
+    """Publica `mensajes` por on_message y espera a que el escritor los guarde todos"""
+    from app.core.config import settings
+    from app.mqtt.client import MQTTClient
+    from app.mqtt.ingesta import ColaIngesta
+
+    # Cola con capacidad para todo: se mide el ritmo sostenido, no los descartes
+    cola = ColaIngesta(cola_max=mensajes)
+    cliente = MQTTClient(cola=cola)
+    cola.iniciar()
+    cuerpos = [
+        SimpleNamespace(
+            topic=f"{settings.mqtt_topic_base}/{ids[i % len(ids)]}/mediciones",
+            payload=json.dumps({"spo2": 97.5, "bpm": 60 + i % 60, "temperatura": 36.8}).encode(),
+        )
+        for i in range(mensajes)
+    ]
+    latencias = []
+    inicio = time.perf_counter()
+    for msg in cuerpos:
+        t = time.perf_counter()
+        cliente.on_message(None, None, msg)
+        latencias.append((time.perf_counter() - t) * 1000)
+    publicacion = time.perf_counter() - inicio
+    cola.detener(timeout=600)
+    total = time.perf_counter() - inicio
+
+    resultado = resumen(latencias, publicacion, cola.filas_fallidas + cola.descartadas)
+    resultado["filas_s"] = round(cola.filas_escritas / total, 1)
+    resultado["lotes"] = cola.lotes_escritos
+    return resultado
+
+
+async def ejecutar(pacientes: int, args) -> dict:
+    import httpx
+    from app.core.migraciones import migrar
+    from app.database import cerrar_async_engine
+    from app.main import app
+
+    migrar()
+    ids = poblar(pacientes, args.historial)
+
+    def paciente(i):
+        return ids[(i * 7919) % len(ids)]
+
+    lote = args.lote
+    escenarios = {
+        "ingesta_individual": (lambda c, i: c.post("/api/v1/mediciones/", json={
+            "id_paciente": paciente(i), "spo2": 97.5, "bpm": 60 + i % 60, "temperatura": 36.8,
+        }), args.peticiones, 1),
+        "ingesta_lote": (lambda c, i: c.post("/api/v1/mediciones/batch", json=[
+            {"id_paciente": paciente(i * lote + k), "spo2": 96 + k % 4, "bpm": 60 + k % 60, "temperatura": 36.8}
+            for k in range(lote)
+        ]), max(10, args.peticiones // 20), lote),
+        "ultima_medicion": (lambda c, i: c.get(f"/api/v1/mediciones/paciente/{paciente(i)}/ultima"),
+                            args.peticiones, 1),
+        "historial_pagina": (lambda c, i: c.get(f"/api/v1/mediciones/paciente/{paciente(i)}/pagina?limit=50"),
+                             args.peticiones, 1),
+        "alertas_activas": (lambda c, i: c.get("/api/v1/alertas/activas?limit=100"), args.peticiones, 1),
+        "pagina_estado": (lambda c, i: c.get("/"), max(10, args.peticiones // 10), 1),
+    }
+
+    resultados = {}
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=None) as cliente:
+        for nombre, (hacer, peticiones, elementos) in escenarios.items():
+            if args.escenarios and nombre not in args.escenarios:
+                continue
+            await cargar(cliente, min(20, peticiones), args.concurrencia, hacer)  # calentamiento
+            resultados[nombre] = await cargar(cliente, peticiones, args.concurrencia, hacer, elementos)
+    # Con API_ASYNC el motor asíncrono impide que el proceso termine si no se cierra
+    await cerrar_async_engine()
+    if not args.escenarios or "ingesta_mqtt" in args.escenarios:
+        resultados["ingesta_mqtt"] = medir_mqtt(ids, args.mensajes_mqtt)
+    return resultados
+
+
+def lanzar(pacientes: int, args) -> dict:
+    """Un proceso por tamaño: base nueva y configuración leída al importar la app"""
+    url = args.url or f"sqlite:///{tempfile.mkdtemp()}/suite_{pacientes}.db"
+    comando = [sys.executable, os.path.abspath(__file__), "--hijo", "--pacientes", str(pacientes),
+               "--historial", str(args.historial), "--peticiones", str(args.peticiones),
+               "--concurrencia", str(args.concurrencia), "--lote", str(args.lote),
+               "--mensajes-mqtt", str(args.mensajes_mqtt)]
+    if args.escenarios:
+        comando += ["--escenarios", *args.escenarios]
+    salida = subprocess.run(comando, env=dict(os.environ, DATABASE_URL=url), cwd=RAIZ,
+                            capture_output=True, text=True)
+    if salida.returncode != 0:
+        sys.stderr.write(salida.stderr)
+        raise SystemExit(f"Falló la ejecución con {pacientes} pacientes")
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def commit_actual() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconocido"
+
+
+def comparar(actual: dict, base: dict, umbral: float) -> list:
+    """Imprime las diferencias con una ejecución anterior y devuelve las regresiones"""
+    regresiones = []
+    print(f"\nComparación con {base.get('commit')} (umbral {umbral:.0%})")
+    for pacientes, escenarios in actual["resultados"].items():
+        for escenario, metricas in escenarios.items():
+            anterior = base.get("resultados", {}).get(pacientes, {}).get(escenario)
+            if not anterior:
+                continue
+            cambios = []
+            for metrica in ("req_s", "filas_s", "p50_ms", "p95_ms", "p99_ms"):
+                if metrica not in metricas or not anterior.get(metrica):
+                    continue
+                cambio = metricas[metrica] / anterior[metrica] - 1
+                peor = -cambio if metrica in MAYOR_ES_MEJOR else cambio
+                if metrica not in MAYOR_ES_MEJOR and metricas[metrica] - anterior[metrica] < RUIDO_MS:
+                    peor = 0
+                marca = " ⚠" if peor > umbral else ""
+                if marca:
+                    regresiones.append((pacientes, escenario, metrica, cambio))
+                cambios.append(f"{metrica} {cambio:+.0%}{marca}")
+            print(f"  {pacientes:>6} pacientes  {escenario:20} {'  '.join(cambios)}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="URL de la base de datos de prueba (por defecto una SQLite nueva por tamaño)")
+    parser.add_argument("--pacientes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--historial", type=int, default=100, help="Mediciones previas por paciente")
+    parser.add_argument("--peticiones", type=int, default=1000, help="Peticiones por escenario de lectura")
+    parser.add_argument("--concurrencia", type=int, default=16)
+    parser.add_argument("--lote", type=int, default=500, help="Mediciones por POST /batch")
+    parser.add_argument("--mensajes-mqtt", type=int, default=20000)
+    parser.add_argument("--escenarios", nargs="+", help="Solo estos escenarios")
+    parser.add_argument("--json", help="Guardar los resultados en este archivo")
+    parser.add_argument("--comparar", help="JSON de una ejecución anterior")
+    parser.add_argument("--umbral", type=float, default=0.15, help="Empeoramiento que se marca como regresión")
+    parser.add_argument("--estricto", action="store_true", help="Salir con código 1 si hay regresiones")
+    parser.add_argument("--hijo", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.hijo:
+        print(json.dumps(asyncio.run(ejecutar(args.pacientes[0], args))))
+        return
+
+    resultados = {
+        "commit": commit_actual(),
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "parametros": {k: v for k, v in vars(args).items() if k not in ("json", "comparar", "estricto", "hijo")},
+        "resultados": {},
+    }
+    for pacientes in args.pacientes:
+        print(f"\n{pacientes} pacientes ({args.historial} mediciones previas cada uno)")
+        r = resultados["resultados"][str(pacientes)] = lanzar(pacientes, args)
+        for escenario, m in r.items():
+            filas = f"  {m['filas_s']:>9} filas/s" if "filas_s" in m else ""
+            print(f"  {escenario:20} {m['req_s']:>9} op/s  p50 {m['p50_ms']:>7} ms  p95 {m['p95_ms']:>7} ms"
+                  f"  p99 {m['p99_ms']:>7} ms{filas}" + (f"  ({m['errores']} errores)" if m["errores"] else ""))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(resultados, f, indent=2)
+
+    if args.comparar:
+        with open(args.comparar) as f:
+            regresiones = comparar(resultados, json.load(f), args.umbral)
+        if regresiones and args.estricto:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -31,7 +31,7 @@ def generate_continuous_data():
                 
                 # Evaluar y crear alerta
                 alerta_data = alerta_service.evaluate_medicion(MedicionResponse.from_orm(medicion))
-                alerta_service.create(alerta_data)
+                alerta_service.registrar(alerta_data)
                 
                 print(f"Paciente {paciente_id}: SpO2={medicion.spo2}%, BPM={medicion.bpm}, Temp={medicion.temperatura}°C")
             
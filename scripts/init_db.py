@@ -1,31 +1,45 @@
 #!/usr/bin/env python3
 """
 Script para inicializar la base de datos con datos de prueba
+
+    # 5 pacientes con 7 días de lecturas horarias
+    python scripts/init_db.py
+
+    # 1000 pacientes con 30 días de lecturas cada 15 minutos
+    python scripts/init_db.py --pacientes 1000 --dias 30 --intervalo 15
 """
 
+import argparse
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.database import SessionLocal, engine, Base
+from app.database import SessionLocal
+from app.core.migraciones import migrar
+from app.services.inferencia import InferenciaService
 from app.utils.data_generator import DataGenerator
 
-def init_database():
+def init_database(pacientes: int = 5, dias: int = 7, intervalo: float = 60, semilla: int = None):
     """Inicializa la base de datos con datos de prueba"""
-    print("Creando tablas...")
-    Base.metadata.create_all(bind=engine)
+    print("Aplicando migraciones...")
+    migrar()
     
     db = SessionLocal()
     try:
         generator = DataGenerator(db)
         
         print("Generando pacientes de muestra...")
-        generator.generate_sample_patients(5)
+        ids = generator.generate_sample_patients(pacientes)
         
         print("Generando datos históricos...")
-        for paciente_id in range(1, 6):
-            generator.generate_historical_data(paciente_id, days=7)
-            generator.generate_predictions(paciente_id, count=3)
+        resumen = generator.generate_historical_bulk(ids, days=dias, intervalo_minutos=intervalo, semilla=semilla)
+        print(f"  {resumen['mediciones']} mediciones y {resumen['alertas']} alertas en "
+              f"{resumen['segundos']} s ({resumen['filas_s']} filas/s)")
+        
+        print("Calculando predicciones...")
+        resultado = InferenciaService(db).ejecutar()
+        print(f"  {resultado['predicciones']} predicciones para {resultado['pacientes']} pacientes "
+              f"({resultado['tiempos_ms']})")
         
         print("Base de datos inicializada exitosamente!")
         
@@ -36,4 +50,10 @@ def init_database():
         db.close()
 
 if __name__ == "__main__":
-    init_database()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pacientes", type=int, default=5)
+    parser.add_argument("--dias", type=int, default=7)
+    parser.add_argument("--intervalo", type=float, default=60, help="Minutos entre lecturas")
+    parser.add_argument("--semilla", type=int)
+    args = parser.parse_args()
+    init_database(args.pacientes, args.dias, args.intervalo, args.semilla)
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Calcula las predicciones de todos los pacientes activos una vez (para cron o a mano).
+
+Lee la ventana reciente de cada paciente (PREDICCIONES_VENTANA_HORAS), calcula
+sus características, las puntúa con el modelo (PREDICCIONES_MODELO_ARCHIVO o el
+de referencia) y guarda las predicciones por encima de PREDICCIONES_UMBRAL:
+
+    python scripts/predecir.py
+    python scripts/predecir.py --simular --paciente 3 --paciente 7
+
+    # Exportar el modelo de referencia como punto de partida de uno propio
+    python scripts/predecir.py --exportar-modelo modelo.npz
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services.inferencia import InferenciaService, modelo_referencia
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--simular", action="store_true", help="Mostrar las predicciones sin guardarlas")
+    parser.add_argument("--paciente", type=int, action="append", help="Solo estos pacientes")
+    parser.add_argument("--exportar-modelo", metavar="RUTA", help="Guardar el modelo de referencia en un .npz")
+    args = parser.parse_args()
+
+    if args.exportar_modelo:
+        modelo_referencia().guardar(args.exportar_modelo)
+        print(f"✅ Modelo de referencia guardado en {args.exportar_modelo}")
+        return
+
+    db = SessionLocal()
+    try:
+        resultado = InferenciaService(db).ejecutar(paciente_ids=args.paciente, guardar=not args.simular)
+        print(f"{resultado['pacientes']} pacientes ({resultado['fuente']}), {resultado['predicciones']} predicciones")
+        for etapa, ms in resultado["tiempos_ms"].items():
+            print(f"  {etapa:16} {ms:>10.2f} ms")
+        for fila in resultado["resultados"] or []:
+            print(f"  paciente {fila['id_paciente']:>6}  {fila['enfermedad']:12} {fila['probabilidad']:.4f}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
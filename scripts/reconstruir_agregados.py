@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Recalcula la tabla mediciones_agregadas a partir de las mediciones crudas.
+
+Necesario una vez tras aplicar la migración 0003 sobre una base con datos,
+o para reparar los agregados de un paciente o periodo:
+
+    python scripts/reconstruir_agregados.py
+    python scripts/reconstruir_agregados.py --paciente 3 --desde 2024-01-01
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database import SessionLocal
+from app.services.agregados import AgregadoService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paciente", type=int, help="Solo este paciente")
+    parser.add_argument("--desde", type=datetime.fromisoformat, help="Solo desde esta fecha (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        procesadas = AgregadoService(db).reconstruir(paciente_id=args.paciente, desde=args.desde)
+        print(f"✅ Agregados reconstruidos a partir de {procesadas} mediciones")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Aplica la retención de mediciones y alertas una vez (para cron o a mano).
+
+Crea las particiones futuras que falten (MySQL particionado), consolida y
+archiva las mediciones de los periodos caducados y los elimina, según
+RETENCION_* y PARTICION_PERIODO en .env:
+
+    python scripts/retencion.py
+    python scripts/retencion.py --simular
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.database import SessionLocal
+from app.services.retencion import RetencionService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--simular", action="store_true", help="Solo mostrar los periodos que caducarían")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        servicio = RetencionService(db)
+        if args.simular:
+            dias = {"mediciones": settings.retencion_mediciones_dias, "alertas": settings.retencion_alertas_dias}
+            for tabla, retencion in dias.items():
+                if retencion <= 0:
+                    print(f"{tabla}: sin retención")
+                    continue
+                corte = servicio.corte(retencion)
+                caducadas = [p.nombre for p in servicio.particiones(tabla) if p.hasta and p.hasta <= corte]
+                print(f"{tabla}: anteriores a {corte:%Y-%m-%d} -> {', '.join(caducadas) or 'nada'}")
+            return
+
+        resultado = servicio.ejecutar()
+        for tabla, creadas in resultado["creadas"].items():
+            print(f"✅ {tabla}: particiones creadas {', '.join(creadas)}")
+        for tabla, resumen in resultado["eliminadas"].items():
+            print(f"✅ {tabla}: {resumen['filas']} filas eliminadas ({', '.join(resumen['particiones']) or 'ningún periodo'})")
+            for archivo in resumen["archivos"]:
+                print(f"   archivado en {archivo}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Arranca la API en producción con varios workers de uvicorn.
+
+Cada worker es un proceso con su propio intérprete, así que el trabajo de
+Python de las peticiones (validación, serialización, reglas) se reparte
+entre los núcleos. Antes de crear los workers el proceso principal:
+
+- aplica las migraciones una sola vez (los workers arrancan con
+  MIGRAR_AL_INICIAR=false)
+- arranca el bus local entre procesos (un socket Unix) para los eventos en
+  tiempo real y la caché de la última medición, o usa el broker MQTT
+  con --bus mqtt
+- fija el cerrojo con el que los workers eligen el único que ingiere de
+  MQTT y ejecuta la retención y las predicciones
+
+    python scripts/servidor.py
+    python scripts/servidor.py --workers 4 --port 8001
+    python scripts/servidor.py --workers 4 --bus mqtt
+
+Para desarrollo (un proceso, recarga automática) sigue usándose run_dev.py.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import uvicorn
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Procesos (por defecto, uno por núcleo)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--bus", choices=("unix", "mqtt"), default="unix",
+                        help="unix: socket local (una máquina); mqtt: el broker de la ingesta")
+    parser.add_argument("--sin-migrar", action="store_true", help="No aplicar las migraciones pendientes")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    # La configuración se lee al importar app.core.config: las variables van antes
+    repetidor = None
+    if args.workers > 1:
+        if args.bus == "unix":
+            ruta = os.path.join(tempfile.gettempdir(), f"monitoreo-bus-{args.port}.sock")
+            os.environ["BUS_URL"] = f"unix://{ruta}"
+        elif not os.environ.get("BUS_URL"):
+            os.environ["BUS_URL"] = "mqtt://"
+        os.environ.setdefault("INGESTA_CERROJO", os.path.join(tempfile.gettempdir(), f"monitoreo-ingesta-{args.port}.lock"))
+    os.environ["MIGRAR_AL_INICIAR"] = "false"
+
+    from app.core.config import settings
+    from app.core.migraciones import migrar
+
+    if not args.sin_migrar:
+        print("🔍 Aplicando migraciones...")
+        migrar()
+
+    if args.workers > 1 and args.bus == "unix":
+        from app.core.bus import Repetidor
+
+        repetidor = Repetidor(ruta)
+        repetidor.iniciar()
+
+    conexiones = args.workers * (settings.db_pool_size + settings.db_max_overflow)
+    print(f"🏥 {args.workers} workers en http://{args.host}:{args.port} "
+          f"(bus: {settings.bus_url or 'ninguno'}, hasta {conexiones} conexiones a la base de datos)")
+    try:
+        uvicorn.run(
+            "app.main:app",
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            log_level=args.log_level,
+        )
+    finally:
+        if repetidor is not None:
+            repetidor.detener()
+
+
+if __name__ == "__main__":
+    main()
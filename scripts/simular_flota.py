@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Simulador de una flota de dispositivos ESP32 (carga realista sin hardware).
+
+Cada dispositivo envía los signos de un paciente con la frecuencia indicada,
+con derivas y episodios según su edad. Admite ráfagas, tormentas de
+reconexión, lecturas fuera de orden y duplicadas, y reparte la flota entre
+varios procesos:
+
+    # 10.000 dispositivos a 1 Hz contra el broker de .env, en 4 procesos
+    python scripts/simular_flota.py --dispositivos 10000 --procesos 4 --duracion 300
+
+    # Pasarela REST (lotes de 500) con ráfagas x5 cada minuto y 1 % de duplicados
+    python scripts/simular_flota.py --destino rest --url http://localhost:8000 \\
+        --rafaga-cada 60 --duplicados 0.01 --desorden 0.02
+
+    # Crear antes los pacientes en la base de datos de .env
+    python scripts/simular_flota.py --dispositivos 10000 --crear-pacientes
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.utils.flota import (ConfigFlota, DestinoMQTT, DestinoREST, Flota, pacientes_sinteticos,
+                             sumar_estadisticas)
+
+
+def pacientes_de_bd(n: int, crear: bool) -> list:
+    """(id, edad) de los primeros `n` pacientes activos; con `crear`, los que falten se crean"""
+    import random
+    from sqlalchemy import insert
+    from app.database import SessionLocal
+    from app.models import Paciente
+
+    with SessionLocal() as db:
+        consulta = db.query(Paciente.id, Paciente.edad).filter(Paciente.activo == True).order_by(Paciente.id)  # noqa: E712
+        pacientes = [tuple(p) for p in consulta.limit(n).all()]
+        if crear and len(pacientes) < n:
+            db.execute(insert(Paciente), [
+                {"nombre": f"Flota {i}", "edad": random.randint(18, 90), "genero": random.choice("MF"), "activo": True}
+                for i in range(len(pacientes), n)
+            ])
+            db.commit()
+            pacientes = [tuple(p) for p in consulta.limit(n).all()]
+    return pacientes
+
+
+def _trabajador(indice: int, pacientes: list, args: dict, config: dict) -> dict:
+    # Una conexión por dispositivo: subir el límite de descriptores hasta el máximo permitido
+    blando, duro = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if blando < duro:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (duro, duro))
+
+    if args["destino"] == "mqtt":
+        conexiones = args["conexiones"] // args["procesos"] if args["conexiones"] else None
+        destino = DestinoMQTT([p for p, _ in pacientes], host=args["host"], port=args["port"],
+                              conexiones=conexiones, conexiones_por_segundo=args["conexiones_por_segundo"],
+                              prefijo=f"flota-{os.getpid()}-{indice}")
+    else:
+        destino = DestinoREST(args["url"], lote=args["lote"], concurrencia=args["concurrencia"])
+    if config["semilla"] is not None:
+        config = dict(config, semilla=config["semilla"] + indice)
+    stats = asyncio.run(Flota(pacientes, destino, ConfigFlota(**config)).ejecutar())
+    return stats.como_dict()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dispositivos", type=int, default=1000)
+    parser.add_argument("--procesos", type=int, default=1)
+    parser.add_argument("--destino", choices=["mqtt", "rest"], default="mqtt")
+    parser.add_argument("--host", default=settings.mqtt_broker_host)
+    parser.add_argument("--port", type=int, default=settings.mqtt_broker_port)
+    parser.add_argument("--conexiones", type=int, help="Conexiones MQTT compartidas (por defecto una por dispositivo)")
+    parser.add_argument("--conexiones-por-segundo", type=float, default=1000, help="Ritmo de conexión inicial")
+    parser.add_argument("--url", default="http://localhost:8000", help="API para --destino rest")
+    parser.add_argument("--lote", type=int, default=500, help="Lecturas por POST /batch")
+    parser.add_argument("--concurrencia", type=int, default=8, help="Peticiones /batch en vuelo por proceso")
+    parser.add_argument("--primer-paciente", type=int, default=1)
+    parser.add_argument("--pacientes-bd", action="store_true", help="Usar los pacientes activos de la base de datos")
+    parser.add_argument("--crear-pacientes", action="store_true", help="Crear en la base de datos los pacientes que falten")
+    parser.add_argument("--frecuencia", type=float, default=1.0, help="Lecturas por segundo y dispositivo")
+    parser.add_argument("--fluctuacion", type=float, default=0.1)
+    parser.add_argument("--duracion", type=float, default=60.0)
+    parser.add_argument("--rafaga-cada", type=float, default=0.0)
+    parser.add_argument("--rafaga-duracion", type=float, default=5.0)
+    parser.add_argument("--rafaga-factor", type=float, default=5.0)
+    parser.add_argument("--tormenta-cada", type=float, default=0.0, help="Segundos entre tormentas de reconexión")
+    parser.add_argument("--desorden", type=float, default=0.0, help="Probabilidad de retrasar una lectura")
+    parser.add_argument("--desorden-max", type=float, default=5.0)
+    parser.add_argument("--duplicados", type=float, default=0.0, help="Probabilidad de duplicar una lectura")
+    parser.add_argument("--tasa-episodios", type=float, default=0.5, help="Episodios por dispositivo y hora")
+    parser.add_argument("--semilla", type=int)
+    parser.add_argument("--json", help="Guardar las estadísticas en este archivo")
+    args = parser.parse_args()
+
+    if args.pacientes_bd or args.crear_pacientes:
+        pacientes = pacientes_de_bd(args.dispositivos, args.crear_pacientes)
+        if len(pacientes) < args.dispositivos:
+            print(f"⚠️  Solo hay {len(pacientes)} pacientes activos; se simulan esos dispositivos")
+    else:
+        pacientes = pacientes_sinteticos(args.dispositivos, args.primer_paciente, args.semilla)
+
+    config = {f.name: getattr(args, f.name) for f in fields(ConfigFlota) if hasattr(args, f.name)}
+    opciones = vars(args)
+    procesos = max(1, min(args.procesos, len(pacientes)))
+    partes = [pacientes[i::procesos] for i in range(procesos)]
+
+    print(f"Simulando {len(pacientes)} dispositivos a {args.frecuencia} Hz durante {args.duracion:.0f} s "
+          f"({args.destino}, {procesos} procesos)...")
+    inicio = time.perf_counter()
+    if procesos == 1:
+        resultados = [_trabajador(0, partes[0], opciones, config)]
+    else:
+        with ProcessPoolExecutor(procesos) as pool:
+            resultados = list(pool.map(_trabajador, range(procesos), partes,
+                                       [opciones] * procesos, [config] * procesos))
+    segundos = time.perf_counter() - inicio
+
+    total = sumar_estadisticas(resultados)
+    total["segundos"] = round(segundos, 2)
+    total["lecturas_s"] = round(total["enviadas"] / segundos, 1)
+    for clave, valor in total.items():
+        print(f"  {clave:14} {valor}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"parametros": opciones, "procesos": resultados, "total": total}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import random
 from datetime import datetime, timedelta
 from typing import Dict, Optional
+from app.services.reglas import TIPOS_ALERTA, VERDE, motor_reglas
 
 class DataSimulationService:
     """Servicio para generar datos simulados realistas"""
@@ -57,34 +58,13 @@ class AlertService:
     """Servicio para evaluar y generar alertas"""
     
     def check_alert(self, medicion: Dict, edad: int) -> Optional[Dict]:
-        """Evalúa si una medición requiere alerta"""
-        
-        bpm = medicion["bpm"]
-        spo2 = float(medicion["spo2"])
-        temperatura = float(medicion["temperatura"])
-        
-        # Alertas críticas (rojas)
-        if bpm > 120 or bpm < 50:
-            return {"tipo": "roja", "mensaje": f"Frecuencia cardíaca crítica: {bpm} BPM"}
-        
-        if spo2 < 90:
-            return {"tipo": "roja", "mensaje": f"Saturación de oxígeno crítica: {spo2}%"}
-        
-        if temperatura > 39 or temperatura < 35:
-            return {"tipo": "roja", "mensaje": f"Temperatura crítica: {temperatura}°C"}
-        
-        # Alertas de precaución (amarillas)
-        if bpm > 100 or bpm < 60:
-            return {"tipo": "amarilla", "mensaje": f"Frecuencia cardíaca elevada: {bpm} BPM"}
-        
-        if spo2 < 95:
-            return {"tipo": "amarilla", "mensaje": f"Saturación de oxígeno baja: {spo2}%"}
-        
-        if temperatura > 37.5 or temperatura < 36:
-            return {"tipo": "amarilla", "mensaje": f"Temperatura anormal: {temperatura}°C"}
-        
-        # Sin alertas
-        return None
+        """Evalúa si una medición requiere alerta con la tabla de reglas compartida"""
+        severidad, mensaje = motor_reglas.evaluar_una(
+            medicion["spo2"], medicion["bpm"], medicion["temperatura"], edad
+        )
+        if severidad == VERDE:
+            return None
+        return {"tipo": TIPOS_ALERTA[severidad].value, "mensaje": mensaje}
 
 class PredictionService:
     """Servicio para generar predicciones simuladas de IA"""
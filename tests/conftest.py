@@ -0,0 +1,7 @@
+import pytest
+from app.core.migraciones import migrar
+
+@pytest.fixture(scope="session", autouse=True)
+def esquema():
+    """Aplica las migraciones antes de la sesión de pruebas"""
+    migrar()
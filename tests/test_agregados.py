@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.agregados import agregar, elegir_resolucion
+
+client = TestClient(app)
+
+INICIO = datetime(2024, 3, 1, 10, 0, 0)
+
+def test_agregar_por_resolucion():
+    filas = [
+        {"id_paciente": 1, "timestamp": INICIO + timedelta(seconds=s), "spo2": 95 + s % 3, "bpm": 60 + s, "temperatura": 36.5}
+        for s in range(0, 120, 10)
+    ]
+    agregados = {(a["resolucion"], a["inicio"]): a for a in agregar(filas)}
+    assert len(agregados) == 4  # 2 minutos, 1 hora, 1 día
+    minuto = agregados[("minuto", INICIO)]
+    assert (minuto["n"], minuto["bpm_min"], minuto["bpm_max"], minuto["bpm_suma"]) == (6, 60, 110, 510)
+    assert agregados[("dia", INICIO.replace(hour=0))]["n"] == 12
+
+def test_elegir_resolucion():
+    assert elegir_resolucion(INICIO, INICIO + timedelta(hours=6), 500) == "minuto"
+    assert elegir_resolucion(INICIO, INICIO + timedelta(days=30), 1000) == "hora"
+    assert elegir_resolucion(INICIO, INICIO + timedelta(days=365), 500) == "dia"
+
+def test_serie_usa_agregados_de_la_ingesta():
+    paciente_id = client.post("/api/v1/pacientes/", json={
+        "nombre": "Test Serie", "edad": 60, "genero": "M", "activo": True
+    }).json()["id"]
+    lote = [
+        {"id_paciente": paciente_id, "spo2": 97, "bpm": 60 + i % 40, "temperatura": 36.6,
+         "timestamp": (INICIO + timedelta(seconds=30 * i)).isoformat()}
+        for i in range(240)  # 2 horas, una lectura cada 30 s
+    ]
+    assert client.post("/api/v1/mediciones/batch", json=lote).json()["guardadas"] == 240
+    # Dos lotes sobre los mismos intervalos se acumulan
+    client.post("/api/v1/mediciones/", json={
+        "id_paciente": paciente_id, "spo2": 90, "bpm": 150, "temperatura": 36.6,
+        "timestamp": (INICIO + timedelta(seconds=5)).isoformat()
+    })
+
+    params = {"start_date": INICIO.isoformat(), "end_date": (INICIO + timedelta(hours=2)).isoformat(), "puntos": 50}
+    serie = client.get(f"/api/v1/mediciones/paciente/{paciente_id}/serie", params=params).json()
+    assert serie["resolucion"] == "hora"
+    assert [p["n"] for p in serie["puntos"]] == [121, 120]
+    assert serie["puntos"][0]["bpm_max"] == 150
+    assert serie["puntos"][0]["spo2_min"] == 90
+
+    params["puntos"] = 200
+    serie = client.get(f"/api/v1/mediciones/paciente/{paciente_id}/serie", params=params).json()
+    assert serie["resolucion"] == "minuto"
+    assert len(serie["puntos"]) == 120
@@ -0,0 +1,75 @@
+import asyncio
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.v1.aio import alertas, mediciones, pacientes, predicciones
+from app.services.aio.alertas import AlertaServiceAsync
+
+# Solo las rutas asíncronas (lo que monta app/main.py con API_ASYNC=true), sobre aiosqlite
+app = FastAPI()
+app.include_router(pacientes.router, prefix="/api/v1/pacientes")
+app.include_router(mediciones.router, prefix="/api/v1/mediciones")
+app.include_router(alertas.router, prefix="/api/v1/alertas")
+app.include_router(predicciones.router, prefix="/api/v1/predicciones")
+
+client = TestClient(app)
+
+def _paciente(nombre="Test Paciente Async"):
+    response = client.post("/api/v1/pacientes/", json={
+        "nombre": nombre, "edad": 58, "genero": "F", "activo": True
+    })
+    assert response.status_code == 200
+    return response.json()["id"]
+
+def test_pacientes_async_crud():
+    paciente_id = _paciente()
+    assert client.get(f"/api/v1/pacientes/{paciente_id}").json()["nombre"] == "Test Paciente Async"
+    response = client.put(f"/api/v1/pacientes/{paciente_id}", json={"edad": 59})
+    assert response.json()["edad"] == 59
+    assert paciente_id in [p["id"] for p in client.get("/api/v1/pacientes/activos").json()]
+    assert client.delete(f"/api/v1/pacientes/{paciente_id}").status_code == 200
+    assert client.get(f"/api/v1/pacientes/{paciente_id}").status_code == 404
+    assert client.delete(f"/api/v1/pacientes/{paciente_id}").status_code == 404
+
+def test_mediciones_async_y_alertas_por_transicion():
+    paciente_id = _paciente("Test Mediciones Async")
+    assert client.get(f"/api/v1/mediciones/paciente/{paciente_id}/ultima").status_code == 404
+    for bpm, spo2 in ((72, 98.0), (74, 97.5), (150, 84.0)):
+        response = client.post("/api/v1/mediciones/", json={
+            "id_paciente": paciente_id, "spo2": spo2, "bpm": bpm, "temperatura": 36.8
+        })
+        assert response.status_code == 200
+
+    assert client.get(f"/api/v1/mediciones/paciente/{paciente_id}/ultima").json()["bpm"] == 150
+    assert len(client.get(f"/api/v1/mediciones/paciente/{paciente_id}").json()) == 3
+    response = client.get(f"/api/v1/mediciones/paciente/{paciente_id}/rango", params={
+        "start_date": "2000-01-01 00:00:00", "end_date": "2100-01-01 00:00:00"
+    })
+    assert len(response.json()) == 3
+    # La segunda lectura normal no es una transición: solo verde y roja
+    tipos = [a["tipo"] for a in client.get(f"/api/v1/alertas/paciente/{paciente_id}").json()]
+    assert sorted(tipos) == ["roja", "verde"]
+
+def test_evaluacion_fuera_del_bucle(monkeypatch):
+    paciente_id = _paciente("Test Evaluación Async")
+    evaluar = AlertaServiceAsync.evaluate_medicion
+    en_bucle = []
+
+    def registrar_hilo(self, medicion):
+        try:
+            asyncio.get_running_loop()
+            en_bucle.append(True)
+        except RuntimeError:
+            en_bucle.append(False)
+        return evaluar(self, medicion)
+
+    monkeypatch.setattr(AlertaServiceAsync, "evaluate_medicion", registrar_hilo)
+    client.post("/api/v1/mediciones/", json={"id_paciente": paciente_id, "spo2": 97, "bpm": 70, "temperatura": 36.6})
+    client.post(f"/api/v1/mediciones/paciente/{paciente_id}/simular")
+    assert en_bucle == [False, False]
+
+def test_predicciones_async():
+    paciente_id = _paciente("Test Predicciones Async")
+    client.post(f"/api/v1/mediciones/paciente/{paciente_id}/simular")
+    response = client.post(f"/api/v1/predicciones/paciente/{paciente_id}/simular")
+    assert response.status_code == 200
+    assert len(client.get(f"/api/v1/predicciones/paciente/{paciente_id}").json()) == 1
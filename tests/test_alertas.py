@@ -0,0 +1,72 @@
+from datetime import datetime
+from fastapi.testclient import TestClient
+from app.database import SessionLocal
+from app.main import app
+from app.schemas.alerta import AlertaCreate
+from app.services.alertas import AlertaService
+from app.services.estado_alertas import EstadoAlertas
+
+client = TestClient(app)
+
+def _alerta(paciente_id, tipo):
+    return AlertaCreate(id_paciente=paciente_id, tipo=tipo, mensaje=tipo)
+
+def test_solo_transiciones_y_anormales():
+    estado = EstadoAlertas(solo_transiciones=True)
+    secuencia = [_alerta(1, t) for t in ["verde", "verde", "amarilla", "amarilla", "verde", "verde", "roja"]]
+    guardadas = estado.filtrar(secuencia, lambda ids: {})
+    assert [a.tipo.value for a in guardadas] == ["verde", "amarilla", "amarilla", "verde", "roja"]
+
+def test_estado_previo_desde_base_de_datos():
+    estado = EstadoAlertas(solo_transiciones=True)
+    consultados = []
+    
+    def cargar(ids):
+        consultados.append(set(ids))
+        return {1: "verde"}
+    
+    guardadas = estado.filtrar([_alerta(1, "verde"), _alerta(2, "verde")], cargar)
+    assert [a.id_paciente for a in guardadas] == [2]
+    estado.confirmar(guardadas)
+    # Una vez en memoria ya no se consulta la base de datos
+    estado.filtrar([_alerta(1, "verde"), _alerta(2, "verde")], cargar)
+    assert consultados == [{1, 2}]
+
+def test_modo_heredado_guarda_todo():
+    estado = EstadoAlertas(solo_transiciones=False)
+    secuencia = [_alerta(1, "verde") for _ in range(3)]
+    assert len(estado.filtrar(secuencia, lambda ids: {})) == 3
+
+def test_lote_fallido_libera_su_transicion():
+    estado = EstadoAlertas(solo_transiciones=True)
+    estado.confirmar([_alerta(1, "roja")])
+    # El lote con la vuelta a verde falla antes del commit: se libera lo reservado
+    reserva = {}
+    assert [a.tipo.value for a in estado.filtrar([_alerta(1, "verde")], lambda ids: {}, reserva)] == ["verde"]
+    estado.liberar(reserva)
+    reserva = {}
+    assert [a.tipo.value for a in estado.filtrar([_alerta(1, "verde")], lambda ids: {}, reserva)] == ["verde"]
+    estado.confirmar([_alerta(1, "verde")])
+    assert estado.filtrar([_alerta(1, "verde")], lambda ids: {}) == []
+
+def test_transicion_reservada_no_se_repite_antes_del_commit():
+    estado = EstadoAlertas(solo_transiciones=True)
+    estado.confirmar([_alerta(1, "roja")])
+    # Dos peticiones del mismo paciente antes de que la primera haga commit
+    primera, segunda = {}, {}
+    assert len(estado.filtrar([_alerta(1, "verde")], lambda ids: {}, primera)) == 1
+    assert estado.filtrar([_alerta(1, "verde")], lambda ids: {}, segunda) == []
+    assert primera == {1: ("roja", "verde")} and segunda == {}
+
+def test_ultimo_tipo_por_timestamp_y_no_por_id():
+    paciente_id = client.post("/api/v1/pacientes/", json={
+        "nombre": "Test Alertas Relleno", "edad": 60, "genero": "F", "activo": True
+    }).json()["id"]
+    with SessionLocal() as db:
+        servicio = AlertaService(db)
+        servicio.bulk_create([AlertaCreate(id_paciente=paciente_id, tipo="roja", mensaje="actual",
+                                           timestamp=datetime(2024, 1, 2))])
+        # Relleno histórico: id mayor, timestamp anterior
+        servicio.bulk_create([AlertaCreate(id_paciente=paciente_id, tipo="verde", mensaje="relleno",
+                                           timestamp=datetime(2024, 1, 1))])
+        assert servicio.get_ultimos_tipos([paciente_id]) == {paciente_id: "roja"}
@@ -0,0 +1,64 @@
+import time
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from app.core.cache import CacheUltimaMedicion, cache_ultima_medicion
+from app.database import SessionLocal
+from app.main import app
+from app.models import Medicion
+from app.schemas.medicion import MedicionResponse
+
+AHORA = datetime(2024, 1, 1, 10, 0, 0)
+
+def _medicion(id, paciente_id, segundos=0):
+    return MedicionResponse(id=id, id_paciente=paciente_id, spo2=98, bpm=70, temperatura=36.5,
+                            timestamp=AHORA + timedelta(seconds=segundos))
+
+def test_aciertos_y_lectura_mas_reciente():
+    cache = CacheUltimaMedicion(max_pacientes=10, ttl=60)
+    assert cache.obtener(1) is None
+    cache.actualizar(_medicion(2, 1, segundos=10))
+    # Una lectura antigua (p. ej. reenviada por un gateway) no reemplaza a la actual
+    cache.actualizar(_medicion(3, 1, segundos=5))
+    assert cache.obtener(1).id == 2
+    stats = cache.estadisticas()
+    assert (stats["aciertos"], stats["fallos"]) == (1, 1)
+
+def test_desalojo_lru():
+    cache = CacheUltimaMedicion(max_pacientes=2, ttl=60)
+    cache.actualizar(_medicion(1, 1))
+    cache.actualizar(_medicion(2, 2))
+    cache.obtener(1)
+    cache.actualizar(_medicion(3, 3))
+    assert cache.obtener(2) is None
+    assert cache.obtener(1) is not None
+    assert cache.estadisticas()["desalojos"] == 1
+
+def test_caducidad_por_antiguedad():
+    cache = CacheUltimaMedicion(max_pacientes=10, ttl=0)
+    cache.actualizar(_medicion(1, 1))
+    assert cache.obtener(1) is None
+    assert cache.estadisticas()["caducadas"] == 1
+
+def test_caduca_aunque_se_siga_leyendo(monkeypatch):
+    client = TestClient(app)
+    paciente_id = client.post("/api/v1/pacientes/", json={
+        "nombre": "Test Caché TTL", "edad": 50, "genero": "M", "activo": True
+    }).json()["id"]
+    client.post("/api/v1/mediciones/", json={
+        "id_paciente": paciente_id, "spo2": 97, "bpm": 70, "temperatura": 36.5,
+        "timestamp": "2024-01-01T10:00:00"
+    })
+    monkeypatch.setattr(cache_ultima_medicion, "ttl", 0.3)
+    url = f"/api/v1/mediciones/paciente/{paciente_id}/ultima"
+    assert client.get(url).json()["bpm"] == 70
+
+    # Escritura que la caché no ve (p. ej. otro proceso sin bus)
+    with SessionLocal() as db:
+        db.execute(insert(Medicion), [{"id_paciente": paciente_id, "spo2": 97, "bpm": 90,
+                                       "temperatura": 36.5, "timestamp": datetime(2024, 1, 1, 10, 5)}])
+        db.commit()
+    limite = time.monotonic() + 5
+    while client.get(url).json()["bpm"] == 70:
+        assert time.monotonic() < limite, "la entrada leída sin parar no caduca"
+        time.sleep(0.05)
@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta
+from app.database import SessionLocal
+from app.models import Alerta, Medicion, MedicionAgregada
+from app.services.agregados import agregar
+from app.utils.data_generator import DataGenerator
+
+def _agregados(db, ids):
+    filas = db.query(MedicionAgregada).filter(MedicionAgregada.id_paciente.in_(ids)).all()
+    return {
+        (a.resolucion, a.id_paciente, a.inicio): (a.n, a.spo2_min, a.bpm_max, round(a.temperatura_suma, 2))
+        for a in filas
+    }
+
+def test_historico_en_bloque():
+    with SessionLocal() as db:
+        generador = DataGenerator(db)
+        ids = generador.generate_sample_patients(3)
+        resumen = generador.generate_historical_bulk(ids, days=2, intervalo_minutos=20, semilla=7)
+        assert resumen["mediciones"] == 3 * 2 * 72 and resumen["filas_s"] > 0
+
+        mediciones = db.query(Medicion).filter(Medicion.id_paciente.in_(ids)).order_by(Medicion.id).all()
+        assert len(mediciones) == resumen["mediciones"]
+        # Cada lectura conserva su hora, no la de la inserción
+        assert mediciones[0].timestamp < datetime.now() - timedelta(days=1, hours=23)
+        assert len({m.timestamp for m in mediciones}) == 2 * 72
+
+        alertas = db.query(Alerta).filter(Alerta.id_paciente.in_(ids)).all()
+        assert len(alertas) == resumen["alertas"] > 0
+        assert {a.timestamp for a in alertas} <= {m.timestamp for m in mediciones}
+
+        # Los agregados en bloque coinciden con los de la ingesta fila a fila
+        esperados = {
+            (a["resolucion"], a["id_paciente"], a["inicio"]):
+                (a["n"], a["spo2_min"], a["bpm_max"], round(a["temperatura_suma"], 2))
+            for a in agregar([
+                {"id_paciente": m.id_paciente, "timestamp": m.timestamp, "spo2": m.spo2,
+                 "bpm": m.bpm, "temperatura": m.temperatura} for m in mediciones
+            ])
+        }
+        assert _agregados(db, ids) == esperados
@@ -0,0 +1,33 @@
+from fastapi.testclient import TestClient
+from app.database import SessionLocal
+from app.main import app
+from app.models import Paciente
+from app.services.estado import EstadoService, estado_sistema
+
+client = TestClient(app)
+
+def test_conteos_aproximados_cubren_las_filas_existentes():
+    client.post("/api/v1/pacientes/", json={"nombre": "Test Estado", "edad": 40, "genero": "M", "activo": True})
+    with SessionLocal() as db:
+        conteos = EstadoService(db).conteos()
+        assert set(conteos) == {"pacientes", "mediciones", "alertas", "predicciones"}
+        assert conteos["pacientes"] >= db.query(Paciente).count() > 0
+
+def test_pagina_de_estado_se_sirve_desde_la_copia_precalculada(monkeypatch):
+    estado_sistema.refrescar()
+    refrescos = estado_sistema.refrescos
+    monkeypatch.setattr(estado_sistema, "ttl", 3600)
+
+    pagina = client.get("/")
+    assert pagina.status_code == 200
+    assert pagina.headers["content-type"].startswith("text/html")
+    assert "Datos Almacenados" in pagina.text and "Error" not in pagina.text
+
+    datos = client.get("/api/v1/sistema/estado").json()
+    assert datos["filas_aproximadas"]["pacientes"] > 0
+    assert estado_sistema.refrescos == refrescos
+
+    # Caducada la copia, la siguiente petición la regenera
+    monkeypatch.setattr(estado_sistema, "ttl", 0)
+    client.get("/")
+    assert estado_sistema.refrescos == refrescos + 1
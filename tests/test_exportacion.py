@@ -0,0 +1,56 @@
+import csv
+import io
+import json
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.exportacion import ExportacionService
+
+client = TestClient(app)
+
+def _paciente_con_mediciones(nombre, n):
+    paciente_id = client.post("/api/v1/pacientes/", json={
+        "nombre": nombre, "edad": 45, "genero": "M", "activo": True
+    }).json()["id"]
+    client.post("/api/v1/mediciones/batch", json=[
+        {"id_paciente": paciente_id, "spo2": 97.25, "bpm": 60 + i, "temperatura": 36.7,
+         "timestamp": f"2024-05-01T08:{i:02d}:00"}
+        for i in range(n)
+    ])
+    return paciente_id
+
+def test_exportar_ndjson_varios_pacientes():
+    uno = _paciente_con_mediciones("Test Export 1", 3)
+    dos = _paciente_con_mediciones("Test Export 2", 2)
+    response = client.get("/api/v1/mediciones/exportar", params={"paciente_id": [uno, dos]})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    filas = [json.loads(linea) for linea in response.text.splitlines()]
+    assert [f["id_paciente"] for f in filas] == [uno] * 3 + [dos] * 2
+    # Mismo formato que la API
+    assert (filas[0]["spo2"], filas[0]["temperatura"]) == ("97.25", "36.70")
+    assert [f["bpm"] for f in filas[:3]] == [60, 61, 62]
+
+def test_exportar_csv_por_rango():
+    paciente_id = _paciente_con_mediciones("Test Export CSV", 5)
+    response = client.get("/api/v1/mediciones/exportar", params={
+        "formato": "csv", "paciente_id": paciente_id,
+        "start_date": "2024-05-01T08:01:00", "end_date": "2024-05-01T08:03:00",
+    })
+    filas = list(csv.DictReader(io.StringIO(response.text)))
+    assert [int(f["bpm"]) for f in filas] == [61, 62, 63]
+    assert filas[0]["temperatura"] == "36.70"
+
+def test_exportar_por_lotes_recorre_todo_el_rango():
+    paciente_id = _paciente_con_mediciones("Test Export lotes", 7)
+    lotes = list(ExportacionService([paciente_id], lote=3).lotes())
+    assert [len(lote) for lote in lotes] == [3, 3, 1]
+    assert [fila[4] for lote in lotes for fila in lote] == [60, 61, 62, 63, 64, 65, 66]
+
+def test_exportar_parquet():
+    pq = pytest.importorskip("pyarrow.parquet")
+    paciente_id = _paciente_con_mediciones("Test Export Parquet", 4)
+    response = client.get("/api/v1/mediciones/exportar", params={"formato": "parquet", "paciente_id": paciente_id})
+    tabla = pq.read_table(io.BytesIO(response.content))
+    assert tabla.num_rows == 4
+    assert tabla.column("bpm").to_pylist() == [60, 61, 62, 63]
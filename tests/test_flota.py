@@ -0,0 +1,79 @@
+import asyncio
+import json
+import httpx
+import numpy as np
+from app.database import SessionLocal
+from app.main import app
+from app.models import Medicion
+from app.utils.flota import ConfigFlota, DestinoMQTT, DestinoREST, Flota, SenalesFlota
+
+def test_senales_plausibles_y_segun_edad():
+    edades = [20] * 2000 + [80] * 2000
+    senales = SenalesFlota(edades, tasa_episodios=60, semilla=1)
+    indices = np.arange(len(edades))
+    for segundo in range(300):
+        valores = senales.avanzar(indices, np.ones(len(edades)), float(segundo))
+    assert (valores[:, 0] >= 70).all() and (valores[:, 0] <= 100).all()
+    assert (valores[:, 2] >= 34).all() and (valores[:, 2] <= 42).all()
+    # La línea base de los jóvenes tiene más pulso que la de los mayores
+    assert senales.base[:2000, 1].mean() > senales.base[2000:, 1].mean()
+
+async def _leer_paquete(lector):
+    tipo = (await lector.readexactly(1))[0]
+    longitud, multiplicador = 0, 1
+    while True:
+        byte = (await lector.readexactly(1))[0]
+        longitud += (byte & 0x7F) * multiplicador
+        multiplicador *= 128
+        if not byte & 0x80:
+            return tipo, await lector.readexactly(longitud)
+
+async def _broker_falso(publicaciones):
+    """Acepta CONNECT y guarda (topic, payload) de cada PUBLISH"""
+    async def atender(lector, escritor):
+        await _leer_paquete(lector)
+        escritor.write(b"\x20\x02\x00\x00")
+        try:
+            while True:
+                tipo, cuerpo = await _leer_paquete(lector)
+                if tipo == 0x30:
+                    largo = int.from_bytes(cuerpo[:2], "big")
+                    publicaciones.append((cuerpo[2:2 + largo].decode(), json.loads(cuerpo[2 + largo:])))
+        except asyncio.IncompleteReadError:
+            pass
+    return await asyncio.start_server(atender, "127.0.0.1", 0)
+
+def test_flota_mqtt_publica_en_el_topic_de_cada_paciente():
+    async def ejecutar():
+        publicaciones = []
+        servidor = await _broker_falso(publicaciones)
+        puerto = servidor.sockets[0].getsockname()[1]
+        pacientes = [(100 + i, 30 + i) for i in range(20)]
+        destino = DestinoMQTT([p for p, _ in pacientes], host="127.0.0.1", port=puerto)
+        stats = await Flota(pacientes, destino, ConfigFlota(
+            frecuencia=20, duracion=0.5, duplicados=0.2, tormenta_cada=0.3, semilla=3)).ejecutar()
+        await asyncio.sleep(0.1)
+        servidor.close()
+        return stats, publicaciones
+    stats, publicaciones = asyncio.run(ejecutar())
+    assert stats.errores == 0 and stats.duplicadas > 0 and stats.tormentas == 1
+    assert len(publicaciones) == stats.enviadas == stats.generadas + stats.duplicadas
+    topic, datos = publicaciones[0]
+    assert topic.endswith("/mediciones") and 100 <= int(topic.split("/")[-2]) < 120
+    assert set(datos) == {"spo2", "bpm", "temperatura", "timestamp"}
+
+def test_flota_rest_envia_lotes_fuera_de_orden_a_la_api():
+    from fastapi.testclient import TestClient
+    ids = [TestClient(app).post("/api/v1/pacientes/", json={
+        "nombre": f"Test Flota {i}", "edad": 40 + i, "genero": "F", "activo": True
+    }).json()["id"] for i in range(3)]
+
+    async def ejecutar():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://flota") as cliente:
+            destino = DestinoREST("http://flota", lote=10, cliente=cliente)
+            return await Flota([(i, 50) for i in ids], destino, ConfigFlota(
+                frecuencia=20, duracion=0.5, desorden=0.3, desorden_max=0.2, semilla=5)).ejecutar()
+    stats = asyncio.run(ejecutar())
+    assert stats.errores == 0 and stats.desordenadas > 0 and stats.peticiones >= 2
+    with SessionLocal() as db:
+        assert db.query(Medicion).filter(Medicion.id_paciente.in_(ids)).count() == stats.enviadas
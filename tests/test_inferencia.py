@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.database import SessionLocal
+from app.main import app
+from app.models import Prediccion
+from app.services.inferencia import CARACTERISTICAS, InferenciaService, ModeloLogistico, modelo_referencia
+
+client = TestClient(app)
+
+def _paciente(nombre, spo2, bpm, temperatura, ahora):
+    paciente_id = client.post("/api/v1/pacientes/", json={
+        "nombre": nombre, "edad": 60, "genero": "F", "activo": True
+    }).json()["id"]
+    lote = [
+        {"id_paciente": paciente_id, "spo2": spo2(i), "bpm": bpm, "temperatura": temperatura,
+         "timestamp": (ahora - timedelta(minutes=5 * (59 - i))).isoformat()}
+        for i in range(60)  # 5 horas, una lectura cada 5 minutos
+    ]
+    assert client.post("/api/v1/mediciones/batch", json=lote).json()["guardadas"] == 60
+    return paciente_id
+
+@pytest.mark.parametrize("fuente", ["crudas", "agregados"])
+def test_caracteristicas_por_fuente(monkeypatch, fuente):
+    monkeypatch.setattr(settings, "predicciones_fuente", fuente)
+    ahora = datetime.now().replace(microsecond=0)
+    paciente_id = _paciente(f"Test Inferencia {fuente}", lambda i: 98 - i * 0.1, 80, 36.8, ahora)
+    with SessionLocal() as db:
+        ids, X = InferenciaService(db).caracteristicas(ahora + timedelta(seconds=1), paciente_ids=[paciente_id])
+    assert ids.tolist() == [paciente_id]
+    fila = dict(zip(CARACTERISTICAS, X[0]))
+    assert fila["spo2_media"] == pytest.approx(95.05, abs=0.05)
+    assert fila["spo2_pendiente"] == pytest.approx(-1.2, abs=0.1)  # -0.1 cada 5 min
+    assert fila["bpm_media"] == 80 and fila["edad"] == 60
+    if fuente == "crudas":
+        assert (fila["spo2_minimo"], fila["spo2_maximo"], fila["spo2_ultima"]) == pytest.approx((92.1, 98, 92.1))
+
+def test_ejecutar_guarda_en_bloque_las_predicciones_relevantes():
+    ahora = datetime.now().replace(microsecond=0)
+    hipoxico = _paciente("Test Hipoxia", lambda i: 89, 78, 36.7, ahora)
+    sano = _paciente("Test Sano", lambda i: 98, 72, 36.7, ahora)
+    with SessionLocal() as db:
+        resultado = InferenciaService(db).ejecutar(ahora + timedelta(seconds=1), paciente_ids=[hipoxico, sano])
+        assert resultado["pacientes"] == 2
+        assert set(resultado["tiempos_ms"]) == {"consulta", "caracteristicas", "inferencia", "escritura"}
+        predicciones = db.query(Prediccion).filter(Prediccion.id_paciente.in_([hipoxico, sano])).all()
+    assert len(predicciones) == resultado["guardadas"]
+    assert {(p.id_paciente, p.enfermedad) for p in predicciones} == {(hipoxico, "Hipoxia")}
+    assert predicciones[0].probabilidad > 0.9
+
+def test_modelo_exportado_a_npz(tmp_path):
+    modelo = modelo_referencia()
+    modelo.guardar(tmp_path / "modelo.npz")
+    cargado = ModeloLogistico.desde_archivo(str(tmp_path / "modelo.npz"))
+    X = np.random.default_rng(0).normal(size=(5, len(CARACTERISTICAS))) + modelo.media
+    assert cargado.clases == modelo.clases
+    np.testing.assert_allclose(cargado.predecir(X), modelo.predecir(X))
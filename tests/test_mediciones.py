@@ -1,5 +1,6 @@
 import pytest
 from fastapi.testclient import TestClient
+from app.core.config import settings
 from app.main import app
 
 client = TestClient(app)
@@ -43,3 +44,107 @@ def test_simular_medicion():
     assert "spo2" in data
     assert "bpm" in data
     assert "temperatura" in data
+
+def test_create_mediciones_batch():
+    paciente_response = client.post("/api/v1/pacientes/", json={
+        "nombre": "Test Paciente Batch",
+        "edad": 50,
+        "genero": "F",
+        "activo": True
+    })
+    paciente_id = paciente_response.json()["id"]
+    
+    response = client.post("/api/v1/mediciones/batch", json=[
+        {"id_paciente": paciente_id, "spo2": 98.0, "bpm": 70, "temperatura": 36.5},
+        {"id_paciente": paciente_id, "spo2": 85.0, "bpm": 130, "temperatura": 39.5,
+         "timestamp": "2024-01-01T10:00:00"},
+        {"id_paciente": paciente_id, "bpm": 70},
+        {"id_paciente": 999999999, "spo2": 98.0, "bpm": 70, "temperatura": 36.5}
+    ])
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 4
+    assert data["guardadas"] == 2
+    assert [r["estado"] for r in data["resultados"]] == ["guardada", "guardada", "rechazada", "rechazada"]
+
+def test_create_mediciones_batch_ndjson():
+    paciente_response = client.post("/api/v1/pacientes/", json={
+        "nombre": "Test Paciente NDJSON",
+        "edad": 45,
+        "genero": "M",
+        "activo": True
+    })
+    paciente_id = paciente_response.json()["id"]
+    
+    lineas = "\n".join(
+        f'{{"id_paciente": {paciente_id}, "spo2": 97.5, "bpm": {60 + i}, "temperatura": 36.7}}'
+        for i in range(10)
+    )
+    response = client.post(
+        "/api/v1/mediciones/batch",
+        content=lineas,
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    assert response.json()["guardadas"] == 10
+
+def test_ultima_medicion_tras_batch():
+    paciente_response = client.post("/api/v1/pacientes/", json={
+        "nombre": "Test Paciente Ultima",
+        "edad": 70,
+        "genero": "F",
+        "activo": True
+    })
+    paciente_id = paciente_response.json()["id"]
+    
+    client.post("/api/v1/mediciones/", json={
+        "id_paciente": paciente_id, "spo2": 97.0, "bpm": 70, "temperatura": 36.5
+    })
+    assert client.get(f"/api/v1/mediciones/paciente/{paciente_id}/ultima").json()["bpm"] == 70
+    
+    client.post("/api/v1/mediciones/batch", json=[
+        {"id_paciente": paciente_id, "spo2": 97.0, "bpm": 80, "temperatura": 36.5,
+         "timestamp": "2099-01-01T00:00:00"}
+    ])
+    assert client.get(f"/api/v1/mediciones/paciente/{paciente_id}/ultima").json()["bpm"] == 80
+
+def test_batch_ndjson_con_linea_ilegible_la_rechaza_sola():
+    paciente_id = client.post("/api/v1/pacientes/", json={
+        "nombre": "Test Paciente NDJSON roto", "edad": 45, "genero": "M", "activo": True
+    }).json()["id"]
+    lineas = "\n".join([
+        f'{{"id_paciente": {paciente_id}, "spo2": 97.5, "bpm": 61, "temperatura": 36.7}}',
+        '{"id_paciente": ',
+        f'{{"id_paciente": {paciente_id}, "spo2": 97.5, "bpm": 62, "temperatura": 36.7}}',
+    ])
+    response = client.post("/api/v1/mediciones/batch", content=lineas,
+                           headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["guardadas"] == 2
+    assert data["resultados"][1]["estado"] == "rechazada"
+    assert data["resultados"][1]["error"].startswith("JSON inválido")
+
+def test_batch_demasiado_grande_se_rechaza_por_content_length(monkeypatch):
+    monkeypatch.setattr(settings, "batch_max_bytes", 100)
+    response = client.post("/api/v1/mediciones/batch", json=[
+        {"id_paciente": 1, "spo2": 97.5, "bpm": 60 + i, "temperatura": 36.7} for i in range(10)
+    ])
+    assert response.status_code == 413
+
+def test_rango_indica_si_se_trunca():
+    paciente_id = client.post("/api/v1/pacientes/", json={
+        "nombre": "Test Paciente Rango", "edad": 45, "genero": "M", "activo": True
+    }).json()["id"]
+    client.post("/api/v1/mediciones/batch", json=[
+        {"id_paciente": paciente_id, "spo2": 97.5, "bpm": 60 + i, "temperatura": 36.7,
+         "timestamp": f"2024-01-01T10:00:0{i}"} for i in range(3)
+    ])
+    url = f"/api/v1/mediciones/paciente/{paciente_id}/rango"
+    rango = {"start_date": "2024-01-01 00:00:00", "end_date": "2024-01-02 00:00:00"}
+    response = client.get(url, params={**rango, "limit": 2})
+    assert [m["bpm"] for m in response.json()] == [62, 61]
+    assert response.headers["x-truncado"] == "true"
+    response = client.get(url, params={**rango, "limit": 3})
+    assert len(response.json()) == 3
+    assert "x-truncado" not in response.headers
@@ -0,0 +1,74 @@
+import threading
+from datetime import datetime
+from fastapi.testclient import TestClient
+from app.core.metricas import RegistroMetricas
+from app.main import app
+from app.mqtt.ingesta import ColaIngesta
+from app.schemas.medicion import MedicionCreate
+
+client = TestClient(app)
+
+def test_histograma_acumula_cubetas_y_contadores_por_hilo():
+    registro = RegistroMetricas()
+    histograma = registro.histograma("prueba_segundos", "Prueba", limites=(0.1, 1.0))
+    contador = registro.contador("prueba_total", "Prueba", ("tipo",))
+    for valor in (0.05, 0.5, 0.5, 3.0):
+        histograma.observar(valor)
+
+    def sumar():
+        for _ in range(10000):
+            contador.con("a").incrementar()
+
+    hilos = [threading.Thread(target=sumar) for _ in range(4)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    texto = registro.exponer()
+    assert 'prueba_segundos_bucket{le="0.1"} 1' in texto
+    assert 'prueba_segundos_bucket{le="1"} 3' in texto
+    assert 'prueba_segundos_bucket{le="+Inf"} 4' in texto
+    assert "prueba_segundos_sum 4.05" in texto
+    assert 'prueba_total{tipo="a"} 40000' in texto
+
+def test_metrics_expone_rutas_y_metodos_de_servicio():
+    paciente_id = client.post("/api/v1/pacientes/", json={
+        "nombre": "Test Métricas", "edad": 60, "genero": "F", "activo": True
+    }).json()["id"]
+    client.get(f"/api/v1/pacientes/{paciente_id}")
+    client.get("/api/v1/pacientes/999999")
+
+    respuesta = client.get("/metrics")
+    assert respuesta.status_code == 200
+    assert respuesta.headers["content-type"].startswith("text/plain")
+    texto = respuesta.text
+    assert 'monitoreo_http_peticiones_total{metodo="GET",ruta="/api/v1/pacientes/{paciente_id}",codigo="404"}' in texto
+    assert 'monitoreo_http_duracion_segundos_count{metodo="POST",ruta="/api/v1/pacientes/"}' in texto
+    assert 'monitoreo_servicio_duracion_segundos_count{metodo="PacienteService.create"}' in texto
+    assert "monitoreo_cache_consultas_total" in texto
+
+def _valor(texto, serie):
+    for linea in texto.splitlines():
+        if linea.startswith(serie + " "):
+            return float(linea.split()[-1])
+    return 0.0
+
+def test_lote_mqtt_cuenta_persistidos_y_retraso():
+    paciente_id = client.post("/api/v1/pacientes/", json={
+        "nombre": "Test Métricas MQTT", "edad": 60, "genero": "F", "activo": True
+    }).json()["id"]
+    antes = client.get("/metrics").text
+    cola = ColaIngesta(cola_max=100, lote_max=50, lote_intervalo=0.05)
+    cola.iniciar()
+    for _ in range(5):
+        cola.encolar(MedicionCreate(id_paciente=paciente_id, spo2=97, bpm=72, temperatura=36.6,
+                                    timestamp=datetime.now()))
+    cola.detener()
+
+    assert (cola.lotes_escritos, cola.filas_escritas, cola.filas_fallidas) == (1, 5, 0)
+    despues = client.get("/metrics").text
+    persistido = 'monitoreo_mqtt_mensajes_total{resultado="persistido"}'
+    assert _valor(despues, persistido) - _valor(antes, persistido) == 5
+    retraso = "monitoreo_ingesta_retraso_segundos_count"
+    assert _valor(despues, retraso) - _valor(antes, retraso) == 5
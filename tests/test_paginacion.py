@@ -0,0 +1,53 @@
+from datetime import datetime
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import mysql
+from app.core.paginacion import condicion_cursor
+from app.main import app
+from app.models.medicion import Medicion
+
+client = TestClient(app)
+
+def test_paginacion_por_cursor_mediciones():
+    paciente_response = client.post("/api/v1/pacientes/", json={
+        "nombre": "Test Paciente Cursor",
+        "edad": 60,
+        "genero": "M",
+        "activo": True
+    })
+    paciente_id = paciente_response.json()["id"]
+    client.post("/api/v1/mediciones/batch", json=[
+        {"id_paciente": paciente_id, "spo2": 97.0, "bpm": 60 + i, "temperatura": 36.5,
+         "timestamp": f"2024-01-01T10:00:{i:02d}"}
+        for i in range(25)
+    ])
+    
+    url = f"/api/v1/mediciones/paciente/{paciente_id}/pagina"
+    vistos = []
+    cursor = None
+    while True:
+        params = {"limit": 10}
+        if cursor:
+            params["after"] = cursor
+        data = client.get(url, params=params).json()
+        vistos.extend(m["bpm"] for m in data["items"])
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+    assert vistos == list(range(84, 59, -1))
+    
+    # Volver atrás desde la última página
+    data = client.get(url, params={"limit": 10, "before": data["prev_cursor"]}).json()
+    assert [m["bpm"] for m in data["items"]] == list(range(74, 64, -1))
+
+def test_cursor_invalido():
+    response = client.get("/api/v1/pacientes/pagina", params={"after": "no-es-un-cursor"})
+    assert response.status_code == 400
+
+def test_condicion_cursor_sin_comparacion_de_filas():
+    columnas = (Medicion.timestamp, Medicion.id)
+    condicion = condicion_cursor(columnas, (datetime(2024, 1, 1), 10), descendente=True)
+    sql = str(condicion.compile(dialect=mysql.dialect())).replace("\n", " ")
+    assert sql == (
+        "mediciones.timestamp <= %s AND (mediciones.timestamp < %s"
+        " OR mediciones.timestamp = %s AND mediciones.id < %s)"
+    )
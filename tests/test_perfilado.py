@@ -0,0 +1,53 @@
+import time
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.core.perfilado import _antes_de_ejecutar, normalizar_sql, perfilador
+from app.database import SessionLocal, engine
+from app.main import app
+from app.models import Paciente
+
+client = TestClient(app)
+
+def _trabajo_lento(segundos: float):
+    fin = time.perf_counter() + segundos
+    while time.perf_counter() < fin:
+        pass
+
+def test_normalizar_sql_agrupa_listas_de_parametros():
+    assert normalizar_sql("SELECT * FROM t WHERE id IN (?, ?, ?)") == "SELECT * FROM t WHERE id IN (?)"
+    assert normalizar_sql("INSERT INTO t (a, b) VALUES (?, ?), (?, ?)") == "INSERT INTO t (a, b) VALUES (?)"
+
+def test_perfilado_bajo_demanda_con_n_mas_1_y_pilas():
+    paciente_id = client.post("/api/v1/pacientes/", json={
+        "nombre": "Test Perfilado", "edad": 70, "genero": "M", "activo": True
+    }).json()["id"]
+    assert not event.contains(engine, "before_cursor_execute", _antes_de_ejecutar)
+
+    estado = client.post("/api/v1/sistema/perfilado", params={"activo": True, "muestreo": 1}).json()
+    try:
+        assert estado["activo"] is True
+        assert event.contains(engine, "before_cursor_execute", _antes_de_ejecutar)
+        client.post("/api/v1/mediciones/", json={
+            "id_paciente": paciente_id, "spo2": 97, "bpm": 70, "temperatura": 36.6
+        })
+        with perfilador.perfilar("prueba:n+1"):
+            with SessionLocal() as db:
+                for _ in range(perfilador.umbral_n_mas_1):
+                    db.get(Paciente, paciente_id)
+                    db.expire_all()
+            _trabajo_lento(0.1)
+
+        estado = client.get("/api/v1/sistema/perfilado").json()
+        nombres = {perfil["nombre"]: perfil for perfil in estado["peores"]}
+        assert nombres["POST /api/v1/mediciones/"]["consultas"] > 0
+        prueba = nombres["prueba:n+1"]
+        assert prueba["n_mas_1"][0]["veces"] == perfilador.umbral_n_mas_1
+        assert prueba["muestras"] > 0
+
+        pilas = client.get("/api/v1/sistema/perfilado/flamegraph", params={"perfil_id": prueba["id"]}).text
+        assert "_trabajo_lento" in pilas
+        pila, muestras = pilas.splitlines()[0].rsplit(" ", 1)
+        assert int(muestras) > 0 and ";" in pila
+    finally:
+        client.post("/api/v1/sistema/perfilado", params={"activo": False})
+    assert not event.contains(engine, "before_cursor_execute", _antes_de_ejecutar)
@@ -0,0 +1,32 @@
+import sqlite3
+
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.core.pool import QueuePoolMedido
+
+
+def _pool():
+    return QueuePoolMedido(lambda: sqlite3.connect(":memory:"), pool_size=1, max_overflow=0, timeout=0.05)
+
+
+def test_pool_cuenta_checkouts_y_utilizacion():
+    pool = _pool()
+    conexion = pool.connect()
+    stats = pool.estadisticas()
+    assert stats["checkouts"] == 1
+    assert stats["en_uso"] == 1
+    assert stats["utilizacion"] == 1.0
+    conexion.close()
+    assert pool.estadisticas()["en_uso"] == 0
+
+
+def test_pool_registra_timeouts_y_espera():
+    pool = _pool()
+    conexion = pool.connect()
+    with pytest.raises(PoolTimeoutError):
+        pool.connect()
+    conexion.close()
+    stats = pool.estadisticas()
+    assert stats["timeouts"] == 1
+    assert stats["espera_max_ms"] >= 0
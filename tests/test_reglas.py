@@ -0,0 +1,30 @@
+from app.services.reglas import MotorReglas, ReglaAlerta, motor_reglas, VERDE, AMARILLA, ROJA
+
+def test_evaluar_lote():
+    severidades, mensajes = motor_reglas.evaluar(
+        [98.0, 93.0, 85.0, 92.0],
+        [72, 72, 130, 105],
+        [36.8, 36.8, 39.5, 36.8]
+    )
+    assert severidades.tolist() == [VERDE, AMARILLA, ROJA, AMARILLA]
+    assert mensajes[0] == "Signos vitales normales"
+    assert mensajes[1] == "SpO2 bajo"
+    assert mensajes[2] == "SpO2 críticamente bajo; Ritmo cardíaco anormal; Temperatura crítica"
+    assert mensajes[3] == "SpO2 bajo; Ritmo cardíaco irregular"
+
+def test_evaluar_una_coincide_con_lote():
+    lecturas = [(98.0, 72, 36.8), (89.9, 55, 38.5), (96.0, 49, 34.9), (94.99, 101, 35.99)]
+    severidades, mensajes = motor_reglas.evaluar(*zip(*lecturas))
+    for lectura, severidad, mensaje in zip(lecturas, severidades.tolist(), mensajes):
+        assert motor_reglas.evaluar_una(*lectura) == (severidad, mensaje)
+
+def test_reglas_por_edad_y_plantillas():
+    motor = MotorReglas([
+        ReglaAlerta("bpm", ROJA, 40, 130, "BPM crítico: {valor:.0f}"),
+        ReglaAlerta("bpm", AMARILLA, 55, 95, "BPM alto para la edad", edad_min=60),
+    ])
+    severidades, mensajes = motor.evaluar([98, 98, 98], [140, 100, 100], [36.5, 36.5, 36.5], edades=[70, 70, 30])
+    assert severidades.tolist() == [ROJA, AMARILLA, VERDE]
+    assert mensajes[0] == "BPM crítico: 140"
+    # Sin edad conocida las reglas por banda de edad no aplican
+    assert motor.evaluar_una(98, 100, 36.5) == (VERDE, "Signos vitales normales")
@@ -0,0 +1,36 @@
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.main import app
+
+client = TestClient(app)
+
+def _listados(paciente_id):
+    return [
+        f"/api/v1/mediciones/paciente/{paciente_id}?limit=20",
+        f"/api/v1/mediciones/paciente/{paciente_id}/rango?start_date=2024-06-01T00:00:00&end_date=2024-06-02T00:00:00",
+        f"/api/v1/alertas/paciente/{paciente_id}",
+        "/api/v1/alertas/activas",
+        "/api/v1/pacientes/?limit=500",
+        "/api/v1/pacientes/activos",
+    ]
+
+def test_lectura_rapida_produce_el_mismo_json(monkeypatch):
+    paciente_id = client.post("/api/v1/pacientes/", json={
+        "nombre": "Test Lectura Rápida", "edad": 70, "genero": "F", "activo": True
+    }).json()["id"]
+    client.post("/api/v1/mediciones/batch", json=[
+        {"id_paciente": paciente_id, "spo2": 88 + i % 10, "bpm": 55 + i, "temperatura": 36.45,
+         "timestamp": f"2024-06-01T10:{i:02d}:30"}
+        for i in range(30)
+    ])
+    rapidas = [client.get(url).json() for url in _listados(paciente_id)]
+    assert len(rapidas[0]) == 20
+
+    monkeypatch.setattr(settings, "lectura_rapida", False)
+    lentas = [client.get(url).json() for url in _listados(paciente_id)]
+    assert rapidas == lentas
+
+def test_lectura_rapida_conserva_el_esquema_openapi():
+    esquema = app.openapi()["paths"]["/api/v1/mediciones/paciente/{paciente_id}"]["get"]
+    contenido = esquema["responses"]["200"]["content"]["application/json"]["schema"]
+    assert contenido["items"]["$ref"].endswith("/MedicionResponse")
@@ -0,0 +1,56 @@
+import json
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.database import SessionLocal
+from app.main import app
+from app.models import Medicion, MedicionAgregada
+from app.services.retencion import RetencionService, periodos
+
+client = TestClient(app)
+
+def test_periodos_mensuales_y_diarios():
+    meses = periodos(datetime(2023, 12, 20), datetime(2024, 2, 1), "mes")
+    assert [p.nombre for p in meses] == ["p202312", "p202401"]
+    assert meses[1].hasta == datetime(2024, 2, 1)
+    dias = periodos(datetime(2024, 2, 28, 13), datetime(2024, 3, 1, 1), "dia")
+    assert [p.nombre for p in dias] == ["p20240228", "p20240229", "p20240301"]
+
+def test_retencion_consolida_archiva_y_elimina_periodos_caducados(monkeypatch, tmp_path):
+    paciente_id = client.post("/api/v1/pacientes/", json={
+        "nombre": "Test Retención", "edad": 50, "genero": "F", "activo": True
+    }).json()["id"]
+    # Sin agregados en la ingesta: la retención debe consolidarlos antes de borrar
+    monkeypatch.setattr(settings, "agregados_activos", False)
+    lote = [
+        {"id_paciente": paciente_id, "spo2": 97, "bpm": 70, "temperatura": 36.6,
+         "timestamp": (datetime(2020, mes, 10) + timedelta(hours=i)).isoformat()}
+        for mes in (1, 2, 3) for i in range(10)
+    ]
+    assert client.post("/api/v1/mediciones/batch", json=lote).json()["guardadas"] == 30
+
+    monkeypatch.setattr(settings, "retencion_mediciones_dias", 30)
+    monkeypatch.setattr(settings, "particion_periodo", "mes")
+    monkeypatch.setattr(settings, "retencion_archivo_dir", str(tmp_path))
+    monkeypatch.setattr(settings, "retencion_archivo_formato", "ndjson")
+    monkeypatch.setattr(settings, "retencion_filas_por_borrado", 4)
+
+    with SessionLocal() as db:
+        resumen = RetencionService(db).aplicar(ahora=datetime(2020, 3, 15))["mediciones"]
+        assert resumen["particiones"] == ["p202001"]
+        assert resumen["filas"] == 10
+
+        restantes = db.query(Medicion.timestamp).filter(Medicion.id_paciente == paciente_id).all()
+        assert len(restantes) == 20 and min(r.timestamp for r in restantes) >= datetime(2020, 2, 1)
+        enero = db.query(MedicionAgregada).filter(
+            MedicionAgregada.id_paciente == paciente_id, MedicionAgregada.resolucion == "dia"
+        ).all()
+        assert [(a.inicio, a.n) for a in enero] == [(datetime(2020, 1, 10), 10)]
+
+    with open(tmp_path / "mediciones_p202001.ndjson") as archivo:
+        archivadas = [json.loads(linea) for linea in archivo]
+    assert len(archivadas) == 10 and {a["id_paciente"] for a in archivadas} == {paciente_id}
+
+def test_estado_retencion():
+    estado = client.get("/api/v1/sistema/retencion").json()
+    assert estado["periodo"] in ("mes", "dia")
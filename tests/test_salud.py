@@ -0,0 +1,60 @@
+import asyncio
+import time
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.main import app
+from app.services.salud import MonitorSalud, monitor_salud
+
+client = TestClient(app)
+
+def test_health_responde_con_la_hora_actual():
+    respuesta = client.get("/health")
+    assert respuesta.status_code == 200
+    assert respuesta.json()["timestamp"][:4] != "2024"
+
+def test_ready_refleja_los_presupuestos(monkeypatch):
+    # Sin comprobaciones /ready no comprueba en línea
+    monkeypatch.setattr(monitor_salud, "_comprobado", 0.0)
+    respuesta = client.get("/ready")
+    assert respuesta.status_code == 503 and respuesta.json()["motivo"] == "sin comprobar"
+
+    monitor_salud.comprobar()
+    respuesta = client.get("/ready")
+    assert respuesta.status_code == 200
+    datos = respuesta.json()
+    assert datos["listo"] is True
+    assert set(datos["comprobaciones"]) == {"base_datos", "pool", "mqtt", "ingesta", "bucle_eventos"}
+
+    # Un presupuesto imposible deja la instancia fuera de servicio en la siguiente comprobación
+    monkeypatch.setattr(settings, "salud_ping_max_ms", 0)
+    monitor_salud.comprobar()
+    respuesta = client.get("/ready")
+    assert respuesta.status_code == 503
+    assert respuesta.json()["comprobaciones"]["base_datos"]["ok"] is False
+
+def test_mqtt_obligatorio_sin_conexion(monkeypatch):
+    monkeypatch.setattr(settings, "salud_mqtt_obligatorio", True)
+    monitor = MonitorSalud(intervalo=0)
+    monitor.comprobar()
+    assert monitor.listo is False and monitor.comprobaciones["mqtt"]["conectado"] is False
+
+def test_retraso_del_bucle_y_resultado_caducado():
+    monitor = MonitorSalud(intervalo=60, periodo_bucle=0.05)
+
+    async def bloquear():
+        tarea = asyncio.get_running_loop().create_task(monitor.vigilar_bucle())
+        await asyncio.sleep(0.1)
+        time.sleep(0.3)  # bloquea el bucle
+        await asyncio.sleep(0.1)
+        tarea.cancel()
+
+    asyncio.run(bloquear())
+    monitor.comprobar()
+    assert monitor.comprobaciones["bucle_eventos"]["lag_ms"] >= 200
+    assert monitor.respuesta()[0] == 503
+
+    # Comprobaciones atascadas: el último resultado deja de servirse
+    monitor.comprobar()
+    monitor._comprobado -= 1000
+    codigo, cuerpo = monitor.respuesta()
+    assert codigo == 503 and b"sin actualizar" in cuerpo
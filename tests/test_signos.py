@@ -0,0 +1,61 @@
+import pytest
+from decimal import Decimal
+from fastapi.testclient import TestClient
+from app.core import migraciones
+from app.core.config import settings
+from app.database import SignoVital, engine
+from app.main import app
+from app.schemas.medicion import MedicionCreate
+
+client = TestClient(app)
+
+@pytest.mark.parametrize("modo", ["entero", "real", "decimal"])
+def test_signo_vital_ida_y_vuelta(modo):
+    tipo = SignoVital(5, 2, modo=modo).dialect_impl(engine.dialect)
+    guardar = tipo.bind_processor(engine.dialect) or (lambda v: v)
+    leer = tipo.result_processor(engine.dialect, None) or (lambda v: v)
+    guardado = guardar(98.55)
+    if modo == "entero":
+        assert guardado == 9855
+    assert leer(guardado) == 98.55
+
+def test_esquema_acepta_numero_cadena_y_rechaza_nan():
+    m = MedicionCreate(id_paciente=1, spo2="97.5", bpm=70, temperatura=Decimal("36.45"))
+    assert (m.spo2, m.temperatura) == (97.5, 36.45)
+    with pytest.raises(ValueError):
+        MedicionCreate(id_paciente=1, spo2="nan", bpm=70, temperatura=36.5)
+
+def test_api_mantiene_signos_como_cadena_con_dos_decimales():
+    paciente_id = client.post("/api/v1/pacientes/", json={
+        "nombre": "Test Signos", "edad": 40, "genero": "M", "activo": True
+    }).json()["id"]
+    creada = client.post("/api/v1/mediciones/", json={
+        "id_paciente": paciente_id, "spo2": 98.5, "bpm": 72, "temperatura": 36.7
+    }).json()
+    assert (creada["spo2"], creada["temperatura"]) == ("98.50", "36.70")
+    listado = client.get(f"/api/v1/mediciones/paciente/{paciente_id}").json()
+    assert (listado[0]["spo2"], listado[0]["temperatura"]) == ("98.50", "36.70")
+
+def test_signos_fuera_de_rango_se_rechazan_por_elemento():
+    paciente_id = client.post("/api/v1/pacientes/", json={
+        "nombre": "Test Signos fuera de rango", "edad": 40, "genero": "M", "activo": True
+    }).json()["id"]
+    # 400 no cabe en SMALLINT x100: no debe llegar a la base de datos
+    assert client.post("/api/v1/mediciones/", json={
+        "id_paciente": paciente_id, "spo2": 400, "bpm": 72, "temperatura": 36.7
+    }).status_code == 422
+    data = client.post("/api/v1/mediciones/batch", json=[
+        {"id_paciente": paciente_id, "spo2": 97, "bpm": 72, "temperatura": 36.7},
+        {"id_paciente": paciente_id, "spo2": 97, "bpm": 72, "temperatura": 400},
+    ]).json()
+    assert (data["guardadas"], data["rechazadas"]) == (1, 1)
+    assert data["resultados"][1]["estado"] == "rechazada"
+
+def test_modo_de_signos_debe_coincidir_con_el_esquema(monkeypatch):
+    modo = migraciones.modo_signos(engine)
+    assert modo == settings.signos_almacenamiento
+    migraciones.verificar_signos(engine)
+    otro = "real" if modo != "real" else "entero"
+    monkeypatch.setattr(settings, "signos_almacenamiento", otro)
+    with pytest.raises(RuntimeError, match="SIGNOS_ALMACENAMIENTO"):
+        migraciones.verificar_signos(engine)
@@ -0,0 +1,49 @@
+import threading
+from app.core.config import settings
+from app.core.tareas import TareaPeriodica
+from app.services.inferencia import TareaPredicciones
+
+class TareaContador(TareaPeriodica):
+    nombre = "contador"
+
+    def __init__(self, intervalo, fallar=False):
+        super().__init__(intervalo)
+        self.fallar = fallar
+        self.pasadas = threading.Semaphore(0)
+
+    def _pasada(self):
+        self.pasadas.release()
+        if self.fallar:
+            raise RuntimeError("fallo")
+        return "ok"
+
+def test_primera_pasada_al_arrancar_y_errores_contados():
+    tarea = TareaContador(intervalo=60, fallar=True)
+    tarea.iniciar()
+    try:
+        assert tarea.pasadas.acquire(timeout=5)
+        assert tarea.activa
+    finally:
+        tarea.detener()
+    stats = tarea.estadisticas()
+    assert not stats["activa"]
+    assert (stats["ejecuciones"], stats["errores"], stats["ultimo_error"]) == (1, 1, "fallo")
+
+def test_tarea_no_inmediata_y_desactivada():
+    tarea = TareaContador(intervalo=60)
+    tarea.inmediata = False
+    tarea.iniciar()
+    tarea.detener()
+    assert tarea.ejecuciones == 0
+
+    desactivada = TareaContador(intervalo=0)
+    desactivada.iniciar()
+    assert not desactivada.activa
+    assert desactivada.ejecutar_ahora() == "ok" and desactivada.ejecuciones == 1
+
+def test_predicciones_solo_periodicas_con_modelo(monkeypatch):
+    monkeypatch.setattr(settings, "predicciones_modelo_archivo", None)
+    assert TareaPredicciones(None).intervalo == 0
+    monkeypatch.setattr(settings, "predicciones_modelo_archivo", "modelo.npz")
+    assert TareaPredicciones(None).intervalo == 3600
+    assert TareaPredicciones(120).intervalo == 120
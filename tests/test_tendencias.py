@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta
+import numpy as np
+from app.schemas.alerta import AlertaCreate
+from app.schemas.medicion import MedicionCreate
+from app.services.tendencias import DetectorTendencias
+
+def _normales(rng, n):
+    return np.column_stack([rng.normal(97, 0.8, n), rng.normal(75, 4, n), rng.normal(36.8, 0.15, n)])
+
+def test_sin_alertas_con_signos_estables():
+    rng = np.random.default_rng(1)
+    detector = DetectorTendencias(ventana=120, sostenida=60, capacidad=4)
+    ids = list(range(500))
+    alertas = 0
+    for segundo in range(300):
+        mensajes = detector.observar(ids, _normales(rng, len(ids)), np.full(len(ids), float(segundo)))
+        alertas += sum(m is not None for m in mensajes)
+    assert alertas == 0
+    assert detector.estadisticas()["pacientes"] == 500
+
+def test_descenso_sostenido_de_spo2_alerta_una_vez():
+    rng = np.random.default_rng(2)
+    detector = DetectorTendencias(ventana=120, sostenida=60)
+    mensajes = []
+    for segundo in range(600):
+        valores = _normales(rng, 1)
+        if segundo >= 300:
+            valores[0, 0] -= (segundo - 300) / 30  # -2 % por minuto
+        mensajes.append(detector.observar([7], valores, [float(segundo)])[0])
+    disparos = [i for i, m in enumerate(mensajes) if m]
+    assert len(disparos) == 1 and 360 <= disparos[0] < 450
+    assert "SpO2 en descenso" in mensajes[disparos[0]]
+    assert detector.estado(7)["spo2"]["pendiente_hora"] < -60
+
+def test_lote_equivale_a_lecturas_sueltas():
+    rng = np.random.default_rng(3)
+    ids = [1, 2, 1, 3, 1, 2] * 50
+    valores = _normales(rng, len(ids))
+    valores[:, 1] += np.arange(len(ids)) * 0.5  # pulso en ascenso
+    tiempos = np.arange(len(ids), dtype=float)
+    en_lote, sueltas = (DetectorTendencias(ventana=60, sostenida=10) for _ in range(2))
+    lote = en_lote.observar(ids, valores, tiempos)
+    una_a_una = [sueltas.observar([p], valores[i:i + 1], tiempos[i:i + 1])[0] for i, p in enumerate(ids)]
+    assert lote == una_a_una and any(lote)
+    assert en_lote.estado(1) == sueltas.estado(1)
+
+def test_aplicar_eleva_la_alerta_verde():
+    detector = DetectorTendencias(ventana=60, lecturas=3, sostenida=5, calentamiento=5)
+    inicio = datetime(2024, 1, 1)
+    mediciones = [
+        MedicionCreate(id_paciente=1, spo2=97, bpm=70 + (i - 60 if i >= 60 else 0), temperatura=36.8,
+                       timestamp=inicio + timedelta(seconds=i))
+        for i in range(120)
+    ]
+    alertas = [AlertaCreate(id_paciente=1, tipo="verde", mensaje="Signos vitales normales") for _ in mediciones]
+    detector.aplicar(mediciones, alertas)
+    elevadas = [a for a in alertas if a.tipo == "amarilla"]
+    assert len(elevadas) == 1 and elevadas[0].mensaje.startswith("Tendencia: Ritmo cardíaco en ascenso")
+
+def _mediciones(paciente_id, inicio, n, desde=0):
+    return [MedicionCreate(id_paciente=paciente_id, spo2=97, bpm=70 + max(i + desde - 60, 0), temperatura=36.8,
+                           timestamp=inicio + timedelta(seconds=i + desde)) for i in range(n)]
+
+def _verdes(mediciones):
+    return [AlertaCreate(id_paciente=m.id_paciente, tipo="verde", mensaje="Signos vitales normales") for m in mediciones]
+
+def test_evaluar_no_cambia_el_estado_hasta_confirmar():
+    inicio = datetime(2024, 1, 1)
+    mediciones = _mediciones(1, inicio, 120)
+    evaluado, referencia = (DetectorTendencias(ventana=60, lecturas=3, sostenida=5, calentamiento=5) for _ in range(2))
+    referencia.aplicar(mediciones, _verdes(mediciones))
+
+    # Un lote que falla y se reintenta: la alerta del episodio sale en el reintento
+    for _ in range(2):
+        alertas, observacion = evaluado.evaluar(mediciones, _verdes(mediciones))
+        assert evaluado.estado(1) is None
+        assert sum(a.tipo == "amarilla" for a in alertas) == 1
+    evaluado.confirmar(observacion)
+    assert evaluado.estado(1) == referencia.estado(1)
+    assert evaluado.estadisticas()["alertas_emitidas"] == 1
+
+def test_confirmaciones_concurrentes_no_pierden_lecturas():
+    inicio = datetime(2024, 1, 1)
+    primero, segundo = _mediciones(1, inicio, 50), _mediciones(1, inicio, 50, desde=50)
+    detector, referencia = (DetectorTendencias(ventana=60) for _ in range(2))
+    referencia.observar([1] * 100, [(97, 70 + max(i - 60, 0), 36.8) for i in range(100)],
+                        [(inicio + timedelta(seconds=i)).timestamp() for i in range(100)])
+    _, a = detector.evaluar(primero, _verdes(primero))
+    _, b = detector.evaluar(segundo, _verdes(segundo))
+    detector.confirmar(a)
+    detector.confirmar(b)
+    assert detector.estado(1)["lecturas"] == 100
+    assert detector.estado(1) == referencia.estado(1)
+
+def test_filas_de_pacientes_inactivos_o_borrados_se_reutilizan():
+    detector = DetectorTendencias(capacidad=2, inactividad=3600)
+    ahora = datetime.now().timestamp()
+    detector.observar([1, 2], _normales(np.random.default_rng(4), 2), [ahora, ahora])
+    detector.invalidar(1)
+    detector.observar([3], _normales(np.random.default_rng(5), 1), [ahora])
+    assert detector.estadisticas()["pacientes"] == 2 and len(detector._n) == 2
+
+    detector._visto[:] -= 7200
+    detector.observar([4, 5], _normales(np.random.default_rng(6), 2), [ahora, ahora])
+    assert detector.estado(2) is None and detector.estado(4) is not None
+    assert len(detector._n) == 2
@@ -0,0 +1,63 @@
+import asyncio
+import json
+from fastapi.testclient import TestClient
+from app.core.eventos import CERRADA, HubEventos
+from app.main import app
+
+client = TestClient(app)
+
+def _paciente(nombre):
+    return client.post("/api/v1/pacientes/", json={
+        "nombre": nombre, "edad": 50, "genero": "F", "activo": True
+    }).json()["id"]
+
+def test_websocket_recibe_mediciones_y_alertas_del_paciente():
+    paciente_id = _paciente("Test Tiempo Real")
+    otro_id = _paciente("Test Tiempo Real Otro")
+    with client.websocket_connect(f"/api/v1/tiempo-real/ws?paciente_id={paciente_id}") as ws:
+        # Una medición de otro paciente no debe llegar a esta suscripción
+        client.post("/api/v1/mediciones/", json={"id_paciente": otro_id, "spo2": 98, "bpm": 70, "temperatura": 36.5})
+        client.post("/api/v1/mediciones/", json={"id_paciente": paciente_id, "spo2": 85, "bpm": 72, "temperatura": 36.8})
+        medicion = json.loads(ws.receive_text())
+        alerta = json.loads(ws.receive_text())
+    assert medicion["tipo"] == "medicion"
+    assert medicion["datos"]["id_paciente"] == paciente_id
+    assert alerta["tipo"] == "alerta"
+    assert alerta["datos"]["tipo"] == "roja"
+
+def test_websocket_de_sala_recibe_lotes():
+    paciente_id = _paciente("Test Tiempo Real Sala")
+    with client.websocket_connect("/api/v1/tiempo-real/ws") as ws:
+        client.post("/api/v1/mediciones/batch", json=[
+            {"id_paciente": paciente_id, "spo2": 98, "bpm": 70 + i, "temperatura": 36.5} for i in range(3)
+        ])
+        eventos = [json.loads(ws.receive_text()) for _ in range(4)]
+        client.post("/api/v1/mediciones/", json={"id_paciente": paciente_id, "spo2": 85, "bpm": 73, "temperatura": 36.5})
+        individuales = [json.loads(ws.receive_text()) for _ in range(2)]
+    assert [e["datos"]["bpm"] for e in eventos[:3]] == [70, 71, 72]
+    # Los eventos del lote llevan el id guardado y el mismo formato que los individuales
+    guardadas = client.get(f"/api/v1/mediciones/paciente/{paciente_id}").json()
+    ids = {m["bpm"]: m["id"] for m in guardadas}
+    assert [e["datos"]["id"] for e in eventos[:3]] == [ids[70], ids[71], ids[72]]
+    alertas = client.get(f"/api/v1/alertas/paciente/{paciente_id}").json()
+    assert eventos[3]["tipo"] == "alerta"
+    assert eventos[3]["datos"]["id"] in [a["id"] for a in alertas]
+    assert set(eventos[0]["datos"]) == set(individuales[0]["datos"])
+    assert set(eventos[3]["datos"]) == set(individuales[1]["datos"])
+
+def test_hub_descarta_consumidores_lentos():
+    async def escenario():
+        hub = HubEventos(cola_max=2, max_suscriptores=1)
+        suscripcion = hub.suscribir([1])
+        assert hub.suscribir([1]) is None
+        for i in range(3):
+            hub.publicar("medicion", 1, {"bpm": i})
+        await asyncio.sleep(0)
+        return hub, await suscripcion.siguiente(1)
+
+    hub, mensaje = asyncio.run(escenario())
+    assert mensaje is CERRADA
+    stats = hub.estadisticas()
+    assert stats["suscriptores"] == 0
+    assert stats["descartados_lentos"] == 1
+    assert stats["rechazados"] == 1
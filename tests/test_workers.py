@@ -0,0 +1,116 @@
+import asyncio
+import time
+from datetime import datetime
+from app.core import eventos
+from app.core.bus import Bus, BusUnix, Repetidor, bus as bus_proceso
+from app.core.cache import CacheUltimaMedicion
+from app.core.eventos import HubEventos
+from app.mqtt.lider import LiderIngesta
+from app.schemas.alerta import AlertaCreate
+from app.schemas.medicion import MedicionResponse
+from app.services import estado_alertas as modulo_estado
+from app.services.estado_alertas import EstadoAlertas, estado_alertas
+
+def _esperar(condicion, timeout=5.0):
+    limite = time.monotonic() + timeout
+    while not condicion():
+        assert time.monotonic() < limite, "tiempo de espera agotado"
+        time.sleep(0.01)
+
+class BusMemoria(Bus):
+    """Bus distribuido que solo guarda lo publicado"""
+    distribuido = True
+
+    def __init__(self):
+        super().__init__()
+        self.publicados = []
+
+    def publicar(self, canal, datos):
+        self.publicados.append((canal, datos))
+
+def test_bus_unix_reparte_entre_procesos_sin_eco(tmp_path):
+    repetidor = Repetidor(str(tmp_path / "bus.sock"))
+    repetidor.iniciar()
+    a, b = BusUnix(repetidor.ruta), BusUnix(repetidor.ruta)
+    recibidos = {"a": [], "b": []}
+    a.suscribir("eventos", recibidos["a"].append)
+    b.suscribir("eventos", recibidos["b"].append)
+    try:
+        a.iniciar()
+        b.iniciar()
+        _esperar(lambda: a.conectado and b.conectado and len(repetidor._conexiones) == 2)
+        for i in range(100):
+            a.publicar("eventos", {"i": i})
+        _esperar(lambda: len(recibidos["b"]) == 100)
+        assert recibidos["b"][-1] == {"i": 99}
+        assert recibidos["a"] == []
+    finally:
+        a.detener()
+        b.detener()
+        repetidor.detener()
+
+def test_cache_remota_solo_actualiza_pacientes_presentes():
+    cache = CacheUltimaMedicion(max_pacientes=10, ttl=60)
+    cache.actualizar(MedicionResponse(id=1, id_paciente=1, spo2=98, bpm=70, temperatura=36.5,
+                                      timestamp=datetime(2024, 1, 1, 10)))
+    cache.actualizar_presentes([
+        MedicionResponse(id=5, id_paciente=1, spo2=97, bpm=72, temperatura=36.6, timestamp=datetime(2024, 1, 1, 11)),
+        MedicionResponse(id=6, id_paciente=2, spo2=97, bpm=72, temperatura=36.6, timestamp=datetime(2024, 1, 1, 11)),
+    ])
+    assert cache.obtener(1).id == 5
+    assert cache.obtener(2) is None
+
+def test_estado_de_alertas_se_difunde_entre_workers(monkeypatch):
+    bus = BusMemoria()
+    monkeypatch.setattr(modulo_estado, "bus", bus)
+    estado = EstadoAlertas(solo_transiciones=True)
+    estado.confirmar([AlertaCreate(id_paciente=7, tipo="roja", mensaje="roja")])
+    assert bus.publicados == [("alertas_estado", {"e": {7: "roja"}})]
+
+    # Otro worker: solo actualiza los pacientes que ya conocía (claves JSON en texto)
+    estado_alertas.sembrar(7, "verde")
+    bus_proceso._entregar({"c": "alertas_estado", "o": "otro", "d": {"e": {"7": "roja", "8": "roja"}}})
+    assert estado_alertas._estado.get(7) == "roja" and not estado_alertas.conocido(8)
+    bus_proceso._entregar({"c": "alertas_estado_invalidar", "o": "otro", "d": {"p": 7}})
+    assert not estado_alertas.conocido(7)
+
+def test_hub_reenvia_eventos_solo_con_suscriptores_en_otros_workers(monkeypatch):
+    bus = BusMemoria()
+    monkeypatch.setattr(eventos, "bus", bus)
+    hub = HubEventos()
+    hub.publicar("medicion", 1, {"bpm": 70})
+    assert bus.publicados == []
+
+    hub._presencia({"o": "otro", "n": 3, "pedir": True})
+    assert hub.activo
+    # Responde al worker que acaba de conectarse con sus propios suscriptores
+    assert bus.publicados[-1] == ("presencia", {"o": bus.origen, "n": 0, "pedir": False})
+    hub.publicar("medicion", 1, {"bpm": 71})
+    canal, datos = bus.publicados[-1]
+    assert canal == "eventos" and datos["p"] == 1
+
+    async def escenario():
+        suscripcion = hub.suscribir([1])
+        hub._remoto(datos)
+        return await suscripcion.siguiente(1)
+
+    assert '"bpm": 71' in asyncio.run(escenario())
+
+def test_lider_unico_y_relevo(tmp_path):
+    ruta = str(tmp_path / "ingesta.lock")
+    elegidos = []
+    a = LiderIngesta(ruta, reintento=0.05, eleccion=True)
+    b = LiderIngesta(ruta, reintento=0.05, eleccion=True)
+    try:
+        a.iniciar(lambda: elegidos.append("a"))
+        b.iniciar(lambda: elegidos.append("b"))
+        time.sleep(0.2)
+        assert elegidos == ["a"]
+        assert a.es_lider and not b.es_lider
+
+        a.detener()
+        _esperar(lambda: b.es_lider)
+        assert elegidos == ["a", "b"]
+    finally:
+        a.detener()
+        b.detener()